@@ -1,6 +1,9 @@
 import os
+from datetime import timedelta
+
 from celery import Celery
-from celery.schedules import crontab
+from celery.schedules import crontab, schedule
+from celery.signals import worker_init, worker_process_shutdown
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "stockq.settings.local")
 
@@ -8,6 +11,25 @@ app = Celery("stockq")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
+
+@worker_process_shutdown.connect
+def release_rate_limit_leases(**kwargs):
+    # prefork 자식은 os._exit로 끝나 atexit이 돌지 않으므로, 남은 lease 토큰을 여기서 반납한다.
+    from stocks.rate_limit import release_all_leases
+
+    release_all_leases()
+
+
+@worker_init.connect
+def preload_spacy_model(**kwargs):
+    # worker 부모에서 fork 전에 모델을 올려 prefork 자식들이 같은 페이지를 공유하게 한다 (opt-in).
+    from django.conf import settings
+
+    if getattr(settings, "SPACY_PRELOAD_IN_WORKER", False):
+        from stocks.utils import preload_nlp
+
+        preload_nlp()
+
 app.conf.timezone = "Asia/Seoul"  
 app.conf.enable_utc = False       
 
@@ -16,12 +38,32 @@ app.conf.beat_schedule = {
         "task": "stocks.tasks.fetch_favorite_news",
         "schedule": crontab(hour=6, minute=0),
     },
-    "dispatch-summary-jobs-every-minute": {
-        "task": "stocks.tasks.dispatch_summary_jobs",
-        "schedule": crontab(minute="*"),
+    "rescore-stale-news-relevance-every-10min": {
+        "task": "stocks.tasks.rescore_stale_news_relevance",
+        "schedule": crontab(minute="*/10"),
     },
-    "recover-stuck-summary-jobs-every-5min": {
+}
+
+
+@app.on_after_configure.connect
+def add_summary_job_schedules(sender, **kwargs):
+    # 간격을 설정에서 읽어야 해서 Django 설정이 올라온 뒤(configure 시점)에 등록한다.
+    from django.conf import settings
+    from django.core.exceptions import ImproperlyConfigured
+
+    # 새 job/RETRY_WAIT 전환은 on_commit으로 dispatch를 바로 깨우므로 beat는 놓친 wake-up을 줍는 안전망이다.
+    # crontab "*/N"은 60을 나누지 않거나 60 이상인 N에서 간격이 어긋나므로 고정 간격 schedule을 쓴다.
+    sweep_minutes = int(getattr(settings, "SUMMARY_DISPATCH_SWEEP_MINUTES", 5))
+    if sweep_minutes < 1:
+        raise ImproperlyConfigured(
+            f"SUMMARY_DISPATCH_SWEEP_MINUTES must be at least 1 (got {sweep_minutes})"
+        )
+    sender.conf.beat_schedule["dispatch-summary-jobs-sweep"] = {
+        "task": "stocks.tasks.dispatch_summary_jobs",
+        "schedule": schedule(timedelta(minutes=sweep_minutes)),
+    }
+    # heartbeat가 끊긴 job을 몇 초 안에 회수하도록 recovery는 초 단위로 돈다 (set-based라 비용이 작다).
+    sender.conf.beat_schedule["recover-stuck-summary-jobs"] = {
         "task": "stocks.tasks.recover_stuck_summary_jobs",
-        "schedule": crontab(minute="*/5"),
-    },
-}
\ No newline at end of file
+        "schedule": getattr(settings, "SUMMARY_JOB_RECOVERY_INTERVAL_SECONDS", 10.0),
+    }
@@ -237,4 +237,119 @@ FINNHUB_BUCKET_REFILL_RATE = env.float("FINNHUB_BUCKET_REFILL_RATE", default=1.0
 FINNHUB_BUCKET_REDIS_URL = env(
     "FINNHUB_BUCKET_REDIS_URL",
     default="redis://redis:6379/3",
-)
\ No newline at end of file
+)
+
+# RedisTokenBucket.wait_for_slot: slot을 Lua에서 미리 예약(FIFO)하고 한 번만 sleep 한다.
+# 비활성화 시 0.2초 간격으로 consume()을 재시도하는 기존 polling 방식.
+RATE_LIMIT_RESERVATION_ENABLED = env.bool("RATE_LIMIT_RESERVATION_ENABLED", default=True)
+
+# Finnhub bucket 우선순위 lane: capacity의 이 비율(반올림)을 interactive(사용자 ingest) 몫으로 남겨 두고,
+# batch(beat 시세/fetch_favorite_news/관리 명령 등 rate_limit_priority 밖의 모든 호출)는 그 위의 토큰만
+# FIFO 차례로 쓴다. batch의 burst는 capacity - round(capacity × SHARE)개다 (기본 capacity 2면 1개).
+# 그 값이 0이 되는 조합은 get_finnhub_bucket이 ImproperlyConfigured로 거부한다. 0이면 lane 구분 없이 공유.
+FINNHUB_BUCKET_INTERACTIVE_SHARE = env.float("FINNHUB_BUCKET_INTERACTIVE_SHARE", default=0.5)
+
+# Finnhub bucket lease 모드: 프로세스가 토큰을 최대 LEASE_SIZE개(capacity 이하)씩 한 번에 가져와
+# 로컬에서 쓰고, LEASE_TTL초가 지나면(그 뒤 호출이 없어도) 남은 토큰을 반납한다. 호출마다의 Redis 왕복을 줄인다.
+FINNHUB_BUCKET_LEASE_ENABLED = env.bool("FINNHUB_BUCKET_LEASE_ENABLED", default=False)
+FINNHUB_BUCKET_LEASE_SIZE = env.int("FINNHUB_BUCKET_LEASE_SIZE", default=5)
+FINNHUB_BUCKET_LEASE_TTL = env.float("FINNHUB_BUCKET_LEASE_TTL", default=1.0)
+
+# Finnhub AIMD: 429를 받으면 공유 bucket의 refill rate를 DECREASE_FACTOR배로 줄이고(COOLDOWN초에 1회),
+# 연속 성공 SUCCESS_THRESHOLD회마다 INCREASE_STEP씩 FINNHUB_BUCKET_REFILL_RATE까지 되돌린다.
+FINNHUB_AIMD_ENABLED = env.bool("FINNHUB_AIMD_ENABLED", default=False)
+FINNHUB_AIMD_MIN_RATE = env.float("FINNHUB_AIMD_MIN_RATE", default=0.2)
+FINNHUB_AIMD_DECREASE_FACTOR = env.float("FINNHUB_AIMD_DECREASE_FACTOR", default=0.5)
+FINNHUB_AIMD_INCREASE_STEP = env.float("FINNHUB_AIMD_INCREASE_STEP", default=0.1)
+FINNHUB_AIMD_SUCCESS_THRESHOLD = env.int("FINNHUB_AIMD_SUCCESS_THRESHOLD", default=20)
+FINNHUB_AIMD_COOLDOWN_SECONDS = env.float("FINNHUB_AIMD_COOLDOWN_SECONDS", default=1.0)
+
+# Celery worker 부모 프로세스에서 spaCy 모델을 미리 로드한다 (prefork 자식이 copy-on-write로 공유).
+# 끄면 각 자식이 첫 요약 task에서 따로 로드한다. web/manage.py는 항상 lazy.
+SPACY_PRELOAD_IN_WORKER = env.bool("SPACY_PRELOAD_IN_WORKER", default=False)
+
+# score_news_relevance_batch의 nlp.pipe batch_size (bench_relevance_scoring으로 측정해 조정)
+RELEVANCE_NLP_BATCH_SIZE = env.int("RELEVANCE_NLP_BATCH_SIZE", default=64)
+
+# 뉴스-종목 링크를 만들 때 관련도를 계산해 NewsStock에 저장한다 (요약 단계는 저장된 값만 읽음).
+NEWS_RELEVANCE_AT_INGEST_ENABLED = env.bool("NEWS_RELEVANCE_AT_INGEST_ENABLED", default=True)
+# rescore_stale_news_relevance beat 1회당 재채점할 최대 링크 수
+NEWS_RELEVANCE_RESCORE_MAX_ROWS = env.int("NEWS_RELEVANCE_RESCORE_MAX_ROWS", default=5000)
+
+# Finnhub/OpenAI circuit breaker (Redis 공유 상태). FAILURE_WINDOW초 안에 upstream 장애(timeout/연결 오류/5xx)가
+# FAILURE_THRESHOLD번 나면 open → RESET_TIMEOUT초 동안 호출하지 않고 바로 실패/재대기,
+# 이후 half-open에서 probe 1건(PROBE_TIMEOUT초 lease)의 결과로 close/재open 한다.
+CIRCUIT_BREAKER_ENABLED = env.bool("CIRCUIT_BREAKER_ENABLED", default=True)
+CIRCUIT_BREAKER_REDIS_URL = env("CIRCUIT_BREAKER_REDIS_URL", default="redis://redis:6379/3")
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = env.int("CIRCUIT_BREAKER_FAILURE_THRESHOLD", default=5)
+CIRCUIT_BREAKER_FAILURE_WINDOW_SECONDS = env.float("CIRCUIT_BREAKER_FAILURE_WINDOW_SECONDS", default=60.0)
+CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS = env.float("CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS", default=30.0)
+CIRCUIT_BREAKER_PROBE_TIMEOUT_SECONDS = env.float("CIRCUIT_BREAKER_PROBE_TIMEOUT_SECONDS", default=30.0)
+
+# 요약 dispatch 동시 실행 한도. ADAPTIVE면 OPENAI_BUCKET_REFILL_RATE × LLM latency EWMA(최소 bucket capacity)를
+# MIN~MAX_INFLIGHT로 자르고, 최근 REJECTION_WINDOW초 안에 bucket 거절/429가 있으면 REJECTION_BACKOFF배로 줄인다.
+# 실행 중 slot은 Redis sorted set(lease_token)에 SLOT_TTL초까지 둔다. 끄거나 Redis 장애 시 DB 기준 STATIC_INFLIGHT.
+SUMMARY_DISPATCH_ADAPTIVE_ENABLED = env.bool("SUMMARY_DISPATCH_ADAPTIVE_ENABLED", default=True)
+SUMMARY_DISPATCH_REDIS_URL = env("SUMMARY_DISPATCH_REDIS_URL", default="redis://redis:6379/3")
+SUMMARY_DISPATCH_STATIC_INFLIGHT = env.int("SUMMARY_DISPATCH_STATIC_INFLIGHT", default=2)
+SUMMARY_DISPATCH_MIN_INFLIGHT = env.int("SUMMARY_DISPATCH_MIN_INFLIGHT", default=1)
+SUMMARY_DISPATCH_MAX_INFLIGHT = env.int("SUMMARY_DISPATCH_MAX_INFLIGHT", default=16)
+SUMMARY_DISPATCH_SLOT_TTL_SECONDS = env.float("SUMMARY_DISPATCH_SLOT_TTL_SECONDS", default=720.0)
+SUMMARY_DISPATCH_LATENCY_EWMA_ALPHA = env.float("SUMMARY_DISPATCH_LATENCY_EWMA_ALPHA", default=0.2)
+SUMMARY_DISPATCH_DEFAULT_LLM_LATENCY_SECONDS = env.float(
+    "SUMMARY_DISPATCH_DEFAULT_LLM_LATENCY_SECONDS", default=5.0
+)
+SUMMARY_DISPATCH_REJECTION_WINDOW_SECONDS = env.float("SUMMARY_DISPATCH_REJECTION_WINDOW_SECONDS", default=60.0)
+SUMMARY_DISPATCH_REJECTION_BACKOFF = env.float("SUMMARY_DISPATCH_REJECTION_BACKOFF", default=0.5)
+
+# 요약 dispatch를 이벤트로 깨운다: job 생성/RETRY_WAIT 전환/slot 반납이 커밋되면 on_commit으로 바로,
+# retry_at이 미래면 그 시각에 countdown task로. 중복 wake-up은 Redis key 하나로 합친다.
+# beat의 dispatch는 SWEEP_MINUTES(1 이상, 고정 간격) 안전망으로만 돈다 (이벤트 모드를 끄면 1로 두는 것을 권장).
+SUMMARY_DISPATCH_EVENT_DRIVEN_ENABLED = env.bool("SUMMARY_DISPATCH_EVENT_DRIVEN_ENABLED", default=True)
+SUMMARY_DISPATCH_SWEEP_MINUTES = env.int("SUMMARY_DISPATCH_SWEEP_MINUTES", default=5)
+
+# SummaryJob dispatch 우선순위(초). 관심 사용자 수가 두 배가 될 때마다 AUDIENCE_SECONDS, watcher 중 활성
+# PREMIUM/PRO 구독자가 있으면 플랜별 초를 더해 MAX_SECONDS에서 자른다. dispatch는 enqueue 시각 - priority 순이라
+# 낮은 우선순위 job도 최대 MAX_SECONDS만큼만 밀린다 (aging). 끄면 모두 0 (FIFO).
+SUMMARY_JOB_PRIORITY_ENABLED = env.bool("SUMMARY_JOB_PRIORITY_ENABLED", default=True)
+SUMMARY_JOB_PRIORITY_AUDIENCE_SECONDS = env.int("SUMMARY_JOB_PRIORITY_AUDIENCE_SECONDS", default=300)
+SUMMARY_JOB_PRIORITY_PREMIUM_SECONDS = env.int("SUMMARY_JOB_PRIORITY_PREMIUM_SECONDS", default=600)
+SUMMARY_JOB_PRIORITY_PRO_SECONDS = env.int("SUMMARY_JOB_PRIORITY_PRO_SECONDS", default=1800)
+SUMMARY_JOB_PRIORITY_MAX_SECONDS = env.int("SUMMARY_JOB_PRIORITY_MAX_SECONDS", default=3600)
+
+# 실행 중인 SummaryJob lease heartbeat. worker가 INTERVAL초마다 lease_expires_at을 LEASE_SECONDS 뒤로 늘리고,
+# recover_stuck_summary_jobs가 RECOVERY_INTERVAL초마다 만료된 lease를 회수한다 (worker 장애 회수 ≈ LEASE + RECOVERY).
+# 끄면 시작된 job은 RUNNING_EXEC_TIMEOUT(10분) 경과로만 회수한다.
+SUMMARY_JOB_HEARTBEAT_ENABLED = env.bool("SUMMARY_JOB_HEARTBEAT_ENABLED", default=True)
+SUMMARY_JOB_HEARTBEAT_INTERVAL_SECONDS = env.float("SUMMARY_JOB_HEARTBEAT_INTERVAL_SECONDS", default=5.0)
+SUMMARY_JOB_LEASE_SECONDS = env.float("SUMMARY_JOB_LEASE_SECONDS", default=20.0)
+SUMMARY_JOB_RECOVERY_INTERVAL_SECONDS = env.float("SUMMARY_JOB_RECOVERY_INTERVAL_SECONDS", default=10.0)
+
+# fetch_favorite_news sharded 모드: 종목을 FINNHUB_BUCKET_CAPACITY개 이하의 shard로
+# 나눠 chord로 병렬 실행한다 (shard 안은 순차, 병렬도 = shard 수). 비활성화 시 기존처럼 한 task에서 순차 처리한다.
+# 반환 형태는 두 모드가 같고, sharded 모드의 종목별 결과는 result_id(chord callback)에 담긴다.
+FINNHUB_FANOUT_ENABLED = env.bool("FINNHUB_FANOUT_ENABLED", default=False)
+FINNHUB_FANOUT_MAX_SHARDS = env.int("FINNHUB_FANOUT_MAX_SHARDS", default=0)
+FINNHUB_FANOUT_SHARD_SOFT_TIME_LIMIT = env.int(
+    "FINNHUB_FANOUT_SHARD_SOFT_TIME_LIMIT", default=600
+)
+
+# fetch_favorite_news를 stocks.ingest 비동기 엔진(aiohttp 커넥션 풀 + 배치 기록)으로 실행한다.
+# 끄면 종목별 순차 경로(공용 requests.Session)로 돌아간다. sharded 모드와 단건 ingest는 항상 순차 경로를 쓴다.
+FINNHUB_ASYNC_ENGINE_ENABLED = env.bool("FINNHUB_ASYNC_ENGINE_ENABLED", default=True)
+FINNHUB_ASYNC_CONCURRENCY = env.int("FINNHUB_ASYNC_CONCURRENCY", default=10)
+FINNHUB_BASE_URL = env("FINNHUB_BASE_URL", default="https://finnhub.io/api/v1")
+
+# 종목별 뉴스 수집 watermark: 마지막 성공 이후만 조회하고, 이미 본 기사는 DB 작업 전에 버린다.
+# 기본 조회 기간(1일) 요청에만 적용하며, 더 넓은 days 요청(backfill)은 그대로 조회한다.
+NEWS_WATERMARK_ENABLED = env.bool("NEWS_WATERMARK_ENABLED", default=True)
+
+# 같은 (symbol, days) 뉴스 수집 동시 호출을 하나로 합친다 (캐시 락 + 짧은 결과 캐시).
+# 락은 수집이 끝날 때까지 LOCK_TIMEOUT/3마다 갱신되므로, LOCK_TIMEOUT은 leader가 죽었을 때 락이 풀리는 시간이다.
+NEWS_INGEST_SINGLE_FLIGHT_ENABLED = env.bool("NEWS_INGEST_SINGLE_FLIGHT_ENABLED", default=True)
+NEWS_INGEST_SINGLE_FLIGHT_LOCK_TIMEOUT = env.int("NEWS_INGEST_SINGLE_FLIGHT_LOCK_TIMEOUT", default=30)
+NEWS_INGEST_SINGLE_FLIGHT_RESULT_TTL = env.int("NEWS_INGEST_SINGLE_FLIGHT_RESULT_TTL", default=15)
+NEWS_INGEST_SINGLE_FLIGHT_WAIT_TIMEOUT = env.int("NEWS_INGEST_SINGLE_FLIGHT_WAIT_TIMEOUT", default=30)
+
+# POST /news/ingest/?wait=N 으로 요청할 수 있는 최대 동기 대기 시간(초). 그 이상은 202 + 폴링.
+NEWS_INGEST_MAX_WAIT_SECONDS = env.int("NEWS_INGEST_MAX_WAIT_SECONDS", default=10)
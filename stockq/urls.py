@@ -22,9 +22,9 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.db import connection
-import redis
 import requests
 from decouple import config
+from stocks.rate_limit import get_redis_client
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView,SpectacularRedocView
 @api_view(["GET"])
 @permission_classes([AllowAny])
@@ -52,7 +52,7 @@ def readiness(request):
 
     # Redis 체크
     try:
-        r = redis.Redis.from_url(config("REDIS_URL"))
+        r = get_redis_client(config("REDIS_URL"))
         r.ping()
         result["redis"] = "ok"
     except Exception as e:
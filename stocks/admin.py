@@ -53,4 +53,23 @@ class SummaryJobAdmin(admin.ModelAdmin):
     )
     list_filter = ("status", "date")
     search_fields = ("stock__symbol", "stock__name")
-    ordering = ("-date", "-created_at")
\ No newline at end of file
+    ordering = ("-date", "-created_at")
+
+from .models import IngestJob
+
+
+@admin.register(IngestJob)
+class IngestJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "symbol",
+        "days",
+        "status",
+        "stage",
+        "requested_by",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status", "stage")
+    search_fields = ("symbol",)
+    ordering = ("-created_at",)
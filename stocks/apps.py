@@ -8,10 +8,15 @@ class StocksConfig(AppConfig):
 
     def ready(self):
         from .metrics import (
+            CircuitBreakerCollector,
+            FinnhubBucketEffectiveRateCollector,
+            SummaryDispatchCollector,
+            SummaryJobDispatchWaitSecondsCollector,
             SummaryJobFinishedTotalCollector,
             SummaryJobQueueWaitSecondsCollector,
             SummaryJobStatusCollector,
             SummaryJobStuckTotalCollector,
+            SummaryJobTimeToSummaryByPriorityCollector,
             SummaryJobTotalElapsedSecondsCollector,
             SummaryJobsOldestPendingSecondsCollector,
         )
@@ -21,8 +26,13 @@ class StocksConfig(AppConfig):
             SummaryJobsOldestPendingSecondsCollector(),
             SummaryJobFinishedTotalCollector(),
             SummaryJobQueueWaitSecondsCollector(),
+            SummaryJobDispatchWaitSecondsCollector(),
             SummaryJobTotalElapsedSecondsCollector(),
+            SummaryJobTimeToSummaryByPriorityCollector(),
             SummaryJobStuckTotalCollector(),
+            FinnhubBucketEffectiveRateCollector(),
+            CircuitBreakerCollector(),
+            SummaryDispatchCollector(),
         ]
 
         for collector in collectors:
@@ -1,12 +1,20 @@
+import hashlib
 import logging
+import threading
+import time
+import uuid
 
-from django.core.cache import cache
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from redis.exceptions import NoScriptError
 
 logger = logging.getLogger(__name__)
 
 SUMMARY_CACHE_VERSION = "v1"
 SUMMARY_CACHE_TIMEOUT = 60 * 60 * 24
 
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05
+
 
 def summary_cache_key(stock_id, date) -> str:
     return f"summary:{SUMMARY_CACHE_VERSION}:{stock_id}:{date.isoformat()}"
@@ -61,3 +69,163 @@ def set_cached_summaries(items, timeout: int = SUMMARY_CACHE_TIMEOUT) -> None:
         cache.set_many(mapping, timeout=timeout)
     except Exception:
         logger.warning("[summary_cache] set_many failed", exc_info=True)
+
+
+# single-flight 락은 값(token)이 자기 것일 때만 지우거나 TTL을 늘린다.
+# get → delete/expire 사이에 락이 만료돼 다른 호출이 잡았더라도 그 락은 건드리지 않는다.
+# ARGV[1] = token
+LUA_LOCK_RELEASE = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+  return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# ARGV[1] = token, ARGV[2] = 새 TTL(초)
+LUA_LOCK_RENEW = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+  return redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+SCRIPT_SHAS = {
+    script: hashlib.sha1(script.encode("utf-8")).hexdigest()
+    for script in (LUA_LOCK_RELEASE, LUA_LOCK_RENEW)
+}
+
+
+def _run_lock_script(script: str, lock_key: str, *args):
+    """default cache가 Django RedisCache면 같은 Redis에서 script를 실행한다. 아니면 None."""
+    backend = caches["default"]
+    if not isinstance(backend, RedisCache):
+        return None
+    client = backend._cache.get_client(lock_key, write=True)
+    key = backend.make_and_validate_key(lock_key)
+    sha = SCRIPT_SHAS[script]
+    try:
+        return client.evalsha(sha, 1, key, *args)
+    except NoScriptError:
+        client.script_load(script)
+        return client.evalsha(sha, 1, key, *args)
+
+
+def _release_lock(lock_key: str, token: int) -> None:
+    if _run_lock_script(LUA_LOCK_RELEASE, lock_key, token) is None:
+        # Redis가 아닌 cache backend(테스트의 locmem 등)는 프로세스 로컬이라 get → delete로 충분하다.
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def _renew_lock(lock_key: str, token: int, timeout: int) -> bool:
+    renewed = _run_lock_script(LUA_LOCK_RENEW, lock_key, token, timeout)
+    if renewed is None:
+        return cache.get(lock_key) == token and cache.touch(lock_key, timeout)
+    return bool(renewed)
+
+
+class _LockRenewer:
+    """
+    leader가 fn()을 실행하는 동안 별도 스레드가 lock_timeout/3마다 락 TTL을 lock_timeout으로 되돌린다.
+    upsert가 slot 대기/재시도/NER로 lock_timeout보다 오래 걸려도 락이 풀려 중복 실행되지 않고,
+    leader 프로세스가 죽으면 갱신이 멈춰 lock_timeout 뒤에 다음 호출이 leader가 된다.
+    """
+
+    def __init__(self, lock_key: str, token: int, lock_timeout: int):
+        self.lock_key = lock_key
+        self.token = token
+        self.lock_timeout = lock_timeout
+        self.interval = max(lock_timeout / 3, 0.1)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(
+            target=self._run, name=f"single-flight-renew-{self.lock_key}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join(timeout=self.interval)
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not _renew_lock(self.lock_key, self.token, self.lock_timeout):
+                    logger.warning("[single_flight] lock lost key=%s", self.lock_key)
+                    return
+            except Exception:
+                # 잠깐의 cache 장애는 다음 주기에 다시 시도한다. 계속 실패하면 락이 만료될 뿐이다.
+                logger.warning("[single_flight] lock renew failed key=%s", self.lock_key, exc_info=True)
+
+
+def _acquire_single_flight(result_key: str, lock_key: str, token: int, lock_timeout: int, wait_timeout: float):
+    """반환: (cached_result, role). role이 "leader"/"bypass"면 호출자가 직접 실행한다."""
+    deadline = time.monotonic() + wait_timeout
+    waited = False
+    while True:
+        cached = cache.get(result_key)
+        if cached is not None:
+            return cached, "follower" if waited else "cached"
+        if cache.add(lock_key, token, timeout=lock_timeout):
+            return None, "leader"
+        if time.monotonic() >= deadline:
+            return None, "bypass"
+        waited = True
+        time.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+
+
+def single_flight(
+    key: str,
+    fn,
+    *,
+    lock_timeout: int = 30,
+    result_timeout: int = 15,
+    wait_timeout: float = 30.0,
+):
+    """
+    같은 key에 대한 동시 호출을 하나로 합친다 (cache.add = Redis SET NX 락 + 짧은 결과 캐시).
+    - 결과 캐시에 값이 있으면 fn()을 부르지 않고 바로 반환
+    - 락을 잡은 호출(leader)만 fn()을 실행하고 결과를 result_timeout초 동안 남긴다
+      (실행 중에는 락 TTL을 계속 갱신하고, 끝나면 자기 token일 때만 원자적으로 푼다)
+    - 나머지(follower)는 결과가 생길 때까지 기다렸다가 같은 결과를 받는다
+      (leader가 실패해 락만 풀리면 다음 호출이 leader가 된다)
+    캐시 장애나 wait_timeout 초과 시에는 fn()을 직접 실행한다.
+    반환: (result, role)  role = "cached" | "leader" | "follower" | "bypass"
+    """
+    result_key = f"singleflight:result:{key}"
+    lock_key = f"singleflight:lock:{key}"
+    # RedisCache는 int를 그대로(10진 문자열로) 저장하므로 Lua에서 token을 바로 비교할 수 있다.
+    token = uuid.uuid4().int >> 64
+
+    try:
+        cached, role = _acquire_single_flight(
+            result_key, lock_key, token, lock_timeout, wait_timeout
+        )
+    except Exception:
+        logger.warning("[single_flight] cache unavailable key=%s", key, exc_info=True)
+        return fn(), "bypass"
+
+    if role in ("cached", "follower"):
+        return cached, role
+    if role == "bypass":
+        logger.warning("[single_flight] wait timeout key=%s", key)
+        return fn(), role
+
+    try:
+        with _LockRenewer(lock_key, token, lock_timeout):
+            result = fn()
+        if result is not None and result_timeout > 0:
+            try:
+                cache.set(result_key, result, timeout=result_timeout)
+            except Exception:
+                logger.warning("[single_flight] result set failed key=%s", key, exc_info=True)
+        return result, role
+    finally:
+        try:
+            _release_lock(lock_key, token)
+        except Exception:
+            logger.warning("[single_flight] lock release failed key=%s", key, exc_info=True)
@@ -0,0 +1,405 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import redis
+from django.conf import settings
+from redis.exceptions import NoScriptError
+
+from .rate_limit import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+STATES = (STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN)
+
+# closed 판정은 이 시간 동안 로컬에서 재사용한다 (호출마다 Redis 왕복을 하지 않도록).
+# open 전파는 최대 이만큼 늦어질 수 있다.
+LOCAL_CLOSED_CACHE_SECONDS = 1.0
+# Redis 오류 뒤에는 이 시간 동안 Redis를 건너뛰고 호출을 허용한다 (fail-open).
+REDIS_ERROR_BACKOFF_SECONDS = 5.0
+# 상태 hash TTL. 오래 호출이 없으면 closed로 돌아가고 trip 누적값도 초기화된다.
+STATE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+# KEYS[1] = breaker key
+# ARGV = now_us, reset_timeout_us, probe_timeout_us
+# 반환: {allowed, state, retry_after_us, failures}
+# open 상태에서 reset_timeout이 지나면 half_open으로 바꾸고 probe 1건만 통과시킨다.
+# probe가 probe_timeout 안에 결과를 남기지 않으면 다음 호출이 다시 probe가 된다.
+LUA_CIRCUIT_ALLOW = """
+local key = KEYS[1]
+local now_us = tonumber(ARGV[1])
+local reset_timeout_us = tonumber(ARGV[2])
+local probe_timeout_us = tonumber(ARGV[3])
+
+local data = redis.call("HMGET", key, "state", "opened_at_us", "probe_until_us", "failures")
+local state = data[1] or "closed"
+local opened_at_us = tonumber(data[2]) or 0
+local probe_until_us = tonumber(data[3]) or 0
+local failures = tonumber(data[4]) or 0
+
+if state == "closed" then
+  return {1, state, 0, failures}
+end
+
+if state == "open" then
+  local retry_after_us = opened_at_us + reset_timeout_us - now_us
+  if retry_after_us > 0 then
+    return {0, state, retry_after_us, failures}
+  end
+  probe_until_us = 0
+end
+
+if probe_until_us > now_us then
+  return {0, "half_open", probe_until_us - now_us, failures}
+end
+
+redis.call("HSET", key,
+  "state", "half_open",
+  "probe_until_us", string.format("%d", now_us + probe_timeout_us)
+)
+return {1, "half_open", 0, failures}
+"""
+
+# KEYS[1] = breaker key
+# ARGV = success(0/1), now_us, failure_threshold, failure_window_us, state_ttl_sec
+# 반환: {state, failures, tripped}
+# closed에서 failure_window 안의 실패가 threshold에 닿거나, half_open probe가 실패하면 open.
+LUA_CIRCUIT_RECORD = """
+local key = KEYS[1]
+local success = ARGV[1] == "1"
+local now_us = tonumber(ARGV[2])
+local failure_threshold = tonumber(ARGV[3])
+local failure_window_us = tonumber(ARGV[4])
+local state_ttl_sec = tonumber(ARGV[5])
+
+local data = redis.call("HMGET", key, "state", "failures", "window_start_us")
+local state = data[1] or "closed"
+local failures = tonumber(data[2]) or 0
+local window_start_us = tonumber(data[3]) or 0
+
+if success then
+  if state == "closed" and failures == 0 then
+    return {state, 0, 0}
+  end
+  redis.call("HSET", key,
+    "state", "closed",
+    "failures", "0",
+    "window_start_us", "0",
+    "probe_until_us", "0"
+  )
+  redis.call("EXPIRE", key, state_ttl_sec)
+  return {"closed", 0, 0}
+end
+
+-- trip 이전에 시작된 호출의 늦은 실패는 open 시각을 뒤로 미루지 않는다.
+if state == "open" then
+  return {state, failures, 0}
+end
+
+local tripped = 0
+if state == "half_open" then
+  tripped = 1
+else
+  if now_us - window_start_us > failure_window_us then
+    failures = 0
+    window_start_us = now_us
+  end
+  failures = failures + 1
+  if failures >= failure_threshold then
+    tripped = 1
+  end
+end
+
+if tripped == 1 then
+  state = "open"
+  redis.call("HSET", key,
+    "state", state,
+    "opened_at_us", string.format("%d", now_us),
+    "probe_until_us", "0",
+    "failures", string.format("%d", failures),
+    "window_start_us", string.format("%d", window_start_us)
+  )
+  redis.call("HINCRBY", key, "trips", 1)
+else
+  redis.call("HSET", key,
+    "failures", string.format("%d", failures),
+    "window_start_us", string.format("%d", window_start_us)
+  )
+end
+redis.call("EXPIRE", key, state_ttl_sec)
+
+return {state, failures, tripped}
+"""
+
+SCRIPT_SHAS = {
+    script: hashlib.sha1(script.encode("utf-8")).hexdigest()
+    for script in (LUA_CIRCUIT_ALLOW, LUA_CIRCUIT_RECORD)
+}
+
+
+class CircuitOpenError(Exception):
+    """upstream circuit이 열려 있어 호출하지 않고 바로 실패한다."""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit open: {name} retry_after={retry_after:.1f}s")
+
+
+@dataclass
+class CircuitDecision:
+    allowed: bool
+    state: str
+    retry_after: float
+
+
+class CircuitBreaker:
+    """
+    upstream(Finnhub/OpenAI)별 closed → open → half_open 상태를 Redis hash 하나에 두고
+    모든 프로세스가 공유한다. 상태 전이는 Lua로 원자적으로 처리한다.
+    Redis를 쓸 수 없으면 호출을 막지 않는다 (breaker 때문에 upstream 호출이 끊기지 않도록).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        redis_url: str,
+        failure_threshold: int,
+        failure_window: float,
+        reset_timeout: float,
+        probe_timeout: float,
+    ):
+        self.name = name
+        self.key = f"circuit:{name}"
+        self.redis_url = redis_url
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+        self._lock = threading.Lock()
+        self._local_state = None
+        self._local_until = 0.0
+        self._clean = False
+        self._redis_down_until = 0.0
+
+    def _run_script(self, script: str, *args):
+        # fork 뒤에도 안전하도록 클라이언트를 들고 있지 않고 프로세스 공유 pool에서 매번 얻는다.
+        client = get_redis_client(self.redis_url)
+        sha = SCRIPT_SHAS[script]
+        try:
+            return client.evalsha(sha, 1, self.key, *args)
+        except NoScriptError:
+            client.script_load(script)
+            return client.evalsha(sha, 1, self.key, *args)
+
+    def _redis_available(self, now: float) -> bool:
+        return now >= self._redis_down_until
+
+    def _mark_redis_down(self, now: float):
+        self._redis_down_until = now + REDIS_ERROR_BACKOFF_SECONDS
+        logger.warning("[circuit_breaker] redis unavailable name=%s fail_open=true", self.name)
+
+    def _cache(self, state: str, until: float, clean: bool = False):
+        with self._lock:
+            self._local_state = state
+            self._local_until = until
+            self._clean = clean
+
+    def allow(self) -> CircuitDecision:
+        now = time.monotonic()
+        with self._lock:
+            if now < self._local_until:
+                if self._local_state == STATE_CLOSED:
+                    return CircuitDecision(True, STATE_CLOSED, 0.0)
+                if self._local_state == STATE_OPEN:
+                    return CircuitDecision(False, STATE_OPEN, self._local_until - now)
+
+        if not self._redis_available(now):
+            return CircuitDecision(True, STATE_CLOSED, 0.0)
+
+        try:
+            allowed, state, retry_after_us, failures = self._run_script(
+                LUA_CIRCUIT_ALLOW,
+                time.time_ns() // 1000,
+                int(self.reset_timeout * 1_000_000),
+                int(self.probe_timeout * 1_000_000),
+            )
+        except redis.RedisError:
+            self._mark_redis_down(now)
+            return CircuitDecision(True, STATE_CLOSED, 0.0)
+
+        state = state.decode() if isinstance(state, bytes) else state
+        retry_after = int(retry_after_us) / 1_000_000
+        if state == STATE_CLOSED:
+            self._cache(STATE_CLOSED, now + LOCAL_CLOSED_CACHE_SECONDS, clean=int(failures) == 0)
+        elif state == STATE_OPEN:
+            self._cache(STATE_OPEN, now + retry_after)
+        else:
+            self._cache(STATE_HALF_OPEN, 0.0)
+
+        return CircuitDecision(bool(int(allowed)), state, retry_after)
+
+    def peek(self) -> CircuitDecision:
+        """
+        상태만 읽는다. allow()와 달리 half_open probe를 잡지 않으므로, 실제 호출 직전에 allow()를 다시
+        부르는 진입점(bucket 토큰/slot 대기 전 거르기)에서 쓴다. 다른 호출이 probe 중이면 거절한다.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now < self._local_until:
+                if self._local_state == STATE_CLOSED:
+                    return CircuitDecision(True, STATE_CLOSED, 0.0)
+                if self._local_state == STATE_OPEN:
+                    return CircuitDecision(False, STATE_OPEN, self._local_until - now)
+
+        if not self._redis_available(now):
+            return CircuitDecision(True, STATE_CLOSED, 0.0)
+
+        try:
+            state, opened_at_us, probe_until_us = get_redis_client(self.redis_url).hmget(
+                self.key, "state", "opened_at_us", "probe_until_us"
+            )
+        except redis.RedisError:
+            self._mark_redis_down(now)
+            return CircuitDecision(True, STATE_CLOSED, 0.0)
+
+        state = state.decode() if state else STATE_CLOSED
+        now_us = time.time_ns() // 1000
+        if state == STATE_OPEN:
+            retry_after = (int(opened_at_us or 0) + int(self.reset_timeout * 1_000_000) - now_us) / 1_000_000
+            if retry_after > 0:
+                self._cache(STATE_OPEN, now + retry_after)
+                return CircuitDecision(False, STATE_OPEN, retry_after)
+            return CircuitDecision(True, STATE_HALF_OPEN, 0.0)
+        if state == STATE_HALF_OPEN:
+            probe_wait = (int(probe_until_us or 0) - now_us) / 1_000_000
+            if probe_wait > 0:
+                return CircuitDecision(False, STATE_HALF_OPEN, probe_wait)
+            return CircuitDecision(True, STATE_HALF_OPEN, 0.0)
+
+        self._cache(STATE_CLOSED, now + LOCAL_CLOSED_CACHE_SECONDS)
+        return CircuitDecision(True, STATE_CLOSED, 0.0)
+
+    def guard(self, take_probe: bool = True) -> None:
+        """
+        circuit이 열려 있으면 CircuitOpenError를 올린다.
+        take_probe=False면 상태만 확인한다 (peek) — 안쪽에서 실제 호출마다 guard()를 다시 부를 때.
+        """
+        decision = self.allow() if take_probe else self.peek()
+        if not decision.allowed:
+            from .metrics import CIRCUIT_BREAKER_REJECTED_TOTAL
+
+            CIRCUIT_BREAKER_REJECTED_TOTAL.labels(upstream=self.name).inc()
+            raise CircuitOpenError(self.name, decision.retry_after)
+
+    def _record(self, success: bool) -> str:
+        now = time.monotonic()
+        if not self._redis_available(now):
+            return STATE_CLOSED
+
+        try:
+            state, failures, tripped = self._run_script(
+                LUA_CIRCUIT_RECORD,
+                1 if success else 0,
+                time.time_ns() // 1000,
+                self.failure_threshold,
+                int(self.failure_window * 1_000_000),
+                STATE_TTL_SECONDS,
+            )
+        except redis.RedisError:
+            self._mark_redis_down(now)
+            return STATE_CLOSED
+
+        state = state.decode() if isinstance(state, bytes) else state
+        if state == STATE_OPEN:
+            self._cache(STATE_OPEN, now + self.reset_timeout)
+        elif state == STATE_CLOSED:
+            self._cache(STATE_CLOSED, now + LOCAL_CLOSED_CACHE_SECONDS, clean=int(failures) == 0)
+
+        if int(tripped):
+            logger.warning(
+                "[circuit_breaker] tripped name=%s failures=%s reset_timeout=%.1fs",
+                self.name,
+                failures,
+                self.reset_timeout,
+            )
+        return state
+
+    def record_success(self) -> None:
+        # closed이고 누적 실패가 없다고 알고 있으면 Redis에 쓸 것이 없다.
+        with self._lock:
+            if self._clean and time.monotonic() < self._local_until:
+                return
+        self._record(success=True)
+
+    def record_failure(self) -> str:
+        return self._record(success=False)
+
+    def snapshot(self) -> tuple[str, int]:
+        """(현재 state, 누적 trip 수). metrics용이며 Redis 오류는 호출자가 처리한다."""
+        state, opened_at_us, trips = get_redis_client(self.redis_url).hmget(
+            self.key, "state", "opened_at_us", "trips"
+        )
+        state = state.decode() if state else STATE_CLOSED
+        if state == STATE_OPEN and opened_at_us is not None:
+            elapsed = time.time() - float(opened_at_us) / 1_000_000
+            if elapsed >= self.reset_timeout:
+                state = STATE_HALF_OPEN
+        return state, int(trips or 0)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def _reset_breakers_after_fork():
+    global _breakers_lock
+    _breakers_lock = threading.Lock()
+    _breakers.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_breakers_after_fork)
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker | None:
+    """upstream 이름별 breaker. CIRCUIT_BREAKER_ENABLED가 꺼져 있으면 None."""
+    if not getattr(settings, "CIRCUIT_BREAKER_ENABLED", True):
+        return None
+
+    redis_url = (
+        getattr(settings, "CIRCUIT_BREAKER_REDIS_URL", None)
+        or getattr(settings, "REDIS_URL", None)
+        or "redis://redis:6379/3"
+    )
+    config = (
+        name,
+        redis_url,
+        int(getattr(settings, "CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5)),
+        float(getattr(settings, "CIRCUIT_BREAKER_FAILURE_WINDOW_SECONDS", 60)),
+        float(getattr(settings, "CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS", 30)),
+        float(getattr(settings, "CIRCUIT_BREAKER_PROBE_TIMEOUT_SECONDS", 30)),
+    )
+    breaker = _breakers.get(config)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(config)
+            if breaker is None:
+                breaker = CircuitBreaker(*config)
+                _breakers[config] = breaker
+    return breaker
+
+
+def get_finnhub_breaker() -> CircuitBreaker | None:
+    return get_circuit_breaker("finnhub")
+
+
+def get_openai_breaker() -> CircuitBreaker | None:
+    return get_circuit_breaker("openai")
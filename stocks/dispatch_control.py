@@ -0,0 +1,381 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+import redis
+from django.conf import settings
+from redis.exceptions import NoScriptError
+
+from .rate_limit import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+INFLIGHT_KEY = "summary_dispatch:inflight"
+STATS_KEY = "summary_dispatch:stats"
+REJECTIONS_KEY = "summary_dispatch:rejections"
+WAKEUP_KEY = "summary_dispatch:wakeup"
+
+# Redis 오류 뒤에는 이 시간 동안 Redis를 건너뛰고 DB 기준 고정 한도로 돌아간다.
+REDIS_ERROR_BACKOFF_SECONDS = 5.0
+# 통계 hash TTL. 오래 요약이 없으면 latency 추정값과 누적 dispatch 수가 초기화된다.
+STATS_TTL_SECONDS = 7 * 24 * 60 * 60
+# 예약한 wake-up task가 유실돼도 이 시간 뒤에는 key가 풀려 다음 요청이 다시 깨울 수 있다.
+WAKEUP_GRACE_SECONDS = 60.0
+# reconcile이 방금 잡은(아직 DB 커밋 전일 수 있는) slot을 지우지 않도록 두는 유예 시간
+RECONCILE_GRACE_SECONDS = 30.0
+
+
+# KEYS[1] = inflight sorted set (member = lease_token, score = 만료 시각 ms)
+# ARGV = now_ms, slot_ttl_ms, max_inflight, token1..tokenN
+# 반환: {admitted, inflight_before}
+# 만료된 slot을 먼저 지우고, max_inflight - 현재 slot 수만큼 앞에서부터 token을 넣는다.
+LUA_INFLIGHT_ACQUIRE = """
+local key = KEYS[1]
+local now_ms = tonumber(ARGV[1])
+local slot_ttl_ms = tonumber(ARGV[2])
+local max_inflight = tonumber(ARGV[3])
+
+redis.call("ZREMRANGEBYSCORE", key, "-inf", now_ms)
+local inflight = redis.call("ZCARD", key)
+local admitted = math.min(max_inflight - inflight, #ARGV - 3)
+if admitted <= 0 then
+  return {0, inflight}
+end
+
+local expires_at = string.format("%d", now_ms + slot_ttl_ms)
+for i = 1, admitted do
+  redis.call("ZADD", key, expires_at, ARGV[3 + i])
+end
+redis.call("PEXPIRE", key, slot_ttl_ms)
+return {admitted, inflight}
+"""
+
+# KEYS[1] = stats hash
+# ARGV = latency_seconds, alpha, ttl_sec
+# 반환: 갱신된 EWMA (문자열)
+LUA_RECORD_LATENCY = """
+local key = KEYS[1]
+local sample = tonumber(ARGV[1])
+local alpha = tonumber(ARGV[2])
+
+local ewma = tonumber(redis.call("HGET", key, "llm_latency_ewma"))
+if ewma == nil then
+  ewma = sample
+else
+  ewma = alpha * sample + (1 - alpha) * ewma
+end
+local value = string.format("%.6f", ewma)
+redis.call("HSET", key, "llm_latency_ewma", value)
+redis.call("EXPIRE", key, tonumber(ARGV[3]))
+return value
+"""
+
+# KEYS[1] = wakeup key (예약된 dispatch 실행 시각 ms)
+# ARGV = now_ms, eta_ms, grace_ms
+# 반환: 1이면 호출자가 eta에 dispatch task를 보낸다. 이미 eta 이전에 도는 wake-up이 있으면 0.
+LUA_CLAIM_WAKEUP = """
+local key = KEYS[1]
+local now_ms = tonumber(ARGV[1])
+local eta_ms = tonumber(ARGV[2])
+local grace_ms = tonumber(ARGV[3])
+
+local scheduled_ms = tonumber(redis.call("GET", key))
+if scheduled_ms and scheduled_ms <= eta_ms then
+  return 0
+end
+redis.call("SET", key, string.format("%d", eta_ms), "PX", math.max(1, eta_ms - now_ms) + grace_ms)
+return 1
+"""
+
+SCRIPT_SHAS = {
+    script: hashlib.sha1(script.encode("utf-8")).hexdigest()
+    for script in (LUA_INFLIGHT_ACQUIRE, LUA_RECORD_LATENCY, LUA_CLAIM_WAKEUP)
+}
+
+
+@dataclass
+class DispatchSlots:
+    tokens: list
+    inflight: int
+    max_inflight: int
+
+
+@dataclass
+class DispatchSnapshot:
+    inflight: int
+    max_inflight: int
+    llm_latency_seconds: float
+    recent_rejections: int
+    dispatched_total: int
+
+
+class SummaryDispatchController:
+    """
+    요약 dispatch의 동시 실행 한도를 정하고, 실행 중인 job의 lease_token을 Redis sorted set 하나에
+    slot으로 둔다 (모든 dispatcher/worker가 공유). 한도는 OpenAI bucket 처리량 × 관측된 LLM latency
+    (Little's law)로 잡되 bucket capacity 이상, 최근 rate limit 거절이 있으면 backoff배로 줄인다.
+    slot은 dispatch 때 잡고 task가 끝나면 반납하며, 반납되지 못한 slot은 slot_ttl 뒤에 만료되거나
+    recover_stuck_summary_jobs의 reconcile에서 DB의 RUNNING lease와 맞춰 정리된다.
+    Redis를 쓸 수 없으면 None/기본값을 돌려주고 호출자가 DB 기준 고정 한도로 처리한다.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        min_inflight: int,
+        max_inflight: int,
+        slot_ttl: float,
+        latency_alpha: float,
+        default_latency: float,
+        rejection_window: float,
+        rejection_backoff: float,
+    ):
+        self.redis_url = redis_url
+        self.min_inflight = min_inflight
+        self.max_inflight = max_inflight
+        self.slot_ttl = slot_ttl
+        self.latency_alpha = latency_alpha
+        self.default_latency = default_latency
+        self.rejection_window = rejection_window
+        self.rejection_backoff = rejection_backoff
+        self._redis_down_until = 0.0
+
+    def _client(self):
+        # fork 뒤에도 안전하도록 클라이언트를 들고 있지 않고 프로세스 공유 pool에서 매번 얻는다.
+        return get_redis_client(self.redis_url)
+
+    def _run_script(self, script: str, key: str, *args):
+        client = self._client()
+        sha = SCRIPT_SHAS[script]
+        try:
+            return client.evalsha(sha, 1, key, *args)
+        except NoScriptError:
+            client.script_load(script)
+            return client.evalsha(sha, 1, key, *args)
+
+    def _redis_available(self) -> bool:
+        return time.monotonic() >= self._redis_down_until
+
+    def _mark_redis_down(self):
+        self._redis_down_until = time.monotonic() + REDIS_ERROR_BACKOFF_SECONDS
+        logger.warning("[summary_dispatch] redis unavailable fallback=static")
+
+    def compute_limit(self, llm_latency: float, recent_rejections: int) -> int:
+        if getattr(settings, "OPENAI_BUCKET_ENABLED", True):
+            capacity = int(getattr(settings, "OPENAI_BUCKET_CAPACITY", 2))
+            refill_rate = float(getattr(settings, "OPENAI_BUCKET_REFILL_RATE", 1.0))
+            limit = max(capacity, math.ceil(refill_rate * llm_latency))
+        else:
+            limit = self.max_inflight
+        if recent_rejections > 0:
+            limit = math.floor(limit * self.rejection_backoff)
+        return max(self.min_inflight, min(self.max_inflight, limit))
+
+    def _read_stats(self, client) -> tuple[float, int, int]:
+        pipe = client.pipeline(transaction=False)
+        pipe.hmget(STATS_KEY, "llm_latency_ewma", "dispatched_total")
+        pipe.get(REJECTIONS_KEY)
+        (latency, dispatched), rejections = pipe.execute()
+        latency = float(latency) if latency is not None else self.default_latency
+        return latency, int(rejections or 0), int(dispatched or 0)
+
+    def acquire(self, limit: int) -> DispatchSlots | None:
+        """최대 limit개의 slot을 잡아 그만큼의 lease_token을 돌려준다. Redis 오류면 None."""
+        if not self._redis_available():
+            return None
+        try:
+            latency, rejections, _ = self._read_stats(self._client())
+            max_inflight = self.compute_limit(latency, rejections)
+            tokens = [uuid.uuid4() for _ in range(max(0, min(limit, max_inflight)))]
+            admitted, inflight = self._run_script(
+                LUA_INFLIGHT_ACQUIRE,
+                INFLIGHT_KEY,
+                int(time.time() * 1000),
+                int(self.slot_ttl * 1000),
+                max_inflight,
+                *[str(token) for token in tokens],
+            )
+        except redis.RedisError:
+            self._mark_redis_down()
+            return None
+        return DispatchSlots(tokens[: int(admitted)], int(inflight), max_inflight)
+
+    def release(self, *lease_tokens) -> None:
+        if not lease_tokens or not self._redis_available():
+            return
+        try:
+            self._client().zrem(INFLIGHT_KEY, *[str(token) for token in lease_tokens])
+        except redis.RedisError:
+            self._mark_redis_down()
+
+    def renew(self, lease_token) -> None:
+        """heartbeat마다 실행 중 slot의 만료를 slot_ttl 뒤로 늘린다. 이미 반납/정리된 slot은 되살리지 않는다 (XX)."""
+        if not self._redis_available():
+            return
+        expires_at = int((time.time() + self.slot_ttl) * 1000)
+        try:
+            self._client().zadd(INFLIGHT_KEY, {str(lease_token): expires_at}, xx=True)
+        except redis.RedisError:
+            self._mark_redis_down()
+
+    def record_dispatched(self, count: int) -> None:
+        if count <= 0 or not self._redis_available():
+            return
+        try:
+            pipe = self._client().pipeline(transaction=False)
+            pipe.hincrby(STATS_KEY, "dispatched_total", count)
+            pipe.expire(STATS_KEY, STATS_TTL_SECONDS)
+            pipe.execute()
+        except redis.RedisError:
+            self._mark_redis_down()
+
+    def record_latency(self, seconds: float) -> None:
+        if not self._redis_available():
+            return
+        try:
+            self._run_script(
+                LUA_RECORD_LATENCY,
+                STATS_KEY,
+                f"{seconds:.6f}",
+                self.latency_alpha,
+                STATS_TTL_SECONDS,
+            )
+        except redis.RedisError:
+            self._mark_redis_down()
+
+    def record_rejection(self) -> None:
+        """OpenAI bucket 거절/429를 센다. rejection_window 동안 새 거절이 없으면 0으로 돌아간다."""
+        if not self._redis_available():
+            return
+        try:
+            pipe = self._client().pipeline(transaction=False)
+            pipe.incr(REJECTIONS_KEY)
+            pipe.expire(REJECTIONS_KEY, max(1, math.ceil(self.rejection_window)))
+            pipe.execute()
+        except redis.RedisError:
+            self._mark_redis_down()
+
+    def reconcile(self, running_lease_tokens) -> int:
+        """
+        DB에서 RUNNING이 아닌 lease_token의 slot을 지운다 (반납 전에 죽은 worker 등).
+        방금 잡혀 아직 커밋되지 않았을 수 있는 slot은 RECONCILE_GRACE_SECONDS 동안 건드리지 않는다.
+        """
+        if not self._redis_available():
+            return 0
+        running = {str(token) for token in running_lease_tokens}
+        now_ms = time.time() * 1000
+        admitted_before = now_ms + (self.slot_ttl - RECONCILE_GRACE_SECONDS) * 1000
+        try:
+            client = self._client()
+            orphaned = [
+                member
+                for member, expires_at in client.zrangebyscore(
+                    INFLIGHT_KEY, now_ms, admitted_before, withscores=True
+                )
+                if (member.decode() if isinstance(member, bytes) else member) not in running
+            ]
+            if orphaned:
+                client.zrem(INFLIGHT_KEY, *orphaned)
+        except redis.RedisError:
+            self._mark_redis_down()
+            return 0
+        return len(orphaned)
+
+    def snapshot(self) -> DispatchSnapshot:
+        """metrics용이며 Redis 오류는 호출자가 처리한다."""
+        client = self._client()
+        latency, rejections, dispatched = self._read_stats(client)
+        inflight = client.zcount(INFLIGHT_KEY, time.time() * 1000, "+inf")
+        return DispatchSnapshot(
+            inflight=int(inflight),
+            max_inflight=self.compute_limit(latency, rejections),
+            llm_latency_seconds=latency,
+            recent_rejections=rejections,
+            dispatched_total=dispatched,
+        )
+
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+def _reset_controllers_after_fork():
+    global _controllers_lock
+    _controllers_lock = threading.Lock()
+    _controllers.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_controllers_after_fork)
+
+
+def static_max_inflight() -> int:
+    return int(getattr(settings, "SUMMARY_DISPATCH_STATIC_INFLIGHT", 2))
+
+
+def get_dispatch_controller() -> SummaryDispatchController | None:
+    """SUMMARY_DISPATCH_ADAPTIVE_ENABLED가 꺼져 있으면 None (DB 기준 고정 한도)."""
+    if not getattr(settings, "SUMMARY_DISPATCH_ADAPTIVE_ENABLED", True):
+        return None
+
+    config = (
+        _dispatch_redis_url(),
+        int(getattr(settings, "SUMMARY_DISPATCH_MIN_INFLIGHT", 1)),
+        int(getattr(settings, "SUMMARY_DISPATCH_MAX_INFLIGHT", 16)),
+        float(getattr(settings, "SUMMARY_DISPATCH_SLOT_TTL_SECONDS", 720)),
+        float(getattr(settings, "SUMMARY_DISPATCH_LATENCY_EWMA_ALPHA", 0.2)),
+        float(getattr(settings, "SUMMARY_DISPATCH_DEFAULT_LLM_LATENCY_SECONDS", 5.0)),
+        float(getattr(settings, "SUMMARY_DISPATCH_REJECTION_WINDOW_SECONDS", 60)),
+        float(getattr(settings, "SUMMARY_DISPATCH_REJECTION_BACKOFF", 0.5)),
+    )
+    controller = _controllers.get(config)
+    if controller is None:
+        with _controllers_lock:
+            controller = _controllers.get(config)
+            if controller is None:
+                controller = SummaryDispatchController(*config)
+                _controllers[config] = controller
+    return controller
+
+
+def _dispatch_redis_url() -> str:
+    return (
+        getattr(settings, "SUMMARY_DISPATCH_REDIS_URL", None)
+        or getattr(settings, "REDIS_URL", None)
+        or "redis://redis:6379/3"
+    )
+
+
+def claim_dispatch_wakeup(countdown: float) -> bool:
+    """
+    countdown초 뒤 dispatch wake-up을 보낼 차례인지 정한다. 같은 시각 또는 더 이른 wake-up이 이미
+    예약돼 있으면 False (그 dispatch가 이 job까지 집고, 남은 retry_at은 다시 예약한다).
+    Redis를 쓸 수 없으면 False — beat sweep이 대신 줍는다.
+    """
+    now_ms = int(time.time() * 1000)
+    client = get_redis_client(_dispatch_redis_url())
+    args = (now_ms, now_ms + int(max(0.0, countdown) * 1000), int(WAKEUP_GRACE_SECONDS * 1000))
+    sha = SCRIPT_SHAS[LUA_CLAIM_WAKEUP]
+    try:
+        try:
+            claimed = client.evalsha(sha, 1, WAKEUP_KEY, *args)
+        except NoScriptError:
+            client.script_load(LUA_CLAIM_WAKEUP)
+            claimed = client.evalsha(sha, 1, WAKEUP_KEY, *args)
+    except redis.RedisError:
+        logger.warning("[summary_dispatch] wakeup claim failed countdown=%.1fs", countdown)
+        return False
+    return bool(int(claimed))
+
+
+def clear_dispatch_wakeup() -> None:
+    """dispatch가 시작할 때 호출한다. 이후 커밋되는 job은 다시 wake-up을 예약할 수 있다."""
+    try:
+        get_redis_client(_dispatch_redis_url()).delete(WAKEUP_KEY)
+    except redis.RedisError:
+        pass
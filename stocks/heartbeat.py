@@ -0,0 +1,98 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .dispatch_control import get_dispatch_controller
+from .models import SummaryJob
+
+logger = logging.getLogger(__name__)
+
+
+def heartbeat_enabled() -> bool:
+    return getattr(settings, "SUMMARY_JOB_HEARTBEAT_ENABLED", True)
+
+
+def lease_expiry(now=None):
+    now = now or timezone.now()
+    return now + timedelta(seconds=float(getattr(settings, "SUMMARY_JOB_LEASE_SECONDS", 20.0)))
+
+
+def renew_lease(job_id: int, lease_token) -> bool:
+    """lease가 아직 이 worker 것일 때만 만료 시각을 늘린다. False면 회수/종료돼 lease를 잃은 것."""
+    return (
+        SummaryJob.objects.filter(
+            id=job_id,
+            status=SummaryJob.Status.RUNNING,
+            lease_token=lease_token,
+            finished_at__isnull=True,
+        ).update(lease_expires_at=lease_expiry())
+        > 0
+    )
+
+
+class LeaseHeartbeat:
+    """
+    with 블록 동안 별도 스레드가 SUMMARY_JOB_HEARTBEAT_INTERVAL_SECONDS마다 job lease(DB)와
+    dispatch slot(Redis)을 늘린다. LLM 호출이 오래 걸려도 lease가 살아 있으므로 회수되지 않고,
+    worker 프로세스가 죽으면 갱신이 멈춰 SUMMARY_JOB_LEASE_SECONDS 뒤에 recover_stuck_summary_jobs가 회수한다.
+    lease를 잃으면(다른 곳에서 회수/종료) 갱신을 멈춘다 — 결과 저장은 기존 lease 확인이 막는다.
+    """
+
+    def __init__(self, job_id: int, lease_token, interval: float | None = None):
+        self.job_id = job_id
+        self.lease_token = lease_token
+        self.interval = float(
+            interval
+            if interval is not None
+            else getattr(settings, "SUMMARY_JOB_HEARTBEAT_INTERVAL_SECONDS", 5.0)
+        )
+        self.beats = 0
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if heartbeat_enabled():
+            self._thread = threading.Thread(
+                target=self._run,
+                name=f"summary-heartbeat-{self.job_id}",
+                daemon=True,
+            )
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+        return False
+
+    def _beat(self) -> bool:
+        if not renew_lease(self.job_id, self.lease_token):
+            self.lost = True
+            logger.warning(
+                "[summary_heartbeat] lease lost job_id=%s lease_token=%s", self.job_id, self.lease_token
+            )
+            return False
+        self.beats += 1
+        controller = get_dispatch_controller()
+        if controller is not None:
+            controller.renew(self.lease_token)
+        return True
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    if not self._beat():
+                        return
+                except Exception:
+                    # DB가 잠깐 끊겨도 다음 주기에 다시 시도한다. 계속 실패하면 lease가 만료돼 회수된다.
+                    logger.warning("[summary_heartbeat] renew failed job_id=%s", self.job_id, exc_info=True)
+        finally:
+            # 이 스레드가 연 DB 연결은 스레드와 함께 정리한다.
+            connection.close()
@@ -0,0 +1,345 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from time import perf_counter
+
+import aiohttp
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Price
+from .circuit_breaker import get_finnhub_breaker
+from .rate_limit import get_finnhub_bucket, report_finnhub_feedback
+from .services import (
+    _date_range,
+    _finnhub_backoff_seconds,
+    apply_watermark,
+    build_news_rows,
+    load_watermarks,
+    persist_news_rows_for_stocks,
+    watermark_fetch_days,
+)
+
+logger = logging.getLogger(__name__)
+
+FINNHUB_BASE_URL = "https://finnhub.io/api/v1"
+
+
+class FinnhubRateLimitTimeout(Exception):
+    pass
+
+
+@dataclass
+class SymbolFetchResult:
+    symbol: str
+    news: list = field(default_factory=list)
+    quote: dict | None = None
+    news_error: str | None = None
+    quote_error: str | None = None
+
+
+class AsyncFinnhubClient:
+    """
+    keep-alive 커넥션 풀 하나를 공유하는 비동기 Finnhub 클라이언트.
+    요청마다 Redis token bucket slot을 받은 뒤 호출하고 (고정 sleep 대신),
+    429/네트워크 오류는 services.fetch_company_news와 같은 exponential backoff로 재시도한다.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        *,
+        pool_size: int = 20,
+        timeout: float = 10.0,
+        max_retries: int = 5,
+        bucket=None,
+        slot_timeout: float = 15.0,
+        breaker=None,
+    ):
+        self.api_key = api_key if api_key is not None else settings.FINNHUB_API_KEY
+        self.base_url = (
+            base_url
+            or getattr(settings, "FINNHUB_BASE_URL", None)
+            or FINNHUB_BASE_URL
+        ).rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.bucket = bucket
+        self.slot_timeout = slot_timeout
+        self.breaker = breaker
+        self._session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+        self._session = None
+
+    async def _wait_for_slot(self, symbol: str):
+        if self.bucket is None:
+            return
+        # RedisTokenBucket은 동기 redis 클라이언트를 쓰므로 이벤트 루프를 막지 않게 스레드에서 대기한다.
+        if not await asyncio.to_thread(self.bucket.wait_for_slot, self.slot_timeout):
+            raise FinnhubRateLimitTimeout(f"Rate limit wait timeout: {symbol}")
+
+    async def _report_feedback(self, throttled: bool):
+        if self.bucket is None or not getattr(settings, "FINNHUB_AIMD_ENABLED", False):
+            return
+        await asyncio.to_thread(report_finnhub_feedback, throttled)
+
+    async def _record_outcome(self, failed: bool):
+        if self.breaker is None:
+            return
+        if failed:
+            await asyncio.to_thread(self.breaker.record_failure)
+            # 이번 실패로 circuit이 열렸으면 재시도 sleep 없이 바로 실패한다.
+            await asyncio.to_thread(self.breaker.guard, take_probe=False)
+        else:
+            await asyncio.to_thread(self.breaker.record_success)
+
+    async def _get_json(self, path: str, params: dict, symbol: str):
+        url = f"{self.base_url}{path}"
+        params = {**params, "token": self.api_key}
+
+        for attempt in range(self.max_retries):
+            if self.breaker is not None:
+                # slot을 기다리기 전에는 거르기만 하고, half_open probe는 slot을 받은 뒤에 잡는다.
+                await asyncio.to_thread(self.breaker.guard, take_probe=False)
+            await self._wait_for_slot(symbol)
+            if self.breaker is not None:
+                await asyncio.to_thread(self.breaker.guard)
+            try:
+                async with self._session.get(url, params=params) as response:
+                    if response.status == 200:
+                        await self._report_feedback(throttled=False)
+                        await self._record_outcome(failed=False)
+                        return await response.json(content_type=None)
+
+                    if response.status == 429:
+                        await self._report_feedback(throttled=True)
+                        # 429도 Finnhub가 응답한 것이므로 이번 시도의 probe를 성공으로 반납한다.
+                        await self._record_outcome(failed=False)
+                        if attempt == self.max_retries - 1:
+                            raise Exception(f"Finnhub 429 Too Many Requests: {symbol}")
+                        sleep_seconds = _finnhub_backoff_seconds(attempt)
+                        logger.warning(
+                            "[finnhub_429] symbol=%s path=%s attempt=%s sleep=%.2f",
+                            symbol,
+                            path,
+                            attempt + 1,
+                            sleep_seconds,
+                        )
+                        await asyncio.sleep(sleep_seconds)
+                        continue
+
+                    body = await response.text()
+                    logger.error(
+                        "[finnhub_http_error] symbol=%s path=%s status=%s body=%s",
+                        symbol,
+                        path,
+                        response.status,
+                        body[:200],
+                    )
+                    response.raise_for_status()
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = getattr(e, "status", None)
+                await self._record_outcome(failed=status is None or status >= 500)
+                if attempt == self.max_retries - 1:
+                    raise Exception(f"Finnhub request failed: {symbol}, error={e}")
+                sleep_seconds = _finnhub_backoff_seconds(attempt)
+                logger.warning(
+                    "[finnhub_request_error] symbol=%s path=%s attempt=%s sleep=%.2f error=%s",
+                    symbol,
+                    path,
+                    attempt + 1,
+                    sleep_seconds,
+                    e,
+                )
+                await asyncio.sleep(sleep_seconds)
+
+        raise Exception(f"Finnhub fetch failed after retries: {symbol}")
+
+    async def company_news(self, symbol: str, days: int = 1):
+        frm, to = _date_range(days)
+        return await self._get_json(
+            "/company-news",
+            {"symbol": symbol, "from": frm, "to": to},
+            symbol,
+        )
+
+    async def quote(self, symbol: str):
+        return await self._get_json("/quote", {"symbol": symbol}, symbol)
+
+
+async def fetch_symbols(
+    client: AsyncFinnhubClient,
+    symbols,
+    days: int = 1,
+    concurrency: int = 10,
+    days_by_symbol: dict | None = None,
+):
+    """
+    종목별 뉴스/시세를 동시에 가져온다. 한 종목의 실패가 다른 종목을 막지 않는다.
+    days_by_symbol이 있으면 종목별 조회 기간(watermark 기준)을 우선한다.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    days_by_symbol = days_by_symbol or {}
+
+    async def fetch_one(symbol):
+        async with semaphore:
+            news, quote = await asyncio.gather(
+                client.company_news(symbol, days_by_symbol.get(symbol, days)),
+                client.quote(symbol),
+                return_exceptions=True,
+            )
+
+        result = SymbolFetchResult(symbol=symbol)
+        if isinstance(news, BaseException):
+            result.news_error = str(news)
+        else:
+            result.news = news or []
+        if isinstance(quote, BaseException):
+            result.quote_error = str(quote)
+        else:
+            result.quote = quote
+        return result
+
+    return await asyncio.gather(*(fetch_one(symbol) for symbol in symbols))
+
+
+def _price_from_quote(stock, quote):
+    current_price = (quote or {}).get("c")
+    if not current_price:
+        return None
+
+    change_percent = quote.get("dp")
+    timestamp = quote.get("t")
+    return Price(
+        stock=stock,
+        price=Decimal(str(current_price)),
+        change_percent=(
+            Decimal(str(change_percent)) if change_percent is not None else None
+        ),
+        timestamp=(
+            datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+            if timestamp
+            else timezone.now()
+        ),
+    )
+
+
+def run_ingest(stocks, days: int = 1, *, concurrency: int | None = None, client=None) -> list[dict]:
+    """
+    async 엔진 진입점 (Celery task / management command 공용, 동기 함수).
+    1) 모든 종목의 뉴스+시세를 하나의 커넥션 풀로 동시에 가져오고
+    2) 끝난 뒤 News/NewsStock과 Price를 한 번에 배치로 기록한다.
+    반환: 종목별 outcome 리스트 — {"symbol", "result"} 또는 {"symbol", "error"}
+    """
+    stocks = list(stocks)
+    if not stocks:
+        return []
+
+    if concurrency is None:
+        concurrency = int(getattr(settings, "FINNHUB_ASYNC_CONCURRENCY", 10))
+    if client is None:
+        client = AsyncFinnhubClient(
+            pool_size=concurrency * 2,
+            bucket=get_finnhub_bucket() if settings.FINNHUB_BUCKET_ENABLED else None,
+            breaker=get_finnhub_breaker(),
+        )
+
+    watermarks = load_watermarks([stock.symbol for stock in stocks])
+    days_by_symbol = {
+        symbol: watermark_fetch_days(wm, days) for symbol, wm in watermarks.items()
+    }
+
+    async def _fetch_all():
+        async with client:
+            return await fetch_symbols(
+                client,
+                [stock.symbol for stock in stocks],
+                days=days,
+                concurrency=concurrency,
+                days_by_symbol=days_by_symbol,
+            )
+
+    t_fetch_start = perf_counter()
+    fetched = {result.symbol: result for result in asyncio.run(_fetch_all())}
+    t_fetch_end = perf_counter()
+
+    rows_by_stock = {}
+    skipped_by_stock = {}
+    watermark_skipped_by_stock = {}
+    prices = []
+    for stock in stocks:
+        result = fetched[stock.symbol]
+        if result.news_error is None:
+            rows, skipped_by_stock[stock.id] = build_news_rows(result.news)
+            (
+                rows_by_stock[stock],
+                watermark_skipped_by_stock[stock.id],
+            ) = apply_watermark(rows, watermarks.get(stock.symbol), days)
+        if result.quote_error is None:
+            price = _price_from_quote(stock, result.quote)
+            if price is not None:
+                prices.append(price)
+        else:
+            logger.warning(
+                "[run_ingest] quote fetch failed symbol=%s error=%s",
+                stock.symbol,
+                result.quote_error,
+            )
+
+    t_persist_start = perf_counter()
+    counters, _, _ = persist_news_rows_for_stocks(rows_by_stock)
+    if prices:
+        Price.objects.bulk_create(
+            prices,
+            update_conflicts=True,
+            unique_fields=["stock", "timestamp"],
+            update_fields=["price", "change_percent"],
+        )
+    t_persist_end = perf_counter()
+
+    outcomes = []
+    for stock in stocks:
+        result = fetched[stock.symbol]
+        if result.news_error is not None:
+            outcomes.append({"symbol": stock.symbol, "error": result.news_error})
+            continue
+
+        created_news, linked_pairs = counters[stock.id]
+        outcomes.append(
+            {
+                "symbol": stock.symbol,
+                "result": {
+                    "created_news": created_news,
+                    "linked_pairs": linked_pairs,
+                    "skipped": skipped_by_stock[stock.id],
+                    "watermark_skipped": watermark_skipped_by_stock[stock.id],
+                },
+            }
+        )
+
+    logger.info(
+        "[run_ingest_breakdown] symbols=%s fetch=%.3fs persist=%.3fs total=%.3fs news_errors=%s prices=%s watermark_skipped=%s",
+        len(stocks),
+        t_fetch_end - t_fetch_start,
+        t_persist_end - t_persist_start,
+        t_persist_end - t_fetch_start,
+        sum(1 for outcome in outcomes if "error" in outcome),
+        len(prices),
+        sum(watermark_skipped_by_stock.values()),
+    )
+    return outcomes
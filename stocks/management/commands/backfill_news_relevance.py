@@ -0,0 +1,247 @@
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from stocks.models import News, NewsStock
+from stocks.services import (
+    NEWS_BULK_BATCH_SIZE,
+    NEWS_NER_CACHE_FIELDS,
+    NEWS_RELEVANCE_FIELDS,
+    relevance_fields,
+    stale_relevance_links,
+)
+from stocks.utils import (
+    RELEVANCE_SCORER_VERSION,
+    extract_org_entities,
+    get_nlp,
+    ner_model_version,
+    score_news_relevance_batch,
+)
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "relevance_backfill:checkpoint:v{version}:{scope}"
+
+
+def _init_worker():
+    # worker 프로세스마다 모델을 한 번만 올린다 (부모에서 이미 로드했다면 fork로 물려받는다).
+    get_nlp()
+
+
+def _worker_ready():
+    return os.getpid()
+
+
+def score_chunk(items):
+    """
+    worker에서 실행된다. DB는 건드리지 않고 부모가 넘긴 값만으로 채점한다.
+    items: [(link_id, news_id, symbol, company_name, headline, org_entities | None)]
+    반환: ([(link_id, (score, is_relevant, reason))], {news_id: 새로 계산한 org_entities})
+    """
+    entities = {news_id: orgs for _, news_id, _, _, _, orgs in items if orgs is not None}
+    headlines = {}
+    for _, news_id, _, _, headline, orgs in items:
+        if orgs is None and news_id not in entities:
+            headlines.setdefault(news_id, headline)
+    computed = {}
+    if headlines:
+        computed = dict(zip(headlines, extract_org_entities(list(headlines.values()))))
+        entities.update(computed)
+
+    by_stock = {}
+    for item in items:
+        by_stock.setdefault((item[2], item[3]), []).append(item)
+
+    results = []
+    for (symbol, company_name), stock_items in by_stock.items():
+        scores = score_news_relevance_batch(
+            symbol,
+            company_name,
+            [headline for _, _, _, _, headline, _ in stock_items],
+            org_entities=[entities[news_id] for _, news_id, _, _, _, _ in stock_items],
+        )
+        results.extend(
+            (link_id, scored) for (link_id, *_), scored in zip(stock_items, scores)
+        )
+    return results, computed
+
+
+class Command(BaseCommand):
+    help = (
+        "관련도가 없거나 이전 scorer_version으로 계산된 NewsStock 링크를 다시 채점해 저장한다. "
+        "링크를 id 순서로 server-side cursor로 읽어 chunk 단위로 --workers개 프로세스에서 채점하고, "
+        "chunk를 쓸 때마다 checkpoint를 남겨 중간에 끊겨도 이어서 실행할 수 있다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=NEWS_BULK_BATCH_SIZE, help="chunk 크기")
+        parser.add_argument("--limit", type=int, default=None, help="최대 처리 링크 수 (기본: 전부)")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="채점 프로세스 수. 1이면 현재 프로세스에서 채점한다.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="stale 링크만이 아니라 모든 링크를 다시 채점한다",
+        )
+        parser.add_argument("--from-id", type=int, default=None, help="checkpoint 대신 이 id 다음부터")
+        parser.add_argument("--reset-checkpoint", action="store_true")
+        parser.add_argument("--progress-every", type=int, default=10, help="N chunk마다 진행률 출력")
+
+    def _checkpoint_key(self, options):
+        return CHECKPOINT_KEY.format(
+            version=RELEVANCE_SCORER_VERSION,
+            scope="all" if options["all"] else "stale",
+        )
+
+    def _load_checkpoint(self, key):
+        try:
+            return int(cache.get(key) or 0)
+        except Exception:
+            logger.warning("[backfill_news_relevance] checkpoint get failed key=%s", key, exc_info=True)
+            return 0
+
+    def _save_checkpoint(self, key, last_id):
+        try:
+            cache.set(key, last_id, timeout=None)
+        except Exception:
+            logger.warning("[backfill_news_relevance] checkpoint set failed key=%s", key, exc_info=True)
+
+    def _stream_chunks(self, start_id, options):
+        """stale(또는 전체) 링크를 id 순서로 chunk씩 읽는다. PostgreSQL에서는 server-side cursor를 쓴다."""
+        queryset = NewsStock.objects.all() if options["all"] else stale_relevance_links()
+        queryset = queryset.filter(id__gt=start_id).order_by("id")
+        if options["limit"] is not None:
+            queryset = queryset[: options["limit"]]
+
+        version = ner_model_version()
+        rows = (
+            (link_id, news_id, symbol, name, headline, orgs if ner_version == version else None)
+            for link_id, news_id, symbol, name, headline, orgs, ner_version in queryset.values_list(
+                "id",
+                "news_id",
+                "stock__symbol",
+                "stock__name",
+                "news__headline",
+                "news__org_entities",
+                "news__ner_version",
+            ).iterator(chunk_size=options["batch_size"])
+        )
+        while True:
+            chunk = list(islice(rows, options["batch_size"]))
+            if not chunk:
+                return
+            yield chunk
+
+    def _scored_chunks(self, chunks, workers):
+        """chunk를 순서대로 채점한 결과를 돌려준다. worker 수의 2배까지만 미리 보내 메모리를 묶어 둔다."""
+        if workers <= 1:
+            for chunk in chunks:
+                yield chunk, score_chunk(chunk)
+            return
+
+        # 부모 DB 연결을 닫고, cursor를 열기 전에 worker를 모두 띄워 자식이 연결을 물려받지 않게 한다.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+        ) as executor:
+            for future in [executor.submit(_worker_ready) for _ in range(workers)]:
+                future.result()
+
+            pending = deque()
+            for chunk in chunks:
+                pending.append((chunk, executor.submit(score_chunk, chunk)))
+                if len(pending) >= workers * 2:
+                    chunk, future = pending.popleft()
+                    yield chunk, future.result()
+            while pending:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+
+    def _write(self, results, computed_entities):
+        NewsStock.objects.bulk_update(
+            [NewsStock(id=link_id, **relevance_fields(scored)) for link_id, scored in results],
+            NEWS_RELEVANCE_FIELDS,
+            batch_size=NEWS_BULK_BATCH_SIZE,
+        )
+        if computed_entities:
+            version = ner_model_version()
+            News.objects.bulk_update(
+                [
+                    News(id=news_id, org_entities=orgs, ner_version=version)
+                    for news_id, orgs in computed_entities.items()
+                ],
+                NEWS_NER_CACHE_FIELDS,
+                batch_size=NEWS_BULK_BATCH_SIZE,
+            )
+
+    def handle(self, *args, **options):
+        key = self._checkpoint_key(options)
+        if options["reset_checkpoint"]:
+            self._save_checkpoint(key, 0)
+        start_id = options["from_id"] if options["from_id"] is not None else self._load_checkpoint(key)
+
+        queryset = NewsStock.objects.all() if options["all"] else stale_relevance_links()
+        pending = queryset.filter(id__gt=start_id).count()
+        if options["limit"] is not None:
+            pending = min(pending, options["limit"])
+        self.stdout.write(
+            f"scorer_version={RELEVANCE_SCORER_VERSION} scope={'all' if options['all'] else 'stale'} "
+            f"start_id={start_id} pending={pending} workers={options['workers']} "
+            f"batch_size={options['batch_size']}"
+        )
+
+        started = time.perf_counter()
+        rescored = relevant = ner_computed = chunks_done = 0
+        last_id = start_id
+
+        for chunk, (results, computed) in self._scored_chunks(
+            self._stream_chunks(start_id, options), options["workers"]
+        ):
+            self._write(results, computed)
+
+            last_id = chunk[-1][0]
+            self._save_checkpoint(key, last_id)
+
+            rescored += len(results)
+            relevant += sum(1 for _, scored in results if scored[1])
+            ner_computed += len(computed)
+            chunks_done += 1
+
+            if chunks_done % options["progress_every"] == 0:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"progress {rescored}/{pending} ({rescored / pending:.0%}) "
+                    f"links/s={rescored / elapsed:.1f} last_id={last_id}"
+                )
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "[backfill_news_relevance] scorer_version=%s rescored=%s relevant=%s ner_computed=%s workers=%s elapsed=%.3fs",
+            RELEVANCE_SCORER_VERSION,
+            rescored,
+            relevant,
+            ner_computed,
+            options["workers"],
+            elapsed,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"done rescored={rescored} relevant={relevant} ner_computed={ner_computed} "
+                f"chunks={chunks_done} elapsed={elapsed:.1f}s "
+                f"links/s={rescored / elapsed if elapsed else 0.0:.1f} last_id={last_id}"
+            )
+        )
@@ -7,6 +7,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from stocks.models import Stock
+from stocks.rate_limit import get_finnhub_bucket
 
 
 class Command(BaseCommand):
@@ -29,6 +30,12 @@ class Command(BaseCommand):
         failed = 0
 
         for stock in stocks:
+            # 사용자 ingest와 같은 Finnhub bucket을 batch lane으로 쓴다.
+            if settings.FINNHUB_BUCKET_ENABLED and not get_finnhub_bucket().wait_for_slot():
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"rate limited {stock.symbol}"))
+                continue
+
             try:
                 response = requests.get(
                     "https://finnhub.io/api/v1/stock/profile2",
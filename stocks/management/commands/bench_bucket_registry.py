@@ -0,0 +1,138 @@
+import time
+import uuid
+from unittest.mock import patch
+
+import redis
+from redis.connection import Connection
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from stocks.rate_limit import (
+    RedisTokenBucket,
+    get_finnhub_bucket,
+    get_openai_bucket,
+    reset_rate_limit_registry,
+)
+
+
+class LegacyRedisTokenBucket(RedisTokenBucket):
+    """registry 도입 전 동작 재현용: 인스턴스마다 from_url 클라이언트를 만들고 첫 호출에 SCRIPT LOAD."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaded = set()
+
+    @property
+    def redis_client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.redis_url)
+        return self._client
+
+    def _run_script(self, script: str, *args, **kwargs):
+        if script not in self._loaded:
+            self.redis_client.script_load(script)
+            self._loaded.add(script)
+        return super()._run_script(script, *args, **kwargs)
+
+
+def _legacy_bucket(key, capacity, rate, redis_url):
+    return LegacyRedisTokenBucket(
+        key=key,
+        capacity=capacity,
+        refill_rate_per_sec=rate,
+        redis_url=redis_url,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "ingest 1회(종목별 뉴스+시세 slot 대기, 요약 job별 OpenAI slot 대기)를 흉내 내며 "
+        "bucket을 매번 새로 만드는 기존 방식과 프로세스 registry의 Redis 연결/왕복 수를 비교한다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+        parser.add_argument("--symbols", type=int, default=50)
+        parser.add_argument("--summary-jobs", type=int, default=20)
+
+    def _connections_received(self, admin):
+        return admin.info("stats")["total_connections_received"]
+
+    def _count_round_trips(self, run):
+        """클라이언트가 읽은 응답 수 = Redis 왕복 수 (연결 handshake의 SELECT/CLIENT SETINFO 포함)."""
+        round_trips = [0]
+        original_read_response = Connection.read_response
+
+        def counting_read_response(connection, *args, **kwargs):
+            round_trips[0] += 1
+            return original_read_response(connection, *args, **kwargs)
+
+        with patch.object(Connection, "read_response", counting_read_response):
+            run()
+        return round_trips[0]
+
+    def _simulate_ingest(self, bucket_factories, symbols, summary_jobs):
+        finnhub_factory, openai_factory = bucket_factories
+        for _ in range(symbols):
+            # fetch_news_for_symbol + update_stock_quote: 종목마다 bucket 조회 후 slot 대기
+            finnhub_factory().wait_for_slot()
+            finnhub_factory().wait_for_slot()
+        for _ in range(summary_jobs):
+            openai_factory().wait_for_slot()
+
+    def handle(self, *args, **options):
+        redis_url = options["redis_url"]
+        run_id = uuid.uuid4().hex
+        # slot 대기 자체가 결과에 섞이지 않도록 충분히 큰 bucket으로 측정한다.
+        bucket_settings = dict(
+            FINNHUB_BUCKET_REDIS_URL=redis_url,
+            FINNHUB_BUCKET_KEY=f"rate_limit:bench:finnhub:{run_id}",
+            FINNHUB_BUCKET_CAPACITY=100_000,
+            FINNHUB_BUCKET_REFILL_RATE=100_000,
+            OPENAI_BUCKET_REDIS_URL=redis_url,
+            OPENAI_BUCKET_KEY=f"rate_limit:bench:openai:{run_id}",
+            OPENAI_BUCKET_CAPACITY=100_000,
+            OPENAI_BUCKET_REFILL_RATE=100_000,
+        )
+
+        legacy = (
+            lambda: _legacy_bucket(
+                bucket_settings["FINNHUB_BUCKET_KEY"], 100_000, 100_000, redis_url
+            ),
+            lambda: _legacy_bucket(
+                bucket_settings["OPENAI_BUCKET_KEY"], 100_000, 100_000, redis_url
+            ),
+        )
+        registry = (get_finnhub_bucket, get_openai_bucket)
+
+        admin = redis.Redis.from_url(redis_url)
+        self.stdout.write(
+            f"symbols={options['symbols']} summary_jobs={options['summary_jobs']} redis={redis_url}"
+        )
+        self.stdout.write(
+            f"{'mode':>9} {'slots':>6} {'new_conns':>10} {'round_trips':>12} {'rt/slot':>8} {'wall(s)':>8}"
+        )
+
+        slots = options["symbols"] * 2 + options["summary_jobs"]
+        with override_settings(**bucket_settings):
+            for label, factories in (("legacy", legacy), ("registry", registry)):
+                reset_rate_limit_registry()
+                conns_before = self._connections_received(admin)
+                started = time.perf_counter()
+                round_trips = self._count_round_trips(
+                    lambda: self._simulate_ingest(
+                        factories, options["symbols"], options["summary_jobs"]
+                    )
+                )
+                elapsed = time.perf_counter() - started
+                new_conns = self._connections_received(admin) - conns_before
+
+                self.stdout.write(
+                    f"{label:>9} {slots:>6} {new_conns:>10} {round_trips:>12} "
+                    f"{round_trips / slots:>8.2f} {elapsed:>8.3f}"
+                )
+
+        admin.delete(
+            bucket_settings["FINNHUB_BUCKET_KEY"],
+            bucket_settings["OPENAI_BUCKET_KEY"],
+        )
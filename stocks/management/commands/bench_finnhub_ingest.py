@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import requests
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+from stocks.ingest import AsyncFinnhubClient, fetch_symbols
+
+
+class FakeFinnhubServer:
+    """로컬 벤치마크용 가짜 Finnhub (/company-news, /quote). 응답마다 latency만큼 지연한다."""
+
+    def __init__(self, latency: float, news_per_symbol: int):
+        self.latency = latency
+        self.news_per_symbol = news_per_symbol
+        self.requests = 0
+        self.connections = set()
+        self.port = None
+        self._loop = None
+        self._runner = None
+        self._ready = threading.Event()
+
+    async def _company_news(self, request):
+        await self._record(request)
+        symbol = request.query["symbol"]
+        now = int(time.time())
+        return web.json_response(
+            [
+                {
+                    "url": f"https://fake.example.com/{symbol}/{i}",
+                    "headline": f"{symbol} headline {i}",
+                    "source": "fake",
+                    "datetime": now - i,
+                }
+                for i in range(self.news_per_symbol)
+            ]
+        )
+
+    async def _quote(self, request):
+        await self._record(request)
+        return web.json_response({"c": 100.0, "dp": 1.2, "t": int(time.time())})
+
+    async def _record(self, request):
+        self.requests += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(self.latency)
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+
+        app = web.Application()
+        app.router.add_get("/company-news", self._company_news)
+        app.router.add_get("/quote", self._quote)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self):
+        threading.Thread(target=self._serve, daemon=True).start()
+        self._ready.wait()
+        return f"http://127.0.0.1:{self.port}"
+
+    def reset(self):
+        self.requests = 0
+        self.connections = set()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class Command(BaseCommand):
+    help = "requests.get 순차 호출 vs stocks.ingest 비동기 엔진 처리량 비교 (로컬 가짜 Finnhub, DB 미사용)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--symbols", type=int, default=100)
+        parser.add_argument("--latency", type=float, default=0.05)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--news-per-symbol", type=int, default=20)
+
+    def _run_blocking(self, base_url, symbols):
+        for symbol in symbols:
+            requests.get(
+                f"{base_url}/company-news",
+                params={"symbol": symbol, "from": "2025-01-01", "to": "2025-01-02", "token": "x"},
+                timeout=10,
+            ).json()
+            requests.get(
+                f"{base_url}/quote",
+                params={"symbol": symbol, "token": "x"},
+                timeout=10,
+            ).json()
+
+    def _run_async(self, base_url, symbols, concurrency):
+        async def run():
+            client = AsyncFinnhubClient(
+                api_key="x",
+                base_url=base_url,
+                pool_size=concurrency * 2,
+                bucket=None,
+            )
+            async with client:
+                return await fetch_symbols(client, symbols, concurrency=concurrency)
+
+        return asyncio.run(run())
+
+    def handle(self, *args, **options):
+        symbols = [f"SYM{i}" for i in range(options["symbols"])]
+        server = FakeFinnhubServer(options["latency"], options["news_per_symbol"])
+        base_url = server.start()
+
+        try:
+            self.stdout.write(
+                f"symbols={len(symbols)} latency={options['latency']}s "
+                f"concurrency={options['concurrency']}"
+            )
+            self.stdout.write(
+                f"{'engine':>10} {'requests':>9} {'tcp_conns':>10} {'wall(s)':>9} {'req/s':>9}"
+            )
+
+            for label, run in (
+                ("blocking", lambda: self._run_blocking(base_url, symbols)),
+                ("async", lambda: self._run_async(base_url, symbols, options["concurrency"])),
+            ):
+                server.reset()
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{label:>10} {server.requests:>9} {len(server.connections):>10} "
+                    f"{elapsed:>9.3f} {server.requests / elapsed:>9.1f}"
+                )
+        finally:
+            server.stop()
@@ -0,0 +1,98 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from stocks.models import News, NewsStock, Stock
+from stocks.services import _parse_published_at, bulk_upsert_news
+from stocks.utils import make_url_hash, normalize_url
+
+
+def fake_payload(size: int, run: str):
+    base_ts = int(time.time()) - size
+    return [
+        {
+            "url": f"https://bench.example.com/{run}/news/{i}?utm_source=x",
+            "headline": f"Bench headline {i}",
+            "source": "bench",
+            "datetime": base_ts + i,
+            "summary": "",
+        }
+        for i in range(size)
+    ]
+
+
+def legacy_loop_upsert(stock, data):
+    """bulk 경로 도입 전 upsert_news_for_symbol의 item별 get_or_create 루프 재현용."""
+    created_news = linked_pairs = skipped = 0
+
+    for item in data:
+        raw_url = item.get("url") or ""
+        if not raw_url:
+            skipped += 1
+            continue
+
+        url_hash = make_url_hash(raw_url)
+        news, created = News.objects.get_or_create(
+            url_hash=url_hash,
+            defaults={
+                "headline": item.get("headline") or "",
+                "url": raw_url,
+                "canonical_url": normalize_url(raw_url),
+                "source": item.get("source"),
+                "published_at": _parse_published_at(item.get("datetime")),
+                "language": item.get("lang", "en"),
+                "raw_json": item,
+            },
+        )
+        if created:
+            created_news += 1
+
+        if NewsStock.objects.get_or_create(news=news, stock=stock)[1]:
+            linked_pairs += 1
+
+    return created_news, linked_pairs, skipped
+
+
+class Command(BaseCommand):
+    help = "upsert_news_for_symbol의 기존 루프와 bulk 경로의 쿼리 수/소요 시간 비교 (DB 변경은 롤백)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="50,250,1000")
+
+    def _measure(self, fn, stock, data):
+        query_count = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal query_count
+            query_count += 1
+            return execute(sql, params, many, context)
+
+        with transaction.atomic():
+            with connection.execute_wrapper(count_queries):
+                started = time.perf_counter()
+                result = fn(stock, data)
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return query_count, elapsed, result[:3]
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options["sizes"].split(",") if s.strip()]
+
+        self.stdout.write(
+            f"{'items':>6} {'path':>7} {'queries':>8} {'wall(s)':>9} created/linked/skipped"
+        )
+        for size in sizes:
+            with transaction.atomic():
+                stock = Stock.objects.create(
+                    symbol=f"BENCH{size}"[:10], name="Bench Corp", exchange="TEST"
+                )
+                data = fake_payload(size, run=str(size))
+
+                for label, fn in (("loop", legacy_loop_upsert), ("bulk", bulk_upsert_news)):
+                    queries, elapsed, counters = self._measure(fn, stock, data)
+                    self.stdout.write(
+                        f"{size:>6} {label:>7} {queries:>8} {elapsed:>9.3f} "
+                        + "/".join(str(c) for c in counters)
+                    )
+                transaction.set_rollback(True)
@@ -0,0 +1,125 @@
+import statistics
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from stocks.rate_limit import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    RedisTokenBucket,
+    get_redis_client,
+)
+
+
+def _p99(values):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * 0.99))]
+
+
+class Command(BaseCommand):
+    help = (
+        "batch 스레드들이 Finnhub bucket을 계속 소진하는 동안 interactive 요청의 slot 대기 시간을 "
+        "lane 없이(reserved_tokens=0) / priority lane으로 비교한다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+        parser.add_argument("--batch-threads", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--capacity", type=int, default=4)
+        parser.add_argument("--rate", type=float, default=20.0)
+        parser.add_argument("--reserved", type=int, default=2, help="lane 모드의 interactive 몫")
+        parser.add_argument(
+            "--interactive-interval", type=float, default=0.25, help="interactive 요청 간격(초)"
+        )
+        parser.add_argument("--timeout", type=float, default=15.0)
+
+    def _run(self, reserved_tokens, options):
+        key = f"rate_limit:bench:lanes:{uuid.uuid4().hex}"
+        bucket = RedisTokenBucket(
+            key=key,
+            capacity=options["capacity"],
+            refill_rate_per_sec=options["rate"],
+            redis_url=options["redis_url"],
+            reserved_tokens=reserved_tokens,
+        )
+
+        stop = threading.Event()
+        batch_grants = [0]
+        batch_lock = threading.Lock()
+        interactive_waits = []
+        interactive_failed = [0]
+
+        def batch_worker():
+            while not stop.is_set():
+                if bucket.wait_for_slot(timeout=options["timeout"], priority=PRIORITY_BATCH):
+                    with batch_lock:
+                        batch_grants[0] += 1
+
+        def interactive_worker():
+            while not stop.is_set():
+                started = time.monotonic()
+                ok = bucket.wait_for_slot(
+                    timeout=options["timeout"],
+                    priority=PRIORITY_INTERACTIVE,
+                )
+                if ok:
+                    interactive_waits.append(time.monotonic() - started)
+                else:
+                    interactive_failed[0] += 1
+                stop.wait(options["interactive_interval"])
+
+        threads = [threading.Thread(target=batch_worker) for _ in range(options["batch_threads"])]
+        # batch가 bucket을 먼저 비운 뒤(포화 상태) interactive를 시작한다.
+        for thread in threads:
+            thread.start()
+        time.sleep(0.5)
+        interactive = threading.Thread(target=interactive_worker)
+        interactive.start()
+
+        time.sleep(options["duration"])
+        stop.set()
+        interactive.join()
+        for thread in threads:
+            thread.join()
+
+        get_redis_client(options["redis_url"]).delete(key)
+
+        return {
+            "interactive": len(interactive_waits),
+            "failed": interactive_failed[0],
+            "p50": statistics.median(interactive_waits) if interactive_waits else 0.0,
+            "p99": _p99(interactive_waits),
+            "max": max(interactive_waits, default=0.0),
+            "batch_rate": batch_grants[0] / (options["duration"] + 0.5),
+        }
+
+    def _baseline(self, options):
+        """batch 부하 없이 interactive만 돌린 기준선."""
+        return self._run(options["reserved"], {**options, "batch_threads": 0})
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"batch_threads={options['batch_threads']} duration={options['duration']}s "
+            f"capacity={options['capacity']} rate={options['rate']}/s "
+            f"reserved={options['reserved']} interactive_every={options['interactive_interval']}s"
+        )
+        self.stdout.write(
+            f"{'mode':>10} {'inter_n':>8} {'failed':>7} {'p50(s)':>8} {'p99(s)':>8} "
+            f"{'max(s)':>8} {'batch/s':>8}"
+        )
+
+        for label, run in (
+            ("idle", lambda: self._baseline(options)),
+            ("shared", lambda: self._run(0, options)),
+            ("lanes", lambda: self._run(options["reserved"], options)),
+        ):
+            r = run()
+            self.stdout.write(
+                f"{label:>10} {r['interactive']:>8} {r['failed']:>7} {r['p50']:>8.3f} "
+                f"{r['p99']:>8.3f} {r['max']:>8.3f} {r['batch_rate']:>8.2f}"
+            )
@@ -0,0 +1,131 @@
+import multiprocessing
+import time
+import uuid
+from bisect import bisect_right
+from unittest.mock import patch
+
+from django.core.management.base import BaseCommand
+from redis.connection import Connection
+
+from stocks.rate_limit import LeasedTokenBucket, RedisTokenBucket, get_redis_client
+
+
+def _max_tokens_in_window(timestamps, window: float) -> int:
+    """정렬된 grant 시각들에서 길이 window인 구간에 들어가는 최대 개수."""
+    best = 0
+    for i, started in enumerate(timestamps):
+        best = max(best, bisect_right(timestamps, started + window) - i)
+    return best
+
+
+def _worker(mode, options, key, results):
+    # fork된 자식 프로세스: registry는 register_at_fork로 이미 비워져 있다.
+    bucket = RedisTokenBucket(
+        key=key,
+        capacity=options["capacity"],
+        refill_rate_per_sec=options["rate"],
+        redis_url=options["redis_url"],
+    )
+    limiter = (
+        LeasedTokenBucket(bucket, batch_size=options["lease_size"], lease_ttl=options["lease_ttl"])
+        if mode == "lease"
+        else bucket
+    )
+
+    round_trips = [0]
+    original_read_response = Connection.read_response
+
+    def counting_read_response(connection, *args, **kwargs):
+        round_trips[0] += 1
+        return original_read_response(connection, *args, **kwargs)
+
+    grants = []
+    deadline = time.time() + options["duration"]
+    with patch.object(Connection, "read_response", counting_read_response):
+        while time.time() < deadline:
+            # 종목 burst 하나를 처리하고 (burst개 연속 호출) pause만큼 쉰다.
+            for _ in range(options["burst"]):
+                remaining = deadline - time.time()
+                if remaining <= 0 or not limiter.wait_for_slot(timeout=remaining):
+                    break
+                grants.append(time.time())
+            time.sleep(options["pause"])
+        if mode == "lease":
+            limiter.release()
+
+    results.put((grants, round_trips[0]))
+
+
+class Command(BaseCommand):
+    help = (
+        "여러 worker 프로세스가 같은 Finnhub bucket에 burst로 몰릴 때, 직접 호출과 lease 모드의 "
+        "토큰당 Redis 왕복 수와 전역 처리율(REFILL_RATE 초과 여부)을 검증한다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--duration", type=float, default=5.0)
+        parser.add_argument("--capacity", type=int, default=5)
+        parser.add_argument("--rate", type=float, default=20.0)
+        parser.add_argument("--burst", type=int, default=5, help="worker가 한 번에 처리하는 호출 수")
+        parser.add_argument("--pause", type=float, default=1.0, help="burst 사이 휴지(초)")
+        parser.add_argument("--lease-size", type=int, default=5)
+        parser.add_argument("--lease-ttl", type=float, default=1.0)
+
+    def _run(self, mode, options):
+        key = f"rate_limit:bench:lease:{mode}:{uuid.uuid4().hex}"
+        ctx = multiprocessing.get_context("fork")
+        results = ctx.Queue()
+        workers = [
+            ctx.Process(target=_worker, args=(mode, options, key, results))
+            for _ in range(options["workers"])
+        ]
+        for process in workers:
+            process.start()
+        collected = [results.get() for _ in workers]
+        for process in workers:
+            process.join()
+
+        get_redis_client(options["redis_url"]).delete(key)
+
+        grants = sorted(t for worker_grants, _ in collected for t in worker_grants)
+        round_trips = sum(rt for _, rt in collected)
+        return grants, round_trips
+
+    def handle(self, *args, **options):
+        capacity, rate = options["capacity"], options["rate"]
+        self.stdout.write(
+            f"workers={options['workers']} duration={options['duration']}s capacity={capacity} "
+            f"rate={rate}/s burst={options['burst']} pause={options['pause']}s "
+            f"lease_size={options['lease_size']} lease_ttl={options['lease_ttl']}s"
+        )
+        self.stdout.write(
+            f"{'mode':>7} {'tokens':>7} {'rt/token':>9} {'eff_rate':>9} "
+            f"{'max_1s':>7} {'bound_1s':>9} {'max_full':>9} {'bound_full':>11} {'ok':>4}"
+        )
+
+        all_ok = True
+        for mode in ("direct", "lease"):
+            grants, round_trips = self._run(mode, options)
+            n = len(grants)
+            span = options["duration"]
+
+            # token bucket 보장: 길이 W인 어떤 구간에서도 capacity + rate * W 개를 넘지 않는다.
+            ok = True
+            for window in (0.5, 1.0, 2.0, span):
+                if _max_tokens_in_window(grants, window) > capacity + rate * window:
+                    ok = False
+            all_ok = all_ok and ok
+
+            self.stdout.write(
+                f"{mode:>7} {n:>7} {round_trips / n if n else float('nan'):>9.2f} "
+                f"{max(0, n - capacity) / span:>9.2f} "
+                f"{_max_tokens_in_window(grants, 1.0):>7} {capacity + rate:>9.0f} "
+                f"{n:>9} {capacity + rate * span:>11.0f} {'yes' if ok else 'NO':>4}"
+            )
+
+        if all_ok:
+            self.stdout.write(self.style.SUCCESS("global rate never exceeded the bucket bound"))
+        else:
+            self.stdout.write(self.style.ERROR("global rate exceeded the bucket bound"))
@@ -0,0 +1,151 @@
+import statistics
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from stocks.rate_limit import RedisTokenBucket
+
+
+def _count_inversions(grant_order):
+    """요청 순서대로 나열한 grant 시각에서 뒤집힌 쌍의 수 (merge sort, O(n log n))."""
+    if len(grant_order) <= 1:
+        return grant_order, 0
+
+    mid = len(grant_order) // 2
+    left, left_inv = _count_inversions(grant_order[:mid])
+    right, right_inv = _count_inversions(grant_order[mid:])
+
+    merged = []
+    inversions = left_inv + right_inv
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if left[i] <= right[j]:
+            merged.append(left[i])
+            i += 1
+        else:
+            merged.append(right[j])
+            inversions += len(left) - i
+            j += 1
+    merged.extend(left[i:])
+    merged.extend(right[j:])
+    return merged, inversions
+
+
+def _jain_index(values):
+    if not values or not any(values):
+        return 1.0
+    return sum(values) ** 2 / (len(values) * sum(v * v for v in values))
+
+
+class Command(BaseCommand):
+    help = (
+        "RedisTokenBucket 경합 벤치마크: polling(consume 재시도) vs reservation(예약 후 1회 sleep). "
+        "N개 스레드가 같은 bucket에서 토큰을 받으며 토큰당 Redis 명령 수와 공정성(FIFO)을 측정한다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+        parser.add_argument("--threads", type=int, default=20)
+        parser.add_argument("--tokens-per-thread", type=int, default=10)
+        parser.add_argument("--capacity", type=int, default=5)
+        parser.add_argument("--rate", type=float, default=50.0)
+        parser.add_argument("--interval", type=float, default=0.2, help="polling 모드 재시도 간격")
+        parser.add_argument("--timeout", type=float, default=60.0)
+
+    def _run(self, mode, options):
+        bucket = RedisTokenBucket(
+            key=f"rate_limit:bench:{mode}:{uuid.uuid4().hex}",
+            capacity=options["capacity"],
+            refill_rate_per_sec=options["rate"],
+            redis_url=options["redis_url"],
+        )
+
+        # 모든 스레드가 같은 클라이언트(커넥션 풀)를 쓰므로 execute_command를 감싸 Redis 명령 수를 센다.
+        client = bucket.redis_client
+        original_execute = client.execute_command
+        ops = [0]
+        ops_lock = threading.Lock()
+
+        def counting_execute(*args, **kwargs):
+            with ops_lock:
+                ops[0] += 1
+            return original_execute(*args, **kwargs)
+
+        client.execute_command = counting_execute
+
+        acquisitions = []  # (requested_at, granted_at, thread_index)
+        acquisitions_lock = threading.Lock()
+        failures = [0]
+        start_barrier = threading.Barrier(options["threads"])
+
+        def worker(index):
+            start_barrier.wait()
+            for _ in range(options["tokens_per_thread"]):
+                requested_at = time.monotonic()
+                ok = bucket.wait_for_slot(
+                    timeout=options["timeout"],
+                    interval=options["interval"],
+                )
+                granted_at = time.monotonic()
+                with acquisitions_lock:
+                    if ok:
+                        acquisitions.append((requested_at, granted_at, index))
+                    else:
+                        failures[0] += 1
+
+        with override_settings(RATE_LIMIT_RESERVATION_ENABLED=(mode == "reserve")):
+            threads = [
+                threading.Thread(target=worker, args=(i,)) for i in range(options["threads"])
+            ]
+            started = time.monotonic()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - started
+
+        client.execute_command = original_execute
+        client.delete(bucket.key)
+
+        acquisitions.sort()
+        _, inversions = _count_inversions([granted for _, granted, _ in acquisitions])
+        n = len(acquisitions)
+        max_pairs = n * (n - 1) / 2 or 1
+        waits = sorted(granted - requested for requested, granted, _ in acquisitions)
+        per_thread = [0] * options["threads"]
+        for _, _, index in acquisitions:
+            per_thread[index] += 1
+
+        return {
+            "tokens": n,
+            "failed": failures[0],
+            "ops": ops[0],
+            "ops_per_token": ops[0] / n if n else float("nan"),
+            "elapsed": elapsed,
+            "fifo_inversion_ratio": inversions / max_pairs,
+            "wait_p50": statistics.median(waits) if waits else 0.0,
+            "wait_max": waits[-1] if waits else 0.0,
+            "jain": _jain_index(per_thread),
+        }
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"threads={options['threads']} tokens/thread={options['tokens_per_thread']} "
+            f"capacity={options['capacity']} rate={options['rate']}/s redis={options['redis_url']}"
+        )
+        self.stdout.write(
+            f"{'mode':>8} {'tokens':>7} {'failed':>7} {'redis_ops':>10} {'ops/token':>10} "
+            f"{'wall(s)':>8} {'fifo_inv':>9} {'wait_p50':>9} {'wait_max':>9} {'jain':>6}"
+        )
+
+        for mode in ("poll", "reserve"):
+            r = self._run(mode, options)
+            self.stdout.write(
+                f"{mode:>8} {r['tokens']:>7} {r['failed']:>7} {r['ops']:>10} "
+                f"{r['ops_per_token']:>10.2f} {r['elapsed']:>8.2f} "
+                f"{r['fifo_inversion_ratio']:>9.3f} {r['wait_p50']:>9.3f} "
+                f"{r['wait_max']:>9.3f} {r['jain']:>6.3f}"
+            )
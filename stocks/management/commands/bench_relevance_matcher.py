@@ -0,0 +1,112 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from stocks.management.commands.bench_relevance_scoring import build_corpus
+from stocks.utils import FINANCE_KEYWORDS, RelevanceMatcher, get_relevance_matcher
+
+REGRESSION_CORPUS = Path(__file__).resolve().parents[2] / "tests" / "data" / "relevance_regression.json"
+
+
+def legacy_score(symbol, company_name, text, org_entities):
+    """scorer_version 1 규칙 (headline마다 alias를 str.replace로 만들고 부분 문자열로 찾던 방식)."""
+    text_lower = text.lower()
+    symbol_lower = (symbol or "").lower().strip()
+    company_lower = (company_name or "").lower().strip()
+    company_alias = company_lower
+    for suffix in [
+        " inc.", " inc", " corporation", " corp.", " corp",
+        " ltd.", " ltd", " co.", " co", " plc", " holdings",
+    ]:
+        company_alias = company_alias.replace(suffix, "")
+    company_alias = company_alias.strip()
+
+    score = 0
+    reasons = []
+    if symbol_lower and symbol_lower in text_lower:
+        score += 3
+        reasons.append("symbol_match")
+    if company_lower and company_lower in text_lower:
+        score += 3
+        reasons.append("company_match")
+    if company_alias and company_alias != company_lower and company_alias in text_lower:
+        score += 3
+        reasons.append("company_alias_match")
+    if company_lower and any(company_lower in org or org in company_lower for org in org_entities):
+        score += 2
+        reasons.append("org_entity_match")
+    if company_alias and any(company_alias in org or org in company_alias for org in org_entities):
+        score += 2
+        reasons.append("org_alias_match")
+    matched_keywords = [kw for kw in FINANCE_KEYWORDS if kw in text_lower]
+    if matched_keywords:
+        score += 1
+        reasons.append(f"finance_keyword:{','.join(matched_keywords[:2])}")
+    return score, score >= 3, ", ".join(reasons) if reasons else "no_match"
+
+
+class Command(BaseCommand):
+    help = (
+        "관련도 규칙 단계만(NER 제외) 떼어 기존 부분 문자열 방식과 컴파일된 RelevanceMatcher의 "
+        "headlines/s를 비교하고, regression corpus에서 두 방식의 정답률을 출력한다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=20000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def _best_of(self, fn, repeat):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    def handle(self, *args, **options):
+        corpus = [row for row in build_corpus(options["size"], options["seed"]) if row[2]]
+        n = len(corpus)
+        self.stdout.write(f"corpus={n} seed={options['seed']} repeat={options['repeat']}")
+
+        def run_legacy():
+            return [legacy_score(symbol, name, headline, []) for symbol, name, headline in corpus]
+
+        def run_uncached():
+            return [
+                RelevanceMatcher(symbol, name).score(headline, [])
+                for symbol, name, headline in corpus
+            ]
+
+        def run_matcher():
+            return [
+                get_relevance_matcher(symbol, name).score(headline, [])
+                for symbol, name, headline in corpus
+            ]
+
+        self.stdout.write(f"{'path':>16} {'wall(s)':>9} {'headlines/s':>12}")
+        for label, fn in (
+            ("legacy", run_legacy),
+            ("matcher_nocache", run_uncached),
+            ("matcher_lru", run_matcher),
+        ):
+            elapsed = self._best_of(fn, options["repeat"])
+            self.stdout.write(f"{label:>16} {elapsed:>9.3f} {n / elapsed:>12.1f}")
+
+        changed = sum(
+            1 for old, new in zip(run_legacy(), run_matcher()) if old[1] != new[1]
+        )
+        self.stdout.write(f"is_relevant changed on synthetic corpus: {changed}/{n}")
+
+        cases = json.loads(REGRESSION_CORPUS.read_text())
+        for label, score in (
+            ("legacy", lambda c: legacy_score(c["symbol"], c["name"], c["headline"], c["orgs"])),
+            (
+                "matcher",
+                lambda c: get_relevance_matcher(c["symbol"], c["name"]).score(c["headline"], c["orgs"]),
+            ),
+        ):
+            correct = sum(1 for case in cases if score(case)[1] == case["is_relevant"])
+            self.stdout.write(f"regression corpus {label:>8}: {correct}/{len(cases)} is_relevant correct")
@@ -0,0 +1,141 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from stocks import utils
+from stocks.utils import score_news_relevance, score_news_relevance_batch
+
+COMPANIES = [
+    ("AAPL", "Apple Inc."),
+    ("MSFT", "Microsoft Corporation"),
+    ("NVDA", "NVIDIA Corp"),
+    ("AMZN", "Amazon.com Inc."),
+    ("GOOGL", "Alphabet Inc."),
+    ("META", "Meta Platforms Inc."),
+    ("TSLA", "Tesla Inc."),
+    ("JPM", "JPMorgan Chase & Co."),
+    ("NFLX", "Netflix Inc."),
+    ("AMD", "Advanced Micro Devices Inc."),
+    ("INTC", "Intel Corporation"),
+    ("ORCL", "Oracle Corporation"),
+]
+
+TEMPLATES = [
+    "{name} beats quarterly earnings estimates as revenue climbs",
+    "{symbol} shares slide after {other} announces rival product",
+    "Analysts upgrade {name} with a new price target of ${price}",
+    "{other} and {name} sign multi-year cloud partnership",
+    "Why {symbol} stock is moving today",
+    "{name} raises full-year guidance on strong demand",
+    "Federal Reserve holds rates steady; tech stocks mixed",
+    "{other} CEO says AI spending will keep rising through {year}",
+    "{name} to acquire startup in ${price} million deal",
+    "Markets wrap: S&P 500 closes at record high",
+    "{name} faces antitrust probe in Europe",
+    "Dividend watch: {name} declares quarterly payout",
+    "Options traders bet on volatility in {symbol} ahead of earnings",
+    "{other} downgrade weighs on chip sector",
+    "",
+]
+
+
+def build_corpus(size: int, seed: int):
+    """고정 seed로 (symbol, company_name, headline) 목록을 만든다. 매칭/비매칭/빈 제목이 섞인다."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        symbol, name = rng.choice(COMPANIES)
+        _, other = rng.choice(COMPANIES)
+        headline = rng.choice(TEMPLATES).format(
+            name=name.replace(" Inc.", "").replace(" Corporation", ""),
+            symbol=symbol,
+            other=other.split()[0],
+            price=rng.randint(50, 900),
+            year=rng.choice([2025, 2026, 2027]),
+        )
+        corpus.append((symbol, name, headline))
+    return corpus
+
+
+class Command(BaseCommand):
+    help = (
+        "고정 corpus로 score_news_relevance(headline마다 nlp 전체 파이프라인)와 "
+        "score_news_relevance_batch(nlp.pipe + NER만)의 headlines/s를 비교하고 점수가 같은지 확인한다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-sizes", default="16,64,256")
+        parser.add_argument(
+            "--group-size",
+            type=int,
+            default=10,
+            help="배치 호출 1회의 headline 수 (요약 task는 종목당 최대 10건)",
+        )
+
+    def _run_single(self, corpus):
+        return [score_news_relevance(symbol, name, headline) for symbol, name, headline in corpus]
+
+    def _run_batch(self, corpus, batch_size, group_size):
+        # 같은 종목 headline을 group_size개씩 묶어 호출한다 (실제 호출 패턴).
+        results = []
+        for start in range(0, len(corpus), group_size):
+            group = corpus[start:start + group_size]
+            by_company = {}
+            for index, (symbol, name, headline) in enumerate(group):
+                by_company.setdefault((symbol, name), []).append((index, headline))
+
+            group_results = [None] * len(group)
+            for (symbol, name), items in by_company.items():
+                scores = score_news_relevance_batch(
+                    symbol, name, [headline for _, headline in items], batch_size=batch_size
+                )
+                for (index, _), score in zip(items, scores):
+                    group_results[index] = score
+            results.extend(group_results)
+        return results
+
+    def _timed(self, fn):
+        started = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        corpus = build_corpus(options["size"], options["seed"])
+        nlp = utils.get_nlp()
+        disabled = utils._ner_only_disabled_pipes(nlp)
+        self.stdout.write(
+            f"corpus={len(corpus)} seed={options['seed']} pipes={nlp.pipe_names} "
+            f"disabled_in_batch={disabled}"
+        )
+
+        # 모델 warm-up (첫 호출의 lazy 초기화가 측정에 섞이지 않게)
+        self._run_single(corpus[:20])
+        self._run_batch(corpus[:20], 16, options["group_size"])
+
+        baseline, elapsed = self._timed(lambda: self._run_single(corpus))
+        self.stdout.write(f"{'path':>20} {'wall(s)':>9} {'headlines/s':>12} {'identical':>10}")
+        self.stdout.write(f"{'single':>20} {elapsed:>9.3f} {len(corpus) / elapsed:>12.1f} {'-':>10}")
+
+        all_identical = True
+        for batch_size in [int(v) for v in options["batch_sizes"].split(",")]:
+            for label, group_size in (
+                (f"batch bs={batch_size} g={options['group_size']}", options["group_size"]),
+                (f"batch bs={batch_size} g=all", len(corpus)),
+            ):
+                scores, elapsed = self._timed(
+                    lambda: self._run_batch(corpus, batch_size, group_size)
+                )
+                identical = scores == baseline
+                all_identical = all_identical and identical
+                self.stdout.write(
+                    f"{label:>20} {elapsed:>9.3f} {len(corpus) / elapsed:>12.1f} "
+                    f"{'yes' if identical else 'NO':>10}"
+                )
+
+        if all_identical:
+            self.stdout.write(self.style.SUCCESS("batched scores identical to single-call scores"))
+        else:
+            self.stdout.write(self.style.ERROR("batched scores differ from single-call scores"))
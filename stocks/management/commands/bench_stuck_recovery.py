@@ -0,0 +1,126 @@
+import time
+import uuid
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from stocks.models import Stock, SummaryJob
+from stocks.tasks import (
+    MAX_STUCK_RECOVERY_RETRIES,
+    RUNNING_EXEC_TIMEOUT,
+    QUEUE_START_TIMEOUT,
+    _get_retry_backoff_minutes,
+    recover_stuck_summary_jobs,
+)
+
+
+def legacy_recover(now):
+    """set-based 복구 이전 방식: stuck job을 읽고 job마다 조건부 UPDATE를 1번씩 보낸다."""
+    stuck_jobs = SummaryJob.objects.filter(
+        status=SummaryJob.Status.RUNNING,
+        finished_at__isnull=True,
+    ).filter(
+        Q(started_at__isnull=True, dispatched_at__isnull=False, dispatched_at__lte=now - QUEUE_START_TIMEOUT)
+        | Q(started_at__isnull=False, started_at__lte=now - RUNNING_EXEC_TIMEOUT)
+    ).values("id", "retry_count", "lease_token")
+
+    recovered = 0
+    for job in list(stuck_jobs):
+        if job["lease_token"] is None:
+            continue
+        lease = SummaryJob.objects.filter(
+            id=job["id"],
+            status=SummaryJob.Status.RUNNING,
+            lease_token=job["lease_token"],
+            finished_at__isnull=True,
+        )
+        if job["retry_count"] >= MAX_STUCK_RECOVERY_RETRIES:
+            recovered += lease.update(
+                status=SummaryJob.Status.FAILED,
+                finished_at=now,
+                error_message="stuck timeout exceeded max retries",
+            )
+            continue
+        recovered += lease.update(
+            status=SummaryJob.Status.RETRY_WAIT,
+            retry_count=job["retry_count"] + 1,
+            retry_at=now + timedelta(minutes=_get_retry_backoff_minutes(job["retry_count"])),
+            started_at=None,
+            finished_at=None,
+            dispatched_at=None,
+            lease_token=None,
+            error_message="stuck timeout recovery",
+        )
+    return recovered
+
+
+class Command(BaseCommand):
+    help = (
+        "worker 장애 직후처럼 RUNNING에 멈춘 SummaryJob --jobs개를 retry_count를 섞어 만든 뒤, "
+        "job마다 UPDATE하던 이전 복구와 retry bucket별 set-based 복구의 실행 시간/쿼리 수를 비교한다. "
+        "DB 변경은 롤백한다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=10000)
+        parser.add_argument("--stocks", type=int, default=500, help="job을 나눠 가질 종목 수 (나머지는 날짜로 나눈다)")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def _seed(self, options):
+        stocks = Stock.objects.bulk_create(
+            [Stock(symbol=f"BSTK{i}", name=f"Bench {i}", exchange="TEST") for i in range(options["stocks"])]
+        )
+        now = timezone.now()
+        today = timezone.localdate()
+        jobs = []
+        for i in range(options["jobs"]):
+            queued = i % 2 == 0
+            jobs.append(
+                SummaryJob(
+                    stock=stocks[i % len(stocks)],
+                    date=today - timedelta(days=i // len(stocks)),
+                    status=SummaryJob.Status.RUNNING,
+                    lease_token=uuid.uuid4(),
+                    retry_count=i % (MAX_STUCK_RECOVERY_RETRIES + 1),
+                    dispatched_at=now - QUEUE_START_TIMEOUT - timedelta(minutes=1),
+                    started_at=None if queued else now - RUNNING_EXEC_TIMEOUT - timedelta(minutes=1),
+                )
+            )
+        SummaryJob.objects.bulk_create(jobs, batch_size=1000)
+
+    def _run(self, label, func):
+        timings = []
+        queries = recovered = 0
+        for _ in range(self.options["repeat"]):
+            sid = transaction.savepoint()
+            executed = []
+            # query log는 9000개에서 잘리므로 execute_wrapper로 직접 센다.
+            with connection.execute_wrapper(lambda execute, *args: executed.append(1) or execute(*args)):
+                started = time.perf_counter()
+                recovered = func()
+                timings.append(time.perf_counter() - started)
+            queries = len(executed)
+            transaction.savepoint_rollback(sid)
+        self.stdout.write(
+            f"{label:>10} {recovered:>8} {queries:>8} {min(timings):>10.3f} {sum(timings) / len(timings):>10.3f}"
+        )
+
+    def _set_based(self):
+        result = recover_stuck_summary_jobs()
+        return len(result["recovered_job_ids"]) + len(result["failed_job_ids"])
+
+    def handle(self, *args, **options):
+        self.options = options
+        with transaction.atomic():
+            self._seed(options)
+            self.stdout.write(f"vendor={connection.vendor} stuck_jobs={options['jobs']} repeat={options['repeat']}")
+            self.stdout.write(f"{'mode':>10} {'rows':>8} {'queries':>8} {'min(s)':>10} {'avg(s)':>10}")
+            self._run("per-row", lambda: legacy_recover(timezone.now()))
+            # Redis slot 반환/reconcile은 측정에서 뺀다 — 두 방식 모두 같은 비용이다.
+            with patch("stocks.tasks.get_dispatch_controller", return_value=None):
+                self._run("set-based", self._set_based)
+            transaction.set_rollback(True)
@@ -0,0 +1,104 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from stocks.metrics import (
+    SummaryJobDispatchWaitSecondsCollector,
+    SummaryJobQueueWaitSecondsCollector,
+    TERMINAL_STATUSES,
+    _duration_stats,
+)
+from stocks.models import Stock, SummaryJob
+from stocks.tasks import request_summary_dispatch
+
+BENCH_SYMBOL_PREFIX = "BDSP"
+
+
+class Command(BaseCommand):
+    help = (
+        "실행 중인 Celery worker/beat를 대상으로 SummaryJob을 --duration초에 걸쳐 무작위 간격으로 만들고, "
+        "PENDING→RUNNING(created_at→dispatched_at)과 queue wait(dispatched_at→started_at)을 잰다. "
+        "SUMMARY_DISPATCH_EVENT_DRIVEN_ENABLED를 바꿔 beat polling과 이벤트 dispatch를 비교한다. "
+        "OPENAI_API_KEY를 비워 두면 job은 LLM 호출 없이 바로 FAILED로 끝난다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=20)
+        parser.add_argument("--duration", type=float, default=120.0, help="job 생성을 흩뿌릴 시간(초)")
+        parser.add_argument("--timeout", type=float, default=300.0, help="모든 job이 끝나기를 기다릴 최대 시간(초)")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--keep", action="store_true", help="bench job/stock을 지우지 않는다")
+
+    def _create_jobs(self, count, duration, seed):
+        rng = random.Random(seed)
+        offsets = sorted(rng.uniform(0, duration) for _ in range(count))
+        started = time.monotonic()
+        today = timezone.localdate()
+        job_ids = []
+        for index, offset in enumerate(offsets):
+            time.sleep(max(0.0, offset - (time.monotonic() - started)))
+            stock, _ = Stock.objects.get_or_create(
+                symbol=f"{BENCH_SYMBOL_PREFIX}{index}", defaults={"name": "Bench Dispatch"}
+            )
+            # fetch_favorite_news의 job 생성과 같은 경로: 커밋 뒤 dispatch를 깨운다.
+            with transaction.atomic():
+                job = SummaryJob.objects.create(stock=stock, date=today, status=SummaryJob.Status.PENDING)
+                request_summary_dispatch()
+            job_ids.append(job.id)
+        return job_ids
+
+    def _wait_finished(self, job_ids, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            remaining = SummaryJob.objects.filter(id__in=job_ids).exclude(status__in=TERMINAL_STATUSES).count()
+            if remaining == 0:
+                return 0
+            time.sleep(0.5)
+        return remaining
+
+    def _stats(self, job_ids, start_field, end_field):
+        values = [
+            (end - start).total_seconds()
+            for start, end in SummaryJob.objects.filter(
+                id__in=job_ids, retry_count=0, **{f"{start_field}__isnull": False, f"{end_field}__isnull": False}
+            ).values_list(start_field, end_field)
+            if end >= start
+        ]
+        return len(values), _duration_stats(values)
+
+    def handle(self, *args, **options):
+        from django.conf import settings
+
+        self.stdout.write(
+            f"jobs={options['jobs']} duration={options['duration']}s "
+            f"event_driven={getattr(settings, 'SUMMARY_DISPATCH_EVENT_DRIVEN_ENABLED', True)} "
+            f"sweep_minutes={getattr(settings, 'SUMMARY_DISPATCH_SWEEP_MINUTES', 5)}"
+        )
+        SummaryJob.objects.filter(stock__symbol__startswith=BENCH_SYMBOL_PREFIX).delete()
+
+        job_ids = self._create_jobs(options["jobs"], options["duration"], options["seed"])
+        remaining = self._wait_finished(job_ids, options["timeout"])
+        if remaining:
+            self.stdout.write(self.style.WARNING(f"{remaining} jobs not finished within timeout"))
+
+        self.stdout.write(f"{'interval':>26} {'n':>4} {'avg(s)':>8} {'p95(s)':>8} {'max(s)':>8}")
+        for label, start_field, end_field in (
+            ("pending->running", "created_at", "dispatched_at"),
+            ("queue wait", "dispatched_at", "started_at"),
+        ):
+            n, stats = self._stats(job_ids, start_field, end_field)
+            self.stdout.write(
+                f"{label:>26} {n:>4} {stats['avg']:>8.3f} {stats['p95']:>8.3f} {stats['max']:>8.3f}"
+            )
+
+        # 같은 값을 운영에서 보는 collector 기준으로도 출력한다 (DB 전체의 1회차 종료 job 대상).
+        for collector in (SummaryJobDispatchWaitSecondsCollector(), SummaryJobQueueWaitSecondsCollector()):
+            for metric in collector.collect():
+                values = " ".join(f"{s.labels['stat']}={s.value:.3f}" for s in metric.samples)
+                self.stdout.write(f"{metric.name} {values}")
+
+        if not options["keep"]:
+            Stock.objects.filter(symbol__startswith=BENCH_SYMBOL_PREFIX).delete()
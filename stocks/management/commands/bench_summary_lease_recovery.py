@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import signal
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import override_settings
+from django.utils import timezone
+
+from stocks.heartbeat import LeaseHeartbeat, lease_expiry
+from stocks.models import Stock, SummaryJob
+from stocks.tasks import RUNNING_EXEC_TIMEOUT, recover_stuck_summary_jobs
+
+BENCH_SYMBOL_PREFIX = "BLSE"
+
+
+def _hold_lease(job_id, lease_token, seconds):
+    """worker 대신: heartbeat를 켜 두고 LLM 호출처럼 seconds초 동안 잡고 있는다."""
+    with LeaseHeartbeat(job_id, lease_token):
+        time.sleep(seconds)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "heartbeat를 보내는 worker 프로세스 두 개로 RUNNING SummaryJob을 잡고, 하나는 중간에 SIGKILL, "
+        "다른 하나는 lease보다 훨씬 오래(느린 LLM 호출) 돌게 한 뒤 recovery를 주기적으로 돌려 "
+        "장애 job의 회수 시간과 느린 job의 오회수 여부를 잰다. 여러 프로세스가 같은 DB를 써야 하므로 "
+        "SQLite 파일이나 PostgreSQL 설정으로 실행한다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=1.0, help="heartbeat 간격(초)")
+        parser.add_argument("--lease-seconds", type=float, default=4.0)
+        parser.add_argument("--recovery-interval", type=float, default=2.0)
+        parser.add_argument("--crash-after", type=float, default=3.0, help="장애 worker를 죽일 시점(초)")
+        parser.add_argument("--slow-seconds", type=float, default=15.0, help="느린 worker가 lease를 잡는 시간(초)")
+
+    def _start_job(self, symbol):
+        stock, _ = Stock.objects.get_or_create(symbol=symbol, defaults={"name": "Bench Lease"})
+        now = timezone.now()
+        return SummaryJob.objects.create(
+            stock=stock,
+            date=timezone.localdate(),
+            status=SummaryJob.Status.RUNNING,
+            lease_token=uuid.uuid4(),
+            dispatched_at=now,
+            started_at=now,
+            lease_expires_at=lease_expiry(now),
+        )
+
+    def handle(self, *args, **options):
+        with override_settings(
+            SUMMARY_JOB_HEARTBEAT_ENABLED=True,
+            SUMMARY_JOB_HEARTBEAT_INTERVAL_SECONDS=options["interval"],
+            SUMMARY_JOB_LEASE_SECONDS=options["lease_seconds"],
+        ):
+            self._run(options)
+
+    def _run(self, options):
+        Stock.objects.filter(symbol__startswith=BENCH_SYMBOL_PREFIX).delete()
+        crashed = self._start_job(f"{BENCH_SYMBOL_PREFIX}CRASH")
+        slow = self._start_job(f"{BENCH_SYMBOL_PREFIX}SLOW")
+
+        # 자식이 부모의 DB 연결을 물려받지 않게 닫고 fork한다.
+        connections.close_all()
+        ctx = multiprocessing.get_context("fork")
+        workers = {
+            "crashed": ctx.Process(target=_hold_lease, args=(crashed.id, crashed.lease_token, 3600)),
+            "slow": ctx.Process(target=_hold_lease, args=(slow.id, slow.lease_token, options["slow_seconds"])),
+        }
+        for worker in workers.values():
+            worker.start()
+
+        started = time.monotonic()
+        killed_at = crashed_recovered_at = None
+        slow_reclaimed = False
+        next_recovery = started
+        try:
+            while time.monotonic() - started < options["slow_seconds"] + 1:
+                now = time.monotonic()
+                if killed_at is None and now - started >= options["crash_after"]:
+                    os.kill(workers["crashed"].pid, signal.SIGKILL)
+                    killed_at = now
+                if now >= next_recovery:
+                    result = recover_stuck_summary_jobs()
+                    recovered = set(result["recovered_job_ids"]) | set(result["failed_job_ids"])
+                    if crashed.id in recovered and crashed_recovered_at is None:
+                        crashed_recovered_at = time.monotonic()
+                    slow_reclaimed = slow_reclaimed or slow.id in recovered
+                    next_recovery = now + options["recovery_interval"]
+                time.sleep(0.05)
+        finally:
+            for worker in workers.values():
+                if worker.is_alive():
+                    worker.kill()
+                worker.join()
+
+        slow.refresh_from_db()
+        self.stdout.write(
+            f"heartbeat={options['interval']}s lease={options['lease_seconds']}s "
+            f"recovery_every={options['recovery_interval']}s"
+        )
+        if crashed_recovered_at is None:
+            self.stdout.write(self.style.WARNING("crashed job was not recovered"))
+        else:
+            self.stdout.write(f"crashed job recovered {crashed_recovered_at - killed_at:.1f}s after SIGKILL")
+        self.stdout.write(
+            f"slow job ran {options['slow_seconds']:.0f}s (> lease) reclaimed={slow_reclaimed} "
+            f"final_status={slow.status}"
+        )
+        self.stdout.write(
+            f"fixed timeout (no heartbeat) would recover after {RUNNING_EXEC_TIMEOUT.total_seconds():.0f}s "
+            f"+ up to one recovery interval"
+        )
+        Stock.objects.filter(symbol__startswith=BENCH_SYMBOL_PREFIX).delete()
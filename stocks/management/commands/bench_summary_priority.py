@@ -0,0 +1,132 @@
+import heapq
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from stocks.metrics import _duration_stats
+from stocks.models import FavoriteStock, Stock, SummaryJob
+from stocks.services import summary_job_priorities, summary_job_priority_fields
+from stocks.tasks import _ready_summary_jobs
+from subscriptions.models import Subscription
+
+
+class Command(BaseCommand):
+    help = (
+        "관심 사용자 수가 Zipf 분포인 종목들의 SummaryJob이 아침 burst로 몰릴 때, "
+        "실제 dispatch pick 쿼리로 FIFO(created_at)와 우선순위(dispatch_key) 순서를 모의 실행해 "
+        "인기 종목/전체/최저 우선순위 job의 time-to-summary를 비교한다. DB 변경은 롤백한다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stocks", type=int, default=200)
+        parser.add_argument("--max-watchers", type=int, default=500, help="가장 인기 있는 종목의 관심 사용자 수")
+        parser.add_argument("--pro-share", type=float, default=0.05, help="PRO 구독 사용자 비율")
+        parser.add_argument("--burst-seconds", type=float, default=120.0, help="job 도착을 흩뿌리는 시간")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--service-seconds", type=float, default=8.0, help="job 1건 LLM 처리 시간")
+        parser.add_argument("--top-share", type=float, default=0.1, help="인기 종목으로 볼 상위 비율")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def _seed_audience(self, options, rng):
+        User = get_user_model()
+        users = User.objects.bulk_create(
+            [User(email=f"bench-priority-{i}@example.com") for i in range(options["max_watchers"])]
+        )
+        Subscription.objects.bulk_create(
+            [
+                Subscription(user=user, plan=Subscription.Plan.PRO)
+                for user in users
+                if rng.random() < options["pro_share"]
+            ]
+        )
+        stocks = Stock.objects.bulk_create(
+            [Stock(symbol=f"BPRI{i}", name=f"Bench {i}", exchange="TEST") for i in range(options["stocks"])]
+        )
+        favorites = []
+        for rank, stock in enumerate(stocks):
+            watchers = max(1, options["max_watchers"] // (rank + 1))
+            favorites.extend(FavoriteStock(user=user, stock=stock) for user in rng.sample(users, watchers))
+        FavoriteStock.objects.bulk_create(favorites, batch_size=1000)
+        return stocks
+
+    def _simulate(self, stocks, priorities, arrivals, order_field, options):
+        """arrivals: [(도착 초, stock)]. 반환: {stock_id: time-to-summary 초}"""
+        base = timezone.now()
+        SummaryJob.objects.filter(stock__in=stocks).delete()
+        jobs = []
+        for offset, stock in arrivals:
+            enqueued_at = base + timedelta(seconds=offset)
+            job = SummaryJob(stock=stock, date=base.date(), status=SummaryJob.Status.PENDING)
+            for field, value in summary_job_priority_fields(priorities[stock.id], enqueued_at).items():
+                setattr(job, field, value)
+            jobs.append((offset, job))
+
+        pending = list(jobs)
+        running = []  # (완료 시각, job id, stock_id)
+        arrived_at = {job.stock_id: offset for offset, job in jobs}
+        done = {}
+        clock = 0.0
+        while pending or running:
+            # 지금까지 도착한 job을 넣고, 빈 slot만큼 실제 pick 쿼리로 고른다.
+            while pending and pending[0][0] <= clock:
+                pending.pop(0)[1].save()
+            free = options["concurrency"] - len(running)
+            if free > 0:
+                picked = list(
+                    _ready_summary_jobs(base + timedelta(seconds=clock))
+                    .filter(stock__in=stocks)
+                    .order_by(order_field, "id")
+                    .values_list("id", "stock_id")[:free]
+                )
+                SummaryJob.objects.filter(id__in=[job_id for job_id, _ in picked]).update(
+                    status=SummaryJob.Status.RUNNING
+                )
+                for job_id, stock_id in picked:
+                    heapq.heappush(running, (clock + options["service_seconds"], job_id, stock_id))
+
+            next_arrival = pending[0][0] if pending else float("inf")
+            next_finish = running[0][0] if running else float("inf")
+            clock = min(next_arrival, next_finish)
+            while running and running[0][0] <= clock:
+                finished_at, job_id, stock_id = heapq.heappop(running)
+                SummaryJob.objects.filter(id=job_id).update(status=SummaryJob.Status.SUCCESS)
+                done[stock_id] = finished_at - arrived_at[stock_id]
+        return done
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        with transaction.atomic():
+            stocks = self._seed_audience(options, rng)
+            priorities = summary_job_priorities([stock.id for stock in stocks])
+            arrivals = sorted(
+                (rng.uniform(0, options["burst_seconds"]), stock) for stock in stocks
+            )
+            top = {stock.id for stock in stocks[: max(1, int(len(stocks) * options["top_share"]))]}
+            lowest = min(priorities.values())
+            bottom = {stock_id for stock_id, priority in priorities.items() if priority == lowest}
+
+            self.stdout.write(
+                f"stocks={len(stocks)} concurrency={options['concurrency']} "
+                f"service={options['service_seconds']}s burst={options['burst_seconds']}s "
+                f"priority min/max={lowest}/{max(priorities.values())}s"
+            )
+            self.stdout.write(
+                f"{'order':>12} {'group':>14} {'n':>4} {'avg(s)':>8} {'p95(s)':>8} {'max(s)':>8}"
+            )
+            for label, order_field in (("fifo", "created_at"), ("priority", "dispatch_key")):
+                done = self._simulate(stocks, priorities, arrivals, order_field, options)
+                for group, ids in (
+                    (f"top {options['top_share']:.0%}", top),
+                    ("all", set(done)),
+                    ("lowest prio", bottom),
+                ):
+                    stats = _duration_stats([done[stock_id] for stock_id in ids])
+                    self.stdout.write(
+                        f"{label:>12} {group:>14} {len(ids):>4} {stats['avg']:>8.1f} "
+                        f"{stats['p95']:>8.1f} {stats['max']:>8.1f}"
+                    )
+            transaction.set_rollback(True)
@@ -1,87 +1,51 @@
-import asyncio
-import aiohttp
-from datetime import datetime, timedelta
 from django.core.management.base import BaseCommand
-from stocks.models import Stock, News, Price
-from decouple import config
-from asgiref.sync import sync_to_async
-from django.utils import timezone
 
-API_KEY = config("FINNHUB_API_KEY")
-BASE_URL = 'https://finnhub.io/api/v1'
+from stocks.ingest import run_ingest
+from stocks.models import Stock
 
-@sync_to_async
-def get_favorited_stocks():
-    return list(Stock.objects.filter(favorited_by__isnull=False).distinct())
-
-@sync_to_async
-def save_news(stock, news):
-    # 뉴스 시간 변환 + 타임존 aware 처리
-    published_time = datetime.utcfromtimestamp(news.get("datetime"))
-    published_time = timezone.make_aware(published_time, timezone.utc)
-
-    News.objects.get_or_create(
-        stock=stock,
-        headline=news.get("headline", "")[:500],
-        published_at=published_time,
-        defaults={
-            'url': news.get("url"),
-            'source': news.get("source"),
-            'raw_json': news
-        }
-    )
-
-@sync_to_async
-def save_price(stock, price_data):
-    # 주가 시간도 timezone aware 처리
-    timestamp = timezone.make_aware(datetime.utcnow(), timezone.utc)
-
-    Price.objects.create(
-        stock=stock,
-        price=price_data.get("c", 0.0),
-        change_percent=price_data.get("dp"),
-        timestamp=timestamp
-    )
-
-async def fetch_data(session, stock):
-    symbol = stock.symbol
-    today = datetime.utcnow().date()
-    from_date = today - timedelta(days=1)
-
-    news_url = f"{BASE_URL}/company-news?symbol={symbol}&from={from_date}&to={today}&token={API_KEY}"
-    price_url = f"{BASE_URL}/quote?symbol={symbol}&token={API_KEY}"
-
-    try:
-        async with session.get(news_url) as news_response, session.get(price_url) as price_response:
-            news_data = await news_response.json()
-            price_data = await price_response.json()
-
-            for news in news_data:
-                await save_news(stock, news)
-
-            await save_price(stock, price_data)
-
-            print(f"{symbol} 데이터 저장 완료.")
-
-    except Exception as e:
-        print(f"{symbol} 데이터 수집 오류:", e)
-
-async def main():
-    stocks = await get_favorited_stocks()
-    batch_size = 30
-    delay_per_batch = 60
-
-    async with aiohttp.ClientSession() as session:
-        for i in range(0, len(stocks), batch_size):
-            batch = stocks[i:i+batch_size]
-            tasks = [fetch_data(session, stock) for stock in batch]
-            await asyncio.gather(*tasks)
-            print(f"Batch {i//batch_size + 1} 완료. 대기 중...")
-            if i + batch_size < len(stocks):
-                await asyncio.sleep(delay_per_batch)
 
 class Command(BaseCommand):
-    help = "Fetch and store stock news and prices from Finnhub"
-
-    def handle(self, *args, **kwargs):
-        asyncio.run(main())
+    help = "Fetch and store stock news and prices from Finnhub (async ingestion engine)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=1)
+        parser.add_argument("--concurrency", type=int, default=None)
+        parser.add_argument(
+            "--symbols",
+            default="",
+            help="쉼표로 구분한 종목 (기본: 즐겨찾기된 전체 종목)",
+        )
+
+    def handle(self, *args, **options):
+        symbols = [s.strip().upper() for s in options["symbols"].split(",") if s.strip()]
+
+        if symbols:
+            stocks = Stock.objects.filter(symbol__in=symbols)
+        else:
+            stocks = Stock.objects.filter(favorited_by__isnull=False).distinct()
+
+        outcomes = run_ingest(
+            stocks,
+            days=options["days"],
+            concurrency=options["concurrency"],
+        )
+
+        failed = 0
+        for outcome in outcomes:
+            if "error" in outcome:
+                failed += 1
+                self.stdout.write(
+                    self.style.ERROR(f"failed {outcome['symbol']}: {outcome['error']}")
+                )
+                continue
+
+            result = outcome["result"]
+            self.stdout.write(
+                f"{outcome['symbol']} created_news={result['created_news']} "
+                f"linked_pairs={result['linked_pairs']} skipped={result['skipped']} "
+                f"watermark_skipped={result['watermark_skipped']}"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"done symbols={len(outcomes)} failed={failed}")
+        )
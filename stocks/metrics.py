@@ -28,6 +28,25 @@ API_REQUEST_LATENCY_SECONDS = Histogram(
     buckets=(0.01, 0.03, 0.05, 0.1, 0.2, 0.3, 0.5, 1, 2, 5),
 )
 
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "stockq_rate_limit_wait_seconds",
+    "Time spent waiting for a token bucket slot by priority lane",
+    ["bucket", "priority", "outcome"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 15),
+)
+
+NER_CACHE_LOOKUPS_TOTAL = Counter(
+    "stockq_ner_cache_lookups_total",
+    "Headline ORG entity lookups against the per-News NER cache",
+    ["result"],
+)
+
+CIRCUIT_BREAKER_REJECTED_TOTAL = Counter(
+    "stockq_circuit_breaker_rejected_total",
+    "Upstream calls failed fast because the circuit breaker was open",
+    ["upstream"],
+)
+
 def _percentile(values, p: float) -> float:
     if not values:
         return 0.0
@@ -122,6 +141,40 @@ class SummaryJobQueueWaitSecondsCollector(Collector):
         return []
 
 
+class SummaryJobDispatchWaitSecondsCollector(Collector):
+    def collect(self):
+        metric = GaugeMetricFamily(
+            "summary_job_dispatch_wait_seconds",
+            "PENDING-to-RUNNING wait stats in seconds (created_at to dispatched_at) for first-attempt finished SummaryJobs",
+            labels=["stat"],
+        )
+
+        rows = (
+            SummaryJob.objects
+            .filter(
+                status__in=TERMINAL_STATUSES,
+                retry_count=0,
+                dispatched_at__isnull=False,
+            )
+            .values_list("created_at", "dispatched_at")
+        )
+
+        values = []
+        for created_at, dispatched_at in rows:
+            if dispatched_at >= created_at:
+                values.append((dispatched_at - created_at).total_seconds())
+
+        stats = _duration_stats(values)
+
+        for stat_name, value in stats.items():
+            metric.add_metric([stat_name], value)
+
+        yield metric
+
+    def describe(self):
+        return []
+
+
 class SummaryJobTotalElapsedSecondsCollector(Collector):
     def collect(self):
         metric = GaugeMetricFamily(
@@ -156,6 +209,43 @@ class SummaryJobTotalElapsedSecondsCollector(Collector):
         return []
 
 
+class SummaryJobTimeToSummaryByPriorityCollector(Collector):
+    def collect(self):
+        metric = GaugeMetricFamily(
+            "summary_job_time_to_summary_seconds",
+            "Enqueue-to-success stats in seconds for SummaryJobs by dispatch priority tier",
+            labels=["priority", "stat"],
+        )
+
+        max_priority = getattr(settings, "SUMMARY_JOB_PRIORITY_MAX_SECONDS", 3600)
+        rows = (
+            SummaryJob.objects
+            .filter(status=SummaryJob.Status.SUCCESS, finished_at__isnull=False)
+            .values_list("priority", "created_at", "finished_at")
+        )
+
+        values = {"none": [], "low": [], "high": []}
+        for priority, created_at, finished_at in rows:
+            if finished_at < created_at:
+                continue
+            if priority == 0:
+                tier = "none"
+            elif priority * 2 < max_priority:
+                tier = "low"
+            else:
+                tier = "high"
+            values[tier].append((finished_at - created_at).total_seconds())
+
+        for tier, tier_values in values.items():
+            for stat_name, value in _duration_stats(tier_values).items():
+                metric.add_metric([tier, stat_name], value)
+
+        yield metric
+
+    def describe(self):
+        return []
+
+
 class SummaryJobStuckTotalCollector(Collector):
     def collect(self):
         metric = GaugeMetricFamily(
@@ -229,4 +319,124 @@ class SummaryJobsOldestPendingSecondsCollector(Collector):
         yield metric
 
     def describe(self):
-        return []
\ No newline at end of file
+        return []
+
+class FinnhubBucketEffectiveRateCollector(Collector):
+    def collect(self):
+        if not getattr(settings, "FINNHUB_BUCKET_ENABLED", True):
+            return
+
+        from redis.exceptions import RedisError
+
+        from .rate_limit import LeasedTokenBucket, get_finnhub_bucket
+
+        bucket = get_finnhub_bucket()
+        if isinstance(bucket, LeasedTokenBucket):
+            bucket = bucket.bucket
+
+        try:
+            rate = bucket.effective_rate()
+        except RedisError:
+            return
+
+        metric = GaugeMetricFamily(
+            "finnhub_bucket_effective_rate",
+            "Current Finnhub token bucket refill rate per second (AIMD-adjusted)",
+        )
+        metric.add_metric([], rate)
+        yield metric
+
+        ceiling = GaugeMetricFamily(
+            "finnhub_bucket_rate_ceiling",
+            "Configured Finnhub token bucket refill rate per second",
+        )
+        ceiling.add_metric([], float(bucket.refill_rate_per_sec))
+        yield ceiling
+
+    def describe(self):
+        return []
+
+
+class CircuitBreakerCollector(Collector):
+    def collect(self):
+        from redis.exceptions import RedisError
+
+        from .circuit_breaker import STATES, get_circuit_breaker
+
+        state_metric = GaugeMetricFamily(
+            "circuit_breaker_state",
+            "Current circuit breaker state per upstream (1 for the active state)",
+            labels=["upstream", "state"],
+        )
+        trips_metric = CounterMetricFamily(
+            "circuit_breaker_trips",
+            "Number of times the circuit breaker opened per upstream",
+            labels=["upstream"],
+        )
+
+        for upstream in ("finnhub", "openai"):
+            breaker = get_circuit_breaker(upstream)
+            if breaker is None:
+                return
+            try:
+                current, trips = breaker.snapshot()
+            except RedisError:
+                continue
+
+            for state in STATES:
+                state_metric.add_metric([upstream, state], 1 if state == current else 0)
+            trips_metric.add_metric([upstream], trips)
+
+        yield state_metric
+        yield trips_metric
+
+    def describe(self):
+        return []
+
+
+class SummaryDispatchCollector(Collector):
+    def collect(self):
+        from redis.exceptions import RedisError
+
+        from .dispatch_control import get_dispatch_controller
+
+        backlog = GaugeMetricFamily(
+            "summary_dispatch_ready_backlog",
+            "SummaryJob rows ready to dispatch (pending or retry_wait past retry_at)",
+        )
+        backlog.add_metric(
+            [],
+            SummaryJob.objects.filter(
+                Q(status=SummaryJob.Status.PENDING)
+                | Q(status=SummaryJob.Status.RETRY_WAIT, retry_at__lte=timezone.now())
+            ).count(),
+        )
+        yield backlog
+
+        controller = get_dispatch_controller()
+        if controller is None:
+            return
+        try:
+            snapshot = controller.snapshot()
+        except RedisError:
+            return
+
+        dispatched = CounterMetricFamily(
+            "summary_dispatch_dispatched",
+            "SummaryJobs handed to workers by dispatch_summary_jobs",
+        )
+        dispatched.add_metric([], snapshot.dispatched_total)
+        yield dispatched
+
+        for name, documentation, value in (
+            ("summary_dispatch_inflight", "Dispatch slots currently held by running SummaryJobs", snapshot.inflight),
+            ("summary_dispatch_inflight_limit", "Current adaptive in-flight limit for summary dispatch", snapshot.max_inflight),
+            ("summary_dispatch_llm_latency_seconds", "EWMA of OpenAI call latency used by the dispatch limit", snapshot.llm_latency_seconds),
+            ("summary_dispatch_recent_rejections", "OpenAI bucket/429 rejections in the current backoff window", snapshot.recent_rejections),
+        ):
+            metric = GaugeMetricFamily(name, documentation)
+            metric.add_metric([], value)
+            yield metric
+
+    def describe(self):
+        return []
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0018_stock_logo_url_stock_profile_fetched_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsIngestWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_published_at', models.DateTimeField(blank=True, null=True)),
+                ('recent_hashes', models.JSONField(blank=True, default=dict)),
+                ('last_success_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('stock', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='news_watermark', to='stocks.stock')),
+            ],
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0020_ingestjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsstock',
+            name='is_relevant',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='newsstock',
+            name='relevance_reason',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='newsstock',
+            name='relevance_score',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='newsstock',
+            name='scorer_version',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='newsstock',
+            index=models.Index(fields=['stock', 'is_relevant'], name='stocks_news_stock_i_6937d9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsstock',
+            index=models.Index(fields=['scorer_version'], name='stocks_news_scorer__f44d50_idx'),
+        ),
+    ]
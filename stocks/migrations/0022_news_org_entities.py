@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0021_newsstock_relevance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='ner_version',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='org_entities',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:25
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_dispatch_key(apps, schema_editor):
+    # 기존 job은 우선순위 0으로 보고 예전 순서(created_at)를 그대로 유지한다.
+    SummaryJob = apps.get_model("stocks", "SummaryJob")
+    SummaryJob.objects.update(dispatch_key=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0022_news_org_entities'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='summaryjob',
+            name='dispatch_key',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='summaryjob',
+            name='priority',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_dispatch_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='summaryjob',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'retry_wait'])), fields=['dispatch_key'], name='summary_job_ready_dispatch_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 # stocks/models.py
+import uuid
+
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
@@ -58,6 +60,11 @@ class News(models.Model):
     language = models.CharField(max_length=8, blank=True, default="en")
     raw_json = models.JSONField(blank=True, null=True)
 
+    # headline NER 결과(ORG 엔티티, 소문자) 캐시. 여러 종목에 링크된 같은 기사는 NER을 한 번만 돌린다.
+    # ner_version(모델 이름@버전)이 현재 모델과 다르면 캐시 미스로 보고 다시 계산한다.
+    org_entities = models.JSONField(blank=True, null=True)
+    ner_version = models.CharField(max_length=64, blank=True, default="")
+
     # 관계
     stocks = models.ManyToManyField(
         Stock, through="NewsStock", related_name="news"
@@ -78,14 +85,47 @@ class NewsStock(models.Model):
     news = models.ForeignKey(News, on_delete=models.CASCADE)
     stock = models.ForeignKey(Stock, on_delete=models.CASCADE)
 
+    # 종목 기준 관련도 (링크 생성 시 계산해 저장, 요약 단계에서는 NLP 없이 읽기만 한다)
+    relevance_score = models.SmallIntegerField(null=True, blank=True)
+    is_relevant = models.BooleanField(null=True, blank=True)
+    relevance_reason = models.CharField(max_length=255, blank=True, default="")
+    # 점수를 계산한 규칙 버전 (utils.RELEVANCE_SCORER_VERSION). null이거나 다르면 재계산 대상
+    scorer_version = models.PositiveSmallIntegerField(null=True, blank=True)
+
     class Meta:
         unique_together = ("news", "stock")
-        indexes = [models.Index(fields=["stock", "news"])]
+        indexes = [
+            models.Index(fields=["stock", "news"]),
+            models.Index(fields=["stock", "is_relevant"]),
+            models.Index(fields=["scorer_version"]),
+        ]
 
     def __str__(self):
         return f"{self.stock.symbol} <-> {self.news.id}"
 
 
+class NewsIngestWatermark(models.Model):
+    """
+    종목별 뉴스 수집 watermark.
+    last_published_at 이하의 기사는 DB 작업 전에 버리고, 직전 수집 이후 필요한 만큼만
+    Finnhub 조회 기간(days)을 줄이는 데 쓴다.
+    """
+
+    stock = models.OneToOneField(
+        Stock, on_delete=models.CASCADE, related_name="news_watermark"
+    )
+    # 지금까지 저장한 기사 중 가장 최신 published_at
+    last_published_at = models.DateTimeField(null=True, blank=True)
+    # watermark 근처(늦게 도착한 기사 허용 구간)에서 이미 본 기사 {url_hash: published_at epoch}
+    recent_hashes = models.JSONField(default=dict, blank=True)
+    # 마지막으로 수집이 성공한 시각 (다음 fetch 기간 계산 기준)
+    last_success_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.stock.symbol} @ {self.last_published_at}"
+
+
 class Price(models.Model):
     stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name="prices")
     price = models.DecimalField(max_digits=12, decimal_places=2)
@@ -158,6 +198,7 @@ class SummaryGenerationLog(models.Model):
     def __str__(self):
         return f"{self.stock.symbol} | {self.date} | {self.status}"
 
+
 class DailyUserNews(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     date = models.DateField()
@@ -205,9 +246,18 @@ class SummaryJob(models.Model):
     finished_at = models.DateTimeField(null=True, blank=True)
     retry_at = models.DateTimeField(null=True, blank=True)
     lease_token = models.UUIDField(null=True, blank=True, db_index=True, editable=False)
+    # 실행 중인 worker가 heartbeat로 계속 늘리는 lease 만료 시각. 지나면 worker가 죽은 것으로 보고 회수한다.
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    # enqueue 때 관심 사용자 수와 watcher 최고 플랜으로 계산한 우선순위 (앞당기는 초)
+    priority = models.PositiveIntegerField(default=0)
+    # dispatch 순서 키 = enqueue 시각 - priority. 작은 것부터 보내므로 우선순위가 낮은 job도
+    # 최대 priority 상한만큼만 밀리고, 그 뒤로는 새로 들어온 job보다 앞선다 (aging).
+    dispatch_key = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    READY_STATUSES = (Status.PENDING, Status.RETRY_WAIT)
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -220,7 +270,69 @@ class SummaryJob(models.Model):
             models.Index(fields=["status", "retry_at"]),
             models.Index(fields=["status", "dispatched_at"]),
             models.Index(fields=["status", "started_at"]),
+            # dispatch pick 쿼리(status IN ready ... ORDER BY dispatch_key LIMIT n)용 partial index
+            models.Index(
+                fields=["dispatch_key"],
+                name="summary_job_ready_dispatch_idx",
+                condition=models.Q(status__in=["pending", "retry_wait"]),
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.stock.symbol} | {self.date} | {self.status}"
+
+
+class IngestJob(models.Model):
+    """
+    POST /news/ingest/ 요청 1건 = IngestJob 1개.
+    API는 job만 만들고 202로 응답하며, 실제 수집은 Celery task가 수행한다.
+    result에는 upsert_news_for_symbol의 반환 dict가 그대로 저장된다.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        SUCCESS = "success", "Success"
+        FAILED = "failed", "Failed"
+
+    class Stage(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        FETCHING = "fetching", "Fetching"
+        PERSISTING = "persisting", "Persisting"
+        DONE = "done", "Done"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="ingest_jobs",
+    )
+    symbol = models.CharField(max_length=10)
+    days = models.PositiveIntegerField(default=1)
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    stage = models.CharField(
+        max_length=20,
+        choices=Stage.choices,
+        default=Stage.QUEUED,
+    )
+    result = models.JSONField(null=True, blank=True)
+    error_message = models.TextField(blank=True, default="")
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
         ]
 
     def __str__(self) -> str:
-        return f"{self.stock.symbol} | {self.date} | {self.status}"
\ No newline at end of file
+        return f"{self.symbol} | days={self.days} | {self.status}"
\ No newline at end of file
@@ -1,19 +1,29 @@
+import atexit
+import contextvars
+import hashlib
+import logging
 import math
+import os
+import threading
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass
 
 import redis
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from redis.exceptions import NoScriptError
 
+logger = logging.getLogger(__name__)
 
-LUA_TOKEN_BUCKET = """
--- KEYS[1] = bucket key
--- ARGV[1] = capacity
--- ARGV[2] = refill_rate_per_sec
--- ARGV[3] = now_us
--- ARGV[4] = requested_tokens (optional, default 1)
-
+# 모든 스크립트가 공유하는 앞부분: 인자 검증 + 경과 시간만큼 토큰 보충.
+# KEYS[1] = bucket key
+# KEYS[2] = AIMD 상태 key (선택)
+# ARGV[1] = capacity
+# ARGV[2] = refill_rate_per_sec
+# ARGV[3] = now_us
+# ARGV[4] = requested_tokens (optional, default 1)
+_LUA_REFILL = """
 local key = KEYS[1]
 local capacity = tonumber(ARGV[1])
 local rate = tonumber(ARGV[2])
@@ -36,6 +46,14 @@ if requested <= 0 then
   return redis.error_reply("invalid requested tokens")
 end
 
+-- KEYS[2] (선택) = AIMD 상태 hash. 429 피드백으로 낮아진 rate가 있으면 그 속도로만 보충한다.
+if KEYS[2] then
+  local adaptive_rate = tonumber(redis.call("HGET", KEYS[2], "rate"))
+  if adaptive_rate and adaptive_rate > 0 and adaptive_rate < rate then
+    rate = adaptive_rate
+  end
+end
+
 local data = redis.call("HMGET", key, "tokens", "last_refill_us")
 local tokens = tonumber(data[1])
 local last_refill_us = tonumber(data[2])
@@ -65,37 +83,367 @@ else
     end
   end
 end
+"""
+
+_LUA_SAVE = """
+redis.call("HMSET",
+  key,
+  "tokens", tostring(tokens),
+  "last_refill_us", tostring(last_refill_us)
+)
+
+-- 예약 모드가 남긴 음수 잔량(선예약분)이 있으면 그만큼 TTL을 늘려 key가 먼저 만료되지 않게 한다.
+local full_refill_sec = math.ceil((capacity - math.min(tokens, 0)) / rate)
+local ttl_sec = math.max(full_refill_sec * 2, 1)
+redis.call("EXPIRE", key, ttl_sec)
+"""
+
+
+# ARGV[5] = reserved_tokens (선택, 기본 0): batch lane은 이만큼을 interactive 몫으로 남겨 둔다.
+LUA_TOKEN_BUCKET = _LUA_REFILL + """
+local reserved_tokens = tonumber(ARGV[5]) or 0
 
 local allowed = 0
-if tokens >= requested then
+if tokens - requested >= reserved_tokens then
   tokens = tokens - requested
   allowed = 1
 end
 
 local retry_after_us = 0
 if allowed == 0 then
+  local missing = requested + reserved_tokens - tokens
+  retry_after_us = last_refill_us + math.ceil((missing * 1000000) / rate) - now_us
+  if retry_after_us < 0 then
+    retry_after_us = 0
+  end
+end
+""" + _LUA_SAVE + """
+return {
+  allowed,
+  tokens,
+  retry_after_us
+}
+"""
+
+
+# 예약 모드: 토큰이 부족하면 음수까지 미리 차감하고, 호출자가 진행해도 되는
+# 시점까지의 대기 시간(wait_us)을 돌려준다. 호출자는 그만큼 한 번만 sleep 한다.
+# 토큰을 먼저 차감한 순서대로 시점이 뒤로 밀리므로 FIFO로 배분된다.
+# ARGV[5] = max_wait_us (이보다 오래 기다려야 하면 예약하지 않는다)
+LUA_TOKEN_BUCKET_RESERVE = _LUA_REFILL + """
+local max_wait_us = tonumber(ARGV[5]) or 0
+
+local wait_us = 0
+if tokens < requested then
   local missing = requested - tokens
-  retry_after_us = math.ceil((missing * 1000000) / rate)
+  -- last_refill_us 이후 이미 흐른 시간만큼은 다음 토큰 생성에 반영되어 있다.
+  wait_us = last_refill_us + math.ceil((missing * 1000000) / rate) - now_us
+  if wait_us < 0 then
+    wait_us = 0
+  end
 end
 
-redis.call("HMSET",
-  key,
-  "tokens", tostring(tokens),
-  "last_refill_us", tostring(last_refill_us)
-)
+local reserved = 0
+if wait_us <= max_wait_us then
+  tokens = tokens - requested
+  reserved = 1
+end
+""" + _LUA_SAVE + """
+return {
+  reserved,
+  tokens,
+  wait_us
+}
+"""
 
-local full_refill_sec = math.ceil(capacity / rate)
-local ttl_sec = math.max(full_refill_sec * 2, 1)
-redis.call("EXPIRE", key, ttl_sec)
 
+# batch lane 예약: reserved_tokens(floor) 위의 토큰만 batch끼리 FIFO로 나눈다.
+# interactive 몫을 미리 깎지 않도록 토큰은 차감하지 않고, 앞선 batch 예약 뒤(batch_tail_us)의
+# 차례 시각만 잡아 준다. 호출자는 그 시각까지 한 번 잔 뒤 floor 조건으로 consume한다.
+# 지금 floor 위에 토큰이 있고 기다리는 batch도 없으면 바로 차감한다.
+# ARGV[5] = reserved_tokens(floor), ARGV[6] = max_wait_us
+# 반환: {2 = 바로 가져감 / 1 = 차례 예약 / 0 = max_wait 초과, tokens, wait_us}
+LUA_TOKEN_BUCKET_BOOK_ABOVE_FLOOR = _LUA_REFILL + """
+local floor_tokens = tonumber(ARGV[5]) or 0
+local max_wait_us = tonumber(ARGV[6]) or 0
+local tail_us = tonumber(redis.call("HGET", key, "batch_tail_us")) or 0
+
+local state = 0
+local wait_us = 0
+if tokens - requested >= floor_tokens and tail_us <= now_us then
+  tokens = tokens - requested
+  state = 2
+else
+  local ready_us = now_us
+  local missing = requested + floor_tokens - tokens
+  if missing > 0 then
+    ready_us = last_refill_us + math.ceil((missing * 1000000) / rate)
+  end
+  local slot_us = math.max(ready_us, tail_us + math.ceil((requested * 1000000) / rate))
+  wait_us = math.max(0, slot_us - now_us)
+  if wait_us <= max_wait_us then
+    redis.call("HSET", key, "batch_tail_us", string.format("%d", slot_us))
+    state = 1
+  end
+end
+""" + _LUA_SAVE + """
+return {
+  state,
+  tokens,
+  wait_us
+}
+"""
+
+
+# lease 모드: 지금 남아 있는 토큰 중 최대 requested개를 한 번에 가져간다 (음수로는 내리지 않는다).
+# 하나도 없으면 granted=0과 다음 토큰까지의 대기 시간을 돌려준다.
+# ARGV[5] = reserved_tokens (선택, 기본 0): 이만큼은 lease하지 않고 남겨 둔다.
+LUA_TOKEN_BUCKET_LEASE = _LUA_REFILL + """
+local reserved_tokens = tonumber(ARGV[5]) or 0
+local available = tokens - reserved_tokens
+
+local granted = 0
+if available >= 1 then
+  granted = math.min(requested, math.floor(available))
+  tokens = tokens - granted
+end
+
+local retry_after_us = 0
+if granted == 0 then
+  retry_after_us = last_refill_us + math.ceil(((1 - available) * 1000000) / rate) - now_us
+  if retry_after_us < 0 then
+    retry_after_us = 0
+  end
+end
+""" + _LUA_SAVE + """
 return {
-  allowed,
+  granted,
   tokens,
   retry_after_us
 }
 """
 
 
+# lease에서 쓰지 않은 토큰 반납. capacity를 넘겨 채우지는 않는다.
+LUA_TOKEN_BUCKET_RETURN = _LUA_REFILL + """
+tokens = math.min(capacity, tokens + requested)
+""" + _LUA_SAVE + """
+return {
+  1,
+  tokens,
+  0
+}
+"""
+
+
+# AIMD 피드백: 429면 rate를 곱으로 줄이고(cooldown 동안 1회), 연속 성공이 threshold에 닿으면 step만큼 올린다.
+# ceiling(설정값)으로 돌아오면 상태를 지워 prelude의 HGET이 빈 값을 보게 한다.
+# KEYS[1] = AIMD 상태 key
+# ARGV = ceiling, floor, throttled(0/1), decrease_factor, increase_step,
+#        success_threshold, cooldown_us, now_us, state_ttl_sec
+LUA_AIMD_FEEDBACK = """
+local key = KEYS[1]
+local ceiling = tonumber(ARGV[1])
+local floor_rate = tonumber(ARGV[2])
+local throttled = ARGV[3] == "1"
+local decrease_factor = tonumber(ARGV[4])
+local increase_step = tonumber(ARGV[5])
+local success_threshold = tonumber(ARGV[6])
+local cooldown_us = tonumber(ARGV[7])
+local now_us = tonumber(ARGV[8])
+local state_ttl_sec = tonumber(ARGV[9])
+
+local data = redis.call("HMGET", key, "rate", "successes", "last_decrease_us")
+local rate = tonumber(data[1]) or ceiling
+local successes = tonumber(data[2]) or 0
+local last_decrease_us = tonumber(data[3]) or 0
+
+if rate > ceiling then
+  rate = ceiling
+end
+
+if throttled then
+  successes = 0
+  -- 같은 429 폭주에 여러 worker가 동시에 반응해 rate가 연쇄적으로 깎이지 않게 한다.
+  if now_us - last_decrease_us >= cooldown_us then
+    rate = math.max(floor_rate, rate * decrease_factor)
+    last_decrease_us = now_us
+  end
+else
+  successes = successes + 1
+  if successes >= success_threshold then
+    rate = math.min(ceiling, rate + increase_step)
+    successes = 0
+  end
+end
+
+if rate >= ceiling then
+  redis.call("DEL", key)
+  return tostring(ceiling)
+end
+
+redis.call("HSET", key,
+  "rate", tostring(rate),
+  "successes", tostring(successes),
+  "last_decrease_us", tostring(last_decrease_us)
+)
+redis.call("EXPIRE", key, state_ttl_sec)
+
+return tostring(rate)
+"""
+
+# 우선순위 lane. interactive(사용자 요청)는 bucket 전체를 쓸 수 있고 FIFO 예약을 한다.
+# batch(beat/관리 명령)는 reserved_tokens를 남겨 둔 채 그 위의 토큰만 가져가므로,
+# interactive가 쉬는 동안에는 refill 전부를 쓰되 interactive 요청이 오면 항상 양보한다.
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+
+_priority = contextvars.ContextVar("rate_limit_priority", default=PRIORITY_BATCH)
+
+
+@contextmanager
+def rate_limit_priority(priority: str):
+    """블록 안의 wait_for_slot/consume 호출을 priority lane으로 보낸다 (asyncio.to_thread에도 전파)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+# AIMD 상태는 이 시간 동안 피드백이 없으면 사라져 설정값(ceiling)으로 돌아간다.
+AIMD_STATE_TTL_SECONDS = 600
+# ceiling에 있다고 알고 있는 동안에는 성공 피드백을 보내지 않는다 (이 주기로만 다시 확인).
+AIMD_RATE_REFRESH_SECONDS = 5.0
+
+
+def _script_sha(script: str) -> str:
+    # Redis가 SCRIPT LOAD에서 돌려주는 값과 같다. 미리 계산해 두고 EVALSHA부터 시도한다.
+    return hashlib.sha1(script.encode("utf-8")).hexdigest()
+
+
+SCRIPT_SHAS = {
+    script: _script_sha(script)
+    for script in (
+        LUA_TOKEN_BUCKET,
+        LUA_TOKEN_BUCKET_RESERVE,
+        LUA_TOKEN_BUCKET_BOOK_ABOVE_FLOOR,
+        LUA_TOKEN_BUCKET_LEASE,
+        LUA_TOKEN_BUCKET_RETURN,
+        LUA_AIMD_FEEDBACK,
+    )
+}
+
+
+# ---------------------------------------------------------------------------
+# 프로세스 단위 registry: Redis URL당 ConnectionPool 1개, (key, 설정)당 bucket 1개.
+# fork 직후(Celery prefork, gunicorn)에는 부모의 소켓을 공유하지 않도록 비운다.
+# ---------------------------------------------------------------------------
+_registry_lock = threading.Lock()
+_pools = {}
+_buckets = {}
+_leases = {}
+
+
+def reset_rate_limit_registry():
+    with _registry_lock:
+        _pools.clear()
+        _buckets.clear()
+        _leases.clear()
+
+
+def _reset_registry_after_fork():
+    # fork 직후 자식 프로세스: 부모가 잡고 있던 lock/커넥션을 이어받지 않는다.
+    # 부모가 lease한 토큰은 부모 몫이므로 반납하지 않고 버린다.
+    global _registry_lock
+    _registry_lock = threading.Lock()
+    _pools.clear()
+    _buckets.clear()
+    _leases.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_registry_after_fork)
+
+
+def get_redis_client(redis_url: str) -> redis.Redis:
+    """redis_url별로 공유되는 ConnectionPool 위의 클라이언트 (클라이언트 객체 생성 비용만 든다)."""
+    pool = _pools.get(redis_url)
+    if pool is None:
+        with _registry_lock:
+            pool = _pools.get(redis_url)
+            if pool is None:
+                pool = redis.ConnectionPool.from_url(redis_url)
+                _pools[redis_url] = pool
+    return redis.Redis(connection_pool=pool)
+
+
+def get_bucket(
+    key: str,
+    capacity: int,
+    refill_rate_per_sec: float,
+    redis_url: str,
+    adaptive: bool = False,
+    reserved_tokens: int = 0,
+) -> "RedisTokenBucket":
+    """같은 설정의 RedisTokenBucket 인스턴스를 프로세스 안에서 재사용한다."""
+    cache_key = (key, capacity, refill_rate_per_sec, redis_url, adaptive, reserved_tokens)
+    bucket = _buckets.get(cache_key)
+    if bucket is None:
+        with _registry_lock:
+            bucket = _buckets.get(cache_key)
+            if bucket is None:
+                bucket = RedisTokenBucket(
+                    key=key,
+                    capacity=capacity,
+                    refill_rate_per_sec=refill_rate_per_sec,
+                    redis_url=redis_url,
+                    adaptive=adaptive,
+                    reserved_tokens=reserved_tokens,
+                )
+                _buckets[cache_key] = bucket
+    return bucket
+
+
+def get_leased_bucket(bucket, batch_size: int, lease_ttl: float) -> "LeasedTokenBucket":
+    """bucket 앞단의 프로세스 로컬 lease 래퍼를 (bucket, batch_size, lease_ttl)별로 재사용한다."""
+    cache_key = (id(bucket), batch_size, lease_ttl)
+    leased = _leases.get(cache_key)
+    if leased is None or leased.bucket is not bucket:
+        with _registry_lock:
+            leased = _leases.get(cache_key)
+            if leased is None or leased.bucket is not bucket:
+                leased = LeasedTokenBucket(bucket, batch_size=batch_size, lease_ttl=lease_ttl)
+                _leases[cache_key] = leased
+    return leased
+
+
+def release_all_leases():
+    """프로세스 종료 시 들고 있는 lease 토큰을 모두 bucket에 반납한다 (atexit / Celery worker shutdown)."""
+    for leased in list(_leases.values()):
+        try:
+            leased.release()
+        except redis.RedisError:
+            pass
+
+
+atexit.register(release_all_leases)
+
+
+def _observe_wait(key: str, priority: str, started: float, acquired: bool):
+    from .metrics import RATE_LIMIT_WAIT_SECONDS
+
+    RATE_LIMIT_WAIT_SECONDS.labels(
+        bucket=key,
+        priority=priority,
+        outcome="acquired" if acquired else "timeout",
+    ).observe(time.monotonic() - started)
+
+
 @dataclass
 class BucketResult:
     allowed: bool
@@ -103,6 +451,13 @@ class BucketResult:
     retry_after_seconds: int
 
 
+@dataclass
+class Reservation:
+    reserved: bool
+    remaining_tokens: int
+    wait_seconds: float
+
+
 class RedisTokenBucket:
     def __init__(
         self,
@@ -110,60 +465,62 @@ class RedisTokenBucket:
         capacity: int,
         refill_rate_per_sec: float,
         redis_url: str,
+        adaptive: bool = False,
+        reserved_tokens: int = 0,
     ):
         self.key = key
         self.capacity = capacity
         self.refill_rate_per_sec = refill_rate_per_sec
         self.redis_url = redis_url
-        self._sha = None
+        # interactive lane 몫. batch는 bucket에 이만큼을 남겨 두고 그 위의 토큰만 쓴다.
+        self.reserved_tokens = max(0, min(reserved_tokens, capacity - 1))
+        # adaptive면 refill rate는 AIMD 상태 key의 값(≤ refill_rate_per_sec)을 따른다.
+        self.aimd_key = f"{key}:aimd" if adaptive else None
         self._client = None
+        self._known_rate = None
+        self._known_rate_at = 0.0
 
     @property
     def redis_client(self):
         if self._client is None:
-            self._client = redis.Redis.from_url(self.redis_url)
+            self._client = get_redis_client(self.redis_url)
         return self._client
 
-    def _load_script(self):
-        self._sha = self.redis_client.script_load(LUA_TOKEN_BUCKET)
-        return self._sha
+    def _run_script(self, script: str, *args, keys=None):
+        """
+        미리 계산한 SHA로 EVALSHA를 먼저 보낸다. 서버 스크립트 캐시에 없을 때(NOSCRIPT)만
+        SCRIPT LOAD 후 한 번 더 시도하므로, 평상시에는 호출당 왕복 1회다.
+        """
+        client = self.redis_client
+        sha = SCRIPT_SHAS[script]
+        if keys is None:
+            keys = [self.key, self.aimd_key] if self.aimd_key else [self.key]
 
-    def consume(self, tokens: int = 1) -> BucketResult:
-        if tokens <= 0:
-            raise ValueError("tokens must be greater than 0")
+        try:
+            return client.evalsha(sha, len(keys), *keys, *args)
+        except NoScriptError:
+            client.script_load(script)
+            return client.evalsha(sha, len(keys), *keys, *args)
+
+    def _floor_for(self, priority: str | None) -> int:
+        priority = priority or current_priority()
+        return self.reserved_tokens if priority == PRIORITY_BATCH else 0
 
+    def _consume(self, tokens: int, priority: str | None) -> tuple[bool, int, int]:
         now_us = time.time_ns() // 1000
-        client = self.redis_client
+        args = [self.capacity, self.refill_rate_per_sec, now_us, tokens]
+        floor = self._floor_for(priority)
+        if floor:
+            args.append(floor)
 
-        if self._sha is None:
-            self._load_script()
+        allowed, remaining_tokens, retry_after_us = self._run_script(LUA_TOKEN_BUCKET, *args)
+        return bool(int(allowed)), int(remaining_tokens), int(retry_after_us)
 
-        try:
-            result = client.evalsha(
-                self._sha,
-                1,
-                self.key,
-                self.capacity,
-                self.refill_rate_per_sec,
-                now_us,
-                tokens,
-            )
-        except NoScriptError:
-            self._load_script()
-            result = client.evalsha(
-                self._sha,
-                1,
-                self.key,
-                self.capacity,
-                self.refill_rate_per_sec,
-                now_us,
-                tokens,
-            )
+    def consume(self, tokens: int = 1, priority: str | None = None) -> BucketResult:
+        if tokens <= 0:
+            raise ValueError("tokens must be greater than 0")
 
-        allowed, remaining_tokens, retry_after_us = result
-        allowed = bool(int(allowed))
-        remaining_tokens = int(remaining_tokens)
-        retry_after_us = int(retry_after_us)
+        allowed, remaining_tokens, retry_after_us = self._consume(tokens, priority)
 
         retry_after_seconds = (
             0 if allowed else max(1, math.ceil(retry_after_us / 1_000_000))
@@ -175,20 +532,319 @@ class RedisTokenBucket:
             retry_after_seconds=retry_after_seconds,
         )
 
+    def reserve(self, tokens: int = 1, max_wait: float = 15.0) -> Reservation:
+        """
+        미래의 slot을 원자적으로 예약한다 (토큰은 음수까지 내려갈 수 있다).
+        max_wait초 안에 slot이 나지 않으면 예약하지 않고 reserved=False를 돌려준다.
+        """
+        if tokens <= 0:
+            raise ValueError("tokens must be greater than 0")
+
+        now_us = time.time_ns() // 1000
+        result = self._run_script(
+            LUA_TOKEN_BUCKET_RESERVE,
+            self.capacity,
+            self.refill_rate_per_sec,
+            now_us,
+            tokens,
+            int(max_wait * 1_000_000),
+        )
+
+        reserved, remaining_tokens, wait_us = result
+        return Reservation(
+            reserved=bool(int(reserved)),
+            remaining_tokens=int(remaining_tokens),
+            wait_seconds=int(wait_us) / 1_000_000,
+        )
+
+    def book_above_floor(self, tokens: int = 1, max_wait: float = 15.0) -> tuple[int, float]:
+        """
+        batch lane의 FIFO 차례를 잡는다 (LUA_TOKEN_BUCKET_BOOK_ABOVE_FLOOR).
+        반환: (2 = 토큰을 바로 가져감 / 1 = 차례 예약 / 0 = max_wait 초과, 차례까지 대기 초)
+        """
+        now_us = time.time_ns() // 1000
+        state, _, wait_us = self._run_script(
+            LUA_TOKEN_BUCKET_BOOK_ABOVE_FLOOR,
+            self.capacity,
+            self.refill_rate_per_sec,
+            now_us,
+            tokens,
+            self.reserved_tokens,
+            int(max_wait * 1_000_000),
+        )
+        return int(state), int(wait_us) / 1_000_000
+
+    def lease(self, max_tokens: int, priority: str | None = None) -> tuple[int, float]:
+        """
+        지금 남은 토큰 중 최대 max_tokens개를 한 번에 가져간다.
+        반환: (받은 토큰 수, 0개일 때 다음 토큰까지 대기 초)
+        """
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be greater than 0")
+
+        now_us = time.time_ns() // 1000
+        args = [self.capacity, self.refill_rate_per_sec, now_us, max_tokens]
+        floor = self._floor_for(priority)
+        if floor:
+            args.append(floor)
+
+        granted, _, retry_after_us = self._run_script(LUA_TOKEN_BUCKET_LEASE, *args)
+        return int(granted), int(retry_after_us) / 1_000_000
+
+    def return_tokens(self, tokens: int) -> None:
+        """lease에서 쓰지 않은 토큰을 돌려준다 (capacity 초과분은 버려진다)."""
+        if tokens <= 0:
+            return
+
+        now_us = time.time_ns() // 1000
+        self._run_script(
+            LUA_TOKEN_BUCKET_RETURN,
+            self.capacity,
+            self.refill_rate_per_sec,
+            now_us,
+            tokens,
+        )
+
+    def effective_rate(self) -> float:
+        """현재 적용 중인 refill rate (AIMD 상태가 없으면 설정값)."""
+        if self.aimd_key is None:
+            return float(self.refill_rate_per_sec)
+        value = self.redis_client.hget(self.aimd_key, "rate")
+        if value is None:
+            return float(self.refill_rate_per_sec)
+        return min(float(self.refill_rate_per_sec), float(value))
+
+    def record_feedback(
+        self,
+        throttled: bool,
+        *,
+        min_rate: float,
+        decrease_factor: float,
+        increase_step: float,
+        success_threshold: int,
+        cooldown: float,
+    ) -> float | None:
+        """
+        upstream 응답 결과를 AIMD 상태에 반영하고 새 rate를 돌려준다.
+        ceiling에 있다고 최근에 확인했다면 성공 피드백은 보내지 않는다 (None 반환).
+        """
+        if self.aimd_key is None:
+            return None
+
+        now = time.monotonic()
+        if (
+            not throttled
+            and self._known_rate is not None
+            and self._known_rate >= self.refill_rate_per_sec
+            and now - self._known_rate_at < AIMD_RATE_REFRESH_SECONDS
+        ):
+            return None
+
+        rate = float(
+            self._run_script(
+                LUA_AIMD_FEEDBACK,
+                self.refill_rate_per_sec,
+                min_rate,
+                1 if throttled else 0,
+                decrease_factor,
+                increase_step,
+                success_threshold,
+                int(cooldown * 1_000_000),
+                time.time_ns() // 1000,
+                AIMD_STATE_TTL_SECONDS,
+                keys=[self.aimd_key],
+            )
+        )
+        self._known_rate = rate
+        self._known_rate_at = now
+        return rate
+
     def wait_for_slot(
         self,
         timeout: float = 15.0,
         interval: float = 0.2,
         tokens: int = 1,
+        priority: str | None = None,
     ) -> bool:
+        """
+        RATE_LIMIT_RESERVATION_ENABLED면 reserve()로 slot을 예약하고 정확히 한 번 sleep 한다.
+        reserved_tokens가 있는 bucket의 batch lane은 예약(음수 차감)으로 interactive 앞을
+        막지 않도록, 남겨 둔 몫 위에서 batch끼리 FIFO 차례만 잡고(book_above_floor) 그 시각까지
+        한 번 잔 뒤 floor 조건으로 consume한다. 그 사이 interactive가 토큰을 가져갔으면
+        다음 토큰 시점까지 자며 다시 시도한다.
+        비활성화 시 기존처럼 interval마다 consume()을 다시 시도한다.
+        """
+        priority = priority or current_priority()
+        started = time.monotonic()
+        acquired = self._wait_for_slot(timeout, interval, tokens, priority)
+        _observe_wait(self.key, priority, started, acquired)
+        return acquired
+
+    def _wait_for_slot(self, timeout, interval, tokens, priority) -> bool:
+        reservation_enabled = getattr(settings, "RATE_LIMIT_RESERVATION_ENABLED", True)
+
+        if reservation_enabled and not self._floor_for(priority):
+            reservation = self.reserve(tokens=tokens, max_wait=timeout)
+            if not reservation.reserved:
+                return False
+            if reservation.wait_seconds > 0:
+                time.sleep(reservation.wait_seconds)
+            return True
+
         deadline = time.monotonic() + timeout
 
-        while time.monotonic() < deadline:
-            if self.consume(tokens=tokens).allowed:
+        if reservation_enabled:
+            state, wait_seconds = self.book_above_floor(tokens=tokens, max_wait=timeout)
+            if state == 2:
+                return True
+            if state == 0:
+                return False
+            if wait_seconds > 0:
+                time.sleep(wait_seconds)
+
+        while True:
+            allowed, _, retry_after_us = self._consume(tokens, priority)
+            if allowed:
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if reservation_enabled:
+                time.sleep(min(remaining, max(retry_after_us / 1_000_000, 0.001)))
+            else:
+                time.sleep(min(remaining, interval))
+
+
+class LeasedTokenBucket:
+    """
+    RedisTokenBucket 앞단의 프로세스 로컬 토큰 lease.
+    토큰이 필요할 때 Redis에서 batch_size개까지 한 번에 가져와(EVALSHA 1회) 로컬에서 쓰고,
+    lease_ttl이 지나면 남은 토큰은 쓰지 않고 bucket에 반납한다. 반납은 만료 timer가 하므로
+    lease를 받은 뒤 더 호출하지 않는(idle) worker의 토큰도 만료 시각에 다른 프로세스가 쓸 수 있다.
+    가져간 토큰은 전역 bucket에서 이미 차감된 것이므로 전역 rate 보장은 그대로 유지된다.
+    (몇 개를 썼는지는 holder만 알기 때문에 Redis 쪽에서 일괄 회수하지 않는다 — 쓴 토큰까지 돌려주게 된다.)
+    """
+
+    def __init__(self, bucket: RedisTokenBucket, batch_size: int, lease_ttl: float):
+        self.bucket = bucket
+        self.batch_size = max(1, min(batch_size, bucket.capacity))
+        self.lease_ttl = lease_ttl
+        self._lock = threading.Lock()
+        self._tokens = 0
+        self._expires_at = 0.0
+        self._expiry_timer = None
+
+    @property
+    def key(self):
+        return self.bucket.key
+
+    def _expire_locked(self, now: float):
+        if self._tokens and now >= self._expires_at:
+            returning, self._tokens = self._tokens, 0
+            self._cancel_expiry_locked()
+            self.bucket.return_tokens(returning)
+
+    def _schedule_expiry_locked(self):
+        self._cancel_expiry_locked()
+        timer = threading.Timer(self.lease_ttl, self._expire_idle)
+        timer.daemon = True
+        timer.start()
+        self._expiry_timer = timer
+
+    def _cancel_expiry_locked(self):
+        if self._expiry_timer is not None and self._expiry_timer is not threading.current_thread():
+            self._expiry_timer.cancel()
+        self._expiry_timer = None
+
+    def _expire_idle(self):
+        # 만료 timer: 그 사이 새 lease를 받았다면 _expires_at이 뒤로 밀려 있어 아무것도 하지 않는다.
+        with self._lock:
+            if self._expiry_timer is threading.current_thread():
+                self._expiry_timer = None
+            try:
+                self._expire_locked(time.monotonic())
+            except redis.RedisError:
+                logger.warning("[rate_limit] lease return failed key=%s", self.key, exc_info=True)
+
+    def _take(self, tokens: int) -> tuple[bool, float]:
+        if tokens > self.batch_size:
+            result = self.bucket.consume(tokens=tokens, priority=PRIORITY_BATCH)
+            return result.allowed, float(result.retry_after_seconds)
+
+        with self._lock:
+            now = time.monotonic()
+            self._expire_locked(now)
+
+            if self._tokens < tokens:
+                # 남은 로컬 토큰이 모자라면 반납하고 새 lease를 받는다.
+                if self._tokens:
+                    returning, self._tokens = self._tokens, 0
+                    self._cancel_expiry_locked()
+                    self.bucket.return_tokens(returning)
+                granted, retry_after = self.bucket.lease(self.batch_size, priority=PRIORITY_BATCH)
+                if granted < tokens:
+                    if granted:
+                        self.bucket.return_tokens(granted)
+                    return False, retry_after
+                self._tokens = granted
+                self._expires_at = now + self.lease_ttl
+                if granted > tokens:
+                    # 이번에 다 쓰지 않는 토큰만 만료 timer로 돌려받는다.
+                    self._schedule_expiry_locked()
+
+            self._tokens -= tokens
+            return True, 0.0
+
+    def consume(self, tokens: int = 1, priority: str | None = None) -> BucketResult:
+        if tokens <= 0:
+            raise ValueError("tokens must be greater than 0")
+        if (priority or current_priority()) == PRIORITY_INTERACTIVE:
+            return self.bucket.consume(tokens=tokens, priority=PRIORITY_INTERACTIVE)
+
+        allowed, retry_after = self._take(tokens)
+        return BucketResult(
+            allowed=allowed,
+            remaining_tokens=self._tokens,
+            retry_after_seconds=0 if allowed else max(1, math.ceil(retry_after)),
+        )
+
+    def wait_for_slot(
+        self,
+        timeout: float = 15.0,
+        interval: float = 0.2,
+        tokens: int = 1,
+        priority: str | None = None,
+    ) -> bool:
+        priority = priority or current_priority()
+        if priority == PRIORITY_INTERACTIVE:
+            # interactive는 드물고 지연에 민감하므로 lease를 거치지 않고 bucket에서 바로 예약한다.
+            return self.bucket.wait_for_slot(
+                timeout=timeout, interval=interval, tokens=tokens, priority=priority
+            )
+
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            allowed, retry_after = self._take(tokens)
+            if allowed:
+                _observe_wait(self.key, priority, started, True)
                 return True
-            time.sleep(interval)
 
-        return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                _observe_wait(self.key, priority, started, False)
+                return False
+            # 다음 토큰이 생기는 시점까지만 잔다 (고정 interval polling 대신).
+            time.sleep(min(remaining, max(retry_after, 0.001)))
+
+    def release(self):
+        with self._lock:
+            returning, self._tokens = self._tokens, 0
+            self._cancel_expiry_locked()
+        if returning:
+            self.bucket.return_tokens(returning)
 
 
 def get_openai_bucket() -> RedisTokenBucket:
@@ -198,7 +854,7 @@ def get_openai_bucket() -> RedisTokenBucket:
         or "redis://redis:6379/3"
     )
 
-    return RedisTokenBucket(
+    return get_bucket(
         key=getattr(settings, "OPENAI_BUCKET_KEY", "rate_limit:openai"),
         capacity=int(getattr(settings, "OPENAI_BUCKET_CAPACITY", 2)),
         refill_rate_per_sec=float(getattr(settings, "OPENAI_BUCKET_REFILL_RATE", 1)),
@@ -206,16 +862,65 @@ def get_openai_bucket() -> RedisTokenBucket:
     )
 
 
-def get_finnhub_bucket() -> RedisTokenBucket:
+def get_finnhub_bucket() -> RedisTokenBucket | LeasedTokenBucket:
     redis_url = (
         getattr(settings, "FINNHUB_BUCKET_REDIS_URL", None)
         or getattr(settings, "REDIS_URL", None)
         or "redis://redis:6379/3"
     )
 
-    return RedisTokenBucket(
+    capacity = int(getattr(settings, "FINNHUB_BUCKET_CAPACITY", 2))
+    interactive_share = float(getattr(settings, "FINNHUB_BUCKET_INTERACTIVE_SHARE", 0.5))
+    reserved_tokens = round(capacity * interactive_share)
+    if reserved_tokens >= capacity:
+        # batch(beat/관리 명령) 몫이 0이면 batch 호출은 영영 토큰을 받지 못한다.
+        raise ImproperlyConfigured(
+            f"FINNHUB_BUCKET_INTERACTIVE_SHARE={interactive_share} reserves {reserved_tokens} of "
+            f"FINNHUB_BUCKET_CAPACITY={capacity} tokens and leaves none for batch callers"
+        )
+    bucket = get_bucket(
         key=getattr(settings, "FINNHUB_BUCKET_KEY", "rate_limit:finnhub"),
-        capacity=int(getattr(settings, "FINNHUB_BUCKET_CAPACITY", 2)),
+        capacity=capacity,
         refill_rate_per_sec=float(getattr(settings, "FINNHUB_BUCKET_REFILL_RATE", 1)),
         redis_url=redis_url,
-    )
\ No newline at end of file
+        adaptive=getattr(settings, "FINNHUB_AIMD_ENABLED", False),
+        reserved_tokens=reserved_tokens,
+    )
+    if getattr(settings, "FINNHUB_BUCKET_LEASE_ENABLED", False):
+        return get_leased_bucket(
+            bucket,
+            batch_size=int(getattr(settings, "FINNHUB_BUCKET_LEASE_SIZE", 5)),
+            lease_ttl=float(getattr(settings, "FINNHUB_BUCKET_LEASE_TTL", 1.0)),
+        )
+    return bucket
+
+
+def report_finnhub_feedback(throttled: bool) -> None:
+    """
+    Finnhub 응답(200/429)을 공유 bucket의 AIMD rate에 반영한다.
+    FINNHUB_AIMD_ENABLED가 꺼져 있으면 아무것도 하지 않고, Redis 오류는 호출자에게 올리지 않는다.
+    """
+    if not getattr(settings, "FINNHUB_AIMD_ENABLED", False):
+        return
+    if not getattr(settings, "FINNHUB_BUCKET_ENABLED", True):
+        return
+
+    bucket = get_finnhub_bucket()
+    if isinstance(bucket, LeasedTokenBucket):
+        bucket = bucket.bucket
+
+    try:
+        rate = bucket.record_feedback(
+            throttled,
+            min_rate=float(getattr(settings, "FINNHUB_AIMD_MIN_RATE", 0.2)),
+            decrease_factor=float(getattr(settings, "FINNHUB_AIMD_DECREASE_FACTOR", 0.5)),
+            increase_step=float(getattr(settings, "FINNHUB_AIMD_INCREASE_STEP", 0.1)),
+            success_threshold=int(getattr(settings, "FINNHUB_AIMD_SUCCESS_THRESHOLD", 20)),
+            cooldown=float(getattr(settings, "FINNHUB_AIMD_COOLDOWN_SECONDS", 1.0)),
+        )
+    except redis.RedisError:
+        logger.warning("[finnhub_aimd] feedback failed throttled=%s", throttled, exc_info=True)
+        return
+
+    if throttled:
+        logger.warning("[finnhub_aimd] throttled effective_rate=%.3f", rate)
@@ -1,5 +1,8 @@
 # stocks/services.py
 import hashlib
+import math
+import os
+import threading
 from datetime import datetime, timedelta, timezone
 from django.utils.timezone import now
 from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
@@ -8,12 +11,23 @@ import time
 import requests
 from django.conf import settings
 from django.db import transaction
+from django.db.models import Count, Q
 import logging
 
 logger = logging.getLogger(__name__)
-from .models import Stock, News, NewsStock, DailyUserNews
-from .rate_limit import get_finnhub_bucket
-from .utils import normalize_url, make_url_hash
+from .cache import single_flight
+from .models import Stock, News, NewsIngestWatermark, NewsStock, DailyUserNews, FavoriteStock
+from .circuit_breaker import get_finnhub_breaker
+from .rate_limit import get_finnhub_bucket, report_finnhub_feedback
+from .metrics import NER_CACHE_LOOKUPS_TOTAL
+from .utils import (
+    RELEVANCE_SCORER_VERSION,
+    extract_org_entities,
+    make_url_hash,
+    ner_model_version,
+    normalize_url,
+    score_news_relevance_batch,
+)
 
 FINNHUB_COMPANY_NEWS = "https://finnhub.io/api/v1/company-news"
 UTC = timezone.utc
@@ -57,6 +71,34 @@ def sha256(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
+_finnhub_session = None
+_finnhub_session_lock = threading.Lock()
+
+
+def _reset_finnhub_session_after_fork():
+    # 부모의 keep-alive 소켓을 자식 프로세스가 같이 쓰지 않도록 새로 만든다.
+    global _finnhub_session, _finnhub_session_lock
+    _finnhub_session = None
+    _finnhub_session_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_finnhub_session_after_fork)
+
+
+def get_finnhub_session() -> requests.Session:
+    """
+    동기 Finnhub 호출(fetch_company_news / fetch_finnhub_quote) 공용 keep-alive 세션.
+    호출마다 TCP/TLS 연결을 새로 맺지 않도록 프로세스당 하나를 재사용한다.
+    """
+    global _finnhub_session
+    if _finnhub_session is None:
+        with _finnhub_session_lock:
+            if _finnhub_session is None:
+                _finnhub_session = requests.Session()
+    return _finnhub_session
+
+
 def _date_range(days: int):
     now = datetime.now(UTC)
     frm = (now - timedelta(days=days)).strftime("%Y-%m-%d")
@@ -74,15 +116,25 @@ def sleep_for_finnhub_429(attempt: int) -> float:
     return sleep_seconds
 
 
+def is_finnhub_upstream_failure(exc: requests.RequestException) -> bool:
+    """timeout/연결 오류/5xx만 circuit breaker 실패로 센다 (4xx, 429는 upstream 장애가 아님)."""
+    response = getattr(exc, "response", None)
+    return response is None or response.status_code >= 500
+
+
 def fetch_company_news(symbol: str, days: int = 1, max_retries: int = 5):
     if not settings.FINNHUB_API_KEY:
         raise RuntimeError("FINNHUB_API_KEY not set")
 
     frm, to = _date_range(days)
+    breaker = get_finnhub_breaker()
 
     for attempt in range(max_retries):
+        if breaker is not None:
+            # 열려 있으면 timeout/재시도 sleep 없이 CircuitOpenError로 바로 실패한다.
+            breaker.guard()
         try:
-            r = requests.get(
+            r = get_finnhub_session().get(
                 FINNHUB_COMPANY_NEWS,
                 params={
                     "symbol": symbol,
@@ -94,6 +146,9 @@ def fetch_company_news(symbol: str, days: int = 1, max_retries: int = 5):
             )
 
             if r.status_code == 200:
+                report_finnhub_feedback(throttled=False)
+                if breaker is not None:
+                    breaker.record_success()
                 if attempt > 0:
                     logger.warning(
                         "[finnhub_retry_success] symbol=%s attempt=%s",
@@ -103,6 +158,10 @@ def fetch_company_news(symbol: str, days: int = 1, max_retries: int = 5):
                 return r.json()
 
             if r.status_code == 429:
+                report_finnhub_feedback(throttled=True)
+                if breaker is not None:
+                    # 429는 Finnhub가 살아 있다는 응답이므로 이번 시도의 probe를 성공으로 반납한다.
+                    breaker.record_success()
                 if attempt == max_retries - 1:
                     raise Exception(f"Finnhub 429 Too Many Requests: {symbol}")
 
@@ -124,6 +183,15 @@ def fetch_company_news(symbol: str, days: int = 1, max_retries: int = 5):
             r.raise_for_status()
 
         except requests.RequestException as e:
+            if breaker is not None:
+                if is_finnhub_upstream_failure(e):
+                    breaker.record_failure()
+                    # 이번 실패로 circuit이 열렸으면 재시도 sleep 없이 바로 실패한다.
+                    breaker.guard(take_probe=False)
+                else:
+                    # 4xx는 장애가 아니므로 probe를 성공으로 반납한다.
+                    breaker.record_success()
+
             sleep_seconds = (2**attempt) + random.uniform(0, 0.5)
             logger.warning(
                 "[finnhub_request_error] symbol=%s attempt=%s sleep=%.2f error=%s",
@@ -146,14 +214,545 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+NEWS_BULK_BATCH_SIZE = 500
+
 
-@transaction.atomic
-def upsert_news_for_symbol(symbol: str, days: int = 1) -> dict:
+def _parse_article_timestamp(ts):
+    """Finnhub datetime(epoch 초)을 파싱한다. 없거나 잘못된 값이면 None."""
+    try:
+        return datetime.fromtimestamp(int(ts), tz=UTC) if ts else None
+    except Exception:
+        return None
+
+
+def _parse_published_at(ts):
+    return _parse_article_timestamp(ts) or datetime.now(UTC)
+
+
+def build_news_rows(data) -> tuple[dict, int]:
     """
-    Finnhub에서 symbol 뉴스 가져와 stocks.News/NewsStock에 업서트.
-    반환: {"created_news": X, "linked_pairs": Y, "skipped": Z}
+    Finnhub 응답을 url_hash 기준으로 한 번에 해시/정규화한다.
+    반환: ({url_hash: News 필드 dict}, url 없는 항목 수)
+    같은 payload 안의 중복 url_hash는 첫 항목만 남긴다 (기존 get_or_create 루프와 동일).
     """
-    t_total_start = perf_counter()
+    rows = {}
+    skipped = 0
+
+    for item in data:
+        raw_url = item.get("url") or ""
+        if not raw_url:
+            skipped += 1
+            continue
+
+        url_hash = make_url_hash(raw_url)
+        if url_hash in rows:
+            continue
+
+        canonical = normalize_url(raw_url)
+        rows[url_hash] = {
+            "headline": item.get("headline") or "",
+            "url": raw_url,
+            "canonical_url": canonical,
+            "source": item.get("source")
+            or (urlparse(canonical).netloc if canonical else None),
+            "published_at": _parse_published_at(item.get("datetime")),
+            "language": item.get("lang", "en"),
+            "raw_json": item,
+        }
+
+    return rows, skipped
+
+
+# watermark보다 이 구간만큼 오래된 기사까지는 "늦게 도착한 기사"로 보고 hash로만 중복을 거른다.
+NEWS_WATERMARK_LATE_WINDOW = timedelta(hours=24)
+NEWS_WATERMARK_MAX_HASHES = 1000
+# watermark는 매 수집이 덮는 기본 조회 기간(일)에만 적용한다. 더 넓게 요청한 days는 backfill로 보고 그대로 조회한다.
+NEWS_WATERMARK_DEFAULT_DAYS = 1
+
+
+def _watermark_enabled() -> bool:
+    return getattr(settings, "NEWS_WATERMARK_ENABLED", True)
+
+
+def load_watermarks(symbols) -> dict:
+    """반환: {symbol: NewsIngestWatermark} (watermark가 없는 종목은 빠진다)"""
+    if not _watermark_enabled():
+        return {}
+    return {
+        wm.stock.symbol: wm
+        for wm in NewsIngestWatermark.objects.filter(
+            stock__symbol__in=list(symbols)
+        ).select_related("stock")
+    }
+
+
+def watermark_fetch_days(watermark, days: int) -> int:
+    """
+    마지막 성공 수집 이후 필요한 만큼만 조회하도록 days를 줄인다 (0이면 오늘 하루).
+    NEWS_WATERMARK_DEFAULT_DAYS보다 넓게 요청한 days는 이전 수집이 덮지 않은 구간이므로 줄이지 않는다.
+    """
+    if (
+        watermark is None
+        or watermark.last_success_at is None
+        or days > NEWS_WATERMARK_DEFAULT_DAYS
+    ):
+        return days
+    elapsed_days = (
+        datetime.now(UTC).date() - watermark.last_success_at.astimezone(UTC).date()
+    ).days
+    return max(0, min(days, elapsed_days))
+
+
+def apply_watermark(
+    rows: dict, watermark, days: int = NEWS_WATERMARK_DEFAULT_DAYS
+) -> tuple[dict, int]:
+    """
+    DB 작업 전에 watermark 이하의 기사를 버린다.
+    - watermark보다 새로운 기사: 유지
+    - late window 안의 기사: 최근 본 hash에 없을 때만 유지
+    - 그보다 오래된 기사: 버림
+    days가 NEWS_WATERMARK_DEFAULT_DAYS보다 넓은 요청(backfill)은 거르지 않는다 (중복은 url_hash upsert가 막는다).
+    반환: (남은 rows, 버린 개수)
+    """
+    if (
+        watermark is None
+        or watermark.last_published_at is None
+        or days > NEWS_WATERMARK_DEFAULT_DAYS
+    ):
+        return rows, 0
+
+    late_cutoff = watermark.last_published_at - NEWS_WATERMARK_LATE_WINDOW
+    seen = watermark.recent_hashes or {}
+
+    kept = {
+        url_hash: fields
+        for url_hash, fields in rows.items()
+        if fields["published_at"] > watermark.last_published_at
+        or (fields["published_at"] >= late_cutoff and url_hash not in seen)
+    }
+    return kept, len(rows) - len(kept)
+
+
+def _advance_watermarks(rows_by_stock: dict):
+    """
+    persist 트랜잭션 안에서 호출: 종목별 최신 published_at과 최근 hash 집합을 갱신한다.
+    datetime이 없어 수집 시각으로 채운 기사는 watermark를 밀지 않는다 (hash만 기억한다).
+    """
+    now_utc = datetime.now(UTC)
+    existing = {
+        wm.stock_id: wm
+        for wm in NewsIngestWatermark.objects.select_for_update().filter(
+            stock_id__in=[stock.id for stock in rows_by_stock]
+        )
+    }
+
+    to_update = []
+    to_create = []
+    for stock, rows in rows_by_stock.items():
+        wm = existing.get(stock.id)
+        if wm is None:
+            wm = NewsIngestWatermark(stock=stock, recent_hashes={})
+            to_create.append(wm)
+        else:
+            to_update.append(wm)
+
+        recent = dict(wm.recent_hashes or {})
+        newest = wm.last_published_at
+        for url_hash, fields in rows.items():
+            recent[url_hash] = fields["published_at"].timestamp()
+            published_at = _parse_article_timestamp(fields["raw_json"].get("datetime"))
+            if published_at is not None and (newest is None or published_at > newest):
+                newest = published_at
+
+        if newest is not None:
+            late_cutoff = (newest - NEWS_WATERMARK_LATE_WINDOW).timestamp()
+            recent = {h: ts for h, ts in recent.items() if ts >= late_cutoff}
+            if len(recent) > NEWS_WATERMARK_MAX_HASHES:
+                recent = dict(
+                    sorted(recent.items(), key=lambda item: item[1])[
+                        -NEWS_WATERMARK_MAX_HASHES:
+                    ]
+                )
+
+        wm.last_published_at = newest
+        wm.recent_hashes = recent
+        wm.last_success_at = now_utc
+        wm.updated_at = now_utc
+
+    if to_update:
+        NewsIngestWatermark.objects.bulk_update(
+            to_update,
+            ["last_published_at", "recent_hashes", "last_success_at", "updated_at"],
+        )
+    if to_create:
+        NewsIngestWatermark.objects.bulk_create(to_create, ignore_conflicts=True)
+
+
+# NewsStock에 저장되는 관련도 컬럼 (bulk_update 대상)
+NEWS_RELEVANCE_FIELDS = ["relevance_score", "is_relevant", "relevance_reason", "scorer_version"]
+
+
+def _relevance_at_ingest_enabled() -> bool:
+    return getattr(settings, "NEWS_RELEVANCE_AT_INGEST_ENABLED", True)
+
+
+def relevance_fields(scored) -> dict:
+    """score_news_relevance_batch 결과 하나 (score, is_relevant, reason)를 NewsStock 필드 dict로."""
+    score, is_relevant, reason = scored
+    return {
+        "relevance_score": score,
+        "is_relevant": is_relevant,
+        "relevance_reason": reason[:255],
+        "scorer_version": RELEVANCE_SCORER_VERSION,
+    }
+
+
+def apply_link_relevance(link, scored):
+    for field, value in relevance_fields(scored).items():
+        setattr(link, field, value)
+
+
+# News에 저장되는 headline NER 캐시 컬럼
+NEWS_NER_CACHE_FIELDS = ["org_entities", "ner_version"]
+
+
+def _record_ner_cache(hits: int, misses: int):
+    if hits:
+        NER_CACHE_LOOKUPS_TOTAL.labels(result="hit").inc(hits)
+    if misses:
+        NER_CACHE_LOOKUPS_TOTAL.labels(result="miss").inc(misses)
+
+
+def format_ner_cache_hit_ratio(hits: int, misses: int) -> str:
+    """로그용 NER 캐시 hit ratio. 조회가 없었으면(NER 미실행) 0.00 대신 "n/a" — 100% miss로 읽히지 않게."""
+    lookups = hits + misses
+    return f"{hits / lookups:.2f}" if lookups else "n/a"
+
+
+def news_org_entities(news_items) -> tuple[list, int, int]:
+    """
+    News 인스턴스들의 ORG 엔티티를 순서대로 돌려준다.
+    현재 모델 버전으로 캐시된 기사는 그대로 쓰고, 미스만 NER을 한 번에 돌려 News에 저장한다.
+    같은 기사가 여러 번(다른 종목 링크로) 들어와도 NER은 한 번이다.
+    반환: (entities 목록, hits, misses)
+    """
+    version = ner_model_version()
+    stale = {}
+    for news in news_items:
+        if news.ner_version != version or news.org_entities is None:
+            stale.setdefault(news.id, []).append(news)
+
+    if stale:
+        extracted = extract_org_entities([copies[0].headline for copies in stale.values()])
+        for copies, orgs in zip(stale.values(), extracted):
+            for news in copies:
+                news.org_entities = orgs
+                news.ner_version = version
+        News.objects.bulk_update(
+            [copies[0] for copies in stale.values()],
+            NEWS_NER_CACHE_FIELDS,
+            batch_size=NEWS_BULK_BATCH_SIZE,
+        )
+
+    misses = len(stale)
+    hits = len(news_items) - misses
+    _record_ner_cache(hits, misses)
+    return [news.org_entities for news in news_items], hits, misses
+
+
+def resolve_row_org_entities(rows_by_stock: dict) -> tuple[dict, int, int]:
+    """
+    persist 전 row들의 url_hash별 ORG 엔티티. 이미 저장된 기사는 News 캐시를 쓰고,
+    미스는 종목과 무관하게 url_hash당 한 번만 NER을 돌린다.
+    결과는 row 필드(org_entities / ner_version)에도 넣어 새 News와 함께 저장되게 하고,
+    캐시가 없거나 오래된 기존 News는 여기서 갱신한다.
+    반환: ({url_hash: entities}, hits, misses)
+    """
+    headlines = {}
+    for rows in rows_by_stock.values():
+        for url_hash, fields in rows.items():
+            headlines.setdefault(url_hash, fields["headline"])
+    if not headlines:
+        return {}, 0, 0
+
+    version = ner_model_version()
+    existing = {
+        url_hash: (news_id, ner_version, org_entities)
+        for news_id, url_hash, ner_version, org_entities in News.objects.filter(
+            url_hash__in=list(headlines)
+        ).values_list("id", "url_hash", "ner_version", "org_entities")
+    }
+    entities = {
+        url_hash: org_entities
+        for url_hash, (_, ner_version, org_entities) in existing.items()
+        if ner_version == version and org_entities is not None
+    }
+
+    missing = [url_hash for url_hash in headlines if url_hash not in entities]
+    if missing:
+        extracted = extract_org_entities([headlines[url_hash] for url_hash in missing])
+        entities.update(zip(missing, extracted))
+
+        stale_news = [
+            News(id=existing[url_hash][0], org_entities=entities[url_hash], ner_version=version)
+            for url_hash in missing
+            if url_hash in existing
+        ]
+        if stale_news:
+            News.objects.bulk_update(
+                stale_news, NEWS_NER_CACHE_FIELDS, batch_size=NEWS_BULK_BATCH_SIZE
+            )
+
+    for rows in rows_by_stock.values():
+        for url_hash, fields in rows.items():
+            fields["org_entities"] = entities[url_hash]
+            fields["ner_version"] = version
+
+    misses = len(missing)
+    hits = len(headlines) - misses
+    _record_ner_cache(hits, misses)
+    return entities, hits, misses
+
+
+def score_rows_for_stocks(rows_by_stock: dict) -> dict:
+    """
+    persist 전에(트랜잭션 밖에서) 종목별 headline 관련도를 한 번에 계산한다.
+    반환: {(stock_id, url_hash): (score, is_relevant, reason)}
+    """
+    t_start = perf_counter()
+    entities, ner_hits, ner_misses = resolve_row_org_entities(rows_by_stock)
+
+    scores = {}
+    for stock, rows in rows_by_stock.items():
+        if not rows:
+            continue
+        url_hashes = list(rows)
+        results = score_news_relevance_batch(
+            stock.symbol,
+            stock.name,
+            [rows[url_hash]["headline"] for url_hash in url_hashes],
+            org_entities=[entities[url_hash] for url_hash in url_hashes],
+        )
+        for url_hash, scored in zip(url_hashes, results):
+            scores[(stock.id, url_hash)] = scored
+
+    logger.debug(
+        "[news_relevance_at_ingest] stocks=%s links=%s ner_cache_hits=%s ner_cache_misses=%s "
+        "ner_cache_hit_ratio=%s elapsed=%.3fs",
+        len(rows_by_stock),
+        len(scores),
+        ner_hits,
+        ner_misses,
+        format_ner_cache_hit_ratio(ner_hits, ner_misses),
+        perf_counter() - t_start,
+    )
+    return scores
+
+
+def persist_news_rows_for_stocks(rows_by_stock: dict) -> tuple[dict, float, float]:
+    """
+    여러 종목의 파싱된 row를 한 번의 짧은 쓰기 트랜잭션으로 업서트한다.
+    rows_by_stock: {Stock: {url_hash: News 필드 dict}}
+    네트워크 I/O나 rate limit 대기는 이 함수 밖(호출 전)에서 끝나 있어야 한다.
+    쿼리 수는 종목/item 수와 무관하게 (기존 hash 조회 1 + News INSERT 배치 + id 조회 1
+    + 기존 링크 조회 1 + NewsStock INSERT 배치)로 고정된다.
+    새로 INSERT된 News는 payload에 처음 등장한 종목의 created_news로 센다.
+    반환: ({stock_id: (created_news, linked_pairs)}, news_upsert_elapsed, link_upsert_elapsed)
+    """
+    counters = {stock.id: [0, 0] for stock in rows_by_stock}
+
+    first_owner = {}
+    all_rows = {}
+    for stock, rows in rows_by_stock.items():
+        for url_hash, fields in rows.items():
+            if url_hash not in all_rows:
+                all_rows[url_hash] = fields
+                first_owner[url_hash] = stock.id
+
+    if not all_rows:
+        if _watermark_enabled() and rows_by_stock:
+            with transaction.atomic():
+                _advance_watermarks(rows_by_stock)
+        return {stock_id: (0, 0) for stock_id in counters}, 0.0, 0.0
+
+    url_hashes = list(all_rows)
+
+    # NLP는 쓰기 트랜잭션을 열기 전에 끝낸다. 새 링크에만 쓰이고 기존 링크 점수는 건드리지 않는다.
+    relevance_by_link = {}
+    if _relevance_at_ingest_enabled():
+        relevance_by_link = score_rows_for_stocks(rows_by_stock)
+
+    with transaction.atomic():
+        t_news_upsert_start = perf_counter()
+        existing_hashes = set(
+            News.objects.filter(url_hash__in=url_hashes).values_list(
+                "url_hash", flat=True
+            )
+        )
+        new_news = [
+            News(url_hash=url_hash, **fields)
+            for url_hash, fields in all_rows.items()
+            if url_hash not in existing_hashes
+        ]
+        # 동시에 같은 기사를 넣는 다른 worker가 있어도 unique(url_hash) 충돌은 무시한다.
+        # 그 경우 created_news는 실제 INSERT 수보다 조금 크게 잡힐 수 있다.
+        News.objects.bulk_create(
+            new_news,
+            batch_size=NEWS_BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        news_id_by_hash = dict(
+            News.objects.filter(url_hash__in=url_hashes).values_list("url_hash", "id")
+        )
+        t_news_upsert_end = perf_counter()
+
+        t_link_upsert_start = perf_counter()
+        existing_links = set(
+            NewsStock.objects.filter(
+                stock_id__in=list(counters),
+                news_id__in=list(news_id_by_hash.values()),
+            ).values_list("news_id", "stock_id")
+        )
+        new_links = []
+        for stock, rows in rows_by_stock.items():
+            for url_hash in rows:
+                news_id = news_id_by_hash.get(url_hash)
+                if news_id is None or (news_id, stock.id) in existing_links:
+                    continue
+                existing_links.add((news_id, stock.id))
+                scored = relevance_by_link.get((stock.id, url_hash))
+                new_links.append(
+                    NewsStock(
+                        news_id=news_id,
+                        stock=stock,
+                        **(relevance_fields(scored) if scored is not None else {}),
+                    )
+                )
+                counters[stock.id][1] += 1
+        NewsStock.objects.bulk_create(
+            new_links,
+            batch_size=NEWS_BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        t_link_upsert_end = perf_counter()
+
+        if _watermark_enabled():
+            _advance_watermarks(rows_by_stock)
+
+    for news in new_news:
+        counters[first_owner[news.url_hash]][0] += 1
+
+    return (
+        {stock_id: tuple(values) for stock_id, values in counters.items()},
+        t_news_upsert_end - t_news_upsert_start,
+        t_link_upsert_end - t_link_upsert_start,
+    )
+
+
+def persist_news_rows(stock, rows: dict):
+    """
+    단일 종목용 persist 단계. build_news_rows()로 이미 파싱된 row만 받는다.
+    반환: (created_news, linked_pairs, news_upsert_elapsed, link_upsert_elapsed)
+    """
+    counters, news_elapsed, link_elapsed = persist_news_rows_for_stocks({stock: rows})
+    created_news, linked_pairs = counters[stock.id]
+    return created_news, linked_pairs, news_elapsed, link_elapsed
+
+
+def stale_relevance_links():
+    """관련도가 없거나 현재 RELEVANCE_SCORER_VERSION과 다른 버전으로 계산된 링크."""
+    return NewsStock.objects.filter(
+        Q(scorer_version__isnull=True) | ~Q(scorer_version=RELEVANCE_SCORER_VERSION)
+    )
+
+
+def rescore_news_relevance(batch_size: int = NEWS_BULK_BATCH_SIZE, max_rows=None) -> dict:
+    """
+    stale 링크를 id 순서로 batch_size개씩 다시 채점해 저장한다 (backfill / 규칙 버전 변경 후 재계산).
+    batch마다 커밋되므로 중간에 멈춰도 다음 실행이 남은 행부터 이어 간다.
+    반환: {"rescored": N, "relevant": R, "batches": B}
+    """
+    rescored = relevant = batches = 0
+    last_id = 0
+
+    while max_rows is None or rescored < max_rows:
+        limit = batch_size if max_rows is None else min(batch_size, max_rows - rescored)
+        links = list(
+            stale_relevance_links()
+            .filter(id__gt=last_id)
+            .select_related("news", "stock")
+            .only(
+                "id",
+                "news",
+                "stock",
+                "news__headline",
+                "news__org_entities",
+                "news__ner_version",
+                "stock__symbol",
+                "stock__name",
+            )
+            .order_by("id")[:limit]
+        )
+        if not links:
+            break
+
+        # 규칙 버전만 바뀐 경우 NER은 News 캐시에서 읽히므로 규칙 매칭만 다시 돈다.
+        news_org_entities([link.news for link in links])
+
+        by_stock = {}
+        for link in links:
+            by_stock.setdefault(link.stock_id, []).append(link)
+        for stock_links in by_stock.values():
+            stock = stock_links[0].stock
+            scores = score_news_relevance_batch(
+                stock.symbol,
+                stock.name,
+                [link.news.headline for link in stock_links],
+                org_entities=[link.news.org_entities for link in stock_links],
+            )
+            for link, scored in zip(stock_links, scores):
+                apply_link_relevance(link, scored)
+
+        NewsStock.objects.bulk_update(links, NEWS_RELEVANCE_FIELDS, batch_size=batch_size)
+
+        rescored += len(links)
+        relevant += sum(1 for link in links if link.is_relevant)
+        batches += 1
+        last_id = links[-1].id
+
+    logger.info(
+        "[rescore_news_relevance] scorer_version=%s rescored=%s relevant=%s batches=%s",
+        RELEVANCE_SCORER_VERSION,
+        rescored,
+        relevant,
+        batches,
+    )
+    return {"rescored": rescored, "relevant": relevant, "batches": batches}
+
+
+def bulk_upsert_news(stock, data):
+    """
+    transform(build_news_rows) + persist(persist_news_rows)를 한 번에 수행한다.
+    반환: (created_news, linked_pairs, skipped, news_upsert_elapsed, link_upsert_elapsed)
+    """
+    rows, skipped = build_news_rows(data)
+    created_news, linked_pairs, news_elapsed, link_elapsed = persist_news_rows(
+        stock, rows
+    )
+    return created_news, linked_pairs, skipped, news_elapsed, link_elapsed
+
+
+def fetch_news_for_symbol(symbol: str, days: int = 1):
+    """
+    fetch 단계: rate limit slot 대기 + Finnhub 호출.
+    DB 트랜잭션 밖에서 호출해야 한다 (대기/재시도 sleep 동안 커넥션과 락을 잡지 않도록).
+    반환: (data, wait_slot_elapsed, fetch_elapsed)
+    """
+    breaker = get_finnhub_breaker()
+    if breaker is not None:
+        # circuit이 열려 있으면 bucket 토큰을 쓰거나 slot을 기다리기 전에 실패한다.
+        # half_open probe는 실제 요청 직전 fetch_company_news의 guard()가 잡아야 하므로 상태만 본다.
+        breaker.guard(take_probe=False)
 
     t_wait_start = perf_counter()
     if settings.FINNHUB_BUCKET_ENABLED:
@@ -164,7 +763,7 @@ def upsert_news_for_symbol(symbol: str, days: int = 1) -> dict:
                 "[upsert_news_for_symbol_breakdown] symbol=%s wait_slot=%.3fs fetch=0.000s stock_get=0.000s news_upsert=0.000s link_upsert=0.000s total=%.3fs status=rate_limited",
                 symbol,
                 t_wait_end - t_wait_start,
-                t_wait_end - t_total_start,
+                t_wait_end - t_wait_start,
             )
             raise Exception(f"Rate limit wait timeout: {symbol}")
     t_wait_end = perf_counter()
@@ -173,9 +772,27 @@ def upsert_news_for_symbol(symbol: str, days: int = 1) -> dict:
     data = fetch_company_news(symbol, days)
     t_fetch_end = perf_counter()
 
-    created_news = 0
-    linked_pairs = 0
-    skipped = 0
+    return data, t_wait_end - t_wait_start, t_fetch_end - t_fetch_start
+
+
+def upsert_news_for_symbol(symbol: str, days: int = 1, on_stage=None) -> dict:
+    """
+    Finnhub에서 symbol 뉴스 가져와 stocks.News/NewsStock에 업서트.
+    fetch(대기+HTTP) → transform(파싱/해시) → persist(짧은 쓰기 트랜잭션) 순으로
+    나뉘며, 트랜잭션은 persist 단계에서만 열린다.
+    종목 watermark 이하의 기사는 DB 작업 전에 버리고, 조회 기간도 마지막 성공 이후로 줄인다.
+    on_stage: 단계가 바뀔 때 "fetching" / "persisting"으로 호출되는 콜백 (IngestJob 진행 상황용)
+    반환: {"created_news": X, "linked_pairs": Y, "skipped": Z, "watermark_skipped": W}
+    """
+    t_total_start = perf_counter()
+
+    watermark = load_watermarks([symbol]).get(symbol)
+    fetch_days = watermark_fetch_days(watermark, days)
+
+    if on_stage is not None:
+        on_stage("fetching")
+
+    data, wait_slot_elapsed, fetch_elapsed = fetch_news_for_symbol(symbol, fetch_days)
 
     t_stock_start = perf_counter()
     try:
@@ -185,68 +802,35 @@ def upsert_news_for_symbol(symbol: str, days: int = 1) -> dict:
         logger.info(
             "[upsert_news_for_symbol_breakdown] symbol=%s wait_slot=%.3fs fetch=%.3fs stock_get=%.3fs news_upsert=0.000s link_upsert=0.000s total=%.3fs status=stock_not_found",
             symbol,
-            t_wait_end - t_wait_start,
-            t_fetch_end - t_fetch_start,
+            wait_slot_elapsed,
+            fetch_elapsed,
             t_stock_end - t_stock_start,
             t_stock_end - t_total_start,
         )
         raise
     t_stock_end = perf_counter()
 
-    news_upsert_elapsed = 0.0
-    link_upsert_elapsed = 0.0
-
-    for item in data:
-        raw_url = item.get("url") or ""
-        if not raw_url:
-            skipped += 1
-            continue
-
-        canonical = normalize_url(raw_url)
-        url_hash = make_url_hash(raw_url)
-
-        ts = item.get("datetime")
-        try:
-            published_at = (
-                datetime.fromtimestamp(int(ts), tz=UTC) if ts else datetime.now(UTC)
-            )
-        except Exception:
-            published_at = datetime.now(UTC)
-
-        defaults = {
-            "headline": item.get("headline") or "",
-            "url": raw_url,
-            "canonical_url": canonical,
-            "source": item.get("source")
-            or (urlparse(canonical).netloc if canonical else None),
-            "published_at": published_at,
-            "language": item.get("lang", "en"),
-            "raw_json": item,
-        }
-
-        t_news_upsert_start = perf_counter()
-        news, created = News.objects.get_or_create(url_hash=url_hash, defaults=defaults)
-        t_news_upsert_end = perf_counter()
-        news_upsert_elapsed += t_news_upsert_end - t_news_upsert_start
+    rows, skipped = build_news_rows(data)
+    parsed_count = len(rows)
+    rows, watermark_skipped = apply_watermark(rows, watermark, days)
 
-        if created:
-            created_news += 1
+    if on_stage is not None:
+        on_stage("persisting")
 
-        t_link_upsert_start = perf_counter()
-        ns_created = NewsStock.objects.get_or_create(news=news, stock=stock)[1]
-        t_link_upsert_end = perf_counter()
-        link_upsert_elapsed += t_link_upsert_end - t_link_upsert_start
-
-        if ns_created:
-            linked_pairs += 1
+    (
+        created_news,
+        linked_pairs,
+        news_upsert_elapsed,
+        link_upsert_elapsed,
+    ) = persist_news_rows(stock, rows)
 
     t_total_end = perf_counter()
 
     logger.info(
-        "[upsert_news_for_symbol_breakdown] symbol=%s wait_slot=%.3fs fetch=%.3fs stock_get=%.3fs news_upsert=%.3fs link_upsert=%.3fs total=%.3fs item_count=%s created_news=%s linked_pairs=%s skipped=%s",
+        "[upsert_news_for_symbol_breakdown] symbol=%s wait_slot=%.3fs fetch=%.3fs stock_get=%.3fs news_upsert=%.3fs link_upsert=%.3fs total=%.3fs item_count=%s created_news=%s linked_pairs=%s skipped=%s fetch_days=%s watermark_skipped=%s watermark_skip_ratio=%.2f",
         symbol,
-        t_wait_end - t_wait_start,
-        t_fetch_end - t_fetch_start,
+        wait_slot_elapsed,
+        fetch_elapsed,
         t_stock_end - t_stock_start,
         news_upsert_elapsed,
         link_upsert_elapsed,
@@ -255,13 +839,102 @@ def upsert_news_for_symbol(symbol: str, days: int = 1) -> dict:
         created_news,
         linked_pairs,
         skipped,
+        fetch_days,
+        watermark_skipped,
+        watermark_skipped / parsed_count if parsed_count else 0.0,
     )
 
     return {
         "created_news": created_news,
         "linked_pairs": linked_pairs,
         "skipped": skipped,
+        "watermark_skipped": watermark_skipped,
+    }
+
+
+def upsert_news_for_symbol_coalesced(symbol: str, days: int = 1, on_stage=None) -> dict:
+    """
+    upsert_news_for_symbol의 single-flight 버전 (API / beat 공용).
+    같은 (symbol, days)로 동시에 들어온 호출은 한 번만 Finnhub를 호출하고 같은 결과 dict를 받는다.
+    on_stage는 실제로 수집을 수행하는 호출(leader)에서만 불린다.
+    """
+    if not getattr(settings, "NEWS_INGEST_SINGLE_FLIGHT_ENABLED", True):
+        return upsert_news_for_symbol(symbol, days, on_stage=on_stage)
+
+    t_start = perf_counter()
+    result, role = single_flight(
+        f"news_ingest:{symbol}:{days}",
+        lambda: upsert_news_for_symbol(symbol, days, on_stage=on_stage),
+        lock_timeout=getattr(settings, "NEWS_INGEST_SINGLE_FLIGHT_LOCK_TIMEOUT", 30),
+        result_timeout=getattr(settings, "NEWS_INGEST_SINGLE_FLIGHT_RESULT_TTL", 15),
+        wait_timeout=getattr(settings, "NEWS_INGEST_SINGLE_FLIGHT_WAIT_TIMEOUT", 30),
+    )
+    logger.info(
+        "[news_ingest_single_flight] symbol=%s days=%s role=%s elapsed=%.3fs",
+        symbol,
+        days,
+        role,
+        perf_counter() - t_start,
+    )
+    return result
+
+
+def _summary_priority_enabled() -> bool:
+    return getattr(settings, "SUMMARY_JOB_PRIORITY_ENABLED", True)
+
+
+def summary_job_priorities(stock_ids) -> dict:
+    """
+    {stock_id: priority(초)}. 관심 사용자 수가 두 배가 될 때마다 AUDIENCE_SECONDS씩,
+    watcher 중 활성 PREMIUM/PRO 구독자가 있으면 플랜별 초를 더하고 MAX_SECONDS에서 자른다.
+    종목 수와 무관하게 쿼리 2번.
+    """
+    stock_ids = list(stock_ids)
+    if not stock_ids or not _summary_priority_enabled():
+        return {stock_id: 0 for stock_id in stock_ids}
+
+    from subscriptions.models import Subscription
+
+    audience = dict(
+        FavoriteStock.objects.filter(stock_id__in=stock_ids)
+        .values("stock_id")
+        .annotate(watchers=Count("id"))
+        .values_list("stock_id", "watchers")
+    )
+
+    plan_seconds = {
+        Subscription.Plan.PREMIUM: getattr(settings, "SUMMARY_JOB_PRIORITY_PREMIUM_SECONDS", 600),
+        Subscription.Plan.PRO: getattr(settings, "SUMMARY_JOB_PRIORITY_PRO_SECONDS", 1800),
     }
+    plan_bonus = {}
+    for stock_id, plan in (
+        Subscription.objects.filter(
+            active=True,
+            plan__in=list(plan_seconds),
+            user__favorites__stock_id__in=stock_ids,
+        )
+        .filter(Q(end_date__isnull=True) | Q(end_date__gte=now().date()))
+        .values_list("user__favorites__stock_id", "plan")
+        .distinct()
+    ):
+        plan_bonus[stock_id] = max(plan_bonus.get(stock_id, 0), plan_seconds[plan])
+
+    audience_seconds = getattr(settings, "SUMMARY_JOB_PRIORITY_AUDIENCE_SECONDS", 300)
+    max_seconds = getattr(settings, "SUMMARY_JOB_PRIORITY_MAX_SECONDS", 3600)
+    return {
+        stock_id: min(
+            max_seconds,
+            round(audience_seconds * math.log2(1 + audience.get(stock_id, 0)))
+            + plan_bonus.get(stock_id, 0),
+        )
+        for stock_id in stock_ids
+    }
+
+
+def summary_job_priority_fields(priority: int, enqueued_at=None) -> dict:
+    """SummaryJob 생성 시 넣을 priority/dispatch_key (dispatch는 dispatch_key 오름차순)."""
+    enqueued_at = enqueued_at or now()
+    return {"priority": priority, "dispatch_key": enqueued_at - timedelta(seconds=priority)}
 
 
 def store_daily_summaries_for_user(user, summaries_by_symbol: dict):
@@ -1,18 +1,54 @@
-import openai, json, logging, uuid, requests
+import openai, json, logging, math, operator, uuid, requests
 
-from celery import shared_task
+from celery import chord, shared_task
+from celery.exceptions import SoftTimeLimitExceeded
 from datetime import datetime, timedelta, time, timezone as dt_timezone
 from decimal import Decimal
+from functools import reduce
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import F, Min, Q
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from stocks.cache import set_cached_summary
-from stocks.services import sleep_for_finnhub_429, upsert_news_for_symbol
-from stocks.models import Stock, News, Summary, SummaryGenerationLog, SummaryJob, Price
-from stocks.utils import score_news_relevance
-from stocks.rate_limit import get_finnhub_bucket, get_openai_bucket
+from stocks.ingest import run_ingest
+from stocks.circuit_breaker import get_finnhub_breaker, get_openai_breaker
+from stocks.heartbeat import LeaseHeartbeat, heartbeat_enabled, lease_expiry
+from stocks.dispatch_control import (
+    claim_dispatch_wakeup,
+    clear_dispatch_wakeup,
+    get_dispatch_controller,
+    static_max_inflight,
+)
+from stocks.services import (
+    NEWS_RELEVANCE_FIELDS,
+    apply_link_relevance,
+    format_ner_cache_hit_ratio,
+    get_finnhub_session,
+    news_org_entities,
+    rescore_news_relevance,
+    sleep_for_finnhub_429,
+    summary_job_priorities,
+    summary_job_priority_fields,
+    upsert_news_for_symbol_coalesced,
+)
+from stocks.models import (
+    IngestJob,
+    NewsStock,
+    Stock,
+    Summary,
+    SummaryGenerationLog,
+    SummaryJob,
+    Price,
+)
+from stocks.utils import RELEVANCE_SCORER_VERSION, score_news_relevance_batch
+from stocks.rate_limit import (
+    PRIORITY_INTERACTIVE,
+    get_finnhub_bucket,
+    get_openai_bucket,
+    rate_limit_priority,
+    report_finnhub_feedback,
+)
 from time import perf_counter
 from zoneinfo import ZoneInfo
 
@@ -21,17 +57,35 @@ User = get_user_model()
 
 
 def fetch_finnhub_quote(symbol, max_retries: int = 5):
+    breaker = get_finnhub_breaker()
+
     for attempt in range(max_retries):
-        response = requests.get(
-            "https://finnhub.io/api/v1/quote",
-            params={
-                "symbol": symbol,
-                "token": settings.FINNHUB_API_KEY,
-            },
-            timeout=10,
-        )
+        if breaker is not None:
+            breaker.guard()
+        try:
+            response = get_finnhub_session().get(
+                "https://finnhub.io/api/v1/quote",
+                params={
+                    "symbol": symbol,
+                    "token": settings.FINNHUB_API_KEY,
+                },
+                timeout=10,
+            )
+        except requests.RequestException:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+
+        if breaker is not None:
+            # 매 시도의 probe를 여기서 반납해 다음 시도의 guard()가 자기 probe에 막히지 않게 한다.
+            # 429/4xx는 Finnhub가 응답한 것이므로 성공, 5xx만 실패로 센다.
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
 
         if response.status_code == 429:
+            report_finnhub_feedback(throttled=True)
             if attempt == max_retries - 1:
                 raise Exception(f"Finnhub 429 Too Many Requests: {symbol}")
 
@@ -45,12 +99,18 @@ def fetch_finnhub_quote(symbol, max_retries: int = 5):
             continue
 
         response.raise_for_status()
+        report_finnhub_feedback(throttled=False)
         return response.json()
 
     raise Exception(f"Finnhub quote fetch failed after retries: {symbol}")
 
 
 def update_stock_quote(stock):
+    breaker = get_finnhub_breaker()
+    if breaker is not None:
+        # slot을 기다리기 전에 거르기만 한다. half_open probe는 fetch_finnhub_quote의 guard()가 잡는다.
+        breaker.guard(take_probe=False)
+
     if settings.FINNHUB_BUCKET_ENABLED:
         bucket = get_finnhub_bucket()
         if not bucket.wait_for_slot():
@@ -111,8 +171,11 @@ def _get_utc_range_from_kst_date(target_date=None):
 
 
 QUEUE_START_TIMEOUT = timedelta(minutes=2)
+# heartbeat(lease_expires_at) 없이 시작된 job에만 쓰는 실행 시간 상한
 RUNNING_EXEC_TIMEOUT = timedelta(minutes=10)
 MAX_STUCK_RECOVERY_RETRIES = 3
+# stuck 복구 UPDATE 1번에 넣을 최대 job 수 ((id, lease_token) 쌍 OR 조건 길이 제한 — SQLite expression depth 1000)
+STUCK_RECOVERY_BATCH_SIZE = 500
 MAX_SUMMARY_RETRIES = 3
 
 RETRY_BACKOFF_MINUTES = {
@@ -151,6 +214,81 @@ def _classify_openai_failure(exc: Exception):
     return False, "openai_non_retryable_unknown_error"
 
 
+OPENAI_RATE_LIMIT_REASONS = (
+    "openai_rate_limit_error",
+    "openai_retryable_status_429",
+)
+
+
+def _is_openai_upstream_failure(retryable: bool, reason: str) -> bool:
+    """timeout/연결 오류/5xx 등 OpenAI 장애만 circuit breaker 실패로 센다 (429는 bucket/backoff 몫)."""
+    return retryable and reason not in OPENAI_RATE_LIMIT_REASONS
+
+
+def _requeue_for_open_circuit(job_id: int, lease_token: str, symbol: str, decision):
+    # OpenAI 장애 중에는 timeout까지 기다리지 않고 retry_count를 쓰지 않은 채 재대기시킨다.
+    retry_after = max(1, math.ceil(decision.retry_after))
+    logger.warning(
+        "[generate_summary] openai circuit open symbol=%s state=%s retry_after=%ss",
+        symbol,
+        decision.state,
+        retry_after,
+    )
+    retry_at = timezone.now() + timedelta(seconds=retry_after)
+    if SummaryJob.objects.filter(
+        id=job_id,
+        status=SummaryJob.Status.RUNNING,
+        lease_token=lease_token,
+    ).update(
+        status=SummaryJob.Status.RETRY_WAIT,
+        retry_at=retry_at,
+        started_at=None,
+        finished_at=None,
+        dispatched_at=None,
+        lease_token=None,
+        error_message="openai circuit open",
+    ):
+        request_summary_dispatch(retry_at)
+    return {
+        "job_id": job_id,
+        "status": "circuit_open",
+        "retry_after": retry_after,
+    }
+
+
+def _filter_lease_pairs(queryset, rows):
+    """행마다 자기 (id, lease_token) 쌍으로만 맞춘다 — id IN × lease_token IN 교차 조건이 아니다."""
+    return queryset.filter(
+        reduce(operator.or_, (Q(id=job_id, lease_token=lease_token) for job_id, lease_token in rows))
+    )
+
+
+def _recover_stuck_rows(rows, **fields) -> list:
+    """
+    stuck job 묶음을 lease 조건 그대로 set-based UPDATE로 옮기고 실제로 바뀐 (id, lease_token)을 돌려준다.
+    rows: [(id, lease_token)]. STUCK_RECOVERY_BATCH_SIZE개씩 lease 쌍이 맞는 행을 잠가 id를 다시 읽고(SELECT ... FOR UPDATE)
+    그 id만 UPDATE 1번 한다. 잠금이 커밋까지 유지되도록 transaction.atomic() 안에서 불러야 한다.
+    """
+    recovered = []
+    for start in range(0, len(rows), STUCK_RECOVERY_BATCH_SIZE):
+        chunk = rows[start:start + STUCK_RECOVERY_BATCH_SIZE]
+        locked_ids = set(
+            _filter_lease_pairs(
+                SummaryJob.objects.filter(
+                    status=SummaryJob.Status.RUNNING,
+                    finished_at__isnull=True,
+                ),
+                chunk,
+            )
+            .select_for_update()
+            .values_list("id", flat=True)
+        )
+        if locked_ids:
+            SummaryJob.objects.filter(id__in=locked_ids).update(**fields)
+        recovered.extend(row for row in chunk if row[0] in locked_ids)
+    return recovered
+
+
 @shared_task
 def recover_stuck_summary_jobs():
     now = timezone.now()
@@ -158,149 +296,253 @@ def recover_stuck_summary_jobs():
     queue_start_deadline = now - QUEUE_START_TIMEOUT
     running_exec_deadline = now - RUNNING_EXEC_TIMEOUT
 
-    stuck_jobs = list(
-        SummaryJob.objects.filter(
-            status=SummaryJob.Status.RUNNING,
-            finished_at__isnull=True,
-        )
-        .filter(
-            Q(
-                started_at__isnull=True,
-                dispatched_at__isnull=False,
-                dispatched_at__lte=queue_start_deadline,
+    recovered_job_ids = []
+    failed_job_ids = []
+    released_tokens = []
+    next_retry_at = None
+
+    with transaction.atomic():
+        # 잠근 행은 아래 UPDATE 전까지 다른 worker가 바꾸지 못한다.
+        # 지금 마무리 중인(잠겨 있는) job은 건너뛰고 다음 실행에서 다시 본다.
+        stuck_jobs = list(
+            SummaryJob.objects.filter(
+                status=SummaryJob.Status.RUNNING,
+                finished_at__isnull=True,
+                lease_token__isnull=False,
             )
-            | Q(
-                started_at__isnull=False,
-                started_at__lte=running_exec_deadline,
+            .filter(
+                Q(
+                    started_at__isnull=True,
+                    dispatched_at__isnull=False,
+                    dispatched_at__lte=queue_start_deadline,
+                )
+                # 시작된 job은 heartbeat가 끊겨 lease가 만료됐을 때 회수한다 (LLM 호출이 길어도 살아 있으면 두고).
+                | Q(
+                    started_at__isnull=False,
+                    lease_expires_at__isnull=False,
+                    lease_expires_at__lte=now,
+                )
+                # heartbeat 없이 시작된 job(설정으로 끔/배포 이전)은 예전처럼 경과 시간으로 본다.
+                | Q(
+                    started_at__isnull=False,
+                    lease_expires_at__isnull=True,
+                    started_at__lte=running_exec_deadline,
+                )
             )
+            .select_for_update(skip_locked=True)
+            .order_by("id")
+            .values_list("id", "retry_count", "lease_token")
         )
-        .values("id", "retry_count", "lease_token")
-    )
 
-    recovered_job_ids = []
-    failed_job_ids = []
+        # retry_count별로 묶는다: 한도를 넘은 job은 FAILED 한 묶음, 나머지는 backoff가 같은 묶음끼리.
+        exhausted = []
+        retry_buckets = {}
+        for job_id, retry_count, lease_token in stuck_jobs:
+            if retry_count >= MAX_STUCK_RECOVERY_RETRIES:
+                exhausted.append((job_id, lease_token))
+            else:
+                retry_buckets.setdefault(retry_count, []).append((job_id, lease_token))
+
+        for job_id, lease_token in _recover_stuck_rows(
+            exhausted,
+            status=SummaryJob.Status.FAILED,
+            finished_at=now,
+            error_message="stuck timeout exceeded max retries",
+        ):
+            failed_job_ids.append(job_id)
+            released_tokens.append(lease_token)
 
-    for job in stuck_jobs:
-        job_id = job["id"]
-        retry_count = job["retry_count"]
-        lease_token = job["lease_token"]
+        for retry_count, rows in sorted(retry_buckets.items()):
+            retry_at = now + timedelta(minutes=_get_retry_backoff_minutes(retry_count))
+            recovered = _recover_stuck_rows(
+                rows,
+                status=SummaryJob.Status.RETRY_WAIT,
+                retry_count=F("retry_count") + 1,
+                retry_at=retry_at,
+                started_at=None,
+                finished_at=None,
+                dispatched_at=None,
+                lease_token=None,
+                lease_expires_at=None,
+                error_message="stuck timeout recovery",
+            )
+            for job_id, lease_token in recovered:
+                recovered_job_ids.append(job_id)
+                released_tokens.append(lease_token)
+            if recovered:
+                next_retry_at = min(next_retry_at or retry_at, retry_at)
 
-        if lease_token is None:
-            continue
+    recovered_job_ids.sort()
+    logger.info(
+        "[recover_stuck_summary_jobs] stuck=%s recovered=%s failed=%s",
+        len(stuck_jobs),
+        len(recovered_job_ids),
+        len(failed_job_ids),
+    )
 
-        if retry_count >= MAX_STUCK_RECOVERY_RETRIES:
-            updated = SummaryJob.objects.filter(
-                id=job_id,
+    if next_retry_at is not None:
+        request_summary_dispatch(next_retry_at)
+
+    orphaned_slots = 0
+    controller = get_dispatch_controller()
+    if controller is not None:
+        controller.release(*released_tokens)
+        orphaned_slots = controller.reconcile(
+            SummaryJob.objects.filter(
                 status=SummaryJob.Status.RUNNING,
-                lease_token=lease_token,
                 finished_at__isnull=True,
-            ).update(
-                status=SummaryJob.Status.FAILED,
-                finished_at=now,
-                error_message="stuck timeout exceeded max retries",
-            )
-            if updated:
-                failed_job_ids.append(job_id)
-            continue
-
-        backoff_minutes = _get_retry_backoff_minutes(retry_count)
-
-        updated = SummaryJob.objects.filter(
-            id=job_id,
-            status=SummaryJob.Status.RUNNING,
-            lease_token=lease_token,
-            finished_at__isnull=True,
-        ).update(
-            status=SummaryJob.Status.RETRY_WAIT,
-            retry_count=retry_count + 1,
-            retry_at=now + timedelta(minutes=backoff_minutes),
-            started_at=None,
-            finished_at=None,
-            dispatched_at=None,
-            lease_token=None,
-            error_message="stuck timeout recovery",
+                lease_token__isnull=False,
+            ).values_list("lease_token", flat=True)
         )
-
-        if updated:
-            recovered_job_ids.append(job_id)
+        if orphaned_slots:
+            logger.warning("[recover_stuck_summary_jobs] orphaned_dispatch_slots=%s", orphaned_slots)
 
     return {
         "recovered_job_ids": recovered_job_ids,
         "failed_job_ids": failed_job_ids,
+        "orphaned_slots": orphaned_slots,
     }
 
 
-@shared_task(bind=True)
-def fetch_favorite_news(self, days: int = 1):
-    stocks = Stock.objects.filter(favorited_by__isnull=False).distinct()
+def _has_new_summary_input(res: dict) -> bool:
+    return res.get("created_news", 0) > 0 or res.get("linked_pairs", 0) > 0
 
-    results = []
-    success_symbols = []
-    failed_symbols = []
-    enqueued_symbols = []
 
-    today = timezone.localdate()
+def _stock_ids_with_summary_or_job(stock_ids, today) -> set:
+    """오늘 Summary나 SummaryJob이 이미 있는 종목 id를 UNION 쿼리 1번으로 가져온다."""
+    stock_ids = list(stock_ids)
+    if not stock_ids:
+        return set()
+    return set(
+        Summary.objects.filter(stock_id__in=stock_ids, date=today)
+        .values_list("stock_id", flat=True)
+        .union(
+            SummaryJob.objects.filter(stock_id__in=stock_ids, date=today).values_list(
+                "stock_id", flat=True
+            )
+        )
+    )
 
-    for stock in stocks:
-        symbol = stock.symbol
-        try:
-            t_symbol_start = perf_counter()
-            t_upsert_start = perf_counter()
-            res = upsert_news_for_symbol(symbol, days=days)
-            t_upsert_end = perf_counter()
-
-            t_quote_start = perf_counter()
-            try:
-                update_stock_quote(stock)
-            except Exception:
-                logger.warning(
-                    "[fetch_favorite_news] quote update failed symbol=%s",
-                    symbol,
-                    exc_info=True,
-                )
-            t_quote_end = perf_counter()
 
-            t_enqueue_start = perf_counter()
-            results.append({"symbol": symbol, **res})
+def _enqueue_summary_jobs(stocks, outcomes, today, covered_stock_ids) -> list:
+    """
+    새 입력이 있는 종목들의 SummaryJob을 bulk_create 한 번으로 만들고 outcome마다 "enqueued"를 채운다.
+    covered_stock_ids: 실행 앞에서 조회한, 오늘 Summary/SummaryJob이 이미 있는 종목 id.
+    그 사이 다른 worker가 같은 (stock, date) job을 만들었다면 unique 제약에 걸려 무시되고,
+    그 종목은 "enqueued"가 False다 (이번 실행이 실제로 만든 job만 센다).
+    """
+    t_enqueue_start = perf_counter()
+    stock_by_symbol = {stock.symbol: stock for stock in stocks}
 
-            has_new_input = (
-                res.get("created_news", 0) > 0 or res.get("linked_pairs", 0) > 0
+    to_create = []
+    for outcome in outcomes:
+        if "error" in outcome:
+            continue
+        stock = stock_by_symbol[outcome["symbol"]]
+        if _has_new_summary_input(outcome["result"]) and stock.id not in covered_stock_ids:
+            to_create.append(stock)
+
+    created_stock_ids = set()
+    if to_create:
+        # ignore_conflicts는 어떤 행이 들어갔는지 알려주지 않으므로, 이번 실행의 토큰을 lease_token에 담아 만들고
+        # 그 토큰이 남은 job만 이번 실행이 만든 것으로 센다. PENDING job의 lease_token은 dispatch가 새로 덮어쓴다.
+        run_token = uuid.uuid4()
+        priorities = summary_job_priorities([stock.id for stock in to_create])
+        jobs = [
+            SummaryJob(
+                stock=stock,
+                date=today,
+                status=SummaryJob.Status.PENDING,
+                lease_token=run_token,
+                **summary_job_priority_fields(priorities[stock.id]),
             )
-
-            summary_exists_today = Summary.objects.filter(
-                stock__symbol__iexact=symbol,
+            for stock in to_create
+        ]
+        SummaryJob.objects.bulk_create(jobs, ignore_conflicts=True)
+        created_stock_ids = set(
+            SummaryJob.objects.filter(
                 date=today,
-            ).exists()
-
-            created = False
-            if has_new_input and not summary_exists_today:
-                _, created = SummaryJob.objects.get_or_create(
-                    stock=stock,
-                    date=today,
-                    defaults={"status": SummaryJob.Status.PENDING},
-                )
-                if created:
-                    enqueued_symbols.append(symbol)
-            t_enqueue_end = perf_counter()
+                stock_id__in=[stock.id for stock in to_create],
+                lease_token=run_token,
+            ).values_list("stock_id", flat=True)
+        )
+        if created_stock_ids:
+            request_summary_dispatch()
 
-            logger.info(
-                "[fetch_favorite_news_breakdown] symbol=%s upsert=%.3fs quote=%.3fs enqueue=%.3fs total=%.3fs created_news=%s linked_pairs=%s enqueued=%s",
+    for outcome in outcomes:
+        if "error" not in outcome:
+            outcome["enqueued"] = stock_by_symbol[outcome["symbol"]].id in created_stock_ids
+
+    logger.info(
+        "[fetch_favorite_news] enqueue candidates=%s already_covered=%s created=%s conflicts=%s elapsed=%.3fs",
+        sum(1 for outcome in outcomes if "error" not in outcome),
+        len(covered_stock_ids),
+        len(created_stock_ids),
+        len(to_create) - len(created_stock_ids),
+        perf_counter() - t_enqueue_start,
+    )
+    return outcomes
+
+
+def _fetch_news_for_favorite_stock(stock, days: int) -> dict:
+    """
+    종목 1개에 대한 뉴스 upsert → 시세 갱신. SummaryJob은 호출한 쪽이 _enqueue_summary_jobs로 한 번에 만든다.
+    실패해도 예외를 올리지 않고 {"symbol", "error"}로 돌려준다 (다른 종목 진행을 막지 않도록).
+    """
+    symbol = stock.symbol
+    try:
+        t_symbol_start = perf_counter()
+        t_upsert_start = perf_counter()
+        res = upsert_news_for_symbol_coalesced(symbol, days=days)
+        t_upsert_end = perf_counter()
+
+        t_quote_start = perf_counter()
+        try:
+            update_stock_quote(stock)
+        except Exception:
+            logger.warning(
+                "[fetch_favorite_news] quote update failed symbol=%s",
                 symbol,
-                t_upsert_end - t_upsert_start,
-                t_quote_end - t_quote_start,
-                t_enqueue_end - t_enqueue_start,
-                t_enqueue_end - t_symbol_start,
-                res.get("created_news", 0),
-                res.get("linked_pairs", 0),
-                created,
+                exc_info=True,
             )
+        t_quote_end = perf_counter()
+
+        logger.info(
+            "[fetch_favorite_news_breakdown] symbol=%s upsert=%.3fs quote=%.3fs total=%.3fs created_news=%s linked_pairs=%s",
+            symbol,
+            t_upsert_end - t_upsert_start,
+            t_quote_end - t_quote_start,
+            t_quote_end - t_symbol_start,
+            res.get("created_news", 0),
+            res.get("linked_pairs", 0),
+        )
+
+        return {"symbol": symbol, "result": res}
 
-            success_symbols.append(symbol)
+    except SoftTimeLimitExceeded:
+        raise
+    except Exception as e:
+        logger.exception("[fetch_favorite_news] symbol=%s failed: %s", symbol, e)
+        return {"symbol": symbol, "error": str(e)}
 
-        except Exception as e:
-            logger.exception("[fetch_favorite_news] symbol=%s failed: %s", symbol, e)
-            results.append({"symbol": symbol, "error": str(e)})
-            failed_symbols.append({"symbol": symbol, "error": str(e)})
+
+def _merge_favorite_news_outcomes(outcomes) -> dict:
+    results = []
+    success_symbols = []
+    failed_symbols = []
+    enqueued_symbols = []
+
+    for outcome in outcomes:
+        symbol = outcome["symbol"]
+        if "error" in outcome:
+            results.append({"symbol": symbol, "error": outcome["error"]})
+            failed_symbols.append({"symbol": symbol, "error": outcome["error"]})
+            continue
+
+        results.append({"symbol": symbol, **outcome["result"]})
+        success_symbols.append(symbol)
+        if outcome["enqueued"]:
+            enqueued_symbols.append(symbol)
 
     return {
         "results": results,
@@ -310,6 +552,205 @@ def fetch_favorite_news(self, days: int = 1):
     }
 
 
+FAVORITE_NEWS_PENDING_SUMMARY = {
+    "results": None,
+    "success_symbols": None,
+    "failed_symbols": None,
+    "enqueued_symbols": None,
+}
+
+
+def _favorite_news_result(summary, *, sharded, shard_count, symbol_count, result_id=None) -> dict:
+    """
+    fetch_favorite_news / merge_favorite_news_results의 공통 반환 형태 (모드와 상관없이 같은 key).
+    sharded 실행 직후에는 종목별 결과가 아직 없으므로 results~enqueued_symbols가 None이고,
+    result_id(chord callback = merge_favorite_news_results)의 결과가 같은 형태로 채워진 값이다.
+    """
+    return {
+        **summary,
+        "sharded": sharded,
+        "shard_count": shard_count,
+        "symbol_count": symbol_count,
+        "result_id": result_id,
+    }
+
+
+def _favorite_news_shard_count(symbol_count: int) -> int:
+    # 동시에 Finnhub를 두드리는 shard 수를 bucket capacity 이하로 묶는다.
+    # capacity보다 많이 띄워봐야 나머지는 wait_for_slot에서 대기만 하게 된다.
+    capacity = int(getattr(settings, "FINNHUB_BUCKET_CAPACITY", 2))
+    max_shards = int(getattr(settings, "FINNHUB_FANOUT_MAX_SHARDS", 0)) or capacity
+    return max(1, min(symbol_count, capacity, max_shards))
+
+
+@shared_task(soft_time_limit=getattr(settings, "FINNHUB_FANOUT_SHARD_SOFT_TIME_LIMIT", 600))
+def fetch_favorite_news_shard(stock_ids, days: int = 1):
+    """
+    fetch_favorite_news sharded 모드의 chord header.
+    shard 안의 종목은 순서대로 처리한다 — 병렬도는 shard 수(≤ FINNHUB_BUCKET_CAPACITY)이고,
+    Finnhub 호출은 어차피 bucket 토큰 하나씩을 기다리므로 shard 안에서 더 나눠도 빨라지지 않는다.
+    어떤 종목이 실패하거나 shard가 soft time limit에 걸려도 예외를 올리지 않고
+    처리하지 못한 종목을 failed로 기록해 반환한다 — chord callback이 항상 실행되도록.
+    """
+    today = timezone.localdate()
+    stocks = list(Stock.objects.filter(id__in=stock_ids).order_by("symbol"))
+    covered_stock_ids = _stock_ids_with_summary_or_job(stock_ids, today)
+    outcomes = []
+
+    try:
+        for stock in stocks:
+            outcomes.append(_fetch_news_for_favorite_stock(stock, days))
+    except SoftTimeLimitExceeded:
+        done = {outcome["symbol"] for outcome in outcomes}
+        for stock in stocks:
+            if stock.symbol not in done:
+                outcomes.append(
+                    {"symbol": stock.symbol, "error": "shard soft time limit exceeded"}
+                )
+        logger.warning(
+            "[fetch_favorite_news_shard] soft time limit exceeded processed=%s total=%s",
+            len(done),
+            len(stocks),
+        )
+
+    return _enqueue_summary_jobs(stocks, outcomes, today, covered_stock_ids)
+
+
+@shared_task
+def merge_favorite_news_results(shard_outcomes):
+    """chord callback: shard별 결과를 fetch_favorite_news와 같은 반환 형태로 합친다."""
+    outcomes = [outcome for shard in shard_outcomes for outcome in shard]
+    merged = _merge_favorite_news_outcomes(outcomes)
+
+    logger.info(
+        "[fetch_favorite_news] sharded run merged success=%s failed=%s enqueued=%s",
+        len(merged["success_symbols"]),
+        len(merged["failed_symbols"]),
+        len(merged["enqueued_symbols"]),
+    )
+    return _favorite_news_result(
+        merged,
+        sharded=True,
+        shard_count=len(shard_outcomes),
+        symbol_count=len(outcomes),
+    )
+
+
+@shared_task(bind=True)
+def fetch_favorite_news(self, days: int = 1, sharded: bool | None = None):
+    """
+    관심 종목 전체의 뉴스/시세를 갱신하고 SummaryJob을 만든다.
+    반환 형태는 모드와 상관없이 _favorite_news_result 하나다. sharded 모드는 chord를 띄우고 바로 돌아오므로
+    종목별 결과 key가 None이고 result_id의 결과(merge_favorite_news_results)에 같은 형태로 채워진다.
+    """
+    stocks = Stock.objects.filter(favorited_by__isnull=False).distinct()
+
+    if sharded is None:
+        sharded = getattr(settings, "FINNHUB_FANOUT_ENABLED", False)
+
+    if sharded:
+        stock_ids = list(stocks.order_by("symbol").values_list("id", flat=True))
+        if not stock_ids:
+            return _favorite_news_result(
+                _merge_favorite_news_outcomes([]), sharded=True, shard_count=0, symbol_count=0
+            )
+
+        shard_count = _favorite_news_shard_count(len(stock_ids))
+        shards = [stock_ids[i::shard_count] for i in range(shard_count)]
+
+        async_result = chord(
+            fetch_favorite_news_shard.s(shard, days) for shard in shards
+        )(merge_favorite_news_results.s())
+
+        logger.info(
+            "[fetch_favorite_news] sharded run symbols=%s shards=%s",
+            len(stock_ids),
+            shard_count,
+        )
+        return _favorite_news_result(
+            FAVORITE_NEWS_PENDING_SUMMARY,
+            sharded=True,
+            shard_count=shard_count,
+            symbol_count=len(stock_ids),
+            result_id=async_result.id,
+        )
+
+    today = timezone.localdate()
+    stocks = list(stocks)
+
+    if getattr(settings, "FINNHUB_ASYNC_ENGINE_ENABLED", True):
+        merged = _fetch_favorite_news_with_async_engine(stocks, days, today)
+    else:
+        covered_stock_ids = _stock_ids_with_summary_or_job([stock.id for stock in stocks], today)
+        outcomes = [_fetch_news_for_favorite_stock(stock, days) for stock in stocks]
+        merged = _merge_favorite_news_outcomes(
+            _enqueue_summary_jobs(stocks, outcomes, today, covered_stock_ids)
+        )
+    return _favorite_news_result(merged, sharded=False, shard_count=1, symbol_count=len(stocks))
+
+
+def _fetch_favorite_news_with_async_engine(stocks, days: int, today) -> dict:
+    """
+    stocks.ingest 비동기 엔진으로 전 종목 뉴스/시세를 동시에 가져와 배치로 기록한 뒤
+    순차 경로와 같은 방식으로 SummaryJob을 생성한다.
+    """
+    stocks = list(stocks)
+    covered_stock_ids = _stock_ids_with_summary_or_job([stock.id for stock in stocks], today)
+
+    outcomes = run_ingest(stocks, days=days)
+    return _merge_favorite_news_outcomes(
+        _enqueue_summary_jobs(stocks, outcomes, today, covered_stock_ids)
+    )
+
+
+@shared_task
+def ingest_news_for_symbol(job_id: str):
+    """
+    NewsIngestView가 만든 IngestJob 1건을 처리한다.
+    pending → running(fetching → persisting) → success/failed 로 상태를 남기고,
+    성공 시 upsert_news_for_symbol의 반환 dict를 result에 저장한다.
+    """
+    started = IngestJob.objects.filter(
+        id=job_id,
+        status=IngestJob.Status.PENDING,
+    ).update(status=IngestJob.Status.RUNNING, started_at=timezone.now())
+    if started == 0:
+        return {"job_id": job_id, "status": "stale_or_already_started"}
+
+    job = IngestJob.objects.get(id=job_id)
+
+    def on_stage(stage):
+        IngestJob.objects.filter(id=job_id).update(stage=stage, updated_at=timezone.now())
+
+    try:
+        # 사용자가 기다리는 요청이므로 beat batch와 별도로 interactive lane에서 slot을 받는다.
+        with rate_limit_priority(PRIORITY_INTERACTIVE):
+            res = upsert_news_for_symbol_coalesced(job.symbol, days=job.days, on_stage=on_stage)
+    except Exception as e:
+        logger.warning(
+            "[ingest_news_for_symbol] failed job_id=%s symbol=%s",
+            job_id,
+            job.symbol,
+            exc_info=True,
+        )
+        IngestJob.objects.filter(id=job_id).update(
+            status=IngestJob.Status.FAILED,
+            error_message=str(e),
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        return {"job_id": job_id, "status": IngestJob.Status.FAILED}
+
+    IngestJob.objects.filter(id=job_id).update(
+        status=IngestJob.Status.SUCCESS,
+        stage=IngestJob.Stage.DONE,
+        result=res,
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    return {"job_id": job_id, "status": IngestJob.Status.SUCCESS, **res}
+
+
 def estimate_token_count(text: str) -> int:
     if not text:
         return 0
@@ -340,13 +781,17 @@ def _generate_summary_for_stock(job_id: int, lease_token: str):
     target_date, start_utc, end_utc = _get_utc_range_from_kst_date(target_date)
 
     t_news_query_start = perf_counter()
-    news_items = list(
-        News.objects.filter(
-            stocks__symbol__iexact=symbol,
-            published_at__gte=start_utc,
-            published_at__lt=end_utc,
-        ).order_by("-published_at")[:10]
+    # 관련도는 ingest 시점에 NewsStock에 저장돼 있으므로 링크 한 번 조회로 점수까지 가져온다.
+    news_links = list(
+        NewsStock.objects.filter(
+            stock=stock,
+            news__published_at__gte=start_utc,
+            news__published_at__lt=end_utc,
+        )
+        .select_related("news")
+        .order_by("-news__published_at")[:10]
     )
+    news_items = [link.news for link in news_links]
     t_news_query_end = perf_counter()
 
     raw_count = len(news_items)
@@ -375,27 +820,42 @@ def _generate_summary_for_stock(job_id: int, lease_token: str):
         return {"message": "No news found", "job_id": job_id}
 
     t_relevance_start = perf_counter()
-    scored_news = []
-    for news in news_items:
-        score, is_relevant, reason = score_news_relevance(
+    # backfill 전 링크나 규칙 버전이 바뀐 링크만 여기서 채점하고 저장해 재시도 때 반복하지 않는다.
+    unscored_links = [
+        link for link in news_links if link.scorer_version != RELEVANCE_SCORER_VERSION
+    ]
+    ner_cache_hits = ner_cache_misses = 0
+    if unscored_links:
+        # 다른 종목 요약이나 ingest에서 이미 NER을 돌린 기사는 News 캐시를 쓴다.
+        org_entities, ner_cache_hits, ner_cache_misses = news_org_entities(
+            [link.news for link in unscored_links]
+        )
+        scores = score_news_relevance_batch(
             symbol=symbol,
             company_name=stock.name,
-            headline=news.headline,
-        )
-        scored_news.append(
-            {
-                "news": news,
-                "relevance_score": score,
-                "is_relevant": is_relevant,
-                "reason": reason,
-            }
+            headlines=[link.news.headline for link in unscored_links],
+            org_entities=org_entities,
         )
+        for link, scored in zip(unscored_links, scores):
+            apply_link_relevance(link, scored)
+        NewsStock.objects.bulk_update(unscored_links, NEWS_RELEVANCE_FIELDS)
+
+    scored_news = [
+        {
+            "news": link.news,
+            "relevance_score": link.relevance_score,
+            "is_relevant": link.is_relevant,
+            "reason": link.relevance_reason,
+        }
+        for link in news_links
+    ]
 
     relevant_news = [item for item in scored_news if item["is_relevant"]]
     relevant_count = len(relevant_news)
     t_relevance_end = perf_counter()
     logger.info(
-        f"[generate_summary] symbol={symbol} raw_count={raw_count} relevant_count={relevant_count}"
+        f"[generate_summary] symbol={symbol} raw_count={raw_count} relevant_count={relevant_count} "
+        f"unscored_links={len(unscored_links)}"
     )
 
     t_prompt_start = perf_counter()
@@ -513,6 +973,15 @@ def _generate_summary_for_stock(job_id: int, lease_token: str):
             "job_id": job_id,
             "status": "stale_before_llm",
         }
+    breaker = get_openai_breaker()
+    if breaker is not None:
+        # 버킷에서 거절될 수 있으므로 여기서는 half_open probe를 잡지 않고 상태만 본다.
+        decision = breaker.peek()
+        if not decision.allowed:
+            return _requeue_for_open_circuit(job_id, lease_token, stock.symbol, decision)
+
+    dispatch_controller = get_dispatch_controller()
+    probe_taken = False
     try:
         if settings.OPENAI_BUCKET_ENABLED:
             bucket = get_openai_bucket()
@@ -529,8 +998,10 @@ def _generate_summary_for_stock(job_id: int, lease_token: str):
                     bucket_result.retry_after_seconds,
                     bucket_result.remaining_tokens,
                 )
+                if dispatch_controller is not None:
+                    dispatch_controller.record_rejection()
 
-                SummaryJob.objects.filter(
+                if SummaryJob.objects.filter(
                     id=job_id,
                     status=SummaryJob.Status.RUNNING,
                     lease_token=lease_token,
@@ -542,13 +1013,20 @@ def _generate_summary_for_stock(job_id: int, lease_token: str):
                     dispatched_at=None,
                     lease_token=None,
                     error_message="rate limited by openai bucket",
-                )
+                ):
+                    request_summary_dispatch(retry_at)
 
                 return {
                     "job_id": job_id,
                     "status": "rate_limited",
                     "retry_after": bucket_result.retry_after_seconds,
                 }
+        if breaker is not None:
+            # probe는 실제 호출 직전에만 잡고, 이후 모든 종료 경로에서 결과를 기록해 반납한다.
+            decision = breaker.allow()
+            if not decision.allowed:
+                return _requeue_for_open_circuit(job_id, lease_token, stock.symbol, decision)
+            probe_taken = True
         t_llm_start = perf_counter()
         response = openai.chat.completions.create(
             model=settings.OPENAI_MODEL,
@@ -560,9 +1038,21 @@ def _generate_summary_for_stock(job_id: int, lease_token: str):
             temperature=0.2,
         )
         t_llm_end = perf_counter()
+        if breaker is not None:
+            breaker.record_success()
+        if dispatch_controller is not None:
+            dispatch_controller.record_latency(t_llm_end - t_llm_start)
     except Exception as e:
         retryable, reason = _classify_openai_failure(e)
         error_message = f"{reason}: {str(e)}"
+        if probe_taken:
+            if _is_openai_upstream_failure(retryable, reason):
+                breaker.record_failure()
+            else:
+                # 요청 오류나 rate limit는 OpenAI가 살아 있다는 응답이므로 probe를 성공으로 반납한다.
+                breaker.record_success()
+        if dispatch_controller is not None and reason in OPENAI_RATE_LIMIT_REASONS:
+            dispatch_controller.record_rejection()
         logger.error(f"OpenAI call failed: {error_message}")
 
         if retryable and job.retry_count < MAX_SUMMARY_RETRIES:
@@ -579,20 +1069,22 @@ def _generate_summary_for_stock(job_id: int, lease_token: str):
                 elapsed_ms=int((perf_counter() - t0) * 1000),
                 error_message=error_message,
             )
-            SummaryJob.objects.filter(
+            retry_at = now + timedelta(minutes=backoff_minutes)
+            if SummaryJob.objects.filter(
                 id=job_id,
                 status=SummaryJob.Status.RUNNING,
                 lease_token=lease_token,
             ).update(
                 status=SummaryJob.Status.RETRY_WAIT,
                 retry_count=job.retry_count + 1,
-                retry_at=now + timedelta(minutes=backoff_minutes),
+                retry_at=retry_at,
                 started_at=None,
                 dispatched_at=None,
                 finished_at=None,
                 lease_token=None,
                 error_message=error_message,
-            )
+            ):
+                request_summary_dispatch(retry_at)
             return {"job_id": job_id, "status": "retry_wait", "reason": reason}
 
         if retryable:
@@ -710,7 +1202,7 @@ def _generate_summary_for_stock(job_id: int, lease_token: str):
     total_elapsed = t_parse_save_end - t_news_query_start
 
     logger.info(
-        "[generate_summary_breakdown] job_id=%s symbol=%s news_query=%.3fs relevance=%.3fs prompt_build=%.3fs llm=%.3fs parse_save=%.3fs total=%.3fs raw_count=%s relevant_count=%s",
+        "[generate_summary_breakdown] job_id=%s symbol=%s news_query=%.3fs relevance=%.3fs prompt_build=%.3fs llm=%.3fs parse_save=%.3fs total=%.3fs raw_count=%s relevant_count=%s ner_cache_hits=%s ner_cache_misses=%s ner_cache_hit_ratio=%s",
         job_id,
         symbol,
         t_news_query_end - t_news_query_start,
@@ -721,6 +1213,9 @@ def _generate_summary_for_stock(job_id: int, lease_token: str):
         total_elapsed,
         raw_count,
         relevant_count,
+        ner_cache_hits,
+        ner_cache_misses,
+        format_ner_cache_hit_ratio(ner_cache_hits, ner_cache_misses),
     )
     return {
         "job_id": job_id,
@@ -734,12 +1229,16 @@ def _generate_summary_for_stock(job_id: int, lease_token: str):
 
 @shared_task(bind=True)
 def generate_summary_for_stock(self, job_id: int, lease_token: str):
+    now = timezone.now()
     started = SummaryJob.objects.filter(
         id=job_id,
         status=SummaryJob.Status.RUNNING,
         lease_token=lease_token,
         started_at__isnull=True,
-    ).update(started_at=timezone.now())
+    ).update(
+        started_at=now,
+        lease_expires_at=lease_expiry(now) if heartbeat_enabled() else None,
+    )
 
     if started == 0:
         return {
@@ -761,80 +1260,185 @@ def generate_summary_for_stock(self, job_id: int, lease_token: str):
         job.stock.symbol,
         queue_wait or 0.0,
     )
-    return _generate_summary_for_stock(job_id, lease_token)
+    try:
+        with LeaseHeartbeat(job_id, lease_token):
+            return _generate_summary_for_stock(job_id, lease_token)
+    finally:
+        # 결과와 상관없이 dispatch slot을 돌려준다 (RETRY_WAIT/FAILED 전환도 lease를 끝낸다).
+        controller = get_dispatch_controller()
+        if controller is not None:
+            controller.release(lease_token)
+        # slot이 비었으니 기다리는 job이 있으면 다음 beat까지 두지 않고 바로 dispatch한다.
+        if _summary_dispatch_event_driven() and _ready_summary_jobs(timezone.now()).exists():
+            request_summary_dispatch()
+
+
+def _summary_dispatch_event_driven() -> bool:
+    return getattr(settings, "SUMMARY_DISPATCH_EVENT_DRIVEN_ENABLED", True)
+
+
+def _ready_summary_jobs(now):
+    # status__in은 중복 조건이지만 partial index(summary_job_ready_dispatch_idx)의 조건과 같은 절을
+    # 넣어 두어야 planner가 그 index를 dispatch_key 순서로 훑고 LIMIT에서 멈춘다.
+    return SummaryJob.objects.filter(status__in=SummaryJob.READY_STATUSES).filter(
+        Q(status=SummaryJob.Status.PENDING)
+        | Q(
+            status=SummaryJob.Status.RETRY_WAIT,
+            retry_at__lte=now,
+        )
+    )
+
+
+def request_summary_dispatch(retry_at=None):
+    """
+    SummaryJob이 dispatch 대상이 되는 변경(생성, RETRY_WAIT 전환, slot 반납)이 커밋된 뒤 dispatch를 깨운다.
+    retry_at이 있으면 그 시각에 도는 countdown task로 깨운다. 이미 그 이전 wake-up이 잡혀 있으면 보내지 않는다.
+    """
+    if not _summary_dispatch_event_driven():
+        return
+    transaction.on_commit(lambda: _wake_summary_dispatch(retry_at))
+
+
+def _wake_summary_dispatch(retry_at):
+    countdown = 0.0 if retry_at is None else max(0.0, (retry_at - timezone.now()).total_seconds())
+    if not claim_dispatch_wakeup(countdown):
+        return
+    try:
+        dispatch_summary_jobs.apply_async(countdown=countdown)
+    except Exception:
+        clear_dispatch_wakeup()
+        logger.warning(
+            "[dispatch_summary_jobs] wakeup enqueue failed countdown=%.1fs", countdown, exc_info=True
+        )
+
+
+def _schedule_next_retry_dispatch(now):
+    # 이번 실행이 wake-up key를 비웠으므로, 합쳐져 있던 미래 retry_at 중 가장 이른 것을 다시 예약한다.
+    next_retry_at = (
+        SummaryJob.objects.filter(status=SummaryJob.Status.RETRY_WAIT, retry_at__gt=now)
+        .aggregate(next_retry_at=Min("retry_at"))["next_retry_at"]
+    )
+    if next_retry_at is not None:
+        request_summary_dispatch(next_retry_at)
+
+
+def _acquire_dispatch_slots(limit: int):
+    """
+    (lease_token 목록, 현재 inflight 수, 한도, controller)를 돌려준다.
+    controller가 꺼져 있거나 Redis를 쓸 수 없으면 DB의 RUNNING 수와 고정 한도로 판단한다.
+    """
+    controller = get_dispatch_controller()
+    slots = controller.acquire(limit) if controller is not None else None
+    if slots is not None:
+        return slots.tokens, slots.inflight, slots.max_inflight, controller
+
+    inflight_count = SummaryJob.objects.filter(
+        status=SummaryJob.Status.RUNNING,
+        finished_at__isnull=True,
+    ).count()
+    max_inflight = static_max_inflight()
+    available_slots = max(0, min(limit, max_inflight - inflight_count))
+    return [uuid.uuid4() for _ in range(available_slots)], inflight_count, max_inflight, None
 
 
 @shared_task
 def dispatch_summary_jobs(limit: int = 20):
     now = timezone.now()
     dispatch_targets = []
+    event_driven = _summary_dispatch_event_driven()
+    if event_driven:
+        # 여기서부터 커밋되는 job은 새 wake-up을 예약한다 (이 실행이 못 볼 수도 있으므로).
+        clear_dispatch_wakeup()
 
-    with transaction.atomic():
-        inflight_count = SummaryJob.objects.filter(
-            status=SummaryJob.Status.RUNNING,
-            finished_at__isnull=True,
-        ).count()
+    lease_tokens, inflight_count, max_inflight, controller = _acquire_dispatch_slots(limit)
+    available_slots = len(lease_tokens)
 
-        max_inflight = 2
-        available_slots = max(0, min(limit, max_inflight - inflight_count))
+    logger.info(
+        "[dispatch_summary_jobs] inflight_count=%s max_inflight=%s available_slots=%s limit=%s adaptive=%s",
+        inflight_count,
+        max_inflight,
+        available_slots,
+        limit,
+        controller is not None,
+    )
 
-        logger.info(
-            "[dispatch_summary_jobs] inflight_count=%s max_inflight=%s available_slots=%s limit=%s",
-            inflight_count,
-            max_inflight,
-            available_slots,
-            limit,
-        )
+    if available_slots == 0:
+        # slot이 비면 worker가 깨우므로 여기서는 미래 retry_at wake-up만 다시 잡는다.
+        if event_driven:
+            _schedule_next_retry_dispatch(now)
+        return {
+            "dispatched_count": 0,
+            "job_ids": [],
+        }
 
-        if available_slots == 0:
-            return {
-                "dispatched_count": 0,
-                "job_ids": [],
-            }
+    try:
+        with transaction.atomic():
+            jobs = list(
+                _ready_summary_jobs(now)
+                .select_for_update(skip_locked=True)
+                .order_by("dispatch_key")[:available_slots]
+            )
 
-        jobs = list(
-            SummaryJob.objects.select_for_update(skip_locked=True)
-            .filter(
-                Q(status=SummaryJob.Status.PENDING)
-                | Q(
-                    status=SummaryJob.Status.RETRY_WAIT,
-                    retry_at__lte=now,
+            for job, lease_token in zip(jobs, lease_tokens):
+                logger.info("[dispatch_summary_jobs] picked job_id=%s", job.id)
+
+                job.status = SummaryJob.Status.RUNNING
+                job.dispatched_at = now
+                job.started_at = None
+                job.finished_at = None
+                job.retry_at = None
+                job.lease_token = lease_token
+                job.lease_expires_at = None
+                job.error_message = ""
+
+                job.save(
+                    update_fields=[
+                        "status",
+                        "dispatched_at",
+                        "started_at",
+                        "finished_at",
+                        "retry_at",
+                        "lease_token",
+                        "lease_expires_at",
+                        "error_message",
+                        "updated_at",
+                    ]
                 )
-            )
-            .order_by("created_at")[:available_slots]
-        )
-
-        for job in jobs:
-            logger.info("[dispatch_summary_jobs] picked job_id=%s", job.id)
-            lease_token = uuid.uuid4()
-
-            job.status = SummaryJob.Status.RUNNING
-            job.dispatched_at = now
-            job.started_at = None
-            job.finished_at = None
-            job.retry_at = None
-            job.lease_token = lease_token
-            job.error_message = ""
-
-            job.save(
-                update_fields=[
-                    "status",
-                    "dispatched_at",
-                    "started_at",
-                    "finished_at",
-                    "retry_at",
-                    "lease_token",
-                    "error_message",
-                    "updated_at",
-                ]
-            )
 
-            dispatch_targets.append((job.id, str(lease_token)))
+                dispatch_targets.append((job.id, str(lease_token)))
+    except Exception:
+        if controller is not None:
+            controller.release(*lease_tokens)
+        raise
+
+    if controller is not None:
+        # 보낼 job이 slot보다 적으면 남은 slot은 바로 돌려준다.
+        controller.release(*lease_tokens[len(dispatch_targets):])
 
     for job_id, lease_token in dispatch_targets:
         generate_summary_for_stock.delay(job_id, lease_token)
 
+    if controller is not None:
+        controller.record_dispatched(len(dispatch_targets))
+
+    if event_driven:
+        if len(dispatch_targets) == limit:
+            # 이번 실행의 limit에 걸렸다면 남은 PENDING을 이어서 보낸다.
+            request_summary_dispatch()
+        _schedule_next_retry_dispatch(now)
+
     return {
         "dispatched_count": len(dispatch_targets),
         "job_ids": [job_id for job_id, _ in dispatch_targets],
     }
+
+
+@shared_task
+def rescore_stale_news_relevance(max_rows: int | None = None):
+    """
+    scorer_version이 현재 규칙 버전과 다른(또는 없는) NewsStock 링크를 점진적으로 다시 채점한다.
+    RELEVANCE_SCORER_VERSION을 올린 뒤 beat가 주기적으로 돌려 한 번에 max_rows씩 따라잡는다.
+    """
+    if max_rows is None:
+        max_rows = getattr(settings, "NEWS_RELEVANCE_RESCORE_MAX_ROWS", 5000)
+    return rescore_news_relevance(max_rows=max_rows)
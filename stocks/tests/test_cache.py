@@ -1,6 +1,10 @@
+import threading
+import time
 from datetime import date
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
+import fakeredis
+from django.core.cache.backends.redis import RedisCacheClient
 from django.test import SimpleTestCase, override_settings
 
 from stocks.cache import (
@@ -8,6 +12,7 @@ from stocks.cache import (
     get_cached_summary,
     set_cached_summaries,
     set_cached_summary,
+    single_flight,
     summary_cache_key,
 )
 
@@ -99,3 +104,143 @@ class SummaryCacheRedisFailureFallbackTests(SimpleTestCase):
         set_cached_summaries([(1, date(2026, 6, 21), {"a": 1})])
 
         mock_set_many.assert_called_once()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def test_concurrent_callers_share_one_execution(self):
+        calls = []
+        started = threading.Event()
+
+        def slow_fetch():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return {"created_news": 3}
+
+        results = []
+
+        def caller():
+            results.append(single_flight("news_ingest:AAPL:1", slow_fetch))
+
+        leader = threading.Thread(target=caller)
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=caller) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        for thread in [leader, *followers]:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result for result, _ in results], [{"created_news": 3}] * 5)
+        self.assertCountEqual(
+            [role for _, role in results],
+            ["leader", "follower", "follower", "follower", "follower"],
+        )
+
+    def test_result_cache_absorbs_burst_after_leader_finishes(self):
+        fn = Mock(return_value={"created_news": 1})
+
+        first = single_flight("news_ingest:AAPL:1", fn)
+        second = single_flight("news_ingest:AAPL:1", fn)
+
+        self.assertEqual(first, ({"created_news": 1}, "leader"))
+        self.assertEqual(second, ({"created_news": 1}, "cached"))
+        fn.assert_called_once_with()
+
+    def test_keys_are_independent(self):
+        fn = Mock(return_value={"created_news": 1})
+
+        single_flight("news_ingest:AAPL:1", fn)
+        single_flight("news_ingest:AAPL:3", fn)
+
+        self.assertEqual(fn.call_count, 2)
+
+    def test_leader_failure_releases_lock_without_caching(self):
+        fn = Mock(side_effect=[Exception("finnhub down"), {"created_news": 2}])
+
+        with self.assertRaises(Exception):
+            single_flight("news_ingest:AAPL:1", fn)
+        result = single_flight("news_ingest:AAPL:1", fn)
+
+        self.assertEqual(result, ({"created_news": 2}, "leader"))
+
+    def test_follower_runs_directly_after_wait_timeout(self):
+        from django.core.cache import cache
+
+        cache.add("singleflight:lock:news_ingest:AAPL:1", "someone-else", timeout=30)
+        fn = Mock(return_value={"created_news": 0})
+
+        result = single_flight("news_ingest:AAPL:1", fn, wait_timeout=0.1)
+
+        self.assertEqual(result, ({"created_news": 0}, "bypass"))
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://example:6379/2",
+        }
+    }
+)
+class SingleFlightRedisLockTests(SimpleTestCase):
+    """RedisCache + fakeredis로 락 갱신과 compare-and-delete 해제를 확인한다."""
+
+    lock_key = "singleflight:lock:news_ingest:AAPL:1"
+
+    def setUp(self):
+        server = fakeredis.FakeServer()
+        patcher = patch.object(
+            RedisCacheClient,
+            "get_client",
+            lambda client, key=None, *, write=False: fakeredis.FakeRedis(server=server),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lock_is_renewed_while_leader_runs_longer_than_lock_timeout(self):
+        from django.core.cache import cache
+
+        seen = []
+
+        def slow_fetch():
+            time.sleep(1.5)
+            seen.append(cache.get(self.lock_key))
+            return {"created_news": 1}
+
+        result = single_flight("news_ingest:AAPL:1", slow_fetch, lock_timeout=1)
+
+        self.assertEqual(result, ({"created_news": 1}, "leader"))
+        self.assertIsNotNone(seen[0])
+        self.assertIsNone(cache.get(self.lock_key))
+
+    def test_release_leaves_lock_taken_by_another_caller(self):
+        from django.core.cache import cache
+
+        def fetch_while_lock_changes_hands():
+            # leader의 락이 만료되고 다른 호출이 새 락을 잡은 상황.
+            cache.delete(self.lock_key)
+            cache.add(self.lock_key, 12345, timeout=30)
+            return {"created_news": 1}
+
+        single_flight("news_ingest:AAPL:1", fetch_while_lock_changes_hands)
+
+        self.assertEqual(cache.get(self.lock_key), 12345)
+
+
+class SingleFlightRedisFailureFallbackTests(SimpleTestCase):
+    @patch("stocks.cache.cache.get", side_effect=ConnectionError("redis down"))
+    def test_single_flight_calls_fn_directly_on_redis_error(self, mock_get):
+        fn = Mock(return_value={"created_news": 1})
+
+        result = single_flight("news_ingest:AAPL:1", fn)
+
+        self.assertEqual(result, ({"created_news": 1}, "bypass"))
+        fn.assert_called_once_with()
@@ -0,0 +1,289 @@
+import asyncio
+import time
+from unittest.mock import Mock, patch
+
+import fakeredis
+import requests
+from django.test import SimpleTestCase, override_settings
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from stocks.circuit_breaker import (
+    LUA_CIRCUIT_ALLOW,
+    LUA_CIRCUIT_RECORD,
+    SCRIPT_SHAS,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    get_circuit_breaker,
+)
+from stocks.ingest import AsyncFinnhubClient, FinnhubRateLimitTimeout
+from stocks.services import fetch_company_news, fetch_news_for_symbol
+from stocks.tasks import fetch_finnhub_quote, update_stock_quote
+
+
+def make_breaker(*evalsha_results):
+    client = Mock()
+    client.evalsha.side_effect = list(evalsha_results)
+    breaker = CircuitBreaker(
+        name="finnhub",
+        redis_url="redis://example:6379/9",
+        failure_threshold=3,
+        failure_window=60,
+        reset_timeout=30,
+        probe_timeout=10,
+    )
+    patcher = patch("stocks.circuit_breaker.get_redis_client", return_value=client)
+    return breaker, client, patcher
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def breaker(self, *evalsha_results):
+        breaker, client, patcher = make_breaker(*evalsha_results)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return breaker, client
+
+    def test_closed_decision_is_reused_locally(self):
+        breaker, client = self.breaker([1, b"closed", 0, 0])
+
+        self.assertTrue(breaker.allow().allowed)
+        self.assertTrue(breaker.allow().allowed)
+
+        client.evalsha.assert_called_once()
+        self.assertEqual(
+            client.evalsha.call_args.args[:3],
+            (SCRIPT_SHAS[LUA_CIRCUIT_ALLOW], 1, "circuit:finnhub"),
+        )
+
+    def test_open_circuit_fails_fast_without_redis_until_retry_time(self):
+        breaker, client = self.breaker([0, b"open", 12_000_000, 3])
+
+        with self.assertRaises(CircuitOpenError) as cm:
+            breaker.guard()
+        self.assertAlmostEqual(cm.exception.retry_after, 12.0, places=1)
+
+        with self.assertRaises(CircuitOpenError):
+            breaker.guard()
+        client.evalsha.assert_called_once()
+
+    def test_half_open_probe_is_not_cached(self):
+        breaker, client = self.breaker([1, b"half_open", 0, 3], [0, b"half_open", 9_000_000, 3])
+
+        self.assertEqual(breaker.allow().state, STATE_HALF_OPEN)
+        decision = breaker.allow()
+
+        self.assertFalse(decision.allowed)
+        self.assertEqual(client.evalsha.call_count, 2)
+
+    def test_failure_that_trips_opens_locally_at_once(self):
+        breaker, client = self.breaker([b"open", 3, 1])
+
+        self.assertEqual(breaker.record_failure(), STATE_OPEN)
+
+        with self.assertRaises(CircuitOpenError):
+            breaker.guard()
+        client.evalsha.assert_called_once()
+        self.assertEqual(client.evalsha.call_args.args[0], SCRIPT_SHAS[LUA_CIRCUIT_RECORD])
+        # success=0, now_us, threshold, window_us, ttl
+        self.assertEqual(client.evalsha.call_args.args[3], 0)
+        self.assertEqual(client.evalsha.call_args.args[5:7], (3, 60_000_000))
+
+    def test_success_is_not_written_while_known_clean(self):
+        breaker, client = self.breaker([1, b"closed", 0, 0])
+
+        breaker.allow()
+        breaker.record_success()
+
+        client.evalsha.assert_called_once()
+
+    def test_success_after_failures_resets_state(self):
+        breaker, client = self.breaker([1, b"closed", 0, 2], [b"closed", 0, 0])
+
+        breaker.allow()
+        breaker.record_success()
+
+        self.assertEqual(client.evalsha.call_count, 2)
+        self.assertEqual(client.evalsha.call_args.args[3], 1)
+
+    def test_redis_errors_fail_open_and_back_off(self):
+        breaker, client = self.breaker(RedisConnectionError("down"))
+
+        self.assertTrue(breaker.allow().allowed)
+        self.assertEqual(breaker.record_failure(), STATE_CLOSED)
+        self.assertTrue(breaker.allow().allowed)
+
+        client.evalsha.assert_called_once()
+
+    @override_settings(CIRCUIT_BREAKER_ENABLED=False)
+    def test_disabled_returns_no_breaker(self):
+        self.assertIsNone(get_circuit_breaker("finnhub"))
+
+
+@override_settings(FINNHUB_API_KEY="test-key")
+class FetchCompanyNewsCircuitTests(SimpleTestCase):
+    def setUp(self):
+        self.breaker = Mock()
+        patcher = patch("stocks.services.get_finnhub_breaker", return_value=self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("stocks.services.requests.Session.get")
+    def test_open_circuit_skips_the_request(self, mock_get):
+        self.breaker.guard.side_effect = CircuitOpenError("finnhub", 20)
+
+        with self.assertRaises(CircuitOpenError):
+            fetch_company_news("AAPL")
+
+        mock_get.assert_not_called()
+
+    @patch("stocks.services.time.sleep")
+    @patch("stocks.services.requests.Session.get")
+    def test_connection_error_counts_and_stops_retrying_once_tripped(self, mock_get, mock_sleep):
+        mock_get.side_effect = requests.ConnectionError("reset")
+        self.breaker.guard.side_effect = [None, CircuitOpenError("finnhub", 30)]
+
+        with self.assertRaises(CircuitOpenError):
+            fetch_company_news("AAPL")
+
+        self.breaker.record_failure.assert_called_once_with()
+        mock_get.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    @patch("stocks.services.time.sleep")
+    @patch("stocks.services.requests.Session.get")
+    def test_client_errors_are_not_counted_as_upstream_failures(self, mock_get, mock_sleep):
+        response = Mock(status_code=404, text="not found")
+        response.raise_for_status.side_effect = requests.HTTPError(response=response)
+        mock_get.return_value = response
+
+        with self.assertRaises(Exception):
+            fetch_company_news("AAPL", max_retries=2)
+
+        self.breaker.record_failure.assert_not_called()
+
+    @patch("stocks.services.requests.Session.get")
+    def test_success_is_recorded(self, mock_get):
+        mock_get.return_value = Mock(status_code=200, json=Mock(return_value=[]))
+
+        fetch_company_news("AAPL")
+
+        self.breaker.record_success.assert_called_once_with()
+
+
+@override_settings(FINNHUB_API_KEY="test-key", FINNHUB_BUCKET_ENABLED=False)
+class CircuitBreakerRecoveryTests(SimpleTestCase):
+    """실제 Lua 상태 전이(fakeredis)로 진입점 guard와 안쪽 guard가 half_open probe를 나눠 갖지 않는지 본다."""
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(
+            name="finnhub",
+            redis_url="redis://example:6379/9",
+            failure_threshold=1,
+            failure_window=60,
+            reset_timeout=0.2,
+            probe_timeout=30,
+        )
+        client = fakeredis.FakeRedis()
+        for target, value in (
+            ("stocks.circuit_breaker.get_redis_client", client),
+            ("stocks.services.get_finnhub_breaker", self.breaker),
+            ("stocks.tasks.get_finnhub_breaker", self.breaker),
+        ):
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @patch("stocks.services.requests.Session.get")
+    def test_fetch_news_for_symbol_closes_circuit_through_half_open_probe(self, mock_get):
+        mock_get.return_value = Mock(status_code=200, json=Mock(return_value=[]))
+        self.breaker.record_failure()
+
+        with self.assertRaises(CircuitOpenError):
+            fetch_news_for_symbol("AAPL")
+        mock_get.assert_not_called()
+
+        time.sleep(0.25)
+        data, _, _ = fetch_news_for_symbol("AAPL")
+        fetch_news_for_symbol("AAPL")
+
+        self.assertEqual(data, [])
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(self.breaker.snapshot()[0], STATE_CLOSED)
+
+    @patch("stocks.tasks.requests.Session.get")
+    def test_update_stock_quote_closes_circuit_through_half_open_probe(self, mock_get):
+        response = Mock(status_code=200, json=Mock(return_value={"c": 0}))
+        mock_get.return_value = response
+        self.breaker.record_failure()
+        time.sleep(0.25)
+
+        update_stock_quote(Mock(symbol="AAPL"))
+
+        mock_get.assert_called_once()
+        self.assertEqual(self.breaker.snapshot()[0], STATE_CLOSED)
+
+    @patch("stocks.tasks.sleep_for_finnhub_429", return_value=0)
+    @patch("stocks.tasks.requests.Session.get")
+    def test_fetch_finnhub_quote_retries_429_with_its_own_probe(self, mock_get, _):
+        mock_get.side_effect = [
+            Mock(status_code=429),
+            Mock(status_code=200, json=Mock(return_value={"c": 1})),
+        ]
+        self.breaker.record_failure()
+        time.sleep(0.25)
+
+        self.assertEqual(fetch_finnhub_quote("AAPL"), {"c": 1})
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(self.breaker.snapshot()[0], STATE_CLOSED)
+
+    @patch("stocks.services.requests.Session.get")
+    def test_fetch_company_news_4xx_releases_half_open_probe(self, mock_get):
+        response = Mock(status_code=404, text="not found")
+        response.raise_for_status.side_effect = requests.HTTPError(response=response)
+        mock_get.return_value = response
+        self.breaker.record_failure()
+        time.sleep(0.25)
+
+        with self.assertRaises(Exception):
+            fetch_company_news("AAPL", max_retries=1)
+
+        self.assertTrue(self.breaker.allow().allowed)
+
+    def test_async_slot_timeout_does_not_take_half_open_probe(self):
+        bucket = Mock()
+        bucket.wait_for_slot.return_value = False
+        client = AsyncFinnhubClient(api_key="test-key", bucket=bucket, breaker=self.breaker)
+        self.breaker.record_failure()
+        time.sleep(0.25)
+
+        with self.assertRaises(FinnhubRateLimitTimeout):
+            asyncio.run(client.quote("AAPL"))
+
+        self.assertEqual(self.breaker.snapshot()[0], STATE_HALF_OPEN)
+        self.assertTrue(self.breaker.allow().allowed)
+
+    def test_peek_does_not_take_the_probe(self):
+        self.breaker.record_failure()
+        time.sleep(0.25)
+
+        self.assertTrue(self.breaker.peek().allowed)
+        self.assertTrue(self.breaker.allow().allowed)
+        self.assertFalse(self.breaker.peek().allowed)
+
+
+class CircuitBreakerCollectorTests(SimpleTestCase):
+    @patch("stocks.circuit_breaker.get_circuit_breaker")
+    def test_exports_state_and_trips_per_upstream(self, mock_get_breaker):
+        from stocks.metrics import CircuitBreakerCollector
+
+        mock_get_breaker.return_value.snapshot.return_value = (STATE_OPEN, 4)
+
+        state, trips = list(CircuitBreakerCollector().collect())
+
+        active = {
+            (s.labels["upstream"], s.labels["state"]) for s in state.samples if s.value == 1
+        }
+        self.assertEqual(active, {("finnhub", STATE_OPEN), ("openai", STATE_OPEN)})
+        self.assertEqual([s.value for s in trips.samples if s.name.endswith("_total")], [4, 4])
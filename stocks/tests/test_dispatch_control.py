@@ -0,0 +1,370 @@
+import uuid
+from datetime import timedelta
+from unittest.mock import ANY, Mock, patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from stocks.dispatch_control import (
+    INFLIGHT_KEY,
+    LUA_INFLIGHT_ACQUIRE,
+    SCRIPT_SHAS,
+    DispatchSlots,
+    DispatchSnapshot,
+    SummaryDispatchController,
+    get_dispatch_controller,
+)
+from stocks.models import Stock, SummaryJob
+from stocks.tasks import (
+    _enqueue_summary_jobs,
+    dispatch_summary_jobs,
+    generate_summary_for_stock,
+    recover_stuck_summary_jobs,
+    request_summary_dispatch,
+)
+
+
+def make_controller(**overrides):
+    config = dict(
+        redis_url="redis://example:6379/9",
+        min_inflight=1,
+        max_inflight=16,
+        slot_ttl=720,
+        latency_alpha=0.2,
+        default_latency=5.0,
+        rejection_window=60,
+        rejection_backoff=0.5,
+    )
+    config.update(overrides)
+    return SummaryDispatchController(**config)
+
+
+@override_settings(OPENAI_BUCKET_ENABLED=True, OPENAI_BUCKET_CAPACITY=2, OPENAI_BUCKET_REFILL_RATE=1.0)
+class DispatchLimitTests(SimpleTestCase):
+    def test_limit_follows_refill_rate_times_latency(self):
+        controller = make_controller()
+
+        self.assertEqual(controller.compute_limit(llm_latency=6.2, recent_rejections=0), 7)
+
+    def test_limit_never_drops_below_bucket_capacity_without_rejections(self):
+        controller = make_controller()
+
+        self.assertEqual(controller.compute_limit(llm_latency=0.3, recent_rejections=0), 2)
+
+    def test_recent_rejections_back_off(self):
+        controller = make_controller()
+
+        self.assertEqual(controller.compute_limit(llm_latency=6.2, recent_rejections=3), 3)
+        self.assertEqual(controller.compute_limit(llm_latency=0.3, recent_rejections=1), 1)
+
+    def test_limit_is_clamped(self):
+        controller = make_controller(max_inflight=4)
+
+        self.assertEqual(controller.compute_limit(llm_latency=60, recent_rejections=0), 4)
+
+    @override_settings(OPENAI_BUCKET_ENABLED=False)
+    def test_without_bucket_uses_max(self):
+        controller = make_controller(max_inflight=9)
+
+        self.assertEqual(controller.compute_limit(llm_latency=1, recent_rejections=0), 9)
+
+    @override_settings(SUMMARY_DISPATCH_ADAPTIVE_ENABLED=False)
+    def test_disabled_returns_no_controller(self):
+        self.assertIsNone(get_dispatch_controller())
+
+
+@override_settings(OPENAI_BUCKET_ENABLED=True, OPENAI_BUCKET_CAPACITY=2, OPENAI_BUCKET_REFILL_RATE=1.0)
+class DispatchSlotTests(SimpleTestCase):
+    def setUp(self):
+        self.client = Mock()
+        pipe = self.client.pipeline.return_value
+        pipe.execute.return_value = [[b"4.5", b"10"], None]
+        patcher = patch("stocks.dispatch_control.get_redis_client", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_acquire_returns_only_admitted_tokens(self):
+        self.client.evalsha.return_value = [2, 3]
+        controller = make_controller()
+
+        slots = controller.acquire(limit=20)
+
+        self.assertEqual(len(slots.tokens), 2)
+        self.assertEqual(slots.inflight, 3)
+        self.assertEqual(slots.max_inflight, 5)
+        args = self.client.evalsha.call_args.args
+        self.assertEqual(args[:3], (SCRIPT_SHAS[LUA_INFLIGHT_ACQUIRE], 1, INFLIGHT_KEY))
+        # now_ms, slot_ttl_ms, max_inflight, token1..token5
+        self.assertEqual(args[4:6], (720_000, 5))
+        self.assertEqual(args[6:8], tuple(str(token) for token in slots.tokens))
+        self.assertEqual(len(args[6:]), 5)
+
+    def test_acquire_never_requests_more_than_limit(self):
+        self.client.evalsha.return_value = [1, 0]
+        controller = make_controller()
+
+        controller.acquire(limit=1)
+
+        self.assertEqual(len(self.client.evalsha.call_args.args[6:]), 1)
+
+    def test_redis_errors_fall_back_and_back_off(self):
+        self.client.pipeline.return_value.execute.side_effect = RedisConnectionError("down")
+        controller = make_controller()
+
+        self.assertIsNone(controller.acquire(limit=5))
+        self.assertIsNone(controller.acquire(limit=5))
+        controller.release(uuid.uuid4())
+
+        self.client.pipeline.return_value.execute.assert_called_once()
+        self.client.zrem.assert_not_called()
+
+    def test_renew_extends_only_existing_slot(self):
+        token = uuid.uuid4()
+        controller = make_controller()
+
+        with patch("stocks.dispatch_control.time.time", return_value=1000.0):
+            controller.renew(token)
+
+        self.client.zadd.assert_called_once_with(INFLIGHT_KEY, {str(token): 1_720_000}, xx=True)
+
+    def test_reconcile_removes_slots_without_running_lease(self):
+        running, orphaned = uuid.uuid4(), uuid.uuid4()
+        self.client.zrangebyscore.return_value = [
+            (str(running).encode(), 1.0),
+            (str(orphaned).encode(), 1.0),
+        ]
+        controller = make_controller()
+
+        self.assertEqual(controller.reconcile([running]), 1)
+
+        self.client.zrem.assert_called_once_with(INFLIGHT_KEY, str(orphaned).encode())
+
+
+class SummaryDispatchTests(TestCase):
+    def setUp(self):
+        self.controller = Mock()
+        patcher = patch("stocks.tasks.get_dispatch_controller", return_value=self.controller)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        today = timezone.localdate()
+        self.jobs = [
+            SummaryJob.objects.create(
+                stock=Stock.objects.create(symbol=symbol, name=symbol),
+                date=today,
+                status=SummaryJob.Status.PENDING,
+            )
+            for symbol in ("AAPL", "MSFT", "NVDA")
+        ]
+
+    @patch("stocks.tasks.generate_summary_for_stock.delay")
+    def test_dispatches_up_to_the_adaptive_limit_with_slot_tokens(self, mock_delay):
+        tokens = [uuid.uuid4() for _ in range(5)]
+        self.controller.acquire.return_value = DispatchSlots(tokens, inflight=0, max_inflight=5)
+
+        result = dispatch_summary_jobs(limit=10)
+
+        self.assertEqual(result["dispatched_count"], 3)
+        self.assertEqual(
+            set(SummaryJob.objects.values_list("lease_token", flat=True)), set(tokens[:3])
+        )
+        self.controller.release.assert_called_once_with(*tokens[3:])
+        self.controller.record_dispatched.assert_called_once_with(3)
+        self.assertEqual(mock_delay.call_count, 3)
+
+    @patch("stocks.tasks.generate_summary_for_stock.delay")
+    def test_picks_by_dispatch_key_so_priority_and_age_both_count(self, mock_delay):
+        now = timezone.now()
+        # 오래 기다린 저우선순위 job이 방금 들어온 고우선순위 job보다 앞설 수 있다 (aging).
+        for job, enqueued_ago, priority in (
+            (self.jobs[0], 10, 0),
+            (self.jobs[1], 0, 600),
+            (self.jobs[2], 3600, 0),
+        ):
+            SummaryJob.objects.filter(id=job.id).update(
+                priority=priority,
+                dispatch_key=now - timedelta(seconds=enqueued_ago + priority),
+            )
+        self.controller.acquire.return_value = DispatchSlots(
+            [uuid.uuid4() for _ in range(2)], inflight=0, max_inflight=2
+        )
+
+        result = dispatch_summary_jobs(limit=10)
+
+        self.assertEqual(result["job_ids"], [self.jobs[2].id, self.jobs[1].id])
+
+    @patch("stocks.tasks.generate_summary_for_stock.delay")
+    def test_no_free_slots_dispatches_nothing(self, mock_delay):
+        self.controller.acquire.return_value = DispatchSlots([], inflight=4, max_inflight=4)
+
+        result = dispatch_summary_jobs(limit=10)
+
+        self.assertEqual(result["dispatched_count"], 0)
+        mock_delay.assert_not_called()
+
+    @override_settings(SUMMARY_DISPATCH_STATIC_INFLIGHT=2)
+    @patch("stocks.tasks.generate_summary_for_stock.delay")
+    def test_redis_unavailable_falls_back_to_db_count(self, mock_delay):
+        self.controller.acquire.return_value = None
+        SummaryJob.objects.filter(id=self.jobs[2].id).update(status=SummaryJob.Status.RUNNING)
+
+        result = dispatch_summary_jobs(limit=10)
+
+        self.assertEqual(result["dispatched_count"], 1)
+        self.controller.release.assert_not_called()
+        self.controller.record_dispatched.assert_not_called()
+
+    @patch("stocks.tasks._generate_summary_for_stock", side_effect=RuntimeError("boom"))
+    def test_worker_releases_its_slot_even_on_failure(self, _):
+        token = uuid.uuid4()
+        SummaryJob.objects.filter(id=self.jobs[0].id).update(
+            status=SummaryJob.Status.RUNNING,
+            lease_token=token,
+            dispatched_at=timezone.now(),
+        )
+
+        with self.assertRaises(RuntimeError):
+            generate_summary_for_stock.run(self.jobs[0].id, str(token))
+
+        self.controller.release.assert_called_once_with(str(token))
+
+    def test_recovery_releases_recovered_slots_and_reconciles(self):
+        token = uuid.uuid4()
+        SummaryJob.objects.filter(id=self.jobs[0].id).update(
+            status=SummaryJob.Status.RUNNING,
+            lease_token=token,
+            dispatched_at=timezone.now() - timedelta(minutes=5),
+        )
+        self.controller.reconcile.return_value = 2
+
+        result = recover_stuck_summary_jobs()
+
+        self.assertEqual(result["recovered_job_ids"], [self.jobs[0].id])
+        self.assertEqual(result["orphaned_slots"], 2)
+        self.controller.release.assert_called_once_with(token)
+        self.controller.reconcile.assert_called_once_with(ANY)
+
+
+@patch("stocks.tasks.dispatch_summary_jobs.apply_async")
+@patch("stocks.tasks.claim_dispatch_wakeup", return_value=True)
+class SummaryDispatchWakeupTests(TestCase):
+    def setUp(self):
+        self.stock = Stock.objects.create(symbol="AAPL", name="Apple")
+
+    def _enqueue(self):
+        outcomes = [{"symbol": "AAPL", "result": {"created_news": 1}}]
+        return _enqueue_summary_jobs([self.stock], outcomes, timezone.localdate(), set())
+
+    def test_new_job_wakes_dispatch_after_commit(self, mock_claim, mock_apply_async):
+        with self.captureOnCommitCallbacks() as callbacks:
+            outcomes = self._enqueue()
+        mock_apply_async.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+
+        self.assertTrue(outcomes[0]["enqueued"])
+        mock_claim.assert_called_once_with(0.0)
+        mock_apply_async.assert_called_once_with(countdown=0.0)
+
+    def test_retry_wait_wakes_dispatch_at_retry_at(self, mock_claim, mock_apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            request_summary_dispatch(timezone.now() + timedelta(seconds=90))
+
+        countdown = mock_apply_async.call_args.kwargs["countdown"]
+        self.assertAlmostEqual(countdown, 90, delta=1)
+
+    def test_coalesced_wakeup_is_not_sent(self, mock_claim, mock_apply_async):
+        mock_claim.return_value = False
+
+        with self.captureOnCommitCallbacks(execute=True):
+            request_summary_dispatch()
+
+        mock_apply_async.assert_not_called()
+
+    @override_settings(SUMMARY_DISPATCH_EVENT_DRIVEN_ENABLED=False)
+    def test_disabled_leaves_dispatch_to_beat(self, mock_claim, mock_apply_async):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self._enqueue()
+
+        self.assertEqual(callbacks, [])
+        mock_apply_async.assert_not_called()
+
+    @patch("stocks.tasks.get_dispatch_controller", return_value=None)
+    @patch("stocks.tasks.clear_dispatch_wakeup")
+    @patch("stocks.tasks.generate_summary_for_stock.delay")
+    def test_dispatch_reschedules_earliest_future_retry(
+        self, mock_delay, mock_clear, _, mock_claim, mock_apply_async
+    ):
+        retry_at = timezone.now() + timedelta(minutes=3)
+        for minutes, symbol in ((3, "MSFT"), (7, "NVDA")):
+            SummaryJob.objects.create(
+                stock=Stock.objects.create(symbol=symbol, name=symbol),
+                date=timezone.localdate(),
+                status=SummaryJob.Status.RETRY_WAIT,
+                retry_at=timezone.now() + timedelta(minutes=minutes),
+            )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = dispatch_summary_jobs(limit=10)
+
+        self.assertEqual(result["dispatched_count"], 0)
+        mock_clear.assert_called_once_with()
+        mock_apply_async.assert_called_once()
+        self.assertAlmostEqual(
+            mock_apply_async.call_args.kwargs["countdown"],
+            (retry_at - timezone.now()).total_seconds(),
+            delta=2,
+        )
+
+
+class SummaryDispatchSweepScheduleTests(SimpleTestCase):
+    def register(self):
+        from stockq.celery import add_summary_job_schedules
+
+        sender = Mock()
+        sender.conf.beat_schedule = {}
+        add_summary_job_schedules(sender)
+        return sender.conf.beat_schedule["dispatch-summary-jobs-sweep"]["schedule"]
+
+    @override_settings(SUMMARY_DISPATCH_SWEEP_MINUTES=90)
+    def test_sweep_runs_at_fixed_interval_even_when_it_does_not_divide_an_hour(self):
+        self.assertEqual(self.register().run_every, timedelta(minutes=90))
+
+    @override_settings(SUMMARY_DISPATCH_SWEEP_MINUTES=7)
+    def test_sweep_interval_is_not_realigned_to_the_hour(self):
+        self.assertEqual(self.register().run_every, timedelta(minutes=7))
+
+    @override_settings(SUMMARY_DISPATCH_SWEEP_MINUTES=0)
+    def test_non_positive_sweep_interval_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.register()
+
+
+class SummaryDispatchCollectorTests(TestCase):
+    @patch("stocks.dispatch_control.get_dispatch_controller")
+    def test_exports_backlog_and_controller_state(self, mock_get_controller):
+        from stocks.metrics import SummaryDispatchCollector
+
+        mock_get_controller.return_value.snapshot.return_value = DispatchSnapshot(
+            inflight=3,
+            max_inflight=6,
+            llm_latency_seconds=5.5,
+            recent_rejections=0,
+            dispatched_total=42,
+        )
+        stock = Stock.objects.create(symbol="AAPL", name="Apple")
+        SummaryJob.objects.create(stock=stock, date=timezone.localdate(), status=SummaryJob.Status.PENDING)
+
+        values = {
+            sample.name: sample.value
+            for metric in SummaryDispatchCollector().collect()
+            for sample in metric.samples
+        }
+
+        self.assertEqual(values["summary_dispatch_ready_backlog"], 1)
+        self.assertEqual(values["summary_dispatch_dispatched_total"], 42)
+        self.assertEqual(values["summary_dispatch_inflight"], 3)
+        self.assertEqual(values["summary_dispatch_inflight_limit"], 6)
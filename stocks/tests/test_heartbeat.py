@@ -0,0 +1,141 @@
+import time
+import uuid
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from stocks.heartbeat import LeaseHeartbeat, renew_lease
+from stocks.models import Stock, SummaryJob
+from stocks.tasks import RUNNING_EXEC_TIMEOUT, generate_summary_for_stock, recover_stuck_summary_jobs
+
+
+def running_job(symbol="AAPL", **fields):
+    return SummaryJob.objects.create(
+        stock=Stock.objects.create(symbol=symbol, name=symbol),
+        date=timezone.localdate(),
+        status=SummaryJob.Status.RUNNING,
+        lease_token=uuid.uuid4(),
+        dispatched_at=timezone.now(),
+        **fields,
+    )
+
+
+@override_settings(SUMMARY_JOB_LEASE_SECONDS=20)
+class RenewLeaseTests(TestCase):
+    def test_renew_extends_current_lease(self):
+        job = running_job(started_at=timezone.now(), lease_expires_at=timezone.now())
+
+        self.assertTrue(renew_lease(job.id, job.lease_token))
+
+        job.refresh_from_db()
+        self.assertGreater(job.lease_expires_at, timezone.now() + timedelta(seconds=15))
+
+    def test_renew_fails_after_lease_was_reclaimed(self):
+        job = running_job(started_at=timezone.now())
+        stale_token = job.lease_token
+        SummaryJob.objects.filter(id=job.id).update(status=SummaryJob.Status.RETRY_WAIT, lease_token=None)
+
+        self.assertFalse(renew_lease(job.id, stale_token))
+
+
+@patch("stocks.heartbeat.get_dispatch_controller")
+@patch("stocks.heartbeat.renew_lease", return_value=True)
+class LeaseHeartbeatTests(SimpleTestCase):
+    def _wait_for(self, condition, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_beats_until_block_exits_and_renews_dispatch_slot(self, mock_renew, mock_get_controller):
+        token = uuid.uuid4()
+
+        with LeaseHeartbeat(1, token, interval=0.01) as heartbeat:
+            self._wait_for(lambda: heartbeat.beats >= 3)
+        beats = heartbeat.beats
+        time.sleep(0.05)
+
+        self.assertGreaterEqual(beats, 3)
+        self.assertEqual(heartbeat.beats, beats)
+        mock_renew.assert_called_with(1, token)
+        mock_get_controller.return_value.renew.assert_called_with(token)
+
+    def test_stops_when_lease_is_lost(self, mock_renew, mock_get_controller):
+        mock_renew.return_value = False
+
+        with LeaseHeartbeat(1, uuid.uuid4(), interval=0.01) as heartbeat:
+            self._wait_for(lambda: heartbeat.lost)
+            time.sleep(0.05)
+
+        self.assertTrue(heartbeat.lost)
+        self.assertEqual(mock_renew.call_count, 1)
+        mock_get_controller.return_value.renew.assert_not_called()
+
+    def test_renew_errors_do_not_stop_heartbeat(self, mock_renew, mock_get_controller):
+        mock_renew.side_effect = [Exception("db down"), True, True]
+
+        with LeaseHeartbeat(1, uuid.uuid4(), interval=0.01) as heartbeat:
+            self._wait_for(lambda: heartbeat.beats >= 1)
+
+        self.assertGreaterEqual(heartbeat.beats, 1)
+
+    @override_settings(SUMMARY_JOB_HEARTBEAT_ENABLED=False)
+    def test_disabled_starts_no_thread(self, mock_renew, mock_get_controller):
+        with LeaseHeartbeat(1, uuid.uuid4(), interval=0.01) as heartbeat:
+            time.sleep(0.05)
+
+        self.assertIsNone(heartbeat._thread)
+        mock_renew.assert_not_called()
+
+
+@patch("stocks.tasks.request_summary_dispatch")
+class HeartbeatRecoveryTests(TestCase):
+    def test_missed_heartbeat_is_reclaimed_within_seconds_of_start(self, mock_request_dispatch):
+        job = running_job(
+            started_at=timezone.now() - timedelta(seconds=30),
+            lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        result = recover_stuck_summary_jobs()
+
+        self.assertEqual(result["recovered_job_ids"], [job.id])
+        job.refresh_from_db()
+        self.assertEqual(job.status, SummaryJob.Status.RETRY_WAIT)
+        self.assertIsNone(job.lease_expires_at)
+
+    def test_long_running_job_with_live_heartbeat_is_not_reclaimed(self, mock_request_dispatch):
+        job = running_job(
+            started_at=timezone.now() - RUNNING_EXEC_TIMEOUT - timedelta(minutes=5),
+            lease_expires_at=timezone.now() + timedelta(seconds=10),
+        )
+
+        result = recover_stuck_summary_jobs()
+
+        self.assertEqual(result["recovered_job_ids"], [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, SummaryJob.Status.RUNNING)
+
+
+@override_settings(OPENAI_API_KEY="", SUMMARY_JOB_LEASE_SECONDS=20)
+@patch("stocks.tasks.get_dispatch_controller", return_value=None)
+class GenerateSummaryLeaseStartTests(TestCase):
+    def test_worker_start_sets_lease_expiry(self, _):
+        job = running_job()
+
+        generate_summary_for_stock(job.id, str(job.lease_token))
+
+        job.refresh_from_db()
+        self.assertIsNotNone(job.started_at)
+        self.assertAlmostEqual(
+            (job.lease_expires_at - job.started_at).total_seconds(), 20, delta=0.001
+        )
+
+    @override_settings(SUMMARY_JOB_HEARTBEAT_ENABLED=False)
+    def test_worker_start_without_heartbeat_leaves_lease_expiry_empty(self, _):
+        job = running_job()
+
+        generate_summary_for_stock(job.id, str(job.lease_token))
+
+        job.refresh_from_db()
+        self.assertIsNone(job.lease_expires_at)
@@ -0,0 +1,104 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from stocks.ingest import run_ingest
+from stocks.models import NewsStock, Price, Stock
+
+
+class FakeAsyncFinnhubClient:
+    def __init__(self, news_by_symbol, failing_symbols=()):
+        self.news_by_symbol = news_by_symbol
+        self.failing_symbols = set(failing_symbols)
+        self.calls = []
+        self.days = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def company_news(self, symbol, days=1):
+        self.calls.append(("news", symbol))
+        self.days[symbol] = days
+        if symbol in self.failing_symbols:
+            raise Exception(f"Finnhub request failed: {symbol}")
+        return self.news_by_symbol.get(symbol, [])
+
+    async def quote(self, symbol):
+        self.calls.append(("quote", symbol))
+        return {"c": 123.45, "dp": 1.5, "t": int(timezone.now().timestamp())}
+
+
+class RunIngestTests(TestCase):
+    def test_run_ingest_fetches_news_and_quote_and_writes_in_batch(self):
+        aapl = Stock.objects.create(symbol="AAPL", name="Apple")
+        msft = Stock.objects.create(symbol="MSFT", name="Microsoft")
+        shared = {"url": "https://example.com/shared", "headline": "Apple and Microsoft"}
+        client = FakeAsyncFinnhubClient(
+            {
+                "AAPL": [shared, {"url": "https://example.com/aapl", "headline": "Apple"}],
+                "MSFT": [shared, {"url": "", "headline": "no url"}],
+            }
+        )
+
+        outcomes = run_ingest([aapl, msft], client=client, concurrency=2)
+
+        self.assertEqual(
+            outcomes,
+            [
+                {
+                    "symbol": "AAPL",
+                    "result": {
+                        "created_news": 2,
+                        "linked_pairs": 2,
+                        "skipped": 0,
+                        "watermark_skipped": 0,
+                    },
+                },
+                {
+                    "symbol": "MSFT",
+                    "result": {
+                        "created_news": 0,
+                        "linked_pairs": 1,
+                        "skipped": 1,
+                        "watermark_skipped": 0,
+                    },
+                },
+            ],
+        )
+        self.assertEqual(NewsStock.objects.count(), 3)
+        self.assertEqual(Price.objects.count(), 2)
+        self.assertCountEqual(
+            client.calls,
+            [("news", "AAPL"), ("quote", "AAPL"), ("news", "MSFT"), ("quote", "MSFT")],
+        )
+
+    def test_run_ingest_reports_failed_symbol_without_blocking_others(self):
+        aapl = Stock.objects.create(symbol="AAPL", name="Apple")
+        msft = Stock.objects.create(symbol="MSFT", name="Microsoft")
+        client = FakeAsyncFinnhubClient(
+            {"MSFT": [{"url": "https://example.com/msft", "headline": "Microsoft"}]},
+            failing_symbols=["AAPL"],
+        )
+
+        outcomes = run_ingest([aapl, msft], client=client)
+
+        self.assertEqual(outcomes[0], {"symbol": "AAPL", "error": "Finnhub request failed: AAPL"})
+        self.assertEqual(outcomes[1]["result"]["created_news"], 1)
+
+    def test_run_ingest_uses_watermark_for_second_run(self):
+        aapl = Stock.objects.create(symbol="AAPL", name="Apple")
+        now_ts = int(timezone.now().timestamp())
+        news = [
+            {"url": f"https://example.com/aapl/{i}", "headline": "Apple", "datetime": now_ts - i}
+            for i in range(3)
+        ]
+
+        run_ingest([aapl], days=1, client=FakeAsyncFinnhubClient({"AAPL": news}))
+        client = FakeAsyncFinnhubClient({"AAPL": news})
+        outcomes = run_ingest([aapl], days=1, client=client)
+
+        self.assertEqual(client.days, {"AAPL": 0})
+        self.assertEqual(outcomes[0]["result"]["watermark_skipped"], 3)
+        self.assertEqual(outcomes[0]["result"]["created_news"], 0)
@@ -0,0 +1,172 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from stocks.models import IngestJob, Stock
+from stocks.rate_limit import PRIORITY_INTERACTIVE, current_priority
+from stocks.tasks import ingest_news_for_symbol
+
+INGEST_RESULT = {
+    "created_news": 2,
+    "linked_pairs": 2,
+    "skipped": 0,
+    "watermark_skipped": 1,
+}
+
+
+class NewsIngestViewTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email="ingest@example.com", password="test1234")
+        Stock.objects.create(symbol="AAPL", name="Apple")
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @patch("stocks.views.news.ingest_news_for_symbol.delay")
+    def test_post_enqueues_task_and_returns_202_with_job_id(self, mock_delay):
+        response = self.client.post("/api/stocks/news/ingest/", {"symbol": "aapl", "days": 3})
+
+        self.assertEqual(response.status_code, 202)
+        job = IngestJob.objects.get()
+        self.assertEqual((job.symbol, job.days, job.requested_by), ("AAPL", 3, self.user))
+        mock_delay.assert_called_once_with(str(job.id))
+        self.assertEqual(response.data["job_id"], str(job.id))
+        self.assertEqual(response.data["status"], IngestJob.Status.PENDING)
+        self.assertEqual(
+            response["Location"],
+            reverse("news-ingest-job", kwargs={"job_id": job.id}),
+        )
+
+    @patch("stocks.tasks.upsert_news_for_symbol_coalesced", return_value=INGEST_RESULT)
+    @patch("stocks.views.news.ingest_news_for_symbol.delay")
+    def test_post_with_wait_returns_result_when_job_finishes_in_time(
+        self, mock_delay, mock_upsert
+    ):
+        mock_delay.side_effect = lambda job_id: ingest_news_for_symbol(job_id)
+
+        response = self.client.post("/api/stocks/news/ingest/?wait=5", {"symbol": "AAPL"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], IngestJob.Status.SUCCESS)
+        self.assertEqual(response.data["result"], INGEST_RESULT)
+
+    @patch("stocks.views.news.INGEST_WAIT_POLL_INTERVAL", 0.01)
+    @patch("stocks.views.news.ingest_news_for_symbol.delay")
+    def test_post_with_wait_falls_back_to_202_when_job_is_still_running(self, mock_delay):
+        response = self.client.post("/api/stocks/news/ingest/", {"symbol": "AAPL", "wait": 0.05})
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], IngestJob.Status.PENDING)
+
+    @patch("stocks.views.news.ingest_news_for_symbol.delay")
+    def test_post_unknown_symbol_returns_404_without_job(self, mock_delay):
+        response = self.client.post("/api/stocks/news/ingest/", {"symbol": "NOPE"})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(IngestJob.objects.exists())
+        mock_delay.assert_not_called()
+
+    @patch("stocks.views.news.ingest_news_for_symbol.delay")
+    def test_post_null_or_non_scalar_values_fall_back_to_defaults(self, mock_delay):
+        for body in (
+            {"symbol": "AAPL", "days": None, "wait": None},
+            {"symbol": "AAPL", "days": [3], "wait": {"seconds": 1}},
+        ):
+            response = self.client.post("/api/stocks/news/ingest/", body, format="json")
+
+            self.assertEqual(response.status_code, 202)
+        self.assertEqual(list(IngestJob.objects.values_list("days", flat=True)), [1, 1])
+
+    @patch("stocks.views.news.ingest_news_for_symbol.delay")
+    def test_post_non_positive_days_returns_400_without_job(self, mock_delay):
+        for days in (0, -3):
+            response = self.client.post(
+                "/api/stocks/news/ingest/", {"symbol": "AAPL", "days": days}, format="json"
+            )
+
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(IngestJob.objects.exists())
+        mock_delay.assert_not_called()
+
+    def test_status_endpoint_returns_progress_and_counters(self):
+        job = IngestJob.objects.create(
+            requested_by=self.user,
+            symbol="AAPL",
+            status=IngestJob.Status.SUCCESS,
+            stage=IngestJob.Stage.DONE,
+            result=INGEST_RESULT,
+        )
+
+        response = self.client.get(reverse("news-ingest-job", kwargs={"job_id": job.id}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["stage"], IngestJob.Stage.DONE)
+        self.assertEqual(response.data["result"], INGEST_RESULT)
+
+    def test_status_endpoint_hides_other_users_jobs(self):
+        other = get_user_model().objects.create_user(email="other@example.com", password="x")
+        job = IngestJob.objects.create(requested_by=other, symbol="AAPL")
+
+        response = self.client.get(reverse("news-ingest-job", kwargs={"job_id": job.id}))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class IngestNewsForSymbolTaskTests(TestCase):
+    def setUp(self):
+        self.job = IngestJob.objects.create(symbol="AAPL", days=2)
+
+    @patch("stocks.tasks.upsert_news_for_symbol_coalesced")
+    def test_task_records_stages_and_result(self, mock_upsert):
+        stages = []
+
+        def fake_upsert(symbol, days, on_stage):
+            for stage in ("fetching", "persisting"):
+                on_stage(stage)
+                stages.append(IngestJob.objects.get(id=self.job.id).stage)
+            return INGEST_RESULT
+
+        mock_upsert.side_effect = fake_upsert
+
+        ingest_news_for_symbol(str(self.job.id))
+
+        self.job.refresh_from_db()
+        self.assertEqual(stages, ["fetching", "persisting"])
+        self.assertEqual(self.job.status, IngestJob.Status.SUCCESS)
+        self.assertEqual(self.job.stage, IngestJob.Stage.DONE)
+        self.assertEqual(self.job.result, INGEST_RESULT)
+        self.assertIsNotNone(self.job.finished_at)
+
+    @patch("stocks.tasks.upsert_news_for_symbol_coalesced")
+    def test_task_fetches_in_interactive_rate_limit_lane(self, mock_upsert):
+        priorities = []
+        mock_upsert.side_effect = lambda *a, **kw: priorities.append(current_priority()) or {}
+
+        ingest_news_for_symbol(str(self.job.id))
+
+        self.assertEqual(priorities, [PRIORITY_INTERACTIVE])
+        self.assertNotEqual(current_priority(), PRIORITY_INTERACTIVE)
+
+    @patch(
+        "stocks.tasks.upsert_news_for_symbol_coalesced",
+        side_effect=Exception("Rate limit wait timeout: AAPL"),
+    )
+    def test_task_marks_job_failed_on_error(self, mock_upsert):
+        ingest_news_for_symbol(str(self.job.id))
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, IngestJob.Status.FAILED)
+        self.assertEqual(self.job.error_message, "Rate limit wait timeout: AAPL")
+
+    @patch("stocks.tasks.upsert_news_for_symbol_coalesced")
+    def test_task_skips_job_that_already_started(self, mock_upsert):
+        IngestJob.objects.filter(id=self.job.id).update(status=IngestJob.Status.RUNNING)
+
+        result = ingest_news_for_symbol(str(self.job.id))
+
+        self.assertEqual(result["status"], "stale_or_already_started")
+        mock_upsert.assert_not_called()
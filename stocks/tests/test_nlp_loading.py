@@ -0,0 +1,131 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from stocks import utils
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_probe(code: str) -> dict:
+    """새 인터프리터에서 django.setup() 후 code를 실행하고 마지막 줄의 JSON을 돌려준다."""
+    script = textwrap.dedent(
+        """
+        import json, os, sys, resource
+        import django
+        django.setup()
+
+        def rss_kb():
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        """
+    ) + textwrap.dedent(code)
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+    completed = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if completed.returncode != 0:
+        raise AssertionError(completed.stderr)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+class LazyNlpImportTests(SimpleTestCase):
+    def test_importing_views_does_not_load_spacy(self):
+        result = run_probe(
+            """
+            import stocks.views
+            before = rss_kb()
+            loaded_on_import = "spacy" in sys.modules
+            from stocks.utils import get_nlp
+            get_nlp()
+            print(json.dumps({
+                "loaded_on_import": loaded_on_import,
+                "rss_import": before,
+                "rss_loaded": rss_kb(),
+            }))
+            """
+        )
+
+        self.assertFalse(result["loaded_on_import"])
+        self.assertLess(result["rss_import"], result["rss_loaded"])
+
+    def test_preloaded_model_is_reused_by_forked_children(self):
+        result = run_probe(
+            """
+            import spacy
+            from unittest.mock import patch
+            from stocks import utils
+
+            utils.preload_nlp()
+            parent_id = id(utils.get_nlp())
+            read_fd, write_fd = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(read_fd)
+                with patch.object(spacy, "load", side_effect=AssertionError("reloaded")):
+                    try:
+                        same = id(utils.get_nlp()) == parent_id
+                        utils.get_nlp()("Apple shares rise")
+                        ok = True
+                    except AssertionError:
+                        same, ok = False, False
+                os.write(write_fd, json.dumps({"same": same, "ok": ok}).encode())
+                os._exit(0)
+            os.close(write_fd)
+            os.waitpid(pid, 0)
+            with os.fdopen(read_fd) as f:
+                print(f.read())
+            """
+        )
+
+        self.assertTrue(result["ok"])
+        self.assertTrue(result["same"])
+
+
+class GetNlpTests(SimpleTestCase):
+    def setUp(self):
+        patcher = patch.object(utils, "_nlp", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("spacy.load")
+    def test_model_is_loaded_once(self, mock_load):
+        first = utils.get_nlp()
+        second = utils.get_nlp()
+
+        self.assertIs(first, second)
+        mock_load.assert_called_once_with(utils.SPACY_MODEL)
+
+    @override_settings(SPACY_PRELOAD_IN_WORKER=True)
+    @patch("stocks.utils.gc.freeze")
+    @patch("spacy.load")
+    def test_worker_init_preloads_when_enabled(self, mock_load, mock_freeze):
+        from stockq.celery import preload_spacy_model
+
+        preload_spacy_model()
+
+        mock_load.assert_called_once_with(utils.SPACY_MODEL)
+        mock_freeze.assert_called_once_with()
+
+    @override_settings(SPACY_PRELOAD_IN_WORKER=False)
+    @patch("spacy.load")
+    def test_worker_init_is_noop_by_default(self, mock_load):
+        from stockq.celery import preload_spacy_model
+
+        preload_spacy_model()
+
+        mock_load.assert_not_called()
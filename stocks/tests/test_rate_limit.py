@@ -1,9 +1,33 @@
+import time
 from types import SimpleNamespace
 from unittest.mock import Mock, call, patch
 
+from django.core.exceptions import ImproperlyConfigured
 from django.test import SimpleTestCase, TestCase, override_settings
 
-from stocks.rate_limit import get_finnhub_bucket
+import fakeredis
+from redis.exceptions import ConnectionError as RedisConnectionError, NoScriptError
+
+from stocks.metrics import FinnhubBucketEffectiveRateCollector, RATE_LIMIT_WAIT_SECONDS
+from stocks.rate_limit import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    LUA_AIMD_FEEDBACK,
+    LUA_TOKEN_BUCKET,
+    LUA_TOKEN_BUCKET_BOOK_ABOVE_FLOOR,
+    LUA_TOKEN_BUCKET_RESERVE,
+    SCRIPT_SHAS,
+    LeasedTokenBucket,
+    RedisTokenBucket,
+    _reset_registry_after_fork,
+    get_bucket,
+    get_finnhub_bucket,
+    get_openai_bucket,
+    get_redis_client,
+    rate_limit_priority,
+    report_finnhub_feedback,
+    reset_rate_limit_registry,
+)
 from stocks.services import (
     _finnhub_backoff_seconds,
     sleep_for_finnhub_429,
@@ -105,7 +129,7 @@ class Finnhub429RetryTests(SimpleTestCase):
 
     @override_settings(FINNHUB_API_KEY="test-key")
     @patch("stocks.services.sleep_for_finnhub_429", return_value=1.25)
-    @patch("stocks.services.requests.get")
+    @patch("stocks.services.requests.Session.get")
     def test_company_news_retries_after_429(
         self,
         mock_get,
@@ -124,7 +148,7 @@ class Finnhub429RetryTests(SimpleTestCase):
 
     @override_settings(FINNHUB_API_KEY="test-key")
     @patch("stocks.tasks.sleep_for_finnhub_429", return_value=1.25)
-    @patch("stocks.tasks.requests.get")
+    @patch("stocks.tasks.requests.Session.get")
     def test_quote_retries_after_429(
         self,
         mock_get,
@@ -144,7 +168,7 @@ class Finnhub429RetryTests(SimpleTestCase):
 
     @override_settings(FINNHUB_API_KEY="test-key")
     @patch("stocks.tasks.sleep_for_finnhub_429", return_value=1.25)
-    @patch("stocks.tasks.requests.get")
+    @patch("stocks.tasks.requests.Session.get")
     def test_quote_raises_after_last_429(
         self,
         mock_get,
@@ -163,3 +187,548 @@ class Finnhub429RetryTests(SimpleTestCase):
             mock_sleep_for_429.call_args_list,
             [call(0), call(1), call(2), call(3)],
         )
+
+
+class RedisTokenBucketReservationTests(SimpleTestCase):
+    def make_bucket(self, *evalsha_results):
+        bucket = RedisTokenBucket(
+            key="rate_limit:test",
+            capacity=2,
+            refill_rate_per_sec=1,
+            redis_url="redis://example:6379/9",
+        )
+        client = Mock()
+        client.evalsha.side_effect = list(evalsha_results)
+        bucket._client = client
+        return bucket, client
+
+    @patch("stocks.rate_limit.time.sleep")
+    def test_wait_for_slot_reserves_once_and_sleeps_exactly_until_slot(self, mock_sleep):
+        bucket, client = self.make_bucket([1, -1, 750_000])
+
+        self.assertTrue(bucket.wait_for_slot(timeout=5))
+
+        client.evalsha.assert_called_once()
+        self.assertEqual(
+            client.evalsha.call_args.args[0], SCRIPT_SHAS[LUA_TOKEN_BUCKET_RESERVE]
+        )
+        self.assertEqual(client.evalsha.call_args.args[-1], 5_000_000)
+        client.script_load.assert_not_called()
+        mock_sleep.assert_called_once_with(0.75)
+
+    @patch("stocks.rate_limit.time.sleep")
+    def test_wait_for_slot_does_not_sleep_when_slot_is_available_now(self, mock_sleep):
+        bucket, _ = self.make_bucket([1, 1, 0])
+
+        self.assertTrue(bucket.wait_for_slot())
+
+        mock_sleep.assert_not_called()
+
+    @patch("stocks.rate_limit.time.sleep")
+    def test_wait_for_slot_returns_false_without_waiting_when_slot_is_beyond_timeout(
+        self, mock_sleep
+    ):
+        bucket, _ = self.make_bucket([0, -20, 21_000_000])
+
+        self.assertFalse(bucket.wait_for_slot(timeout=15))
+
+        mock_sleep.assert_not_called()
+
+    def test_reserve_reloads_script_after_noscript_error(self):
+        bucket, client = self.make_bucket(NoScriptError("flushed"), [1, 0, 0])
+
+        reservation = bucket.reserve()
+
+        self.assertTrue(reservation.reserved)
+        client.script_load.assert_called_once_with(LUA_TOKEN_BUCKET_RESERVE)
+        self.assertEqual(client.evalsha.call_count, 2)
+
+    @override_settings(RATE_LIMIT_RESERVATION_ENABLED=False)
+    @patch("stocks.rate_limit.time.sleep")
+    def test_wait_for_slot_polls_consume_when_reservation_is_disabled(self, mock_sleep):
+        bucket, client = self.make_bucket([0, 0, 200_000], [1, 0, 0])
+
+        self.assertTrue(bucket.wait_for_slot(interval=0.2))
+
+        self.assertEqual(client.evalsha.call_count, 2)
+        mock_sleep.assert_called_once_with(0.2)
+
+
+class RateLimitRegistryTests(SimpleTestCase):
+    def setUp(self):
+        reset_rate_limit_registry()
+        self.addCleanup(reset_rate_limit_registry)
+
+    def test_get_finnhub_bucket_returns_cached_instance(self):
+        self.assertIs(get_finnhub_bucket(), get_finnhub_bucket())
+
+    @override_settings(
+        FINNHUB_BUCKET_REDIS_URL="redis://example:6379/3",
+        OPENAI_BUCKET_REDIS_URL="redis://example:6379/3",
+    )
+    def test_buckets_on_same_url_share_one_connection_pool(self):
+        finnhub = get_finnhub_bucket()
+        openai = get_openai_bucket()
+
+        self.assertIsNot(finnhub, openai)
+        self.assertIs(
+            finnhub.redis_client.connection_pool,
+            openai.redis_client.connection_pool,
+        )
+        self.assertIsNot(
+            get_redis_client("redis://example:6379/3").connection_pool,
+            get_redis_client("redis://example:6379/4").connection_pool,
+        )
+
+    def test_changed_settings_create_a_new_bucket(self):
+        first = get_bucket("rate_limit:test", 2, 1.0, "redis://example:6379/3")
+
+        with override_settings(FINNHUB_BUCKET_CAPACITY=9):
+            self.assertEqual(get_finnhub_bucket().capacity, 9)
+        self.assertIsNot(get_bucket("rate_limit:test", 3, 1.0, "redis://example:6379/3"), first)
+        self.assertIs(get_bucket("rate_limit:test", 2, 1.0, "redis://example:6379/3"), first)
+
+    def test_registry_is_emptied_in_forked_child(self):
+        parent_bucket = get_finnhub_bucket()
+
+        _reset_registry_after_fork()
+
+        self.assertIsNot(get_finnhub_bucket(), parent_bucket)
+
+
+class InMemoryBucket:
+    """LeasedTokenBucket 테스트용: lease/return/consume만 흉내 내는 전역 bucket (보충 없음)."""
+
+    def __init__(self, tokens, capacity=5):
+        self.key = "rate_limit:test"
+        self.tokens = tokens
+        self.capacity = capacity
+        self.lease_calls = 0
+        self.returned = 0
+
+    def lease(self, max_tokens, priority=None):
+        self.lease_calls += 1
+        granted = min(max_tokens, self.tokens)
+        self.tokens -= granted
+        return granted, 0.0 if granted else 0.5
+
+    def return_tokens(self, tokens):
+        self.returned += tokens
+        self.tokens = min(self.capacity, self.tokens + tokens)
+
+
+class LeasedTokenBucketTests(SimpleTestCase):
+    def test_spends_leased_tokens_locally_with_one_round_trip_per_batch(self):
+        bucket = InMemoryBucket(tokens=5)
+        leased = LeasedTokenBucket(bucket, batch_size=3, lease_ttl=60)
+
+        results = [leased.consume().allowed for _ in range(3)]
+
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual(bucket.lease_calls, 1)
+        self.assertEqual(bucket.tokens, 2)
+
+    def test_batch_size_is_capped_by_bucket_capacity(self):
+        leased = LeasedTokenBucket(InMemoryBucket(tokens=2, capacity=2), batch_size=10, lease_ttl=1)
+
+        self.assertEqual(leased.batch_size, 2)
+
+    @patch("stocks.rate_limit.time.monotonic")
+    def test_expired_lease_returns_unused_tokens_before_leasing_again(self, mock_monotonic):
+        bucket = InMemoryBucket(tokens=5)
+        leased = LeasedTokenBucket(bucket, batch_size=3, lease_ttl=1.0)
+
+        mock_monotonic.return_value = 100.0
+        leased.consume()
+        mock_monotonic.return_value = 101.5
+        leased.consume()
+
+        self.assertEqual(bucket.returned, 2)
+        self.assertEqual(bucket.lease_calls, 2)
+
+    def test_release_returns_remaining_tokens(self):
+        bucket = InMemoryBucket(tokens=5)
+        leased = LeasedTokenBucket(bucket, batch_size=3, lease_ttl=60)
+        leased.consume()
+
+        leased.release()
+
+        self.assertEqual(bucket.returned, 2)
+        self.assertEqual(bucket.tokens, 4)
+
+    def test_idle_holder_returns_unused_tokens_to_other_processes_at_expiry(self):
+        server = fakeredis.FakeServer()
+
+        def make_bucket():
+            bucket = RedisTokenBucket(
+                key="rate_limit:lease:idle",
+                capacity=3,
+                refill_rate_per_sec=0.001,
+                redis_url="redis://example:6379/9",
+            )
+            bucket._client = fakeredis.FakeRedis(server=server)
+            return bucket
+
+        holder = LeasedTokenBucket(make_bucket(), batch_size=3, lease_ttl=0.1)
+        other = make_bucket()
+        self.assertTrue(holder.consume().allowed)
+        self.assertFalse(other.consume().allowed)
+
+        # holder는 더 호출하지 않는다 — 만료 timer가 남은 2개를 돌려준다.
+        time.sleep(0.3)
+
+        self.assertTrue(other.consume(tokens=2).allowed)
+        self.assertEqual(holder._tokens, 0)
+
+    def test_new_lease_is_not_returned_by_previous_expiry_timer(self):
+        bucket = InMemoryBucket(tokens=10, capacity=10)
+        leased = LeasedTokenBucket(bucket, batch_size=3, lease_ttl=0.1)
+        leased.consume()
+        leased.release()
+
+        leased.consume()
+        leased._expire_idle()
+
+        self.assertEqual(leased._tokens, 2)
+        self.assertEqual(bucket.returned, 2)
+
+    def test_wait_for_slot_sleeps_until_next_token_and_times_out(self):
+        leased = LeasedTokenBucket(InMemoryBucket(tokens=0), batch_size=3, lease_ttl=1)
+        clock = [0.0]
+
+        def fake_sleep(seconds):
+            clock[0] += seconds
+
+        with patch("stocks.rate_limit.time.monotonic", side_effect=lambda: clock[0]), patch(
+            "stocks.rate_limit.time.sleep", side_effect=fake_sleep
+        ) as mock_sleep:
+            self.assertFalse(leased.wait_for_slot(timeout=1.0))
+
+        # 고정 interval(0.2s) 대신 bucket이 알려준 다음 토큰 시점(0.5s)까지만 잔다.
+        self.assertEqual(mock_sleep.call_args_list, [call(0.5), call(0.5)])
+
+    @override_settings(
+        FINNHUB_BUCKET_LEASE_ENABLED=True,
+        FINNHUB_BUCKET_LEASE_SIZE=4,
+        FINNHUB_BUCKET_LEASE_TTL=0.5,
+        FINNHUB_BUCKET_CAPACITY=10,
+    )
+    def test_get_finnhub_bucket_returns_shared_lease_wrapper_when_enabled(self):
+        reset_rate_limit_registry()
+        self.addCleanup(reset_rate_limit_registry)
+
+        leased = get_finnhub_bucket()
+
+        self.assertIsInstance(leased, LeasedTokenBucket)
+        self.assertIs(get_finnhub_bucket(), leased)
+        self.assertEqual((leased.batch_size, leased.lease_ttl), (4, 0.5))
+
+
+class AdaptiveRateTests(SimpleTestCase):
+    def make_bucket(self, *evalsha_results):
+        bucket = RedisTokenBucket(
+            key="rate_limit:test",
+            capacity=2,
+            refill_rate_per_sec=4,
+            redis_url="redis://example:6379/9",
+            adaptive=True,
+        )
+        client = Mock()
+        client.evalsha.side_effect = list(evalsha_results)
+        bucket._client = client
+        return bucket, client
+
+    def record(self, bucket, throttled):
+        return bucket.record_feedback(
+            throttled,
+            min_rate=0.5,
+            decrease_factor=0.5,
+            increase_step=0.25,
+            success_threshold=10,
+            cooldown=1.0,
+        )
+
+    def test_adaptive_bucket_passes_aimd_state_key_to_refill(self):
+        bucket, client = self.make_bucket([1, 1, 0])
+
+        bucket.consume()
+
+        args = client.evalsha.call_args.args
+        self.assertEqual(args[0], SCRIPT_SHAS[LUA_TOKEN_BUCKET])
+        self.assertEqual(args[1:4], (2, "rate_limit:test", "rate_limit:test:aimd"))
+
+    def test_throttled_feedback_runs_aimd_script_on_state_key(self):
+        bucket, client = self.make_bucket(b"2")
+
+        self.assertEqual(self.record(bucket, throttled=True), 2.0)
+
+        args = client.evalsha.call_args.args
+        self.assertEqual(args[:3], (SCRIPT_SHAS[LUA_AIMD_FEEDBACK], 1, "rate_limit:test:aimd"))
+        # ceiling, floor, throttled, decrease_factor, increase_step, threshold, cooldown_us
+        self.assertEqual(args[3:10], (4, 0.5, 1, 0.5, 0.25, 10, 1_000_000))
+
+    def test_success_feedback_is_skipped_while_rate_is_known_to_be_at_ceiling(self):
+        bucket, client = self.make_bucket(b"4")
+
+        self.assertEqual(self.record(bucket, throttled=False), 4.0)
+        self.assertIsNone(self.record(bucket, throttled=False))
+
+        client.evalsha.assert_called_once()
+
+    def test_effective_rate_reads_state_and_falls_back_to_ceiling(self):
+        bucket, client = self.make_bucket()
+
+        client.hget.return_value = b"1.5"
+        self.assertEqual(bucket.effective_rate(), 1.5)
+
+        client.hget.return_value = None
+        self.assertEqual(bucket.effective_rate(), 4.0)
+
+    def test_non_adaptive_bucket_ignores_feedback(self):
+        bucket = RedisTokenBucket(
+            key="rate_limit:test",
+            capacity=2,
+            refill_rate_per_sec=4,
+            redis_url="redis://example:6379/9",
+        )
+        bucket._client = Mock()
+
+        self.assertIsNone(self.record(bucket, throttled=True))
+        bucket._client.evalsha.assert_not_called()
+        self.assertEqual(bucket.effective_rate(), 4.0)
+
+
+class ReportFinnhubFeedbackTests(SimpleTestCase):
+    @override_settings(FINNHUB_AIMD_ENABLED=False)
+    @patch("stocks.rate_limit.get_finnhub_bucket")
+    def test_does_nothing_when_disabled(self, mock_get_bucket):
+        report_finnhub_feedback(throttled=True)
+
+        mock_get_bucket.assert_not_called()
+
+    @override_settings(FINNHUB_AIMD_ENABLED=True, FINNHUB_AIMD_DECREASE_FACTOR=0.25)
+    @patch("stocks.rate_limit.get_finnhub_bucket")
+    def test_forwards_settings_to_bucket(self, mock_get_bucket):
+        bucket = mock_get_bucket.return_value
+        bucket.record_feedback.return_value = 0.25
+
+        report_finnhub_feedback(throttled=True)
+
+        self.assertTrue(bucket.record_feedback.call_args.args[0])
+        self.assertEqual(bucket.record_feedback.call_args.kwargs["decrease_factor"], 0.25)
+
+    @override_settings(FINNHUB_AIMD_ENABLED=True)
+    @patch("stocks.rate_limit.get_finnhub_bucket")
+    def test_swallows_redis_errors(self, mock_get_bucket):
+        mock_get_bucket.return_value.record_feedback.side_effect = RedisConnectionError("down")
+
+        report_finnhub_feedback(throttled=False)
+
+    @override_settings(FINNHUB_API_KEY="test-key")
+    @patch("stocks.services.report_finnhub_feedback")
+    @patch("stocks.services.sleep_for_finnhub_429", return_value=0)
+    @patch("stocks.services.requests.Session.get")
+    def test_company_news_reports_429_then_success(self, mock_get, mock_sleep, mock_report):
+        success = Mock(status_code=200)
+        success.json.return_value = []
+        mock_get.side_effect = [Mock(status_code=429), success]
+
+        fetch_company_news("AAPL")
+
+        self.assertEqual(
+            mock_report.call_args_list,
+            [call(throttled=True), call(throttled=False)],
+        )
+
+    @override_settings(FINNHUB_API_KEY="test-key")
+    @patch("stocks.tasks.report_finnhub_feedback")
+    @patch("stocks.tasks.sleep_for_finnhub_429", return_value=0)
+    @patch("stocks.tasks.requests.Session.get")
+    def test_quote_reports_429_then_success(self, mock_get, mock_sleep, mock_report):
+        success = Mock(status_code=200)
+        success.json.return_value = {"c": 1.0}
+        mock_get.side_effect = [Mock(status_code=429), success]
+
+        fetch_finnhub_quote("AAPL")
+
+        self.assertEqual(
+            mock_report.call_args_list,
+            [call(throttled=True), call(throttled=False)],
+        )
+
+
+class FinnhubBucketEffectiveRateCollectorTests(SimpleTestCase):
+    @patch("stocks.rate_limit.get_finnhub_bucket")
+    def test_exports_effective_rate_and_ceiling(self, mock_get_bucket):
+        bucket = Mock(spec=RedisTokenBucket, refill_rate_per_sec=1.0)
+        bucket.effective_rate.return_value = 0.5
+        mock_get_bucket.return_value = bucket
+
+        metrics = {m.name: m.samples[0].value for m in FinnhubBucketEffectiveRateCollector().collect()}
+
+        self.assertEqual(
+            metrics,
+            {"finnhub_bucket_effective_rate": 0.5, "finnhub_bucket_rate_ceiling": 1.0},
+        )
+
+
+class PriorityLaneTests(SimpleTestCase):
+    def make_bucket(self, *evalsha_results):
+        bucket = RedisTokenBucket(
+            key="rate_limit:lanes",
+            capacity=4,
+            refill_rate_per_sec=1,
+            redis_url="redis://example:6379/9",
+            reserved_tokens=2,
+        )
+        client = Mock()
+        client.evalsha.side_effect = list(evalsha_results)
+        bucket._client = client
+        return bucket, client
+
+    def wait_count(self, priority, outcome="acquired"):
+        labels = {"bucket": "rate_limit:lanes", "priority": priority, "outcome": outcome}
+        for metric in RATE_LIMIT_WAIT_SECONDS.collect():
+            for sample in metric.samples:
+                if sample.name.endswith("_count") and sample.labels == labels:
+                    return sample.value
+        return 0
+
+    def test_batch_consume_leaves_reserved_tokens_for_interactive(self):
+        bucket, client = self.make_bucket([1, 2, 0], [1, 1, 0])
+
+        bucket.consume(priority=PRIORITY_BATCH)
+        self.assertEqual(client.evalsha.call_args.args[-1], 2)
+
+        bucket.consume(priority=PRIORITY_INTERACTIVE)
+        self.assertEqual(len(client.evalsha.call_args.args), 7)  # floor 인자 없음
+
+    def test_reserved_tokens_are_capped_below_capacity(self):
+        bucket = RedisTokenBucket(
+            key="rate_limit:lanes",
+            capacity=2,
+            refill_rate_per_sec=1,
+            redis_url="redis://example:6379/9",
+            reserved_tokens=5,
+        )
+
+        self.assertEqual(bucket.reserved_tokens, 1)
+
+    @patch("stocks.rate_limit.time.sleep")
+    def test_batch_wait_books_fifo_turn_above_reserve_then_consumes(self, mock_sleep):
+        bucket, client = self.make_bucket([1, 2, 400_000], [1, 1, 0])
+        before = self.wait_count(PRIORITY_BATCH)
+
+        self.assertTrue(bucket.wait_for_slot(timeout=5))
+
+        scripts = [c.args[0] for c in client.evalsha.call_args_list]
+        self.assertEqual(
+            scripts,
+            [SCRIPT_SHAS[LUA_TOKEN_BUCKET_BOOK_ABOVE_FLOOR], SCRIPT_SHAS[LUA_TOKEN_BUCKET]],
+        )
+        self.assertNotIn(SCRIPT_SHAS[LUA_TOKEN_BUCKET_RESERVE], scripts)
+        self.assertEqual(client.evalsha.call_args_list[0].args[-2:], (2, 5_000_000))
+        mock_sleep.assert_called_once_with(0.4)
+        self.assertEqual(self.wait_count(PRIORITY_BATCH), before + 1)
+
+    @patch("stocks.rate_limit.time.sleep")
+    def test_batch_wait_takes_token_at_booking_when_above_reserve(self, mock_sleep):
+        bucket, client = self.make_bucket([2, 2, 0])
+
+        self.assertTrue(bucket.wait_for_slot(timeout=5))
+
+        self.assertEqual(client.evalsha.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    @patch("stocks.rate_limit.time.sleep")
+    def test_batch_wait_gives_up_when_turn_is_beyond_timeout(self, mock_sleep):
+        bucket, client = self.make_bucket([0, 0, 9_000_000])
+
+        self.assertFalse(bucket.wait_for_slot(timeout=5))
+
+        self.assertEqual(client.evalsha.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    @patch("stocks.rate_limit.time.sleep")
+    def test_interactive_wait_reserves_from_whole_bucket(self, mock_sleep):
+        bucket, client = self.make_bucket([1, 1, 0])
+        before = self.wait_count(PRIORITY_INTERACTIVE)
+
+        with rate_limit_priority(PRIORITY_INTERACTIVE):
+            self.assertTrue(bucket.wait_for_slot())
+
+        self.assertEqual(client.evalsha.call_args.args[0], SCRIPT_SHAS[LUA_TOKEN_BUCKET_RESERVE])
+        mock_sleep.assert_not_called()
+        self.assertEqual(self.wait_count(PRIORITY_INTERACTIVE), before + 1)
+
+    def test_leased_bucket_sends_interactive_calls_straight_to_bucket(self):
+        bucket = Mock(capacity=5, key="rate_limit:lanes")
+        leased = LeasedTokenBucket(bucket, batch_size=3, lease_ttl=1)
+
+        with rate_limit_priority(PRIORITY_INTERACTIVE):
+            leased.wait_for_slot(timeout=1)
+
+        bucket.wait_for_slot.assert_called_once_with(
+            timeout=1, interval=0.2, tokens=1, priority=PRIORITY_INTERACTIVE
+        )
+        bucket.lease.assert_not_called()
+
+    @override_settings(FINNHUB_BUCKET_CAPACITY=4, FINNHUB_BUCKET_INTERACTIVE_SHARE=0.25)
+    def test_get_finnhub_bucket_reserves_share_of_capacity(self):
+        reset_rate_limit_registry()
+        self.addCleanup(reset_rate_limit_registry)
+
+        self.assertEqual(get_finnhub_bucket().reserved_tokens, 1)
+
+    @override_settings(FINNHUB_BUCKET_CAPACITY=2, FINNHUB_BUCKET_INTERACTIVE_SHARE=0.9)
+    def test_get_finnhub_bucket_rejects_share_that_leaves_batch_nothing(self):
+        reset_rate_limit_registry()
+        self.addCleanup(reset_rate_limit_registry)
+
+        with self.assertRaises(ImproperlyConfigured):
+            get_finnhub_bucket()
+
+
+class BatchLaneReservationTests(SimpleTestCase):
+    """실제 Lua(fakeredis)로 batch FIFO 차례와 interactive 몫을 확인한다."""
+
+    def make_bucket(self):
+        bucket = RedisTokenBucket(
+            key="rate_limit:lanes:fifo",
+            capacity=4,
+            refill_rate_per_sec=10,
+            redis_url="redis://example:6379/9",
+            reserved_tokens=2,
+        )
+        bucket._client = fakeredis.FakeRedis()
+        return bucket
+
+    def test_batch_bookings_queue_fifo_above_reserve(self):
+        bucket = self.make_bucket()
+
+        states = [bucket.book_above_floor(max_wait=5) for _ in range(4)]
+
+        # 처음 2개는 floor 위 토큰을 바로 가져가고, 이후는 0.1초 간격 차례를 받는다.
+        self.assertEqual([state for state, _ in states], [2, 2, 1, 1])
+        self.assertAlmostEqual(states[2][1], 0.1, delta=0.02)
+        self.assertAlmostEqual(states[3][1], 0.2, delta=0.02)
+
+    def test_batch_bookings_do_not_spend_interactive_reserve(self):
+        bucket = self.make_bucket()
+        for _ in range(5):
+            bucket.book_above_floor(max_wait=5)
+
+        result = bucket.consume(tokens=2, priority=PRIORITY_INTERACTIVE)
+
+        self.assertTrue(result.allowed)
+
+    def test_wait_for_slot_serves_batch_callers_in_booking_order(self):
+        bucket = self.make_bucket()
+        started = time.monotonic()
+
+        for _ in range(4):
+            self.assertTrue(bucket.wait_for_slot(timeout=5, priority=PRIORITY_BATCH))
+
+        # floor 2개는 남기고 10 tokens/s로 채워지므로 두 번째 이후 호출은 차례대로 기다린다.
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+        self.assertTrue(bucket.consume(tokens=2, priority=PRIORITY_INTERACTIVE).allowed)
@@ -0,0 +1,213 @@
+import json
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from stocks.management.commands.bench_relevance_scoring import build_corpus
+from stocks.models import News, NewsStock, Stock
+from stocks.services import NEWS_RELEVANCE_FIELDS, rescore_news_relevance
+from stocks.utils import (
+    RELEVANCE_SCORER_VERSION,
+    _company_aliases,
+    _ner_only_disabled_pipes,
+    get_relevance_matcher,
+    ner_model_version,
+    score_news_relevance,
+    score_news_relevance_batch,
+)
+
+
+class ScoreNewsRelevanceBatchTests(SimpleTestCase):
+    def test_batch_scores_match_single_call_scores(self):
+        corpus = build_corpus(size=60, seed=7)
+        by_company = {}
+        for symbol, name, headline in corpus:
+            by_company.setdefault((symbol, name), []).append(headline)
+
+        for (symbol, name), headlines in by_company.items():
+            expected = [score_news_relevance(symbol, name, h) for h in headlines]
+            self.assertEqual(
+                score_news_relevance_batch(symbol, name, headlines, batch_size=4),
+                expected,
+            )
+
+    def test_empty_headlines_keep_their_position(self):
+        scores = score_news_relevance_batch(
+            "AAPL", "Apple Inc.", ["", "Apple beats earnings", "   "]
+        )
+
+        self.assertEqual(scores[0], (0, False, "empty_headline"))
+        self.assertEqual(scores[2], (0, False, "empty_headline"))
+        self.assertTrue(scores[1][1])
+
+    def test_batch_runs_one_pipe_call_with_only_ner(self):
+        with patch("stocks.utils.get_nlp") as mock_get_nlp:
+            mock_nlp = mock_get_nlp.return_value
+            mock_nlp.pipeline = [
+                ("tok2vec", SimpleNamespace(listening_components=["tagger"])),
+                ("tagger", object()),
+                ("ner", object()),
+            ]
+            mock_nlp.pipe_names = ["tok2vec", "tagger", "ner"]
+            mock_nlp.pipe.return_value = [SimpleNamespace(ents=[]), SimpleNamespace(ents=[])]
+
+            score_news_relevance_batch("AAPL", "Apple", ["a", "b"], batch_size=32)
+
+        mock_nlp.pipe.assert_called_once_with(
+            ["a", "b"], batch_size=32, disable=["tok2vec", "tagger"]
+        )
+
+    def test_components_that_ner_listens_to_stay_enabled(self):
+        model = SimpleNamespace(
+            pipeline=[
+                ("tok2vec", SimpleNamespace(listening_components=["ner", "parser"])),
+                ("parser", object()),
+                ("ner", object()),
+            ],
+            pipe_names=["tok2vec", "parser", "ner"],
+        )
+
+        self.assertEqual(_ner_only_disabled_pipes(model), ["parser"])
+
+
+REGRESSION_CORPUS = Path(__file__).parent / "data" / "relevance_regression.json"
+
+
+class RelevanceMatcherTests(SimpleTestCase):
+    def test_regression_corpus(self):
+        for case in json.loads(REGRESSION_CORPUS.read_text()):
+            with self.subTest(symbol=case["symbol"], headline=case["headline"]):
+                _, is_relevant, reason = get_relevance_matcher(
+                    case["symbol"], case["name"]
+                ).score(case["headline"], case["orgs"])
+                self.assertEqual((is_relevant, reason), (case["is_relevant"], case["reason"]))
+
+    def test_aliases_strip_legal_suffixes_and_share_class(self):
+        self.assertEqual(_company_aliases("jpmorgan chase & co."), ("jpmorgan chase",))
+        self.assertEqual(_company_aliases("sony group holdings co., ltd."), ("sony",))
+        self.assertEqual(_company_aliases("alphabet inc. class a"), ("alphabet",))
+        self.assertEqual(_company_aliases("amazon.com inc."), ("amazon.com", "amazon"))
+        self.assertEqual(_company_aliases("netflix"), ())
+
+    def test_matcher_is_built_once_per_stock(self):
+        get_relevance_matcher.cache_clear()
+
+        first = get_relevance_matcher("AAPL", "Apple Inc.")
+        score_news_relevance_batch("AAPL", "Apple Inc.", ["Apple beats earnings"])
+
+        self.assertIs(get_relevance_matcher("AAPL", "Apple Inc."), first)
+        self.assertEqual(get_relevance_matcher.cache_info().misses, 1)
+
+
+def headline_scores(symbol, company_name, headlines, **kwargs):
+    """score_news_relevance_batch 대역: headline에 symbol이 있으면 관련 있음."""
+    return [
+        (3, True, "symbol_match") if symbol in headline else (0, False, "no_match")
+        for headline in headlines
+    ]
+
+
+@patch("stocks.services.score_news_relevance_batch", side_effect=headline_scores)
+class RescoreNewsRelevanceTests(TestCase):
+    def setUp(self):
+        self.stock = Stock.objects.create(symbol="AAPL", name="Apple")
+
+    def link(self, headline, **fields):
+        news = News.objects.create(
+            headline=headline,
+            url_hash=headline,
+            published_at=timezone.now(),
+        )
+        return NewsStock.objects.create(news=news, stock=self.stock, **fields)
+
+    def test_only_missing_or_outdated_links_are_rescored(self, mock_score):
+        legacy = self.link("AAPL rallies")
+        outdated = self.link("Markets wrap", scorer_version=RELEVANCE_SCORER_VERSION + 1)
+        current = self.link(
+            "AAPL keeps stored score",
+            relevance_score=9,
+            is_relevant=False,
+            relevance_reason="kept",
+            scorer_version=RELEVANCE_SCORER_VERSION,
+        )
+
+        result = rescore_news_relevance(batch_size=1)
+
+        self.assertEqual(result, {"rescored": 2, "relevant": 1, "batches": 2})
+        legacy.refresh_from_db()
+        outdated.refresh_from_db()
+        current.refresh_from_db()
+        self.assertEqual(
+            (legacy.is_relevant, legacy.relevance_reason, legacy.scorer_version),
+            (True, "symbol_match", RELEVANCE_SCORER_VERSION),
+        )
+        self.assertEqual(
+            (outdated.is_relevant, outdated.scorer_version), (False, RELEVANCE_SCORER_VERSION)
+        )
+        self.assertEqual((current.relevance_score, current.relevance_reason), (9, "kept"))
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BackfillNewsRelevanceCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.stock = Stock.objects.create(symbol="AAPL", name="Apple")
+        self.links = []
+        for i in range(5):
+            news = News.objects.create(
+                headline=f"AAPL headline {i}" if i % 2 else f"Markets wrap {i}",
+                url_hash=f"h{i}",
+                published_at=timezone.now(),
+            )
+            self.links.append(NewsStock.objects.create(news=news, stock=self.stock))
+
+    def backfill(self, *args):
+        out = StringIO()
+        call_command("backfill_news_relevance", "--batch-size", "2", *args, stdout=out)
+        return out.getvalue()
+
+    @patch("stocks.management.commands.backfill_news_relevance.extract_org_entities")
+    def test_limit_leaves_checkpoint_and_next_run_resumes(self, mock_extract):
+        mock_extract.side_effect = lambda headlines: [[] for _ in headlines]
+
+        output = self.backfill("--limit", "3")
+
+        self.assertIn("rescored=3", output)
+        self.assertIn(f"last_id={self.links[2].id}", output)
+        self.assertEqual(NewsStock.objects.filter(scorer_version__isnull=True).count(), 2)
+
+        output = self.backfill()
+        self.assertIn(f"start_id={self.links[2].id} pending=2", output)
+        self.assertFalse(NewsStock.objects.filter(scorer_version__isnull=True).exists())
+
+        # NER 결과는 News 캐시에 남아 규칙만 바뀐 재채점에서는 다시 계산하지 않는다.
+        self.assertTrue(all(news.ner_version == ner_model_version() for news in News.objects.all()))
+        mock_extract.reset_mock()
+        output = self.backfill("--all", "--reset-checkpoint")
+        self.assertIn("rescored=5", output)
+        mock_extract.assert_not_called()
+
+    def test_process_pool_scores_the_same_as_in_process(self):
+        self.backfill("--workers", "1")
+        expected = list(NewsStock.objects.order_by("id").values_list(*NEWS_RELEVANCE_FIELDS))
+        NewsStock.objects.update(scorer_version=None, relevance_score=None, is_relevant=None)
+
+        output = self.backfill("--workers", "2", "--from-id", "0")
+
+        self.assertIn("rescored=5", output)
+        self.assertEqual(
+            list(NewsStock.objects.order_by("id").values_list(*NEWS_RELEVANCE_FIELDS)),
+            expected,
+        )
+        self.assertEqual(
+            [link.is_relevant for link in NewsStock.objects.order_by("id")],
+            [False, True, False, True, False],
+        )
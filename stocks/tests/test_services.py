@@ -0,0 +1,461 @@
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from django.contrib.auth import get_user_model
+
+from stocks.models import FavoriteStock, News, NewsIngestWatermark, NewsStock, Stock
+from stocks.metrics import NER_CACHE_LOOKUPS_TOTAL
+from stocks.services import (
+    NEWS_WATERMARK_LATE_WINDOW,
+    bulk_upsert_news,
+    fetch_company_news,
+    format_ner_cache_hit_ratio,
+    get_finnhub_session,
+    news_org_entities,
+    summary_job_priorities,
+    summary_job_priority_fields,
+    upsert_news_for_symbol,
+    upsert_news_for_symbol_coalesced,
+)
+from stocks.utils import RELEVANCE_SCORER_VERSION, make_url_hash, ner_model_version
+from subscriptions.models import Subscription
+
+
+def finnhub_item(i, **overrides):
+    item = {
+        "url": f"https://example.com/news/{i}",
+        "headline": f"Headline {i}",
+        "source": "Example",
+        "datetime": int(timezone.now().timestamp()),
+    }
+    item.update(overrides)
+    return item
+
+
+class BulkUpsertNewsTests(TestCase):
+    def setUp(self):
+        self.stock = Stock.objects.create(symbol="AAPL", name="Apple")
+
+    def test_bulk_upsert_creates_news_and_links_with_counters(self):
+        data = [finnhub_item(i) for i in range(3)] + [finnhub_item(9, url="")]
+
+        created, linked, skipped, _, _ = bulk_upsert_news(self.stock, data)
+
+        self.assertEqual((created, linked, skipped), (3, 3, 1))
+        self.assertEqual(News.objects.count(), 3)
+        self.assertEqual(NewsStock.objects.filter(stock=self.stock).count(), 3)
+
+    def test_bulk_upsert_is_idempotent(self):
+        data = [finnhub_item(i) for i in range(3)]
+        bulk_upsert_news(self.stock, data)
+
+        created, linked, skipped, _, _ = bulk_upsert_news(self.stock, data)
+
+        self.assertEqual((created, linked, skipped), (0, 0, 0))
+        self.assertEqual(News.objects.count(), 3)
+
+    def test_bulk_upsert_dedupes_same_url_hash_within_payload(self):
+        data = [
+            finnhub_item(1, url="https://example.com/news/1?utm_source=a"),
+            finnhub_item(1, url="https://example.com/news/1?utm_source=b"),
+        ]
+
+        created, linked, skipped, _, _ = bulk_upsert_news(self.stock, data)
+
+        self.assertEqual((created, linked, skipped), (1, 1, 0))
+
+    def test_bulk_upsert_links_existing_news_to_new_stock(self):
+        msft = Stock.objects.create(symbol="MSFT", name="Microsoft")
+        data = [finnhub_item(1)]
+        bulk_upsert_news(self.stock, data)
+
+        created, linked, _, _, _ = bulk_upsert_news(msft, data)
+
+        self.assertEqual((created, linked), (0, 1))
+        news = News.objects.get(url_hash=make_url_hash(data[0]["url"]))
+        self.assertCountEqual(
+            news.stocks.values_list("symbol", flat=True), ["AAPL", "MSFT"]
+        )
+
+    @patch("stocks.services.score_news_relevance_batch")
+    def test_bulk_upsert_stores_relevance_on_new_links_only(self, mock_score):
+        mock_score.side_effect = lambda symbol, name, headlines, **kwargs: [
+            (3, True, "symbol_match") for _ in headlines
+        ]
+        bulk_upsert_news(self.stock, [finnhub_item(1)])
+        msft = Stock.objects.create(symbol="MSFT", name="Microsoft")
+        mock_score.side_effect = lambda symbol, name, headlines, **kwargs: [
+            (0, False, "no_match") for _ in headlines
+        ]
+
+        bulk_upsert_news(msft, [finnhub_item(1)])
+        bulk_upsert_news(self.stock, [finnhub_item(1)])
+
+        links = {
+            link.stock.symbol: link
+            for link in NewsStock.objects.select_related("stock")
+        }
+        self.assertEqual(
+            (links["AAPL"].relevance_score, links["AAPL"].is_relevant, links["AAPL"].relevance_reason),
+            (3, True, "symbol_match"),
+        )
+        self.assertFalse(links["MSFT"].is_relevant)
+        self.assertEqual(links["MSFT"].scorer_version, RELEVANCE_SCORER_VERSION)
+
+    @override_settings(NEWS_RELEVANCE_AT_INGEST_ENABLED=False)
+    @patch("stocks.services.score_news_relevance_batch")
+    def test_disabled_ingest_scoring_leaves_links_for_backfill(self, mock_score):
+        bulk_upsert_news(self.stock, [finnhub_item(1)])
+
+        mock_score.assert_not_called()
+        self.assertIsNone(NewsStock.objects.get().scorer_version)
+
+    def test_bulk_upsert_query_count_does_not_grow_with_item_count(self):
+        with CaptureQueriesContext(connection) as small:
+            bulk_upsert_news(self.stock, [finnhub_item(i) for i in range(5)])
+        with CaptureQueriesContext(connection) as large:
+            bulk_upsert_news(self.stock, [finnhub_item(i) for i in range(100, 150)])
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+@patch("stocks.services.extract_org_entities")
+class NewsNerCacheTests(TestCase):
+    def setUp(self):
+        self.aapl = Stock.objects.create(symbol="AAPL", name="Apple")
+        self.msft = Stock.objects.create(symbol="MSFT", name="Microsoft")
+
+    def counter(self, result):
+        return NER_CACHE_LOOKUPS_TOTAL.labels(result=result)._value.get()
+
+    def test_article_linked_to_several_stocks_runs_ner_once(self, mock_extract):
+        mock_extract.side_effect = lambda headlines: [["apple"] for _ in headlines]
+        hits_before = self.counter("hit")
+
+        bulk_upsert_news(self.aapl, [finnhub_item(1)])
+        bulk_upsert_news(self.msft, [finnhub_item(1)])
+
+        mock_extract.assert_called_once_with(["Headline 1"])
+        news = News.objects.get()
+        self.assertEqual((news.org_entities, news.ner_version), (["apple"], ner_model_version()))
+        self.assertEqual(self.counter("hit") - hits_before, 1)
+
+    def test_outdated_model_version_is_recomputed_and_saved(self, mock_extract):
+        mock_extract.side_effect = lambda headlines: [["apple"] for _ in headlines]
+        news = News.objects.create(
+            headline="Apple rallies",
+            url_hash="h1",
+            published_at=timezone.now(),
+            org_entities=["stale"],
+            ner_version="en_core_web_sm@0.0.1",
+        )
+        copies = [News.objects.get(id=news.id), News.objects.get(id=news.id)]
+
+        entities, hits, misses = news_org_entities(copies)
+
+        self.assertEqual((entities, hits, misses), ([["apple"], ["apple"]], 1, 1))
+        mock_extract.assert_called_once_with(["Apple rallies"])
+        news.refresh_from_db()
+        self.assertEqual((news.org_entities, news.ner_version), (["apple"], ner_model_version()))
+
+        news_org_entities([news])
+        mock_extract.assert_called_once()
+
+    def test_hit_ratio_is_not_applicable_without_lookups(self, mock_extract):
+        self.assertEqual(format_ner_cache_hit_ratio(0, 0), "n/a")
+        self.assertEqual(format_ner_cache_hit_ratio(0, 2), "0.00")
+        self.assertEqual(format_ner_cache_hit_ratio(3, 1), "0.75")
+
+
+@override_settings(
+    SUMMARY_JOB_PRIORITY_AUDIENCE_SECONDS=300,
+    SUMMARY_JOB_PRIORITY_PREMIUM_SECONDS=600,
+    SUMMARY_JOB_PRIORITY_PRO_SECONDS=1800,
+    SUMMARY_JOB_PRIORITY_MAX_SECONDS=3600,
+)
+class SummaryJobPriorityTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [User.objects.create_user(email=f"user{i}@example.com") for i in range(3)]
+        self.popular = Stock.objects.create(symbol="AAPL", name="Apple")
+        self.niche = Stock.objects.create(symbol="NICH", name="Niche")
+        self.orphan = Stock.objects.create(symbol="ORPH", name="Orphan")
+        for user in self.users:
+            FavoriteStock.objects.create(user=user, stock=self.popular)
+        FavoriteStock.objects.create(user=self.users[0], stock=self.niche)
+
+    def test_priority_grows_with_audience_in_two_queries(self):
+        with self.assertNumQueries(2):
+            priorities = summary_job_priorities([self.popular.id, self.niche.id, self.orphan.id])
+
+        # log2(1 + watchers) * 300
+        self.assertEqual(
+            priorities,
+            {self.popular.id: 600, self.niche.id: 300, self.orphan.id: 0},
+        )
+
+    def test_best_active_watcher_plan_adds_bonus(self):
+        Subscription.objects.create(user=self.users[0], plan=Subscription.Plan.PREMIUM)
+        Subscription.objects.create(user=self.users[1], plan=Subscription.Plan.PRO)
+        Subscription.objects.create(
+            user=self.users[2],
+            plan=Subscription.Plan.PRO,
+            end_date=timezone.localdate() - timedelta(days=1),
+        )
+
+        priorities = summary_job_priorities([self.popular.id, self.niche.id])
+
+        self.assertEqual(priorities, {self.popular.id: 600 + 1800, self.niche.id: 300 + 600})
+
+    @override_settings(SUMMARY_JOB_PRIORITY_MAX_SECONDS=1000)
+    def test_priority_is_capped(self):
+        Subscription.objects.create(user=self.users[1], plan=Subscription.Plan.PRO)
+
+        self.assertEqual(summary_job_priorities([self.popular.id]), {self.popular.id: 1000})
+
+    @override_settings(SUMMARY_JOB_PRIORITY_ENABLED=False)
+    def test_disabled_is_fifo(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(summary_job_priorities([self.popular.id]), {self.popular.id: 0})
+
+    def test_dispatch_key_moves_enqueue_time_forward_by_priority(self):
+        enqueued_at = timezone.now()
+
+        fields = summary_job_priority_fields(900, enqueued_at)
+
+        self.assertEqual(fields, {"priority": 900, "dispatch_key": enqueued_at - timedelta(seconds=900)})
+
+
+class UpsertNewsForSymbolTests(TestCase):
+    @override_settings(FINNHUB_BUCKET_ENABLED=False)
+    @patch("stocks.services.fetch_company_news")
+    def test_upsert_news_for_symbol_returns_counters(self, mock_fetch_company_news):
+        Stock.objects.create(symbol="AAPL", name="Apple")
+        mock_fetch_company_news.return_value = [finnhub_item(1), finnhub_item(2, url="")]
+
+        result = upsert_news_for_symbol("AAPL")
+
+        self.assertEqual(
+            result,
+            {"created_news": 1, "linked_pairs": 1, "skipped": 1, "watermark_skipped": 0},
+        )
+
+
+@override_settings(FINNHUB_BUCKET_ENABLED=False, NEWS_WATERMARK_ENABLED=True)
+class NewsIngestWatermarkTests(TestCase):
+    def setUp(self):
+        self.stock = Stock.objects.create(symbol="AAPL", name="Apple")
+        self.now_ts = int(timezone.now().timestamp())
+
+    def item(self, i, age_seconds):
+        return finnhub_item(i, datetime=self.now_ts - age_seconds)
+
+    @patch("stocks.services.fetch_company_news")
+    def test_first_run_creates_watermark_and_second_run_skips_seen_items(
+        self, mock_fetch_company_news
+    ):
+        mock_fetch_company_news.return_value = [self.item(1, 60), self.item(2, 120)]
+        upsert_news_for_symbol("AAPL")
+
+        watermark = NewsIngestWatermark.objects.get(stock=self.stock)
+        self.assertEqual(int(watermark.last_published_at.timestamp()), self.now_ts - 60)
+        self.assertEqual(len(watermark.recent_hashes), 2)
+        self.assertIsNotNone(watermark.last_success_at)
+
+        with CaptureQueriesContext(connection) as ctx:
+            result = upsert_news_for_symbol("AAPL")
+
+        # 마지막 성공이 오늘이므로 조회 기간은 오늘 하루로 줄어든다.
+        self.assertEqual(mock_fetch_company_news.call_args.args, ("AAPL", 0))
+        self.assertEqual(result["watermark_skipped"], 2)
+        self.assertEqual(result["created_news"], 0)
+        self.assertFalse(
+            any(
+                'INSERT INTO "stocks_news"' in q["sql"]
+                or 'INSERT INTO "stocks_newsstock"' in q["sql"]
+                for q in ctx.captured_queries
+            )
+        )
+
+    @patch("stocks.services.fetch_company_news")
+    def test_late_arriving_item_inside_window_is_kept(self, mock_fetch_company_news):
+        mock_fetch_company_news.return_value = [self.item(1, 60)]
+        upsert_news_for_symbol("AAPL")
+
+        # watermark보다 오래됐지만 late window 안에 있는, 처음 보는 기사
+        late_age = 60 + int(NEWS_WATERMARK_LATE_WINDOW.total_seconds()) // 2
+        mock_fetch_company_news.return_value = [self.item(1, 60), self.item(2, late_age)]
+        result = upsert_news_for_symbol("AAPL")
+
+        self.assertEqual(result["created_news"], 1)
+        self.assertEqual(result["watermark_skipped"], 1)
+        self.assertTrue(
+            NewsStock.objects.filter(
+                stock=self.stock, news__url_hash=make_url_hash(self.item(2, 0)["url"])
+            ).exists()
+        )
+
+    @patch("stocks.services.fetch_company_news")
+    def test_item_older_than_late_window_is_dropped(self, mock_fetch_company_news):
+        mock_fetch_company_news.return_value = [self.item(1, 60)]
+        upsert_news_for_symbol("AAPL")
+
+        too_old = 60 + int(NEWS_WATERMARK_LATE_WINDOW.total_seconds()) + 3600
+        mock_fetch_company_news.return_value = [self.item(2, too_old)]
+        result = upsert_news_for_symbol("AAPL")
+
+        self.assertEqual(result["created_news"], 0)
+        self.assertEqual(result["watermark_skipped"], 1)
+
+    @patch("stocks.services.fetch_company_news")
+    def test_explicit_wider_days_is_not_narrowed_by_watermark(self, mock_fetch_company_news):
+        mock_fetch_company_news.return_value = [self.item(1, 60)]
+        upsert_news_for_symbol("AAPL")
+
+        # 오늘 이미 성공했어도 7일 backfill 요청은 그대로 조회하고 watermark보다 오래된 기사도 넣는다.
+        too_old = int(NEWS_WATERMARK_LATE_WINDOW.total_seconds()) + 3 * 86400
+        mock_fetch_company_news.return_value = [self.item(1, 60), self.item(2, too_old)]
+        result = upsert_news_for_symbol("AAPL", days=7)
+
+        self.assertEqual(mock_fetch_company_news.call_args.args, ("AAPL", 7))
+        self.assertEqual(result["watermark_skipped"], 0)
+        self.assertEqual(result["created_news"], 1)
+        watermark = NewsIngestWatermark.objects.get(stock=self.stock)
+        self.assertEqual(int(watermark.last_published_at.timestamp()), self.now_ts - 60)
+
+    @patch("stocks.services.fetch_company_news")
+    def test_item_without_datetime_does_not_advance_watermark(self, mock_fetch_company_news):
+        mock_fetch_company_news.return_value = [self.item(1, 3600), finnhub_item(2, datetime=None)]
+        upsert_news_for_symbol("AAPL")
+
+        watermark = NewsIngestWatermark.objects.get(stock=self.stock)
+        self.assertEqual(int(watermark.last_published_at.timestamp()), self.now_ts - 3600)
+        self.assertEqual(len(watermark.recent_hashes), 2)
+
+        # 수집 시각이 watermark가 됐다면 1시간 전에 발행됐지만 늦게 도착한 기사가 버려졌을 것이다.
+        mock_fetch_company_news.return_value = [self.item(3, 1800)]
+        result = upsert_news_for_symbol("AAPL")
+
+        self.assertEqual(result["created_news"], 1)
+        self.assertEqual(result["watermark_skipped"], 0)
+
+    @override_settings(NEWS_WATERMARK_ENABLED=False)
+    @patch("stocks.services.fetch_company_news")
+    def test_disabled_watermark_keeps_previous_behaviour(self, mock_fetch_company_news):
+        mock_fetch_company_news.return_value = [self.item(1, 60)]
+        upsert_news_for_symbol("AAPL", days=3)
+        result = upsert_news_for_symbol("AAPL", days=3)
+
+        self.assertEqual(mock_fetch_company_news.call_args.args, ("AAPL", 3))
+        self.assertEqual(result["watermark_skipped"], 0)
+        self.assertFalse(NewsIngestWatermark.objects.exists())
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    NEWS_INGEST_SINGLE_FLIGHT_ENABLED=True,
+)
+class UpsertNewsCoalescedTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+
+    @patch("stocks.services.upsert_news_for_symbol")
+    def test_burst_for_same_symbol_and_days_calls_upstream_once(self, mock_upsert):
+        mock_upsert.return_value = {"created_news": 1, "linked_pairs": 1, "skipped": 0}
+
+        first = upsert_news_for_symbol_coalesced("AAPL", days=1)
+        second = upsert_news_for_symbol_coalesced("AAPL", days=1)
+        other_days = upsert_news_for_symbol_coalesced("AAPL", days=3)
+
+        self.assertEqual(first, second)
+        self.assertEqual(other_days, first)
+        self.assertEqual(mock_upsert.call_count, 2)
+
+    @override_settings(NEWS_INGEST_SINGLE_FLIGHT_ENABLED=False)
+    @patch("stocks.services.upsert_news_for_symbol")
+    def test_disabled_single_flight_calls_upstream_every_time(self, mock_upsert):
+        mock_upsert.return_value = {"created_news": 0, "linked_pairs": 0, "skipped": 0}
+
+        upsert_news_for_symbol_coalesced("AAPL")
+        upsert_news_for_symbol_coalesced("AAPL")
+
+        self.assertEqual(mock_upsert.call_count, 2)
+
+
+class UpsertNewsTransactionScopeTests(TransactionTestCase):
+    """fetch 단계(대기/HTTP/재시도 sleep) 동안에는 DB 트랜잭션이 열려 있으면 안 된다."""
+
+    @override_settings(FINNHUB_BUCKET_ENABLED=True, FINNHUB_API_KEY="test-key")
+    @patch("stocks.services.time.sleep")
+    @patch("stocks.services.requests.Session.get")
+    @patch("stocks.services.get_finnhub_bucket")
+    def test_no_transaction_is_open_during_wait_http_and_sleep(
+        self,
+        mock_get_finnhub_bucket,
+        mock_requests_get,
+        mock_sleep,
+    ):
+        Stock.objects.create(symbol="AAPL", name="Apple")
+        calls = []
+
+        def record(label, result=None):
+            calls.append((label, connection.in_atomic_block))
+            return result
+
+        bucket = Mock()
+        bucket.wait_for_slot.side_effect = lambda: record("wait_for_slot", True)
+        mock_get_finnhub_bucket.return_value = bucket
+
+        success = Mock(status_code=200)
+        success.json.return_value = [finnhub_item(1)]
+        http_responses = iter([Mock(status_code=429), success])
+        mock_requests_get.side_effect = lambda *args, **kwargs: record(
+            "http", next(http_responses)
+        )
+        mock_sleep.side_effect = lambda seconds: record("sleep")
+
+        original_bulk_create = News.objects.bulk_create
+        with patch.object(
+            News.objects,
+            "bulk_create",
+            side_effect=lambda *args, **kwargs: record(
+                "persist", original_bulk_create(*args, **kwargs)
+            ),
+        ):
+            result = upsert_news_for_symbol("AAPL")
+
+        self.assertEqual(result["created_news"], 1)
+        self.assertEqual(
+            calls,
+            [
+                ("wait_for_slot", False),
+                ("http", False),
+                ("sleep", False),
+                ("http", False),
+                ("persist", True),
+            ],
+        )
+
+
+@override_settings(FINNHUB_API_KEY="test-key")
+class FinnhubSessionTests(SimpleTestCase):
+    @patch("stocks.services.get_finnhub_breaker", return_value=None)
+    @patch("stocks.tasks.get_finnhub_breaker", return_value=None)
+    def test_news_and_quote_reuse_one_keep_alive_session(self, *_):
+        from stocks.tasks import fetch_finnhub_quote
+
+        session = get_finnhub_session()
+        with patch.object(session, "get") as mock_get:
+            mock_get.return_value = Mock(status_code=200, json=Mock(return_value=[]))
+            fetch_company_news("AAPL")
+            fetch_finnhub_quote("AAPL")
+
+        self.assertIs(get_finnhub_session(), session)
+        self.assertEqual(mock_get.call_count, 2)
@@ -1,17 +1,22 @@
-import json,uuid
+import json,time,uuid
+import fakeredis
 import httpx
 import openai
 from types import SimpleNamespace
 from unittest.mock import ANY, Mock, call, patch
 from uuid import uuid4
 from datetime import timedelta
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from django.test import TestCase, override_settings
 from django.utils import timezone
+from celery.exceptions import SoftTimeLimitExceeded
 
+from stocks.circuit_breaker import STATE_HALF_OPEN, CircuitBreaker
 from stocks.models import (
     FavoriteStock,
     News,
+    NewsStock,
     Stock,
     Summary,
     SummaryGenerationLog,
@@ -22,11 +27,23 @@ from stocks.tasks import (
     RUNNING_EXEC_TIMEOUT,
     MAX_STUCK_RECOVERY_RETRIES,
     MAX_SUMMARY_RETRIES,
+    STUCK_RECOVERY_BATCH_SIZE,
+    _enqueue_summary_jobs,
+    _recover_stuck_rows,
+    _stock_ids_with_summary_or_job,
     dispatch_summary_jobs,
     fetch_favorite_news,
+    fetch_favorite_news_shard,
     generate_summary_for_stock,
+    merge_favorite_news_results,
     recover_stuck_summary_jobs,
 )
+from stocks.utils import RELEVANCE_SCORER_VERSION
+
+
+def relevance_scores(score):
+    """score_news_relevance_batch 대역: 모든 headline에 같은 점수를 돌려준다."""
+    return lambda symbol, company_name, headlines, **kwargs: [score] * len(headlines)
 
 
 def mark_job_as_dispatched(job):
@@ -80,7 +97,7 @@ class GenerateSummaryEmptyBranchTests(SummaryJobTestMixin, TestCase):
 
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
     @patch("stocks.tasks.openai.chat.completions.create")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
     def test_generate_summary_logs_no_relevant_news_when_all_news_filtered_out(
         self,
         mock_score_news_relevance,
@@ -98,7 +115,7 @@ class GenerateSummaryEmptyBranchTests(SummaryJobTestMixin, TestCase):
         )
         news.stocks.add(stock)
 
-        mock_score_news_relevance.return_value = (1, False, "not relevant enough")
+        mock_score_news_relevance.side_effect = relevance_scores((1, False, "not relevant enough"))
 
         lease_token = mark_job_as_dispatched(job)
         result = generate_summary_for_stock.apply(args=(job.id, lease_token)).get()
@@ -116,11 +133,70 @@ class GenerateSummaryEmptyBranchTests(SummaryJobTestMixin, TestCase):
         self.assertEqual(log.raw_count, 1)
         self.assertEqual(log.relevant_count, 0)
 
+    @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
+    @patch("stocks.tasks.openai.chat.completions.create")
+    @patch("stocks.tasks.score_news_relevance_batch")
+    def test_generate_summary_uses_stored_relevance_without_nlp(
+        self,
+        mock_score_news_relevance,
+        mock_openai_create,
+    ):
+        stock, job = self.create_job(symbol="AAPL", name="Apple")
+        news = News.objects.create(
+            headline="Apple mentioned in passing",
+            url="https://example.com/aapl-stored",
+            published_at=timezone.now(),
+        )
+        news.stocks.add(
+            stock,
+            through_defaults={
+                "relevance_score": 1,
+                "is_relevant": False,
+                "relevance_reason": "no_match",
+                "scorer_version": RELEVANCE_SCORER_VERSION,
+            },
+        )
+
+        lease_token = mark_job_as_dispatched(job)
+        generate_summary_for_stock.apply(args=(job.id, lease_token)).get()
+
+        mock_score_news_relevance.assert_not_called()
+        job.refresh_from_db()
+        self.assertEqual(job.status, SummaryJob.Status.NO_RELEVANT_NEWS)
+
+    @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
+    @patch("stocks.tasks.openai.chat.completions.create")
+    @patch("stocks.tasks.score_news_relevance_batch")
+    def test_generate_summary_scores_and_stores_unscored_links_once(
+        self,
+        mock_score_news_relevance,
+        mock_openai_create,
+    ):
+        stock, job = self.create_job(symbol="AAPL", name="Apple")
+        news = News.objects.create(
+            headline="Macro market roundup",
+            url="https://example.com/aapl-unscored",
+            published_at=timezone.now(),
+        )
+        news.stocks.add(stock)
+        mock_score_news_relevance.side_effect = relevance_scores((1, False, "no_match"))
+
+        for _ in range(2):
+            lease_token = mark_job_as_dispatched(job)
+            generate_summary_for_stock.apply(args=(job.id, lease_token)).get()
+
+        mock_score_news_relevance.assert_called_once()
+        link = NewsStock.objects.get(news=news, stock=stock)
+        self.assertEqual(
+            (link.relevance_score, link.is_relevant, link.scorer_version),
+            (1, False, RELEVANCE_SCORER_VERSION),
+        )
+
 
 class GenerateSummaryIdempotencyTests(SummaryJobTestMixin, TestCase):
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
     @patch("stocks.tasks.openai.chat.completions.create")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
     def test_generate_summary_does_not_create_duplicate_summary_for_same_stock_and_date(
         self,
         mock_score_news_relevance,
@@ -138,7 +214,7 @@ class GenerateSummaryIdempotencyTests(SummaryJobTestMixin, TestCase):
         )
         news.stocks.add(stock)
 
-        mock_score_news_relevance.return_value = (10, True, "matched")
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
 
         response_payload = {
             "ticker": "AAPL",
@@ -179,8 +255,9 @@ class GenerateSummaryIdempotencyTests(SummaryJobTestMixin, TestCase):
         self.assertEqual(summary.summary["overall_sentiment"]["sentiment"], "긍정")
 
 
+@override_settings(FINNHUB_ASYNC_ENGINE_ENABLED=False)
 class FetchFavoriteNewsJobCreationTests(TestCase):
-    @patch("stocks.tasks.upsert_news_for_symbol")
+    @patch("stocks.tasks.upsert_news_for_symbol_coalesced")
     def test_fetch_favorite_news_continues_other_symbols_when_one_upsert_fails(
         self,
         mock_upsert_news,
@@ -232,6 +309,147 @@ class FetchFavoriteNewsJobCreationTests(TestCase):
         self.assertCountEqual(result["enqueued_symbols"], ["MSFT", "NVDA"])
 
 
+@override_settings(FINNHUB_ASYNC_ENGINE_ENABLED=False)
+class FetchFavoriteNewsShardedTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        user = User.objects.create_user(email="shard@example.com", password="test1234")
+        self.stocks = {}
+        for symbol in ["AAPL", "MSFT", "NVDA"]:
+            stock = Stock.objects.create(symbol=symbol, name=symbol)
+            FavoriteStock.objects.create(user=user, stock=stock)
+            self.stocks[symbol] = stock
+
+    @override_settings(FINNHUB_BUCKET_CAPACITY=2, FINNHUB_FANOUT_MAX_SHARDS=0)
+    @patch("stocks.tasks.chord")
+    def test_sharded_mode_splits_symbols_into_bucket_capacity_shards(self, mock_chord):
+        mock_chord.return_value.return_value = SimpleNamespace(id="chord-id")
+
+        result = fetch_favorite_news(sharded=True)
+
+        self.assertEqual(result["shard_count"], 2)
+        self.assertEqual(result["symbol_count"], 3)
+        self.assertEqual(result["result_id"], "chord-id")
+        self.assertIsNone(result["enqueued_symbols"])
+        header = list(mock_chord.call_args.args[0])
+        self.assertEqual(len(header), 2)
+        shard_ids = [sig.args[0] for sig in header]
+        self.assertCountEqual(
+            [stock_id for shard in shard_ids for stock_id in shard],
+            [stock.id for stock in self.stocks.values()],
+        )
+
+    @patch("stocks.tasks.update_stock_quote")
+    @patch("stocks.tasks.upsert_news_for_symbol_coalesced")
+    def test_shards_merge_into_sequential_result_shape(
+        self,
+        mock_upsert_news,
+        mock_update_stock_quote,
+    ):
+        def upsert_side_effect(symbol, days=1):
+            if symbol == "MSFT":
+                raise Exception("upsert failed for MSFT")
+            return {"created_news": 1, "linked_pairs": 1, "skipped": 0}
+
+        mock_upsert_news.side_effect = upsert_side_effect
+
+        shard_a = fetch_favorite_news_shard([self.stocks["AAPL"].id, self.stocks["MSFT"].id])
+        shard_b = fetch_favorite_news_shard([self.stocks["NVDA"].id])
+        result = merge_favorite_news_results([shard_a, shard_b])
+
+        self.assertEqual(
+            set(result),
+            {
+                "results",
+                "success_symbols",
+                "failed_symbols",
+                "enqueued_symbols",
+                "sharded",
+                "shard_count",
+                "symbol_count",
+                "result_id",
+            },
+        )
+        self.assertEqual((result["shard_count"], result["symbol_count"]), (2, 3))
+        self.assertCountEqual(result["success_symbols"], ["AAPL", "NVDA"])
+        self.assertCountEqual(result["enqueued_symbols"], ["AAPL", "NVDA"])
+        self.assertEqual(
+            result["failed_symbols"],
+            [{"symbol": "MSFT", "error": "upsert failed for MSFT"}],
+        )
+
+    @override_settings(FINNHUB_BUCKET_CAPACITY=2)
+    @patch("stocks.tasks.chord")
+    @patch("stocks.tasks.update_stock_quote")
+    @patch("stocks.tasks.upsert_news_for_symbol_coalesced")
+    def test_sharded_and_sequential_modes_return_the_same_keys(
+        self,
+        mock_upsert_news,
+        mock_update_stock_quote,
+        mock_chord,
+    ):
+        mock_chord.return_value.return_value = SimpleNamespace(id="chord-id")
+        mock_upsert_news.return_value = {"created_news": 0, "linked_pairs": 0, "skipped": 0}
+
+        sharded = fetch_favorite_news(sharded=True)
+        sequential = fetch_favorite_news(sharded=False)
+
+        self.assertEqual(set(sharded), set(sequential))
+        self.assertEqual(
+            (sequential["sharded"], sequential["shard_count"], sequential["symbol_count"]),
+            (False, 1, 3),
+        )
+        self.assertIsNone(sequential["result_id"])
+
+    @patch("stocks.tasks.update_stock_quote")
+    @patch("stocks.tasks.upsert_news_for_symbol_coalesced")
+    def test_shard_soft_time_limit_reports_unprocessed_symbols_instead_of_raising(
+        self,
+        mock_upsert_news,
+        mock_update_stock_quote,
+    ):
+        mock_upsert_news.side_effect = [
+            {"created_news": 0, "linked_pairs": 0, "skipped": 0},
+            SoftTimeLimitExceeded(),
+        ]
+
+        outcomes = fetch_favorite_news_shard(
+            [stock.id for stock in self.stocks.values()]
+        )
+
+        self.assertEqual(len(outcomes), 3)
+        failed = [outcome for outcome in outcomes if "error" in outcome]
+        self.assertEqual(len(failed), 2)
+        self.assertTrue(
+            all(outcome["error"] == "shard soft time limit exceeded" for outcome in failed)
+        )
+
+
+class FetchFavoriteNewsAsyncEngineTests(TestCase):
+    @patch("stocks.tasks.run_ingest")
+    def test_async_engine_outcomes_are_enqueued_and_merged(self, mock_run_ingest):
+        User = get_user_model()
+        user = User.objects.create_user(email="engine@example.com", password="test1234")
+        for symbol in ["AAPL", "MSFT"]:
+            stock = Stock.objects.create(symbol=symbol, name=symbol)
+            FavoriteStock.objects.create(user=user, stock=stock)
+
+        mock_run_ingest.return_value = [
+            {"symbol": "AAPL", "result": {"created_news": 2, "linked_pairs": 2, "skipped": 0}},
+            {"symbol": "MSFT", "error": "Finnhub request failed: MSFT"},
+        ]
+
+        result = fetch_favorite_news()
+
+        self.assertEqual(result["success_symbols"], ["AAPL"])
+        self.assertEqual(result["enqueued_symbols"], ["AAPL"])
+        self.assertEqual(result["failed_symbols"][0]["symbol"], "MSFT")
+        self.assertEqual(
+            list(SummaryJob.objects.values_list("stock__symbol", flat=True)),
+            ["AAPL"],
+        )
+
+
 class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
     def create_job_with_news(self, symbol="AAPL", name="Apple", retry_count=0):
         stock, job = self.create_job(symbol=symbol, name=name)
@@ -260,7 +478,7 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
 
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
     @patch("stocks.tasks.openai.chat.completions.create")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
     def test_generate_summary_fails_and_logs_when_json_parse_fails(
         self,
         mock_score_news_relevance,
@@ -278,7 +496,7 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
         )
         news.stocks.add(stock)
 
-        mock_score_news_relevance.return_value = (10, True, "matched")
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
         mock_openai_create.return_value = SimpleNamespace(
             choices=[SimpleNamespace(message=SimpleNamespace(content="not-json"))]
         )
@@ -307,7 +525,7 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
 
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
     @patch("stocks.tasks.openai.chat.completions.create")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
     def test_generate_summary_fails_and_logs_when_openai_call_fails(
         self,
         mock_score_news_relevance,
@@ -325,7 +543,7 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
         )
         news.stocks.add(stock)
 
-        mock_score_news_relevance.return_value = (10, True, "matched")
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
         mock_openai_create.side_effect = Exception("openai temporary failure")
 
         lease_token = mark_job_as_dispatched(job)
@@ -351,8 +569,91 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
         self.assertIn("openai temporary failure", job.error_message)
 
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
+    @patch("stocks.tasks.get_openai_breaker")
     @patch("stocks.tasks.openai.chat.completions.create")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
+    def test_generate_summary_requeues_without_calling_openai_when_circuit_is_open(
+        self,
+        mock_score_news_relevance,
+        mock_openai_create,
+        mock_get_breaker,
+    ):
+        stock, job = self.create_job_with_news(retry_count=1)
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
+        mock_get_breaker.return_value.peek.return_value = SimpleNamespace(
+            allowed=False, state="open", retry_after=12.3
+        )
+
+        lease_token = mark_job_as_dispatched(job)
+        before = timezone.now()
+        result = generate_summary_for_stock.apply(args=(job.id, lease_token)).get()
+
+        self.assertEqual(result["status"], "circuit_open")
+        self.assertEqual(result["retry_after"], 13)
+        mock_openai_create.assert_not_called()
+        mock_get_breaker.return_value.allow.assert_not_called()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, SummaryJob.Status.RETRY_WAIT)
+        self.assertEqual(job.retry_count, 1)
+        self.assertGreaterEqual(job.retry_at, before + timedelta(seconds=13))
+        self.assertIsNone(job.lease_token)
+        self.assertEqual(job.error_message, "openai circuit open")
+
+    @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
+    @patch("stocks.tasks.get_openai_breaker")
+    @patch("stocks.tasks.openai.chat.completions.create")
+    @patch("stocks.tasks.score_news_relevance_batch")
+    def test_generate_summary_counts_connection_errors_against_openai_circuit(
+        self,
+        mock_score_news_relevance,
+        mock_openai_create,
+        mock_get_breaker,
+    ):
+        stock, job = self.create_job_with_news()
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
+        mock_openai_create.side_effect = self.openai_connection_error()
+        breaker = mock_get_breaker.return_value
+        breaker.allow.return_value = SimpleNamespace(allowed=True, state="closed", retry_after=0)
+
+        lease_token = mark_job_as_dispatched(job)
+        generate_summary_for_stock.apply(args=(job.id, lease_token)).get()
+
+        breaker.record_failure.assert_called_once_with()
+        breaker.record_success.assert_not_called()
+
+    @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
+    @patch("stocks.tasks.get_openai_breaker")
+    @patch("stocks.tasks.openai.chat.completions.create")
+    @patch("stocks.tasks.score_news_relevance_batch")
+    def test_generate_summary_settles_probe_on_non_upstream_openai_error(
+        self,
+        mock_score_news_relevance,
+        mock_openai_create,
+        mock_get_breaker,
+    ):
+        stock, job = self.create_job_with_news()
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
+        mock_openai_create.side_effect = openai.BadRequestError(
+            "bad request",
+            response=httpx.Response(400, request=httpx.Request("POST", "https://api.openai.com")),
+            body=None,
+        )
+        breaker = mock_get_breaker.return_value
+        breaker.peek.return_value = SimpleNamespace(allowed=True, state="half_open", retry_after=0)
+        breaker.allow.return_value = SimpleNamespace(allowed=True, state="half_open", retry_after=0)
+
+        lease_token = mark_job_as_dispatched(job)
+        with self.assertRaises(Exception):
+            generate_summary_for_stock.apply(args=(job.id, lease_token)).get()
+
+        breaker.allow.assert_called_once_with()
+        breaker.record_success.assert_called_once_with()
+        breaker.record_failure.assert_not_called()
+
+    @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
+    @patch("stocks.tasks.openai.chat.completions.create")
+    @patch("stocks.tasks.score_news_relevance_batch")
     def test_generate_summary_moves_job_to_retry_wait_when_openai_connection_fails(
         self,
         mock_score_news_relevance,
@@ -360,7 +661,7 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
     ):
         stock, job = self.create_job_with_news()
 
-        mock_score_news_relevance.return_value = (10, True, "matched")
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
         mock_openai_create.side_effect = self.openai_connection_error()
 
         lease_token = mark_job_as_dispatched(job)
@@ -387,7 +688,7 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
 
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
     @patch("stocks.tasks.openai.chat.completions.create")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
     def test_generate_summary_fails_when_openai_connection_exceeds_max_retries(
         self,
         mock_score_news_relevance,
@@ -395,7 +696,7 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
     ):
         stock, job = self.create_job_with_news(retry_count=MAX_SUMMARY_RETRIES)
 
-        mock_score_news_relevance.return_value = (10, True, "matched")
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
         mock_openai_create.side_effect = self.openai_connection_error()
 
         lease_token = mark_job_as_dispatched(job)
@@ -415,7 +716,7 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
 
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
     @patch("stocks.tasks.openai.chat.completions.create")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
     def test_generate_summary_fails_immediately_when_openai_authentication_fails(
         self,
         mock_score_news_relevance,
@@ -423,7 +724,7 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
     ):
         stock, job = self.create_job_with_news()
 
-        mock_score_news_relevance.return_value = (10, True, "matched")
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
         mock_openai_create.side_effect = self.openai_status_error(
             openai.AuthenticationError,
             401,
@@ -446,7 +747,7 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
 
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
     @patch("stocks.tasks.openai.chat.completions.create")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
     def test_generate_summary_fails_immediately_when_openai_bad_request_fails(
         self,
         mock_score_news_relevance,
@@ -454,7 +755,7 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
     ):
         stock, job = self.create_job_with_news()
 
-        mock_score_news_relevance.return_value = (10, True, "matched")
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
         mock_openai_create.side_effect = self.openai_status_error(
             openai.BadRequestError,
             400,
@@ -476,8 +777,9 @@ class GenerateSummaryFailureTests(SummaryJobTestMixin, TestCase):
         self.assertIn("openai_bad_request_error", log.error_message)
 
 
+@override_settings(FINNHUB_ASYNC_ENGINE_ENABLED=False)
 class FetchFavoriteNewsDuplicateJobTests(TestCase):
-    @patch("stocks.tasks.upsert_news_for_symbol")
+    @patch("stocks.tasks.upsert_news_for_symbol_coalesced")
     def test_fetch_favorite_news_does_not_create_duplicate_job_for_same_stock_and_date(
         self,
         mock_upsert_news,
@@ -509,6 +811,115 @@ class FetchFavoriteNewsDuplicateJobTests(TestCase):
         )
 
 
+@override_settings(FINNHUB_ASYNC_ENGINE_ENABLED=False)
+class FetchFavoriteNewsBulkEnqueueTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        user = User.objects.create_user(email="bulk@example.com", password="test1234")
+        self.today = timezone.localdate()
+        self.stocks = []
+        for symbol in ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"]:
+            stock = Stock.objects.create(symbol=symbol, name=symbol)
+            FavoriteStock.objects.create(user=user, stock=stock)
+            self.stocks.append(stock)
+        Summary.objects.create(stock=self.stocks[0], date=self.today, summary={})
+        SummaryJob.objects.create(stock=self.stocks[1], date=self.today, status=SummaryJob.Status.SUCCESS)
+
+    def _outcomes(self):
+        return [
+            {"symbol": stock.symbol, "result": {"created_news": 1, "linked_pairs": 1, "skipped": 0}}
+            for stock in self.stocks
+        ]
+
+    def test_covered_stock_ids_are_fetched_in_one_query(self):
+        with self.assertNumQueries(1):
+            covered = _stock_ids_with_summary_or_job([stock.id for stock in self.stocks], self.today)
+
+        self.assertEqual(covered, {self.stocks[0].id, self.stocks[1].id})
+
+    @patch("stocks.tasks.request_summary_dispatch")
+    def test_jobs_are_created_in_one_bulk_insert_regardless_of_symbol_count(self, mock_request_dispatch):
+        covered = {self.stocks[0].id, self.stocks[1].id}
+
+        # priority 계산(2) + bulk insert(1) + 실제로 만든 job 확인(1). 종목 수가 늘어도 그대로다.
+        with self.assertNumQueries(4):
+            outcomes = _enqueue_summary_jobs(self.stocks, self._outcomes(), self.today, covered)
+
+        self.assertEqual(
+            [outcome["symbol"] for outcome in outcomes if outcome["enqueued"]],
+            ["NVDA", "TSLA", "AMZN"],
+        )
+        self.assertCountEqual(
+            SummaryJob.objects.filter(status=SummaryJob.Status.PENDING).values_list("stock__symbol", flat=True),
+            ["NVDA", "TSLA", "AMZN"],
+        )
+        mock_request_dispatch.assert_called_once_with()
+
+    @patch("stocks.tasks.request_summary_dispatch")
+    def test_job_created_concurrently_is_ignored(self, mock_request_dispatch):
+        SummaryJob.objects.create(stock=self.stocks[2], date=self.today, status=SummaryJob.Status.PENDING)
+
+        outcomes = _enqueue_summary_jobs(
+            self.stocks, self._outcomes(), self.today, {self.stocks[0].id, self.stocks[1].id}
+        )
+
+        self.assertEqual(SummaryJob.objects.filter(stock=self.stocks[2], date=self.today).count(), 1)
+        self.assertEqual(SummaryJob.objects.filter(date=self.today).count(), 4)
+        # 다른 worker가 만든 NVDA job은 이번 실행이 enqueue한 것으로 세지 않는다.
+        self.assertEqual(
+            [outcome["symbol"] for outcome in outcomes if outcome["enqueued"]],
+            ["TSLA", "AMZN"],
+        )
+
+    @patch("stocks.tasks.request_summary_dispatch")
+    def test_job_created_concurrently_in_the_same_microsecond_is_ignored(self, mock_request_dispatch):
+        frozen = timezone.now()
+        with patch("django.utils.timezone.now", return_value=frozen):
+            # 다른 실행이 같은 시각에 만든 job: created_at이 이번 실행이 쓸 값과 똑같다.
+            SummaryJob.objects.create(stock=self.stocks[2], date=self.today, status=SummaryJob.Status.PENDING)
+            outcomes = _enqueue_summary_jobs(
+                self.stocks, self._outcomes(), self.today, {self.stocks[0].id, self.stocks[1].id}
+            )
+
+        self.assertEqual(
+            [outcome["symbol"] for outcome in outcomes if outcome["enqueued"]],
+            ["TSLA", "AMZN"],
+        )
+
+    @patch("stocks.tasks.request_summary_dispatch")
+    def test_no_dispatch_when_every_insert_was_ignored(self, mock_request_dispatch):
+        for stock in self.stocks[2:]:
+            SummaryJob.objects.create(stock=stock, date=self.today, status=SummaryJob.Status.PENDING)
+
+        outcomes = _enqueue_summary_jobs(
+            self.stocks, self._outcomes(), self.today, {self.stocks[0].id, self.stocks[1].id}
+        )
+
+        self.assertFalse(any(outcome["enqueued"] for outcome in outcomes))
+        mock_request_dispatch.assert_not_called()
+
+    @patch("stocks.tasks.update_stock_quote")
+    @patch("stocks.tasks.upsert_news_for_symbol_coalesced")
+    def test_fetch_favorite_news_skips_symbols_without_new_input_or_already_covered(
+        self,
+        mock_upsert_news,
+        mock_update_stock_quote,
+    ):
+        def upsert_side_effect(symbol, days=1):
+            created = 0 if symbol == "TSLA" else 1
+            return {"created_news": created, "linked_pairs": created, "skipped": 0}
+
+        mock_upsert_news.side_effect = upsert_side_effect
+
+        result = fetch_favorite_news()
+
+        self.assertCountEqual(result["enqueued_symbols"], ["NVDA", "AMZN"])
+        self.assertCountEqual(
+            SummaryJob.objects.filter(status=SummaryJob.Status.PENDING).values_list("stock__symbol", flat=True),
+            ["NVDA", "AMZN"],
+        )
+
+
 class DispatchSummaryJobsTests(TestCase):
     @patch("stocks.tasks.generate_summary_for_stock.delay")
     def test_dispatch_summary_jobs_moves_only_pending_jobs_to_running_and_enqueues_them(
@@ -599,7 +1010,7 @@ class GenerateSummaryRateLimitTests(TestCase):
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test")
     @patch("stocks.tasks.openai.chat.completions.create")
     @patch("stocks.tasks.get_openai_bucket")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
     def test_generate_summary_moves_job_to_retry_wait_when_bucket_denies(
         self,
         mock_score_news_relevance,
@@ -627,7 +1038,7 @@ class GenerateSummaryRateLimitTests(TestCase):
             started_at=None,
         )
 
-        mock_score_news_relevance.return_value = (90, True, "relevant")
+        mock_score_news_relevance.side_effect = relevance_scores((90, True, "relevant"))
         mock_bucket = mock_get_openai_bucket.return_value
         mock_bucket.consume.return_value = SimpleNamespace(
             allowed=False,
@@ -658,6 +1069,64 @@ class GenerateSummaryRateLimitTests(TestCase):
             ).exists()
         )
 
+    @override_settings(OPENAI_API_KEY="test-key", OPENAI_BUCKET_ENABLED=True)
+    @patch("stocks.tasks.openai.chat.completions.create")
+    @patch("stocks.tasks.get_openai_bucket")
+    @patch("stocks.tasks.score_news_relevance_batch")
+    def test_bucket_denial_does_not_hold_half_open_probe(
+        self,
+        mock_score_news_relevance,
+        mock_get_openai_bucket,
+        mock_openai_create,
+    ):
+        breaker = CircuitBreaker(
+            name="openai",
+            redis_url="redis://example:6379/9",
+            failure_threshold=1,
+            failure_window=60,
+            reset_timeout=0.05,
+            probe_timeout=30,
+        )
+        stock = Stock.objects.create(symbol="AAPL", name="Apple")
+        news = News.objects.create(
+            headline="Apple beats estimates",
+            url="https://example.com/aapl-news",
+            source="Example",
+            published_at=timezone.now(),
+            language="en",
+            raw_json={},
+        )
+        news.stocks.add(stock)
+        lease_token = uuid.uuid4()
+        job = SummaryJob.objects.create(
+            stock=stock,
+            date=timezone.localdate(),
+            status=SummaryJob.Status.RUNNING,
+            lease_token=lease_token,
+            dispatched_at=timezone.now(),
+        )
+        mock_score_news_relevance.side_effect = relevance_scores((90, True, "relevant"))
+        mock_get_openai_bucket.return_value.consume.return_value = SimpleNamespace(
+            allowed=False,
+            remaining_tokens=0,
+            retry_after_seconds=3,
+        )
+
+        with patch(
+            "stocks.circuit_breaker.get_redis_client",
+            return_value=fakeredis.FakeRedis(),
+        ), patch("stocks.tasks.get_openai_breaker", return_value=breaker):
+            breaker.record_failure()
+            time.sleep(0.1)
+
+            result = generate_summary_for_stock.apply(args=(job.id, lease_token)).get()
+
+            self.assertEqual(result["status"], "rate_limited")
+            mock_openai_create.assert_not_called()
+            # 버킷에서 거절된 job은 probe를 잡지 않았으므로 다음 job이 probe를 가져갈 수 있다.
+            self.assertEqual(breaker.snapshot()[0], STATE_HALF_OPEN)
+            self.assertTrue(breaker.allow().allowed)
+
 
 class DispatchSummaryRetryWaitTests(TestCase):
     @patch("stocks.tasks.generate_summary_for_stock.delay")
@@ -779,10 +1248,117 @@ class RecoverStuckSummaryJobsTests(TestCase):
         self.assertEqual(job.error_message, "stuck timeout exceeded max retries")
 
 
+class RecoverStuckSummaryJobsSetBasedTests(TestCase):
+    def _stuck_job(self, symbol, retry_count):
+        return SummaryJob.objects.create(
+            stock=Stock.objects.create(symbol=symbol, name=symbol),
+            date=timezone.localdate(),
+            status=SummaryJob.Status.RUNNING,
+            lease_token=uuid4(),
+            retry_count=retry_count,
+            started_at=timezone.now() - RUNNING_EXEC_TIMEOUT - timedelta(seconds=1),
+        )
+
+    @patch("stocks.tasks.request_summary_dispatch")
+    def test_recovery_issues_one_update_per_retry_bucket(self, mock_request_dispatch):
+        jobs = [
+            self._stuck_job(f"S{i}", retry_count)
+            for i, retry_count in enumerate([0, 0, 0, 1, 1, MAX_STUCK_RECOVERY_RETRIES, MAX_STUCK_RECOVERY_RETRIES])
+        ]
+
+        # SAVEPOINT/RELEASE 2 + SELECT ... FOR UPDATE 1
+        # + 묶음(FAILED, retry_count 0, retry_count 1)마다 lease 쌍 재확인 SELECT 1 + UPDATE 1.
+        # job 수와 무관하다.
+        with self.assertNumQueries(9):
+            result = recover_stuck_summary_jobs()
+
+        self.assertEqual(result["recovered_job_ids"], [job.id for job in jobs[:5]])
+        self.assertEqual(result["failed_job_ids"], [job.id for job in jobs[5:]])
+
+        retry_ats = {}
+        for job in jobs[:5]:
+            before = job.retry_count
+            job.refresh_from_db()
+            self.assertEqual(job.status, SummaryJob.Status.RETRY_WAIT)
+            self.assertEqual(job.retry_count, before + 1)
+            self.assertIsNone(job.lease_token)
+            retry_ats.setdefault(before, set()).add(job.retry_at)
+        self.assertEqual({before: len(values) for before, values in retry_ats.items()}, {0: 1, 1: 1})
+        self.assertLess(min(retry_ats[0]), min(retry_ats[1]))
+        mock_request_dispatch.assert_called_once_with(min(retry_ats[0]))
+
+    def test_rows_whose_lease_changed_are_not_reported(self):
+        current = self._stuck_job("AAPL", 0)
+        finished = self._stuck_job("MSFT", 0)
+        stale_token = finished.lease_token
+        # SELECT 뒤 worker가 먼저 끝낸 상황.
+        SummaryJob.objects.filter(id=finished.id).update(
+            status=SummaryJob.Status.SUCCESS, finished_at=timezone.now(), lease_token=None
+        )
+
+        recovered = _recover_stuck_rows(
+            [(current.id, current.lease_token), (finished.id, stale_token)],
+            status=SummaryJob.Status.FAILED,
+            finished_at=timezone.now(),
+            error_message="stuck timeout exceeded max retries",
+        )
+
+        self.assertEqual(recovered, [(current.id, current.lease_token)])
+        finished.refresh_from_db()
+        self.assertEqual(finished.status, SummaryJob.Status.SUCCESS)
+
+    def test_rows_match_on_their_own_id_and_lease_token_pair(self):
+        first = self._stuck_job("AAPL", 0)
+        second = self._stuck_job("MSFT", 0)
+
+        # 토큰을 엇갈려 넘기면 id IN × lease_token IN 교차 조건으로는 둘 다 맞지만, 쌍으로는 하나도 맞지 않는다.
+        recovered = _recover_stuck_rows(
+            [(first.id, second.lease_token), (second.id, first.lease_token)],
+            status=SummaryJob.Status.FAILED,
+            finished_at=timezone.now(),
+            error_message="stuck timeout exceeded max retries",
+        )
+
+        self.assertEqual(recovered, [])
+        self.assertEqual(
+            set(SummaryJob.objects.values_list("status", flat=True)), {SummaryJob.Status.RUNNING}
+        )
+
+    def test_lease_pair_batches_stay_within_sqlite_expression_depth(self):
+        # STUCK_RECOVERY_BATCH_SIZE개 + 1 → 두 묶음. 쌍 OR 조건이 SQLite expression depth 한도 안에 들어가야 한다.
+        jobs = [self._stuck_job(f"S{i}", 0) for i in range(STUCK_RECOVERY_BATCH_SIZE + 1)]
+
+        with self.assertNumQueries(4):
+            recovered = _recover_stuck_rows(
+                [(job.id, job.lease_token) for job in jobs],
+                status=SummaryJob.Status.FAILED,
+                finished_at=timezone.now(),
+            )
+
+        self.assertEqual(len(recovered), STUCK_RECOVERY_BATCH_SIZE + 1)
+
+    def test_reports_exactly_the_rows_it_updated_with_expression_fields(self):
+        jobs = [self._stuck_job(symbol, 0) for symbol in ("AAPL", "MSFT", "NVDA")]
+        SummaryJob.objects.filter(id=jobs[1].id).update(lease_token=uuid4())
+
+        recovered = _recover_stuck_rows(
+            [(job.id, job.lease_token) for job in jobs],
+            status=SummaryJob.Status.RETRY_WAIT,
+            retry_count=F("retry_count") + 1,
+            lease_token=None,
+        )
+
+        self.assertEqual(recovered, [(jobs[0].id, jobs[0].lease_token), (jobs[2].id, jobs[2].lease_token)])
+        self.assertEqual(
+            dict(SummaryJob.objects.values_list("id", "retry_count")),
+            {jobs[0].id: 1, jobs[1].id: 0, jobs[2].id: 1},
+        )
+
+
 class GenerateSummaryLeaseStateTests(SummaryJobTestMixin, TestCase):
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
     @patch("stocks.tasks.openai.chat.completions.create")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
     @patch("stocks.tasks._is_current_lease")
     def test_generate_summary_returns_stale_before_llm(
         self,
@@ -802,7 +1378,7 @@ class GenerateSummaryLeaseStateTests(SummaryJobTestMixin, TestCase):
         )
         news.stocks.add(stock)
 
-        mock_score_news_relevance.return_value = (10, True, "matched")
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
         mock_is_current_lease.return_value = False
 
         lease_token = mark_job_as_dispatched(job)
@@ -820,7 +1396,7 @@ class GenerateSummaryLeaseStateTests(SummaryJobTestMixin, TestCase):
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test")
     @patch("stocks.tasks.get_openai_bucket")
     @patch("stocks.tasks.openai.chat.completions.create")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
     @patch("stocks.tasks._is_current_lease")
     def test_generate_summary_returns_stale_after_llm(
         self,
@@ -841,7 +1417,7 @@ class GenerateSummaryLeaseStateTests(SummaryJobTestMixin, TestCase):
         )
         news.stocks.add(stock)
 
-        mock_score_news_relevance.return_value = (10, True, "matched")
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
         mock_is_current_lease.side_effect = [True, False]
 
         mock_bucket = mock_get_openai_bucket.return_value
@@ -898,7 +1474,7 @@ class GenerateSummaryCacheUpdateTests(SummaryJobTestMixin, TestCase):
 
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
     @patch("stocks.tasks.openai.chat.completions.create")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
     def test_generate_summary_updates_cache_only_after_db_commit(
         self,
         mock_score_news_relevance,
@@ -918,7 +1494,7 @@ class GenerateSummaryCacheUpdateTests(SummaryJobTestMixin, TestCase):
         )
         news.stocks.add(stock)
 
-        mock_score_news_relevance.return_value = (10, True, "matched")
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
 
         response_payload = {
             "ticker": "AAPL",
@@ -990,7 +1566,7 @@ class GenerateSummaryCacheRollbackTests(SummaryJobTestMixin, TestCase):
     @override_settings(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-test", OPENAI_BUCKET_ENABLED=False)
     @patch("stocks.tasks.set_cached_summary")
     @patch("stocks.tasks.openai.chat.completions.create")
-    @patch("stocks.tasks.score_news_relevance")
+    @patch("stocks.tasks.score_news_relevance_batch")
     def test_set_cached_summary_is_not_called_when_transaction_rolls_back(
         self,
         mock_score_news_relevance,
@@ -1011,7 +1587,7 @@ class GenerateSummaryCacheRollbackTests(SummaryJobTestMixin, TestCase):
         )
         news.stocks.add(stock)
 
-        mock_score_news_relevance.return_value = (10, True, "matched")
+        mock_score_news_relevance.side_effect = relevance_scores((10, True, "matched"))
 
         response_payload = {
             "ticker": "AAPL",
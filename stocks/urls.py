@@ -1,6 +1,6 @@
 # stocks/urls.py
 from django.urls import path
-from .views import FavoriteStockViewSet, StockSearchViewSet, NewsSummaryViewSet,NewsIngestView,NewsFeedView
+from .views import FavoriteStockViewSet, StockSearchViewSet, NewsSummaryViewSet,NewsIngestView,NewsIngestJobView,NewsFeedView
 from .views import xbench_test
 urlpatterns = [
     # 즐겨찾기 목록 조회 & 추가
@@ -35,6 +35,11 @@ urlpatterns = [
         name="news-summary-retrieve",
     ),
     path("news/ingest/", NewsIngestView.as_view()), 
+    path(
+        "news/ingest/<uuid:job_id>/",
+        NewsIngestJobView.as_view(),
+        name="news-ingest-job",
+    ),
     path("news/", NewsFeedView.as_view(), name="news-feed"),
     path('test-xbench/', xbench_test),
 ]
@@ -1,7 +1,13 @@
+import gc
 import hashlib
+import importlib.metadata
 import urllib.parse
 import os
+import re
+import threading
+from functools import lru_cache
 import redis
+from django.conf import settings
 
 def normalize_url(url: str) -> str:
     if not url:
@@ -29,13 +35,13 @@ def allow_request(
     refill_rate: float | None = None,
 ) -> bool:
     """Compatibility wrapper around the shared RedisTokenBucket implementation."""
-    from stocks.rate_limit import RedisTokenBucket
+    from stocks.rate_limit import get_bucket
 
     effective_rate = rate if rate is not None else refill_rate
     if effective_rate is None:
         raise ValueError("rate or refill_rate must be provided")
 
-    limiter = RedisTokenBucket(
+    limiter = get_bucket(
         key=bucket,
         capacity=capacity,
         refill_rate_per_sec=effective_rate,
@@ -58,9 +64,9 @@ def wait_for_slot(
     interval: float = 0.2,
 ) -> bool:
     """Compatibility wrapper for callers that still pass bucket settings directly."""
-    from stocks.rate_limit import RedisTokenBucket
+    from stocks.rate_limit import get_bucket
 
-    limiter = RedisTokenBucket(
+    limiter = get_bucket(
         key=bucket,
         capacity=capacity,
         refill_rate_per_sec=rate,
@@ -74,9 +80,190 @@ def wait_for_slot(
             return True
         raise RuntimeError("Redis unavailable in non-dev environment")
 
-import spacy
+SPACY_MODEL = "en_core_web_sm"
 
-nlp = spacy.load("en_core_web_sm")
+# spaCy 모델은 요약 task(NER)에서만 쓰므로 import 시점이 아니라 첫 사용 때 로드한다.
+# web worker / manage.py / migration은 spacy import와 모델 메모리를 전혀 쓰지 않는다.
+_nlp = None
+_nlp_lock = threading.Lock()
+
+
+def _reset_nlp_lock_after_fork():
+    # 다른 스레드가 로드 중에 fork되면 lock이 잠긴 채 복사되므로 자식에서 새로 만든다.
+    # 이미 로드된 모델(_nlp)은 그대로 두어 부모와 copy-on-write로 공유한다.
+    global _nlp_lock
+    _nlp_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_nlp_lock_after_fork)
+
+
+def get_nlp():
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+
+                _nlp = spacy.load(SPACY_MODEL)
+    return _nlp
+
+
+def preload_nlp():
+    """
+    Celery worker 부모 프로세스에서 fork 전에 모델을 올려 둔다 (SPACY_PRELOAD_IN_WORKER).
+    gc.freeze()로 로드된 객체를 GC 대상에서 빼서, 자식의 GC가 공유 페이지를 건드려
+    copy-on-write 복사가 일어나는 것을 줄인다.
+    """
+    model = get_nlp()
+    gc.freeze()
+    return model
+
+
+# NewsStock에 저장되는 관련도 점수의 규칙 버전.
+# RelevanceMatcher / alias / 키워드 규칙을 바꾸면 올린다 → 다른 버전으로 저장된 링크가 재계산 대상이 된다.
+# 2: 단어 경계 매칭 + 짧은 ticker는 $AAPL / "NYSE: A" 형태만 인정 (부분 문자열 오탐 제거)
+RELEVANCE_SCORER_VERSION = 2
+
+# ORG 엔티티만 쓰므로 배치 경로에서는 NER(과 NER이 listen 하는 tok2vec)만 남기고 끈다.
+NER_COMPONENT = "ner"
+
+
+def _ner_only_disabled_pipes(model) -> list[str]:
+    required = {NER_COMPONENT}
+    for name, component in model.pipeline:
+        if NER_COMPONENT in getattr(component, "listening_components", ()):
+            required.add(name)
+    return [name for name in model.pipe_names if name not in required]
+
+
+FINANCE_KEYWORDS = (
+    "earnings", "revenue", "guidance", "forecast",
+    "upgrade", "downgrade", "price target",
+    "dividend", "acquisition", "merger", "partnership",
+)
+
+
+def _word_pattern(phrase: str) -> str:
+    # \b는 "amazon.com"처럼 비단어 문자로 끝나는 이름에서 어긋나므로 영숫자 경계를 직접 쓴다.
+    return r"(?<![a-z0-9])" + re.escape(phrase) + r"(?![a-z0-9])"
+
+
+# 모든 종목이 같이 쓰는 키워드 테이블: (키워드, 단어 경계 확인용 정규식).
+# 앞쪽만 경계로 묶어 "upgrades", "forecasts"는 허용하고 "downgrade" 안의 "upgrade"는 막는다.
+# CPython re의 alternation은 C 수준 `in` 검색보다 느려서, 부분 문자열이 있을 때만 정규식으로 확인한다.
+_FINANCE_KEYWORD_MATCHERS = tuple(
+    (kw, re.compile(r"(?<![a-z0-9])" + re.escape(kw))) for kw in FINANCE_KEYWORDS
+)
+
+# 회사명 끝에 붙는 법인 접미사 (여러 개가 이어질 수 있다: "Holdings Co., Ltd.")
+_COMPANY_SUFFIX_RE = re.compile(
+    r"(?:[\s,&]+(?:inc|corporation|corp|ltd|co|plc|holdings|company|group)\.?)+[\s,&]*$"
+)
+# 보통주 클래스 표기 ("Alphabet Inc. Class A")
+_SHARE_CLASS_RE = re.compile(r"\s+(?:class|cl)\s+[a-z]\b.*$")
+# 이 길이 이하의 ticker("A", "IT")는 일반 단어와 겹치므로 $AAPL, "NYSE: A" 형태로만 인정한다.
+SHORT_SYMBOL_MAX_LEN = 2
+RELEVANCE_MATCHER_CACHE_SIZE = 4096
+
+
+def _company_aliases(company_lower: str) -> tuple[str, ...]:
+    """회사명에서 법인 접미사를 뗀 alias 목록. 회사명 자체와 같은 alias는 뺀다."""
+    aliases = []
+    alias = _COMPANY_SUFFIX_RE.sub("", _SHARE_CLASS_RE.sub("", company_lower)).strip()
+    if alias.startswith("the "):
+        alias = alias[len("the "):]
+    if alias:
+        aliases.append(alias)
+        if alias.endswith(".com"):
+            aliases.append(alias[: -len(".com")])
+    return tuple(a for a in dict.fromkeys(aliases) if a and a != company_lower)
+
+
+def _symbol_pattern(symbol: str) -> str:
+    escaped = re.escape(symbol)
+    if len(symbol) <= SHORT_SYMBOL_MAX_LEN:
+        return r"(?:\$" + escaped + r"|:\s?" + escaped + r")(?![A-Za-z0-9])"
+    return r"(?<![A-Za-z0-9])\$?" + escaped + r"(?![A-Za-z0-9])"
+
+
+class RelevanceMatcher:
+    """
+    종목 하나의 symbol / 회사명 / alias 매칭 규칙을 미리 만들어 둔 matcher.
+    headline마다 alias를 다시 가공하지 않고, 소문자 변환 한 번 + 부분 문자열 검색으로 후보를 거른 뒤
+    후보가 있을 때만 컴파일된 단어 경계 정규식으로 확인한다.
+    """
+
+    def __init__(self, symbol: str, company_name: str):
+        self.symbol = (symbol or "").strip().upper()
+        self.company = (company_name or "").lower().strip()
+        self.aliases = _company_aliases(self.company)
+
+        # symbol은 대소문자를 구분한다 (ticker는 대문자로 쓰이고, 소문자 "a"/"it"는 일반 단어).
+        self._symbol_re = re.compile(_symbol_pattern(self.symbol)) if self.symbol else None
+        self._company_re = re.compile(_word_pattern(self.company)) if self.company else None
+        self._alias_res = tuple((alias, re.compile(_word_pattern(alias))) for alias in self.aliases)
+
+    @staticmethod
+    def _matches_org(org_entities: list[str], name: str) -> bool:
+        return any(name in org or org in name for org in org_entities)
+
+    def score(self, text: str, org_entities: list[str]) -> tuple[int, bool, str]:
+        text_lower = text.lower()
+
+        score = 0
+        reasons = []
+
+        # 1) 직접 매칭
+        # `in`으로 먼저 거르고 후보가 있을 때만 정규식을 돌린다 (headline 대부분은 여기서 끝난다).
+        symbol = self.symbol
+        if symbol and symbol in text and self._symbol_re.search(text):
+            score += 3
+            reasons.append("symbol_match")
+
+        company = self.company
+        if company and company in text_lower and self._company_re.search(text_lower):
+            score += 3
+            reasons.append("company_match")
+
+        if any(alias in text_lower and pattern.search(text_lower) for alias, pattern in self._alias_res):
+            score += 3
+            reasons.append("company_alias_match")
+
+        # 2) spaCy ORG 엔티티 매칭
+        if org_entities:
+            if self.company and self._matches_org(org_entities, self.company):
+                score += 2
+                reasons.append("org_entity_match")
+
+            if any(self._matches_org(org_entities, alias) for alias in self.aliases):
+                score += 2
+                reasons.append("org_alias_match")
+
+        # 3) 기업 이벤트 키워드
+        matched_keywords = [
+            kw
+            for kw, pattern in _FINANCE_KEYWORD_MATCHERS
+            if kw in text_lower and pattern.search(text_lower)
+        ]
+        if matched_keywords:
+            score += 1
+            reasons.append(f"finance_keyword:{','.join(matched_keywords[:2])}")
+
+        is_relevant = score >= 3
+        reason = ", ".join(reasons) if reasons else "no_match"
+        return score, is_relevant, reason
+
+
+@lru_cache(maxsize=RELEVANCE_MATCHER_CACHE_SIZE)
+def get_relevance_matcher(symbol: str, company_name: str) -> RelevanceMatcher:
+    # Stock id 대신 matcher를 만드는 값 자체로 캐시해서 회사명이 바뀌면 자연히 새로 만든다.
+    return RelevanceMatcher(symbol, company_name)
+
+
+def _org_entities(doc) -> list[str]:
+    return [ent.text.lower() for ent in doc.ents if ent.label_ == "ORG"]
 
 
 def score_news_relevance(symbol: str, company_name: str, headline: str) -> tuple[int, bool, str]:
@@ -84,58 +271,75 @@ def score_news_relevance(symbol: str, company_name: str, headline: str) -> tuple
     if not text:
         return 0, False, "empty_headline"
 
-    text_lower = text.lower()
-    symbol_lower = (symbol or "").lower().strip()
-    company_lower = (company_name or "").lower().strip()
-
-    # 회사명 alias
-    company_alias = company_lower
-    for suffix in [
-        " inc.", " inc", " corporation", " corp.", " corp",
-        " ltd.", " ltd", " co.", " co", " plc", " holdings",
-    ]:
-        company_alias = company_alias.replace(suffix, "")
-    company_alias = company_alias.strip()
-
-    score = 0
-    reasons = []
-
-    # 1) 직접 매칭
-    if symbol_lower and symbol_lower in text_lower:
-        score += 3
-        reasons.append("symbol_match")
-
-    if company_lower and company_lower in text_lower:
-        score += 3
-        reasons.append("company_match")
-
-    if company_alias and company_alias != company_lower and company_alias in text_lower:
-        score += 3
-        reasons.append("company_alias_match")
-
-    # 2) spaCy ORG 엔티티 추출
-    doc = nlp(text)
-    org_entities = [ent.text.lower() for ent in doc.ents if ent.label_ == "ORG"]
-
-    if company_lower and any(company_lower in org or org in company_lower for org in org_entities):
-        score += 2
-        reasons.append("org_entity_match")
-
-    if company_alias and any(company_alias in org or org in company_alias for org in org_entities):
-        score += 2
-        reasons.append("org_alias_match")
-
-    # 3) 기업 이벤트 키워드
-    finance_keywords = [
-        "earnings", "revenue", "guidance", "forecast",
-        "upgrade", "downgrade", "price target",
-        "dividend", "acquisition", "merger", "partnership",
+    doc = get_nlp()(text)
+    return get_relevance_matcher(symbol, company_name).score(text, _org_entities(doc))
+
+
+_ner_model_version = None
+
+
+def ner_model_version() -> str:
+    """
+    News.org_entities 캐시의 버전 키. 모델 패키지 이름@버전이라 모델을 올리면 캐시가 자연히 무효화된다.
+    설치 메타데이터만 읽으므로 모델을 로드하지 않는다.
+    """
+    global _ner_model_version
+    if _ner_model_version is None:
+        try:
+            version = importlib.metadata.version(SPACY_MODEL)
+        except importlib.metadata.PackageNotFoundError:
+            version = "unknown"
+        _ner_model_version = f"{SPACY_MODEL}@{version}"
+    return _ner_model_version
+
+
+def extract_org_entities(headlines: list[str], batch_size: int | None = None) -> list[list[str]]:
+    """headline 목록의 ORG 엔티티(소문자)를 순서대로 돌려준다. nlp.pipe 한 번으로 NER만 돌린다."""
+    if batch_size is None:
+        batch_size = int(getattr(settings, "RELEVANCE_NLP_BATCH_SIZE", 64))
+
+    texts = [(headline or "").strip() for headline in headlines]
+    non_empty = [text for text in texts if text]
+    if not non_empty:
+        return [[] for _ in texts]
+
+    nlp = get_nlp()
+    docs = iter(
+        nlp.pipe(
+            non_empty,
+            batch_size=batch_size,
+            disable=_ner_only_disabled_pipes(nlp),
+        )
+    )
+    return [_org_entities(next(docs)) if text else [] for text in texts]
+
+
+def score_news_relevance_batch(
+    symbol: str,
+    company_name: str,
+    headlines: list[str],
+    batch_size: int | None = None,
+    org_entities: list | None = None,
+) -> list[tuple[int, bool, str]]:
+    """
+    score_news_relevance와 같은 결과를 headline 목록 순서대로 돌려준다.
+    nlp.pipe 한 번으로 NER만 돌리므로 headline마다 전체 파이프라인을 부르는 것보다 빠르다.
+    org_entities: headline별로 이미 아는 ORG 엔티티 (News.org_entities 캐시). None인 항목만 NER을 돌린다.
+    """
+    matcher = get_relevance_matcher(symbol, company_name)
+
+    texts = [(headline or "").strip() for headline in headlines]
+    if org_entities is None:
+        org_entities = [None] * len(texts)
+    entities = list(org_entities)
+
+    missing = [index for index, text in enumerate(texts) if text and entities[index] is None]
+    if missing:
+        extracted = extract_org_entities([texts[index] for index in missing], batch_size)
+        for index, orgs in zip(missing, extracted):
+            entities[index] = orgs
+
+    return [
+        matcher.score(text, entities[index]) if text else (0, False, "empty_headline")
+        for index, text in enumerate(texts)
     ]
-    matched_keywords = [kw for kw in finance_keywords if kw in text_lower]
-    if matched_keywords:
-        score += 1
-        reasons.append(f"finance_keyword:{','.join(matched_keywords[:2])}")
-
-    is_relevant = score >= 3
-    reason = ", ".join(reasons) if reasons else "no_match"
-    return score, is_relevant, reason
\ No newline at end of file
@@ -1,5 +1,5 @@
 from stocks.views.favorites import FavoriteStockViewSet
-from stocks.views.news import NewsFeedView, NewsIngestView, StandardPagination
+from stocks.views.news import NewsFeedView, NewsIngestJobView, NewsIngestView, StandardPagination
 from stocks.views.ops import xbench_test
 from stocks.views.search import StockCursorPagination, StockSearchViewSet
 from stocks.views.summaries import NewsSummaryViewSet
@@ -12,5 +12,6 @@ __all__ = [
     "StandardPagination",
     "NewsFeedView",
     "NewsIngestView",
+    "NewsIngestJobView",
     "xbench_test",
 ]
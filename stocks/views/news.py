@@ -1,15 +1,22 @@
+import time
+
+from django.conf import settings
 from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils.dateparse import parse_datetime
-from rest_framework import permissions
+from rest_framework import permissions, status
 from rest_framework.generics import ListAPIView
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from stocks.models import FavoriteStock, News, Stock
+from stocks.models import FavoriteStock, IngestJob, News, Stock
 from stocks.serializers import NewsSerializer
-from stocks.services import upsert_news_for_symbol
+from stocks.tasks import ingest_news_for_symbol
+
+INGEST_WAIT_POLL_INTERVAL = 0.2
 
 
 class StandardPagination(PageNumberPagination):
@@ -66,14 +73,96 @@ class NewsFeedView(ListAPIView):
         return qs.distinct()
 
 
+def build_ingest_job_payload(job):
+    return {
+        "job_id": str(job.id),
+        "symbol": job.symbol,
+        "days": job.days,
+        "status": job.status,
+        "stage": job.stage,
+        "result": job.result,
+        "error": job.error_message or None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "status_url": reverse("news-ingest-job", kwargs={"job_id": job.id}),
+    }
+
+
+def _wait_for_ingest_job(job, wait_seconds: float):
+    """job이 끝나거나 wait_seconds가 지날 때까지 DB를 폴링한다."""
+    deadline = time.monotonic() + wait_seconds
+    finished = (IngestJob.Status.SUCCESS, IngestJob.Status.FAILED)
+    while job.status not in finished and time.monotonic() < deadline:
+        time.sleep(INGEST_WAIT_POLL_INTERVAL)
+        job.refresh_from_db()
+    return job
+
+
 class NewsIngestView(APIView):
+    """
+    POST /api/stocks/news/ingest/
+    - body: symbol, days, wait(선택, 초)
+    - IngestJob을 만들고 Celery task로 넘긴 뒤 202 + job id를 바로 돌려준다.
+    - wait를 주면 최대 NEWS_INGEST_MAX_WAIT_SECONDS까지 기다렸다가 끝났으면 200으로 결과를 돌려준다.
+    """
+
     permission_classes = [permissions.IsAuthenticated]  # 원하면 AllowAny로 바꿔도 됨
 
     def post(self, request):
         symbol = request.data.get("symbol", "AAPL").upper()
+        # null/list/dict는 TypeError라 ValueError와 함께 기본값으로 돌린다.
         try:
             days = int(request.data.get("days", 1))
-        except ValueError:
+        except (TypeError, ValueError):
             days = 1
-        res = upsert_news_for_symbol(symbol, days=days)
-        return Response({"symbol": symbol, "days": days, **res})
+        if days < 1:
+            return Response(
+                {"detail": "days must be a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            wait_seconds = float(
+                request.data.get("wait", request.query_params.get("wait", 0))
+            )
+        except (TypeError, ValueError):
+            wait_seconds = 0.0
+        wait_seconds = max(
+            0.0,
+            min(wait_seconds, getattr(settings, "NEWS_INGEST_MAX_WAIT_SECONDS", 10)),
+        )
+
+        if not Stock.objects.filter(symbol=symbol).exists():
+            return Response(
+                {"detail": f"Unknown symbol: {symbol}"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        job = IngestJob.objects.create(
+            requested_by=request.user,
+            symbol=symbol,
+            days=days,
+        )
+        ingest_news_for_symbol.delay(str(job.id))
+
+        if wait_seconds > 0:
+            job = _wait_for_ingest_job(job, wait_seconds)
+            if job.status in (IngestJob.Status.SUCCESS, IngestJob.Status.FAILED):
+                return Response(build_ingest_job_payload(job), status=status.HTTP_200_OK)
+
+        payload = build_ingest_job_payload(job)
+        return Response(
+            payload,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": payload["status_url"]},
+        )
+
+
+class NewsIngestJobView(APIView):
+    """GET /api/stocks/news/ingest/{job_id}/ : 내가 요청한 수집 job의 진행 상황/결과 조회"""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(IngestJob, id=job_id, requested_by=request.user)
+        return Response(build_ingest_job_payload(job))